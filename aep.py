@@ -0,0 +1,318 @@
+# aep.py
+"""Estimacion Monte Carlo de la produccion anual de energia (AEP) de un parque.
+
+Cada simulacion es un anio con la logica de control real de ParqueVectorizado (corte a 25 m/s con
+rearme de 10 ticks, limites de temperatura del checklist, curvas de curvas.py) sobre un clima sorteado
+(Weibull con variabilidad entre anios y persistencia, turbulencia por turbina, estelas de CampoViento)
+y fallas criticas con tasa y tiempo de reparacion por tipo de AG.
+Las simulaciones son independientes: cada tarea del pool de procesos apila un lote como filas de un
+solo ParqueVectorizado y devuelve energia y disponibilidad de cada una; los lotes se entregan a medida
+que terminan. Cada simulacion sortea con su propia semilla (SeedSequence.spawn), asi que el resultado
+no depende del tamano de lote ni de la cantidad de procesos.
+El tick por defecto es de 10 minutos (resolucion habitual de los datos de clima): el rearme por viento
+de corte dura 10 ticks, como en el ciclo de control.
+
+Uso:
+    python aep.py --baja 10 --alta 6 --simulaciones 2000
+    python aep.py --disposicion layout.csv --simulaciones 500 --salida aep.json
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from aerogenerador import AG_AltaPotencia, AG_BajaPotencia
+from campo_viento import CampoViento
+from kpis import ESTADOS_DISPONIBLES
+from parque_vectorizado import CODIGOS_ESTADO, PAUSADO, STOP_CRITICO, ParqueVectorizado
+
+ANIO = 365 * 24 * 3600 # segundos
+CLASES = {"BAJA": AG_BajaPotencia, "ALTA": AG_AltaPotencia}
+TICKS_POR_BLOQUE = 144 # Los sorteos de cada simulacion se hacen de a bloques (un dia con dt = 600 s)
+
+
+class Clima(NamedTuple):
+    """Clima de viento y temperatura de gondola del que se sortea cada anio."""
+    weibull_k: float = 2.0
+    weibull_c: float = 8.5               # m/s, escala de un anio tipico
+    variabilidad_anual: float = 0.06     # Desvio relativo de la escala entre anios
+    tau_clima: float = 6 * 3600.0        # Persistencia del viento medio (s)
+    intensidad_turbulencia: float = 0.10 # Por turbina y tick (a 10 minutos la turbulencia no tiene memoria)
+    direccion: float = 270.0             # Direccion dominante, para las estelas
+    temp_media: float = 55.0             # C
+    temp_estacional: float = 10.0        # Amplitud del ciclo anual
+    temp_desvio: float = 6.0
+
+
+class Fallas(NamedTuple):
+    """Fallas criticas por tipo de AG: tasa anual y reparacion media (duracion exponencial)."""
+    por_anio: Dict[str, float] = {"BAJA": 1.5, "ALTA": 2.0}
+    horas_reparacion: Dict[str, float] = {"BAJA": 48.0, "ALTA": 72.0}
+
+
+class Disposicion(NamedTuple):
+    """Layout candidato: tipo ("BAJA" / "ALTA") y posicion (m) de cada AG."""
+    tipos: Tuple[str, ...]
+    posiciones: Tuple[Tuple[float, float], ...]
+
+    @classmethod
+    def grilla(cls, tipos: Sequence[str]) -> 'Disposicion':
+        """Los AG en el orden dado sobre la grilla por defecto de CampoViento."""
+        return cls(tuple(tipos), tuple(CampoViento.posicion_grilla(i) for i in range(len(tipos))))
+
+    @classmethod
+    def desde_csv(cls, ruta: str) -> 'Disposicion':
+        """Lee un CSV 'tipo,x,y' (con o sin encabezado)."""
+        tipos, posiciones = [], []
+        with open(ruta, newline="") as f:
+            for fila in csv.reader(f):
+                try:
+                    tipo, x, y = fila[0].strip().upper(), float(fila[1]), float(fila[2])
+                except (ValueError, IndexError):
+                    continue # encabezado o linea vacia
+                tipos.append(tipo)
+                posiciones.append((x, y))
+        return cls(tuple(tipos), tuple(posiciones))
+
+    def validar(self) -> None:
+        if not self.tipos:
+            raise ValueError("La disposicion no tiene aerogeneradores.")
+        if len(self.tipos) != len(self.posiciones):
+            raise ValueError("La disposicion necesita una posicion por aerogenerador.")
+        desconocidos = set(self.tipos) - set(CLASES)
+        if desconocidos:
+            raise ValueError(f"Tipos de AG desconocidos: {sorted(desconocidos)}")
+
+
+def simular_lote(disposicion: Disposicion, clima: Clima, fallas: Fallas,
+                 semillas: Sequence[Tuple[int, np.random.SeedSequence]], dt: float) -> List[dict]:
+    """Simula un anio por cada (indice, semilla). Funcion de modulo para el pool de procesos.
+    Fila s * T + j del parque = AG j de la simulacion s.
+    """
+    T, S = len(disposicion.tipos), len(semillas)
+    filas = S * T
+    ticks = round(ANIO / dt)
+
+    # Parque sin vistas: tipos y limites del checklist salen de las clases de AG reales
+    parque = ParqueVectorizado()
+    parque.restablecer(filas)
+    modelos = {tipo: CLASES[tipo](0) for tipo in set(disposicion.tipos)}
+    indice_curva = {tipo: parque._registrar_curva(ag.curva) for tipo, ag in modelos.items()}
+    def por_fila(valores: Sequence[float], dtype=float) -> np.ndarray:
+        return np.tile(np.asarray(valores, dtype=dtype), S)
+    parque.id_a[:filas] = np.arange(filas)
+    parque.tipo[:filas] = por_fila([indice_curva[t] for t in disposicion.tipos], np.int16)
+    parque.max_temp[:filas] = por_fila([modelos[t].MAX_TEMP for t in disposicion.tipos])
+    parque.estado[:filas] = PAUSADO # En marcha desde el primer tick
+    nominal_kw = sum(modelos[t].curva.POTENCIA_NOMINAL for t in disposicion.tipos)
+
+    campo = CampoViento(direccion=clima.direccion)
+    campo.agregar_turbinas(*zip(*disposicion.posiciones))
+    estela = por_fila(campo.factores_estela())
+    ticks_entre_fallas = por_fila([ANIO / dt / fallas.por_anio[t] if fallas.por_anio.get(t, 0) > 0 else np.inf
+                                   for t in disposicion.tipos])
+    ticks_reparacion = por_fila([fallas.horas_reparacion.get(t, 0.0) * 3600 / dt for t in disposicion.tipos])
+
+    rngs = [np.random.default_rng(semilla) for _, semilla in semillas]
+    def exponenciales(filas_sorteo: np.ndarray) -> np.ndarray:
+        """Exp(1) por fila, cada una del generador de su simulacion (en orden de fila)."""
+        sorteo = np.empty(len(filas_sorteo))
+        simulacion = filas_sorteo // T
+        for s in np.unique(simulacion):
+            m = simulacion == s
+            sorteo[m] = rngs[s].standard_exponential(int(m.sum()))
+        return sorteo
+    def proximo(filas_sorteo: np.ndarray, desde: np.ndarray, media: np.ndarray) -> np.ndarray:
+        """Tick de un evento exponencial de media 'media' ticks (nunca si la media es infinita)."""
+        ticks_hasta = np.ceil(exponenciales(filas_sorteo) * media[filas_sorteo])
+        return np.where(np.isfinite(ticks_hasta), desde + np.maximum(1, ticks_hasta), -1).astype(np.int64)
+
+    # Viento medio de cada simulacion: escala del anio * E^(1/k), con E = (x1^2 + x2^2) / 2 ~ Exp(1)
+    # y x1, x2 normales AR(1): marginal Weibull(k, c) exacta y persistencia tau_clima
+    escala = np.array([clima.weibull_c * max(0.1, 1 + clima.variabilidad_anual * rng.standard_normal())
+                       for rng in rngs])
+    latente = np.array([rng.standard_normal(2) for rng in rngs])
+    phi = math.exp(-dt / clima.tau_clima)
+    raiz = math.sqrt(1 - phi * phi)
+    fase = 2 * math.pi * dt / ANIO
+
+    disponibles = np.zeros(len(CODIGOS_ESTADO), dtype=np.int64)
+    disponibles[[CODIGOS_ESTADO[e] for e in ESTADOS_DISPONIBLES]] = 1
+    energia = np.zeros(filas)                   # kW * tick
+    ticks_disponible = np.zeros(filas, dtype=np.int64)
+    # Fallas como proceso de Poisson mientras el AG no esta en reparacion: se sortea el tick de la
+    # proxima al arrancar y al terminar cada reparacion (sorteos solo en los eventos)
+    todas = np.arange(filas)
+    proxima_falla = proximo(todas, np.zeros(filas, dtype=np.int64) - 1, ticks_entre_fallas)
+    fin_reparacion = np.full(filas, -1, dtype=np.int64)
+    cantidad_fallas = np.zeros(filas, dtype=np.int64)
+    viento_medio = np.zeros(S)
+
+    for inicio in range(0, ticks, TICKS_POR_BLOQUE):
+        b = min(TICKS_POR_BLOQUE, ticks - inicio)
+        ruido_clima = np.empty((b, S, 2))
+        turbulencia = np.empty((b, S, T), dtype=np.float32) # Ruido por AG en float32: la mitad de costo
+        ruido_temp = np.empty((b, S, T), dtype=np.float32)
+        for s, rng in enumerate(rngs):
+            ruido_clima[:, s] = rng.standard_normal((b, 2))
+            turbulencia[:, s] = rng.standard_normal((b, T), dtype=np.float32)
+            ruido_temp[:, s] = rng.standard_normal((b, T), dtype=np.float32)
+        turbulencia = turbulencia.reshape(b, filas)
+        ruido_temp = ruido_temp.reshape(b, filas)
+
+        for k in range(b):
+            t = inicio + k
+            latente = phi * latente + raiz * ruido_clima[k]
+            medio = escala * (0.5 * (latente * latente).sum(axis=1)) ** (1 / clima.weibull_k)
+            viento_medio += medio
+            v = np.repeat(medio, T) * (1 + clima.intensidad_turbulencia * turbulencia[k]) * estela
+            np.maximum(v, 0.0, out=v)
+            temp = clima.temp_media + clima.temp_estacional * math.sin(fase * t) + clima.temp_desvio * ruido_temp[k]
+
+            # Entre ticks, como los comandos del controlador: fin de reparaciones (realizar_mantenimiento)
+            reparadas = np.flatnonzero(fin_reparacion == t)
+            if len(reparadas):
+                fin_reparacion[reparadas] = -1
+                proxima_falla[reparadas] = proximo(reparadas, t, ticks_entre_fallas)
+                parque.bloqueo_critico[reparadas] = False
+                parque.bloqueo_manual[reparadas] = False
+                parque.timer_rearme[reparadas] = 0
+                parque.estado[reparadas] = PAUSADO
+            # ... y fallas nuevas (registrar_falla_externa)
+            nuevas = np.flatnonzero(proxima_falla == t)
+            if len(nuevas):
+                proxima_falla[nuevas] = -1
+                fin_reparacion[nuevas] = proximo(nuevas, t, ticks_reparacion)
+                cantidad_fallas[nuevas] += 1
+                parque.bloqueo_critico[nuevas] = True
+                parque.estado[nuevas] = STOP_CRITICO
+
+            parque.avanzar(v, temp)
+            energia += parque.potencia[:filas]
+            ticks_disponible += disponibles[parque.estado[:filas]]
+
+    energia_kwh = energia.reshape(S, T).sum(axis=1) * dt / 3600
+    disponibilidad = ticks_disponible.reshape(S, T).sum(axis=1) / (T * ticks)
+    nominal_kwh = nominal_kw * ticks * dt / 3600
+    return [{"simulacion": indice, "energia_mwh": float(energia_kwh[s]) / 1000,
+             "disponibilidad": float(disponibilidad[s]), "factor_capacidad": float(energia_kwh[s]) / nominal_kwh,
+             "viento_medio": float(viento_medio[s]) / ticks,
+             "fallas": int(cantidad_fallas.reshape(S, T)[s].sum())}
+            for s, (indice, _) in enumerate(semillas)]
+
+
+def resumir(resultados: Sequence[dict]) -> Dict[str, float]:
+    """Distribucion de energia y disponibilidad. Pxx = valor superado con xx% de probabilidad."""
+    energia = np.array([r["energia_mwh"] for r in resultados])
+    disponibilidad = np.array([r["disponibilidad"] for r in resultados])
+    factor = np.array([r["factor_capacidad"] for r in resultados])
+    resumen = {"simulaciones": len(resultados)}
+    if not resultados:
+        return resumen
+    resumen.update({"energia_media_mwh": float(energia.mean()), "energia_desvio_mwh": float(energia.std()),
+                    "disponibilidad_media": float(disponibilidad.mean()),
+                    "factor_capacidad_medio": float(factor.mean())})
+    for p in (50, 90, 99):
+        resumen[f"energia_p{p}_mwh"] = float(np.percentile(energia, 100 - p))
+        resumen[f"disponibilidad_p{p}"] = float(np.percentile(disponibilidad, 100 - p))
+    return resumen
+
+
+class EstimadorAEP:
+    """Corre simulaciones anuales de una disposicion en un pool de procesos (uno por nucleo)."""
+    FILAS_POR_LOTE = 4096 # Filas de ParqueVectorizado por tarea: lotes grandes amortizan el costo por tick
+
+    def __init__(self, disposicion: Disposicion, clima: Clima = Clima(), fallas: Fallas = Fallas(),
+                 dt: float = 600.0, procesos: Optional[int] = None):
+        disposicion.validar()
+        self.disposicion = disposicion
+        self.clima = clima
+        self.fallas = fallas
+        self.dt = dt
+        self.procesos = procesos or os.cpu_count() or 1
+
+    def lotes(self, simulaciones: int, semilla: Optional[int] = None,
+              por_lote: Optional[int] = None) -> List[List[Tuple[int, np.random.SeedSequence]]]:
+        """Reparte las simulaciones en lotes; al menos 4 por proceso para balancear y entregar parciales."""
+        semillas = list(enumerate(np.random.SeedSequence(semilla).spawn(simulaciones)))
+        if por_lote is None:
+            por_lote = min(max(1, self.FILAS_POR_LOTE // len(self.disposicion.tipos)),
+                           max(1, math.ceil(simulaciones / (4 * self.procesos))))
+        return [semillas[i:i + por_lote] for i in range(0, simulaciones, por_lote)]
+
+    def iterar(self, simulaciones: int, semilla: Optional[int] = None,
+               por_lote: Optional[int] = None) -> Iterator[List[dict]]:
+        """Resultados de cada lote en el orden en que terminan."""
+        lotes = self.lotes(simulaciones, semilla, por_lote)
+        argumentos = (self.disposicion, self.clima, self.fallas)
+        if self.procesos == 1:
+            for lote in lotes:
+                yield simular_lote(*argumentos, lote, self.dt)
+            return
+        pool = ProcessPoolExecutor(max_workers=min(self.procesos, len(lotes)))
+        try:
+            futuros = [pool.submit(simular_lote, *argumentos, lote, self.dt) for lote in lotes]
+            for futuro in as_completed(futuros):
+                yield futuro.result()
+        finally: # Si se deja de iterar, no se esperan los lotes pendientes
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def ejecutar(self, simulaciones: int, semilla: Optional[int] = None, por_lote: Optional[int] = None,
+                 al_avanzar: Optional[Callable[[List[dict], Dict[str, float]], None]] = None
+                 ) -> Tuple[List[dict], Dict[str, float]]:
+        """Todas las simulaciones (ordenadas por indice) y su resumen. 'al_avanzar' recibe cada lote
+        terminado y el resumen parcial."""
+        resultados: List[dict] = []
+        for lote in self.iterar(simulaciones, semilla, por_lote):
+            resultados.extend(lote)
+            if al_avanzar is not None:
+                al_avanzar(lote, resumir(resultados))
+        resultados.sort(key=lambda r: r["simulacion"])
+        return resultados, resumir(resultados)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Estimacion Monte Carlo de la produccion anual (AEP).")
+    parser.add_argument("--baja", type=int, default=0, help="AG de baja potencia (en grilla).")
+    parser.add_argument("--alta", type=int, default=0, help="AG de alta potencia (en grilla, despues de los BAJA).")
+    parser.add_argument("--disposicion", help="CSV 'tipo,x,y' con la disposicion (reemplaza --baja/--alta).")
+    parser.add_argument("--simulaciones", type=int, default=1000, help="Anios simulados.")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, uno por nucleo).")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla para resultados reproducibles.")
+    parser.add_argument("--dt", type=float, default=600.0, help="Segundos simulados por tick.")
+    parser.add_argument("--por-lote", type=int, default=None, help="Simulaciones por tarea del pool.")
+    parser.add_argument("--weibull-k", type=float, default=Clima().weibull_k)
+    parser.add_argument("--weibull-c", type=float, default=Clima().weibull_c)
+    parser.add_argument("--variabilidad-anual", type=float, default=Clima().variabilidad_anual)
+    parser.add_argument("--salida", help="Archivo JSON con el resumen y cada simulacion.")
+    args = parser.parse_args(argv)
+
+    if args.disposicion:
+        disposicion = Disposicion.desde_csv(args.disposicion)
+    else:
+        disposicion = Disposicion.grilla(["BAJA"] * args.baja + ["ALTA"] * args.alta)
+    clima = Clima(weibull_k=args.weibull_k, weibull_c=args.weibull_c, variabilidad_anual=args.variabilidad_anual)
+    try:
+        estimador = EstimadorAEP(disposicion, clima, dt=args.dt, procesos=args.procesos)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def progreso(lote: List[dict], resumen: Dict[str, float]) -> None:
+        print(f"{resumen['simulaciones']}/{args.simulaciones} simulaciones: "
+              f"P50 {resumen['energia_p50_mwh']:.0f} MWh, P90 {resumen['energia_p90_mwh']:.0f} MWh, "
+              f"disponibilidad {resumen['disponibilidad_media']:.3f}", file=sys.stderr)
+
+    resultados, resumen = estimador.ejecutar(args.simulaciones, args.semilla, args.por_lote, progreso)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump({"resumen": resumen, "simulaciones": resultados}, f, indent=1)
+    print(json.dumps(resumen, indent=1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
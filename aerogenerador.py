@@ -1,16 +1,18 @@
 #aerogenerador.py
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Dict
 from componentes import ParteAerogenerador
 from sensores import SensorVelocidadViento, SensorTemperatura
 from curvas import CurvaPotencia, CurvaPotenciaBaja, CurvaPotenciaAlta
 from viento import VientoFactory
 from validaciones import PreFlightChecklist
 from alarmas import AlarmManager
+from historial import HistorialMultiResolucion
 
 class AerogeneradorBase:
     ESTADOS = ["mantenimiento", "generando", "pausado", "stop", "stop_critico", "espera_viento"]
+    LARGO_HISTORIAL = 50 # Muestras crudas; los niveles agregados cubren dias
     
-    def __init__(self, id_a: int, curva_potencia: CurvaPotencia):
+    def __init__(self, id_a: int, curva_potencia: CurvaPotencia, dt: float = 1.0):
         self.id_a = id_a
         self._estado: str = "pausado" #Encapsulamiento, uso de atributos protegidos
         self.curva = curva_potencia
@@ -20,13 +22,22 @@ class AerogeneradorBase:
         self._bloqueo_manual: bool = False #Encapsulamiento, Se evita que agentes externos modifiquen el estado directamente  
         self._bloqueo_critico: bool = False #Encapsulamiento, Se obliga a usar mtodos pblicos 
         self._timer_rearme: int = 0         
-        self.historial_potencia: List[float] = [0.0]*50 
+        self.planificador: Optional[Any] = None # PlanificadorEventos del controlador (opcional)
+        self.bitacora: Optional[Any] = None # Bitacora del controlador: registra comandos y fallas (opcional)
+        self.metricas: Optional[Any] = None # MetricasSimulacion del controlador (opcional)
+        self.historial_potencia = HistorialMultiResolucion(self.LARGO_HISTORIAL, dt) # dt: segundos por tick
         
         # Composicion
         self.buje = ParteAerogenerador("Buje")
         self.gondola = ParteAerogenerador("Gondola")
         self.torre = ParteAerogenerador("Torre")
         self.partes = [self.buje, self.gondola, self.torre] #Composicin
+
+        # Contadores de fallas mantenidos por eventos (consultas O(1))
+        self._fallas_por_nivel: Dict[str, int] = {}
+        self.observador: Optional[Any] = None # RegistroFallasParque del controlador
+        for p in self.partes:
+            p.al_cambiar_fallas = self._actualizar_conteo_fallas
         
         # Sensores
         self.buje.agregar_sensor("viento", SensorVelocidadViento("Buje"))
@@ -40,12 +51,37 @@ class AerogeneradorBase:
         return self._bloqueo_critico
 
     def get_timer_rearme(self) -> int:
+        if self.planificador is not None:
+            self.planificador.sincronizar(self)
         return self._timer_rearme
 
+    @property
+    def historial_potencia(self) -> HistorialMultiResolucion:
+        if self.planificador is not None: # Completa los ticks en que la turbina no se evaluo
+            self.planificador.sincronizar(self)
+        return self._historial_potencia
+
+    @historial_potencia.setter
+    def historial_potencia(self, historial: HistorialMultiResolucion) -> None:
+        self._historial_potencia = historial
+
+    def contar_fallas(self, nivel: Optional[str] = None, componente: Optional[str] = None) -> int:
+        """Fallas activas por nivel y/o componente, sin recorrer las listas."""
+        if componente is not None:
+            return self._buscar_parte(componente).contar_fallas(nivel)
+        if nivel is None:
+            return sum(self._fallas_por_nivel.values())
+        return self._fallas_por_nivel.get(nivel, 0)
+
+    def tiene_fallas_criticas(self) -> bool:
+        return self._fallas_por_nivel.get("Critica", 0) > 0
+
     # --- ENCAPSULAMIENTO: Metodos Publicos de Control (NO USAR _set_estado FUERA) ---
     
     def solicitar_marcha(self) -> str: #Defensibilidad
         """Intenta poner en marcha el aero. Retorna mensaje de exito/error."""
+        self._registrar_comando("marcha")
+        self._avisar_planificador()
         if self._bloqueo_critico:
             return "Error: Bloqueo Critico Activo. Revise Status."
         
@@ -55,30 +91,98 @@ class AerogeneradorBase:
 
     def forzar_parada_manual(self) -> None:
         """Usuario presiona boton PARAR."""
+        self._registrar_comando("parada")
+        self._avisar_planificador()
         self._bloqueo_manual = True
         self._cambiar_estado_interno("stop")
 
-    def registrar_falla_externa(self, falla: Any) -> None:
+    def registrar_falla_externa(self, falla: Any, componente: Optional[str] = None) -> None:
         """Metodo para inyectar fallas de forma controlada."""
         # Buscamos la parte correspondiente o default a Buje
-        self.buje.fallas_activas.append(falla) # Simplificacion
+        parte = self._buscar_parte(componente)
+        self._registrar_comando("falla", falla=falla, componente=componente)
+        self._avisar_planificador()
+        falla.id_ag = self.id_a
+        falla.bloqueante = True # Mientras siga activa, reparar otras fallas no levanta el bloqueo
+        parte.registrar_falla(falla)
         AlarmManager.registrar_alarma(falla)
-        self._bloqueo_critico = True
+        self._fijar_bloqueo_critico(True)
         self._cambiar_estado_interno("stop_critico")
 
+    def registrar_advertencia(self, falla: Any, componente: Optional[str] = None) -> None:
+        """Registra una falla sin detener el aero (aviso temprano; la limpia el mantenimiento)."""
+        parte = self._buscar_parte(componente)
+        self._registrar_comando("advertencia", falla=falla, componente=componente)
+        falla.id_ag = self.id_a
+        parte.registrar_falla(falla)
+        AlarmManager.registrar_alarma(falla)
+
+    def reparar_falla(self, falla: Any, componente: Optional[str] = None) -> bool:
+        """Quita una falla puntual. El bloqueo critico se levanta solo si no quedan fallas criticas ni otras
+        fallas que lo hayan puesto (p. ej. una falla electrica inyectada por el operador); la parada manual
+        y las demas fallas no cambian. False si la falla ya no estaba activa."""
+        parte = self._buscar_parte(componente)
+        if not any(f is falla for f in parte.fallas_activas):
+            return False
+        self._registrar_comando("reparacion", falla=falla, componente=componente)
+        self._avisar_planificador()
+        parte.quitar_falla(falla)
+        if self._bloqueo_critico and not self._hay_fallas_bloqueantes():
+            self._fijar_bloqueo_critico(False)
+            self._cambiar_estado_interno("stop" if self._bloqueo_manual else "pausado")
+        return True
+
     def realizar_mantenimiento(self) -> None:
         """Limpia fallas y desbloquea."""
-        self._bloqueo_critico = False
+        self._registrar_comando("mantenimiento")
+        self._avisar_planificador()
+        self._fijar_bloqueo_critico(False)
         self._bloqueo_manual = False
         self._timer_rearme = 0
         for p in self.partes:
-            p.fallas_activas = []
+            p.limpiar_fallas()
         self._cambiar_estado_interno("pausado")
 
     # --- Metodos Privados ---
     def _cambiar_estado_interno(self, nuevo: str) -> None:
         if nuevo in self.ESTADOS and nuevo != self._estado:
             self._estado = nuevo
+            if self.metricas is not None:
+                self.metricas.transicion(nuevo)
+
+    def _buscar_parte(self, componente: Optional[str]) -> ParteAerogenerador:
+        if componente is None:
+            return self.buje # Simplificacion: default a Buje
+        for p in self.partes:
+            if p.nombre.lower() == componente.lower():
+                return p
+        raise ValueError(f"Componente desconocido: {componente}")
+
+    def _hay_fallas_bloqueantes(self) -> bool:
+        """Fallas activas que sostienen el bloqueo critico (solo se recorre al reparar)."""
+        return self.tiene_fallas_criticas() or any(f.bloqueante for p in self.partes for f in p.fallas_activas)
+
+    def _fijar_bloqueo_critico(self, valor: bool) -> None:
+        if valor != self._bloqueo_critico:
+            self._bloqueo_critico = valor
+            if self.observador is not None:
+                self.observador.bloqueo_critico_cambiado(self, valor)
+
+    def _registrar_comando(self, accion: str, **datos: Any) -> None:
+        """Deja constancia del comando en la bitacora (si hay una) antes de aplicarlo."""
+        if self.bitacora is not None:
+            self.bitacora.comando(self, accion, **datos)
+
+    def _avisar_planificador(self) -> None:
+        """Los comandos y las fallas vuelven a poner la turbina en evaluacion (antes de modificarla)."""
+        if self.planificador is not None:
+            self.planificador.despertar(self)
+
+    def _actualizar_conteo_fallas(self, parte: ParteAerogenerador, nivel: str, delta: int) -> None:
+        self._avisar_planificador()
+        self._fallas_por_nivel[nivel] = self._fallas_por_nivel.get(nivel, 0) + delta
+        if self.observador is not None:
+            self.observador.fallas_cambiadas(self, nivel, delta)
             
     def obtener_viento(self) -> float: 
         return self.buje.obtener_lectura("viento")
@@ -91,9 +195,17 @@ class AerogeneradorBase:
 
     def ejecutar_ciclo_control(self) -> None:
         """Logica principal del automata."""
+        m = self.metricas
+        if m is None:
+            self._ciclo_control(None)
+        else: # Tiempo por fase (sin metricas, cada marca de fase es solo un 'is None')
+            m.fases.entrar("bloqueos")
+            self._ciclo_control(m)
+            m.fases.terminar()
+
+    def _ciclo_control(self, m: Optional[Any]) -> None:
         # Historial
-        self.historial_potencia.pop(0)
-        self.historial_potencia.append(self.potencia_actual)
+        self.historial_potencia.agregar(self.potencia_actual)
 
         # 1. Bloqueos
         if self._bloqueo_critico:
@@ -107,13 +219,15 @@ class AerogeneradorBase:
             return
         
         # 2. Autodiagnostico
+        if m is not None: m.fases.entrar("autodiagnostico")
         if AlarmManager.hay_criticas_activas(self):
-            self._bloqueo_critico = True
+            self._fijar_bloqueo_critico(True)
             self._cambiar_estado_interno("stop_critico")
             self.potencia_actual = 0
             return
 
         # 3. Timer Viento
+        if m is not None: m.fases.entrar("timer")
         if self._timer_rearme > 0:
             self._timer_rearme -= 1
             self._cambiar_estado_interno("espera_viento")
@@ -121,9 +235,11 @@ class AerogeneradorBase:
             return
 
         # 4. Logica Operativa
+        if m is not None: m.fases.entrar("viento")
         v = self.obtener_viento()
         
         if v >= 25:
+            if m is not None: m.rearmes.inc()
             self._timer_rearme = 10
             self._cambiar_estado_interno("espera_viento")
             self.potencia_actual = 0
@@ -133,12 +249,14 @@ class AerogeneradorBase:
         estado_deseado = condicion.aplicar_efecto(self)
 
         if estado_deseado == "generando":
+            if m is not None: m.fases.entrar("checklist")
             ok, _ = PreFlightChecklist.validar(self)
             if not ok:
                 self._cambiar_estado_interno("pausado")
                 self.potencia_actual = 0
                 return
             
+            if m is not None: m.fases.entrar("curva")
             self.potencia_actual = self.curva.calcular_potencia(v)
         else:
             self.potencia_actual = 0
@@ -146,11 +264,11 @@ class AerogeneradorBase:
         self._cambiar_estado_interno(estado_deseado)
 
 class AG_BajaPotencia(AerogeneradorBase): #Extensibilidad
-    def __init__(self, id_a: int):
-        super().__init__(id_a, CurvaPotenciaBaja())
+    def __init__(self, id_a: int, dt: float = 1.0):
+        super().__init__(id_a, CurvaPotenciaBaja(), dt)
         self.MAX_TEMP = 80 
 
 class AG_AltaPotencia(AerogeneradorBase): #Extensibilidad
-    def __init__(self, id_a: int):
-        super().__init__(id_a, CurvaPotenciaAlta())
+    def __init__(self, id_a: int, dt: float = 1.0):
+        super().__init__(id_a, CurvaPotenciaAlta(), dt)
         self.MAX_TEMP = 95
\ No newline at end of file
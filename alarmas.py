@@ -1,22 +1,317 @@
 # alarmas.py
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
 import time
-from typing import List, Any # Para type hinting
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, TextIO # Para type hinting
+
+_log = logging.getLogger(__name__) # Problemas del propio AlarmManager (sinks rotos, alarmas descartadas)
+
+
+class EntradaAlarma:
+    """Una alarma registrada (inmutable por convencion)."""
+    __slots__ = ("t", "id_ag", "nivel", "mensaje")
+
+    def __init__(self, t: float, id_ag: Optional[int], nivel: str, mensaje: str):
+        self.t = t
+        self.id_ag = id_ag
+        self.nivel = nivel
+        self.mensaje = mensaje
+
+    def __str__(self):
+        t_str = time.strftime('%H:%M:%S', time.localtime(self.t))
+        return f"[{t_str}] ALARMA SYSTEM -> {self.mensaje}"
+
+
+class _Indice:
+    """Lista ordenada por tiempo con desalojo por el frente (O(1) amortizado) y busqueda binaria.
+    Las alarmas no siempre llegan en orden de tiempo (tiempo simulado vs. reloj del operador):
+    las atrasadas se insertan en su posicion."""
+    def __init__(self):
+        self._entradas: List[EntradaAlarma] = []
+        self._tiempos: List[float] = []
+        self._inicio = 0
+
+    def agregar(self, entrada: EntradaAlarma) -> None:
+        if not self._tiempos or entrada.t >= self._tiempos[-1]:
+            self._entradas.append(entrada)
+            self._tiempos.append(entrada.t)
+            return
+        i = bisect_right(self._tiempos, entrada.t, self._inicio)
+        self._entradas.insert(i, entrada)
+        self._tiempos.insert(i, entrada.t)
+
+    def desalojar(self, entrada: EntradaAlarma) -> None:
+        """Quita 'entrada' (la mas antigua por llegada); si es la primera por tiempo, la lista
+        se compacta de a bloques."""
+        if self._entradas[self._inicio] is not entrada:
+            i = bisect_left(self._tiempos, entrada.t, self._inicio)
+            while self._entradas[i] is not entrada:
+                i += 1
+            del self._entradas[i]
+            del self._tiempos[i]
+            return
+        self._inicio += 1
+        if self._inicio > 1024 and self._inicio * 2 > len(self._entradas):
+            del self._entradas[:self._inicio]
+            del self._tiempos[:self._inicio]
+            self._inicio = 0
+
+    def rango(self, desde: float, hasta: float) -> List[EntradaAlarma]:
+        a = bisect_left(self._tiempos, desde, self._inicio)
+        b = bisect_right(self._tiempos, hasta, a)
+        return self._entradas[a:b]
+
+    def __len__(self) -> int:
+        return len(self._entradas) - self._inicio
+
+
+# --- Sinks: reciben lotes de alarmas desde el hilo escritor ---
+Sink = Callable[[List[EntradaAlarma]], None]
+
+
+class SinkConsola:
+    """Imprime cada alarma (por defecto en stdout, como el print original)."""
+    def __init__(self, flujo: Optional[TextIO] = None):
+        self.flujo = flujo
+
+    def __call__(self, lote: List[EntradaAlarma]) -> None:
+        flujo = self.flujo or sys.stdout
+        flujo.write("".join(f"{e}\n" for e in lote))
+        flujo.flush()
+
+
+class SinkArchivoRotativo:
+    """Agrega alarmas a un archivo de texto; al superar max_bytes rota a .1, .2, ... (hasta 'copias')."""
+    def __init__(self, ruta: str, max_bytes: int = 5 * 1024 * 1024, copias: int = 5):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.copias = copias
+
+    def __call__(self, lote: List[EntradaAlarma]) -> None:
+        texto = "".join(f"{e}\n" for e in lote)
+        if os.path.exists(self.ruta) and os.path.getsize(self.ruta) + len(texto) > self.max_bytes:
+            self._rotar()
+        with open(self.ruta, "a") as f:
+            f.write(texto)
+
+    def _rotar(self) -> None:
+        for i in range(self.copias - 1, 0, -1):
+            origen = f"{self.ruta}.{i}"
+            if os.path.exists(origen):
+                os.replace(origen, f"{self.ruta}.{i + 1}")
+        os.replace(self.ruta, f"{self.ruta}.1")
+
+
+class _EscritorAlarmas(threading.Thread):
+    """Hilo de fondo: agrupa alarmas de la cola y las entrega a los sinks."""
+    LOTE_MAXIMO = 500
+
+    def __init__(self, cola: 'queue.Queue[Optional[EntradaAlarma]]'):
+        super().__init__(name="EscritorAlarmas", daemon=True)
+        self.cola = cola
+        self._descartadas_informadas = 0
+
+    def run(self) -> None:
+        while True:
+            primera = self.cola.get()
+            lote = [primera]
+            while len(lote) < self.LOTE_MAXIMO:
+                try:
+                    lote.append(self.cola.get_nowait())
+                except queue.Empty:
+                    break
+            fin = None in lote
+            entradas = [e for e in lote if e is not None]
+            if entradas:
+                for sink in list(AlarmManager.sinks):
+                    try:
+                        sink(entradas)
+                    except Exception: # Un sink roto no debe tumbar al resto
+                        _log.exception("AlarmManager: error en sink %r", sink)
+            with AlarmManager._lock:
+                descartadas = AlarmManager.descartadas
+            if descartadas > self._descartadas_informadas:
+                _log.warning("AlarmManager: cola llena, %d alarmas no se entregaron a los sinks",
+                             descartadas - self._descartadas_informadas)
+            self._descartadas_informadas = descartadas # Tambien si alguien puso el contador en cero
+            for _ in lote:
+                self.cola.task_done()
+            if fin:
+                return
+
 
 class AlarmManager: #Cohesion
-    """Gestiona el registro centralizado de alarmas."""
-    log: List[str] = []
+    """Gestiona el registro centralizado de alarmas.
+    Ventana en memoria acotada, indices por AG / nivel / tiempo y escritura asincrona a sinks.
+    """
+    CAPACIDAD = 10000
+    COLA_MAXIMA = 50000 # Alarmas pendientes de entregar; si los sinks no dan abasto se descartan las nuevas
+    log: Deque[str] = deque(maxlen=CAPACIDAD) # Textos de la ventana actual (compatibilidad)
+    sinks: List[Sink] = [SinkConsola()]
+
+    _ventana: Deque[EntradaAlarma] = deque()
+    _indice_tiempo = _Indice()
+    _por_ag: Dict[Optional[int], _Indice] = {}
+    _por_nivel: Dict[str, _Indice] = {}
+    _lock = threading.Lock()
+    _cola: 'queue.Queue[Optional[EntradaAlarma]]' = queue.Queue(maxsize=COLA_MAXIMA)
+    descartadas = 0 # Alarmas que no llegaron a los sinks por cola llena (siguen en la ventana)
+    _escritor: Optional[_EscritorAlarmas] = None
 
     @classmethod #Testeabilidad
     def registrar_alarma(cls, falla: Any) -> None:
-        t_str = time.strftime('%H:%M:%S')
-        mensaje = f"[{t_str}] ALARMA SYSTEM -> {falla}"
-        cls.log.append(mensaje)
-        print(mensaje)
+        entrada = EntradaAlarma(getattr(falla, "timestamp", None) or time.time(), getattr(falla, "id_ag", None),
+                                getattr(falla, "nivel_peligro", "Advertencia"), str(falla))
+        with cls._lock:
+            cls._insertar(entrada)
+        cls._iniciar_escritor()
+        try:
+            cls._cola.put_nowait(entrada) # La simulacion nunca espera a un sink lento
+        except queue.Full:
+            with cls._lock: # Lo leen el hilo escritor y otros productores
+                cls.descartadas += 1
+
+    @classmethod
+    def _insertar(cls, entrada: EntradaAlarma) -> None:
+        if len(cls._ventana) >= cls.CAPACIDAD:
+            cls._desalojar()
+        cls._ventana.append(entrada)
+        cls._indice_tiempo.agregar(entrada)
+        cls._por_ag.setdefault(entrada.id_ag, _Indice()).agregar(entrada)
+        cls._por_nivel.setdefault(entrada.nivel, _Indice()).agregar(entrada)
+        cls.log.append(str(entrada))
+
+    @classmethod
+    def _desalojar(cls) -> None:
+        vieja = cls._ventana.popleft()
+        cls._indice_tiempo.desalojar(vieja)
+        for indice, clave in ((cls._por_ag, vieja.id_ag), (cls._por_nivel, vieja.nivel)):
+            indice[clave].desalojar(vieja)
+            if not len(indice[clave]):
+                del indice[clave]
+
+    @classmethod
+    def _iniciar_escritor(cls) -> None:
+        if cls._escritor is None or not cls._escritor.is_alive():
+            if cls._escritor is None:
+                atexit.register(cls.vaciar) # No perder alarmas pendientes al salir
+            cls._escritor = _EscritorAlarmas(cls._cola)
+            cls._escritor.start()
+
+    # --- Consultas ---
+    @classmethod
+    def consultar(cls, id_ag: Optional[int] = None, nivel: Optional[str] = None,
+                  desde: float = float("-inf"), hasta: float = float("inf")) -> List[EntradaAlarma]:
+        """Alarmas de la ventana filtradas por AG, nivel y rango de tiempo (orden cronologico)."""
+        with cls._lock:
+            candidatos = [cls._indice_tiempo]
+            if id_ag is not None:
+                candidatos.append(cls._por_ag.get(id_ag, _Indice()))
+            if nivel is not None:
+                candidatos.append(cls._por_nivel.get(nivel, _Indice()))
+            indice = min(candidatos, key=len) # Se recorre el indice mas selectivo
+            resultado = indice.rango(desde, hasta)
+        if id_ag is not None:
+            resultado = [e for e in resultado if e.id_ag == id_ag]
+        if nivel is not None:
+            resultado = [e for e in resultado if e.nivel == nivel]
+        return resultado
+
+    @classmethod
+    def cantidad(cls) -> int:
+        return len(cls._ventana)
+
+    # --- Configuracion ---
+    @classmethod
+    def configurar(cls, capacidad: Optional[int] = None, sinks: Optional[List[Sink]] = None,
+                   cola_maxima: Optional[int] = None) -> None:
+        """Cambia el tamano de la ventana, el de la cola hacia los sinks y/o reemplaza los sinks."""
+        if cola_maxima is not None:
+            cls.COLA_MAXIMA = cola_maxima
+            cls._cola.maxsize = cola_maxima # Queue consulta maxsize en cada put
+        if sinks is not None:
+            cls.sinks = list(sinks)
+        if capacidad is not None:
+            with cls._lock:
+                cls.CAPACIDAD = capacidad
+                while len(cls._ventana) > capacidad:
+                    cls._desalojar()
+                cls.log = deque(cls.log, maxlen=capacidad)
+
+    @classmethod
+    def agregar_sink(cls, sink: Sink) -> None:
+        cls.sinks.append(sink)
+
+    @classmethod
+    def vaciar(cls) -> None:
+        """Bloquea hasta que el hilo escritor entrego todas las alarmas pendientes."""
+        cls._cola.join()
+
+    @classmethod
+    def detener(cls) -> None:
+        """Entrega lo pendiente y termina el hilo escritor (se relanza con la proxima alarma)."""
+        if cls._escritor is not None and cls._escritor.is_alive():
+            cls._cola.put(None)
+            cls._escritor.join()
+
+    @classmethod
+    def limpiar(cls) -> None:
+        """Vacia la ventana en memoria (no toca lo ya escrito por los sinks)."""
+        with cls._lock:
+            cls._ventana.clear()
+            cls._indice_tiempo = _Indice()
+            cls._por_ag.clear()
+            cls._por_nivel.clear()
+            cls.log.clear()
+
+    @classmethod
+    def cargar(cls, entradas: List[EntradaAlarma]) -> None:
+        """Reemplaza la ventana en memoria (p. ej. al restaurar un checkpoint); no se reenvian a los sinks."""
+        cls.limpiar()
+        with cls._lock:
+            for entrada in entradas:
+                cls._insertar(entrada)
 
     @classmethod
     def hay_criticas_activas(cls, aerogenerador: Any) -> bool:
-        for parte in aerogenerador.partes:
-            for falla in parte.fallas_activas:
-                if falla.nivel_peligro == "Critica":
-                    return True
-        return False
\ No newline at end of file
+        # O(1): el AG mantiene sus contadores por nivel al registrar / limpiar fallas
+        return aerogenerador.tiene_fallas_criticas()
+
+
+class RegistroFallasParque:
+    """Contadores de fallas de todo el parque, actualizados por eventos de cada AG (Observer).
+    Los tableros consultan sin recorrer las turbinas.
+    """
+    def __init__(self):
+        self.por_nivel: Dict[str, int] = {}
+        self.turbinas_con_falla: Set[int] = set()
+        self.bloqueadas_criticas: Set[int] = set()
+        self._fallas_por_ag: Dict[int, int] = {}
+
+    def fallas_cambiadas(self, ag: Any, nivel: str, delta: int) -> None:
+        self.por_nivel[nivel] = self.por_nivel.get(nivel, 0) + delta
+        total = self._fallas_por_ag.get(ag.id_a, 0) + delta
+        if total > 0:
+            self._fallas_por_ag[ag.id_a] = total
+            self.turbinas_con_falla.add(ag.id_a)
+        else:
+            self._fallas_por_ag.pop(ag.id_a, None)
+            self.turbinas_con_falla.discard(ag.id_a)
+
+    def bloqueo_critico_cambiado(self, ag: Any, bloqueado: bool) -> None:
+        if bloqueado:
+            self.bloqueadas_criticas.add(ag.id_a)
+        else:
+            self.bloqueadas_criticas.discard(ag.id_a)
+
+    def contar(self, nivel: str) -> int:
+        return self.por_nivel.get(nivel, 0)
+
+    def cantidad_bloqueadas_criticas(self) -> int:
+        return len(self.bloqueadas_criticas)
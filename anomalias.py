@@ -0,0 +1,206 @@
+# anomalias.py
+"""Deteccion en linea de derivas de temperatura y de bajo rendimiento en todo el parque.
+
+PreFlightChecklist solo detiene la turbina cuando la temperatura supera MAX_TEMP. Este modulo busca
+los sintomas antes: despues de cada tick actualiza, para todas las turbinas en una pasada NumPy, dos
+cartas de control (EWMA y CUSUM unilateral) sobre dos residuos:
+
+- Temperatura de gondola menos la media del parque en ese tick (asi no alarman los cambios de clima),
+  en desvios de la linea base propia de cada turbina, aprendida en sus primeros 'aprendizaje' ticks.
+- Potencia: (prediccion de su CurvaPotencia con el viento medido - potencia real) / POTENCIA_NOMINAL,
+  solo en los ticks en que la turbina genera. Con despacho se compara contra la potencia disponible:
+  un recorte no es bajo rendimiento.
+
+La EWMA detecta derivas lentas y el CUSUM cambios sostenidos mas bruscos. Cuando una carta cruza su
+limite se registra una FallaElectrica de nivel Advertencia (la turbina sigue en marcha); la misma
+carta no vuelve a avisar hasta bajar del HISTERESIS de su limite. El estado no se guarda en los
+checkpoints.
+"""
+from typing import Dict, List, NamedTuple, Sequence
+import numpy as np
+from aerogenerador import AerogeneradorBase
+from curvas import CurvaPotencia, CurvaPotenciaTabulada
+from fallas import FallaElectrica
+
+GENERANDO = AerogeneradorBase.ESTADOS.index("generando")
+HISTERESIS = 0.8
+DESVIO_MINIMO = 0.5 # C: piso del desvio de la linea base (sensores casi constantes)
+
+
+class Carta(NamedTuple):
+    """EWMA y CUSUM unilateral (hacia arriba) sobre un residuo."""
+    lambda_ewma: float # Peso de la muestra nueva en la EWMA
+    limite_ewma: float # Aviso cuando la EWMA supera este valor
+    k: float           # Holgura del CUSUM: desvio tolerado por muestra
+    h: float           # Aviso cuando el CUSUM supera este valor
+
+
+# Temperatura en desvios de la linea base; potencia en fraccion de la nominal
+CARTA_TEMPERATURA = Carta(0.01, 0.5, 1.0, 10.0)
+CARTA_POTENCIA = Carta(0.05, 0.05, 0.02, 0.5)
+# (nombre del aviso, senal, estadistico, mensaje)
+AVISOS = (
+    ("temp_ewma", "temp", "ewma", "Deriva de temperatura de gondola"),
+    ("temp_cusum", "temp", "cusum", "Aumento sostenido de temperatura de gondola"),
+    ("potencia_ewma", "potencia", "ewma", "Bajo rendimiento respecto de la curva de potencia"),
+    ("potencia_cusum", "potencia", "cusum", "Bajo rendimiento sostenido respecto de la curva de potencia"),
+)
+
+
+def _agrandar(array: np.ndarray, filas: int) -> np.ndarray:
+    nuevo = np.zeros((filas,) + array.shape[1:], dtype=array.dtype)
+    nuevo[:len(array)] = array
+    return nuevo
+
+
+def _clave_curva(curva: CurvaPotencia):
+    """Las curvas de formula se agrupan por clase; las tabuladas, por instancia."""
+    return curva if isinstance(curva, CurvaPotenciaTabulada) else type(curva)
+
+
+class DetectorAnomalias:
+    """Cartas EWMA/CUSUM por turbina (fila i = controller.ags[i]), alimentadas despues de cada tick."""
+    CAPACIDAD_INICIAL = 64
+
+    def __init__(self, controller, aprendizaje: int = 600, carta_temperatura: Carta = CARTA_TEMPERATURA,
+                 carta_potencia: Carta = CARTA_POTENCIA):
+        if aprendizaje < 2:
+            raise ValueError("La linea base necesita al menos 2 ticks.")
+        self.controller = controller
+        self.aprendizaje = aprendizaje
+        self.cartas = {"temp": carta_temperatura, "potencia": carta_potencia}
+        self.n = 0
+        self.capacidad = self.CAPACIDAD_INICIAL
+        self._curvas: List[CurvaPotencia] = []
+        self._indice_curva: Dict[object, int] = {}
+        c = self.capacidad
+        self.curva = np.zeros(c, dtype=np.int16)
+        self.nominal_kw = np.zeros(c)
+        # Linea base de temperatura (residuo respecto del parque)
+        self.muestras_base = np.zeros(c, dtype=np.int32)
+        self._suma = np.zeros(c)
+        self._suma2 = np.zeros(c)
+        self.media_base = np.zeros(c)
+        self.desvio_base = np.ones(c)
+        # Cartas: estadisticos y avisos vigentes
+        self.ewma = {senal: np.zeros(c) for senal in self.cartas}
+        self.cusum = {senal: np.zeros(c) for senal in self.cartas}
+        self.avisando = {nombre: np.zeros(c, dtype=bool) for nombre, *_ in AVISOS}
+        self.avisos = dict.fromkeys(self.avisando, 0)
+        self._aprendiendo = 0 # Filas que todavia no completaron la linea base
+
+    def _registrar_curva(self, curva: CurvaPotencia) -> int:
+        clave = _clave_curva(curva)
+        if clave not in self._indice_curva:
+            self._indice_curva[clave] = len(self._curvas)
+            self._curvas.append(curva)
+        return self._indice_curva[clave]
+
+    def agregar_turbinas(self, curvas: Sequence[CurvaPotencia]) -> None:
+        """Alta de turbinas al final (en el orden de controller.ags); arrancan aprendiendo su linea base."""
+        n = self.n + len(curvas)
+        if n > self.capacidad:
+            capacidad = max(n, 2 * self.capacidad)
+            for nombre in ("curva", "nominal_kw", "muestras_base", "_suma", "_suma2", "media_base", "desvio_base"):
+                setattr(self, nombre, _agrandar(getattr(self, nombre), capacidad))
+            for tabla in (self.ewma, self.cusum, self.avisando):
+                for clave in tabla:
+                    tabla[clave] = _agrandar(tabla[clave], capacidad)
+            self.capacidad = capacidad
+        self.curva[self.n:n] = [self._registrar_curva(c) for c in curvas]
+        self.nominal_kw[self.n:n] = [c.POTENCIA_NOMINAL for c in curvas]
+        self.desvio_base[self.n:n] = 1.0
+        self._aprendiendo += len(curvas)
+        self.n = n
+
+    # --- Ciclo ---
+    def al_avanzar(self, estados: np.ndarray, viento: np.ndarray, temp: np.ndarray, potencia: np.ndarray) -> None:
+        """Actualiza las cartas con el tick que acaba de terminar y registra los avisos nuevos."""
+        n = len(potencia)
+        if n != self.n:
+            raise ValueError(f"Deteccion de {self.n} turbinas y un tick de {n}.")
+        # Temperatura: residuo respecto del parque, estandarizado con la linea base
+        con_dato = ~np.isnan(temp)
+        residuo = temp - (temp[con_dato].mean() if con_dato.any() else 0.0)
+        if self._aprendiendo:
+            self._aprender(residuo, con_dato)
+        z = (residuo - self.media_base[:n]) / self.desvio_base[:n]
+        self._actualizar("temp", z, con_dato & (self.muestras_base[:n] >= self.aprendizaje))
+
+        # Potencia: deficit respecto de la curva, solo mientras genera
+        generando = np.flatnonzero(estados == GENERANDO)
+        deficit = np.zeros(n)
+        if len(generando):
+            esperada = np.empty(len(generando))
+            tipos = self.curva[generando]
+            for k, curva in enumerate(self._curvas):
+                m = tipos == k
+                if m.any():
+                    esperada[m] = curva.calcular_potencia_batch(viento[generando[m]])
+            deficit[generando] = (esperada - potencia[generando]) / self.nominal_kw[generando]
+        activas = np.zeros(n, dtype=bool)
+        activas[generando] = True
+        self._actualizar("potencia", deficit, activas)
+
+    def _aprender(self, residuo: np.ndarray, con_dato: np.ndarray) -> None:
+        n = len(residuo)
+        aprendiendo = con_dato & (self.muestras_base[:n] < self.aprendizaje)
+        filas = np.flatnonzero(aprendiendo)
+        valores = residuo[filas]
+        self._suma[filas] += valores
+        self._suma2[filas] += valores * valores
+        self.muestras_base[filas] += 1
+        listas = filas[self.muestras_base[filas] == self.aprendizaje]
+        if len(listas):
+            media = self._suma[listas] / self.aprendizaje
+            varianza = np.maximum(self._suma2[listas] / self.aprendizaje - media * media, 0.0)
+            self.media_base[listas] = media
+            self.desvio_base[listas] = np.maximum(np.sqrt(varianza), DESVIO_MINIMO)
+            self._aprendiendo -= len(listas)
+
+    def _actualizar(self, senal: str, x: np.ndarray, activas: np.ndarray) -> None:
+        """Un paso de EWMA y CUSUM en las filas activas (las demas conservan su estado)."""
+        n = len(x)
+        carta = self.cartas[senal]
+        ewma = self.ewma[senal][:n]
+        cusum = self.cusum[senal][:n]
+        x = np.where(activas, x, 0.0) # Sin dato: no se mezcla en los estadisticos
+        ewma += np.where(activas, carta.lambda_ewma * (x - ewma), 0.0)
+        np.copyto(cusum, np.maximum(0.0, cusum + x - carta.k), where=activas)
+        for nombre, de, estadistico, mensaje in AVISOS:
+            if de != senal:
+                continue
+            valores, limite = (ewma, carta.limite_ewma) if estadistico == "ewma" else (cusum, carta.h)
+            avisando = self.avisando[nombre][:n]
+            nuevos = np.flatnonzero((valores > limite) & ~avisando)
+            avisando &= valores >= HISTERESIS * limite
+            if len(nuevos):
+                avisando[nuevos] = True
+                for fila in nuevos.tolist():
+                    self._avisar(nombre, fila, mensaje, senal, float(valores[fila]))
+
+    def _avisar(self, nombre: str, fila: int, mensaje: str, senal: str, valor: float) -> None:
+        if senal == "temp":
+            detalle = f"+{valor * self.desvio_base[fila]:.1f} C" if nombre.endswith("ewma") else f"CUSUM {valor:.1f}"
+        else:
+            detalle = f"{valor:.1%} por debajo" if nombre.endswith("ewma") else f"CUSUM {valor:.2f}"
+        falla = FallaElectrica("Gondola", f"{mensaje} ({detalle})", "Advertencia")
+        falla.timestamp = self.controller.tiempo_simulado()
+        self.controller.ags[fila].registrar_advertencia(falla, "Gondola")
+        self.avisos[nombre] += 1
+
+    # --- Consultas ---
+    def turbina(self, i: int) -> Dict[str, float]:
+        """Estadisticos de la fila i (temperatura en desvios de su linea base)."""
+        resumen = {"linea_base_lista": bool(self.muestras_base[i] >= self.aprendizaje),
+                   "temp_media_base": float(self.media_base[i]), "temp_desvio_base": float(self.desvio_base[i])}
+        for senal in self.cartas:
+            resumen[f"{senal}_ewma"] = float(self.ewma[senal][i])
+            resumen[f"{senal}_cusum"] = float(self.cusum[senal][i])
+        for nombre, avisando in self.avisando.items():
+            resumen[f"aviso_{nombre}"] = bool(avisando[i])
+        return resumen
+
+    def resumen(self) -> Dict[str, int]:
+        """Avisos emitidos por carta."""
+        return dict(self.avisos)
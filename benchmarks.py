@@ -0,0 +1,319 @@
+# benchmarks.py
+"""Suite de benchmarks de rendimiento.
+
+Uso:
+    python benchmarks.py --salida base.json              # mide y guarda JSON
+    python benchmarks.py --comparar base.json            # marca regresiones contra una linea base
+    python benchmarks.py --rapido --solo ciclo,alarmas   # subconjunto rapido
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from curvas import CurvaPotenciaAlta, CurvaPotenciaTabulada
+from controlador import SimuladorController
+from aerogenerador import AG_AltaPotencia
+from alarmas import AlarmManager
+from fallas import FallaElectrica
+from viento import VientoFactory
+from validaciones import PreFlightChecklist
+
+# nombre -> {"valor": float, "unidad": str, "mayor_es_mejor": bool}
+Resultados = Dict[str, Dict[str, object]]
+
+MUESTRA_MINIMA_S = 0.05 # Duracion minima de cada repeticion de _por_llamada
+# Diferencia absoluta por debajo de la cual un cambio es ruido de medicion, aunque sea grande en proporcion
+RUIDO_ABSOLUTO: Dict[str, float] = {"ns/muestra": 1.0, "us/llamada": 0.25, "us/widget": 5.0, "ms/llamada": 0.5}
+
+
+def _medir(funcion: Callable[[], object], repeticiones: int = 3) -> float:
+    """Mejor tiempo (s) de varias repeticiones."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def _por_llamada(funcion: Callable[[], object], llamadas: int, repeticiones: int = 5) -> float:
+    """Costo por llamada en microsegundos. 'llamadas' es el minimo por repeticion: se duplica hasta que
+    cada repeticion dure al menos MUESTRA_MINIMA_S, para que la resolucion del reloj y las interrupciones
+    no dominen operaciones de menos de un microsegundo."""
+    def lote():
+        for _ in range(llamadas):
+            funcion()
+    while _medir(lote, 1) < MUESTRA_MINIMA_S:
+        llamadas *= 2
+    return _medir(lote, repeticiones) / llamadas * 1e6
+
+
+def _resultado(valor: float, unidad: str, mayor_es_mejor: bool = False) -> Dict[str, object]:
+    return {"valor": valor, "unidad": unidad, "mayor_es_mejor": mayor_es_mejor}
+
+
+# --- Casos ---
+
+def bench_curvas(n: int = 1_000_000, semilla: int = 0) -> Resultados:
+    """Costo por muestra (ns) de evaluar n velocidades: camino escalar vs batch vs tabla."""
+    velocidades = np.random.default_rng(semilla).uniform(0, 30, n)
+    lista = velocidades.tolist()
+    curva = CurvaPotenciaAlta()
+    # Misma forma que CurvaPotenciaAlta expresada como tabla de fabricante
+    tabla = CurvaPotenciaTabulada([0, 7.999, 8, 15, 25, 25.001], [0, 0, 0, 2500, 2500, 0])
+
+    tiempos = {
+        "escalar": _medir(lambda: [curva.calcular_potencia(v) for v in lista], 1),
+        "batch": _medir(lambda: curva.calcular_potencia_batch(velocidades)),
+        "tabulada_batch": _medir(lambda: tabla.calcular_potencia_batch(velocidades)),
+    }
+    return {f"curvas/{k}": _resultado(t / n * 1e9, "ns/muestra") for k, t in tiempos.items()}
+
+
+def _parque(turbinas: int, motor: str, procesos: Optional[int] = None) -> SimuladorController:
+    controller = SimuladorController(motor=motor, semilla=0, procesos=procesos)
+    while len(controller.ags) < turbinas:
+        nuevo = controller.agregar_aerogenerador("ALTA")
+        controller.ags[nuevo - 1].solicitar_marcha()
+    return controller
+
+
+def bench_ciclo(tamanos: List[int], motores: List[str], presupuesto_s: float = 1.0) -> Resultados:
+    """Ticks por segundo de avanzar_ciclo_simulacion segun tamano del parque y motor."""
+    resultados: Resultados = {}
+    for motor in motores:
+        for n in tamanos:
+            controller = _parque(n, motor)
+            try:
+                tps = _ticks_por_segundo(controller, presupuesto_s)
+            finally:
+                controller.cerrar()
+            resultados[f"ciclo/{motor}/{n}"] = _resultado(tps, "ticks/s", mayor_es_mejor=True)
+    return resultados
+
+
+def _ticks_por_segundo(controller: SimuladorController, presupuesto_s: float) -> float:
+    controller.avanzar_ciclo_simulacion() # calentamiento
+    ticks = 0
+    t0 = time.perf_counter()
+    while ticks < 3 or time.perf_counter() - t0 < presupuesto_s:
+        controller.avanzar_ciclo_simulacion()
+        ticks += 1
+    return ticks / (time.perf_counter() - t0)
+
+
+def bench_escalado(n: int, procesos: List[int], presupuesto_s: float = 1.0) -> Resultados:
+    """Motor distribuido con n turbinas: ticks/s y aceleracion respecto de 1 proceso."""
+    resultados: Resultados = {}
+    base = None
+    for p in procesos:
+        controller = _parque(n, "distribuido", p)
+        try:
+            tps = _ticks_por_segundo(controller, presupuesto_s)
+        finally:
+            controller.cerrar()
+        base = base or tps
+        resultados[f"escalado/{n}/{p}"] = _resultado(tps, "ticks/s", mayor_es_mejor=True)
+        resultados[f"escalado/{n}/{p}/aceleracion"] = _resultado(tps / base, "x", mayor_es_mejor=True)
+    return resultados
+
+
+def bench_eventos(tamanos: List[int], fraccion_detenida: float = 0.7, presupuesto_s: float = 1.0) -> Resultados:
+    """Ticks por segundo del motor por objetos con parte del parque detenido: evaluacion completa vs eventos."""
+    resultados: Resultados = {}
+    for modo in ("completo", "eventos"):
+        for n in tamanos:
+            controller = SimuladorController(semilla=0)
+            while len(controller.ags) < n:
+                nuevo = controller.agregar_aerogenerador("ALTA")
+                if (nuevo % 10) / 10 >= fraccion_detenida:
+                    controller.ags[nuevo - 1].solicitar_marcha()
+            if modo == "eventos":
+                controller.habilitar_planificacion_eventos()
+            tps = _ticks_por_segundo(controller, presupuesto_s)
+            resultados[f"eventos/{modo}/{n}"] = _resultado(tps, "ticks/s", mayor_es_mejor=True)
+    return resultados
+
+
+def bench_alarmas(cantidades: List[int]) -> Resultados:
+    """hay_criticas_activas con listas de fallas crecientes (sin criticas: el antiguo peor caso)."""
+    resultados: Resultados = {}
+    for cantidad in cantidades:
+        ag = AG_AltaPotencia(1)
+        for i in range(cantidad):
+            ag.buje.registrar_falla(FallaElectrica("Generador", f"advertencia {i}"))
+        costo = _por_llamada(lambda: AlarmManager.hay_criticas_activas(ag), 2000)
+        resultados[f"alarmas/hay_criticas_activas/{cantidad}"] = _resultado(costo, "us/llamada")
+    return resultados
+
+
+def bench_reglas() -> Resultados:
+    """Costo por llamada de VientoFactory.crear_condicion y PreFlightChecklist.validar."""
+    ag = AG_AltaPotencia(1)
+    ag.buje.sensores["viento"]._valor = 12
+    ag.gondola.sensores["temp"]._valor = 60
+    return {
+        "reglas/crear_condicion": _resultado(
+            _por_llamada(lambda: VientoFactory.crear_condicion(12), 20000), "us/llamada"),
+        "reglas/checklist_validar": _resultado(
+            _por_llamada(lambda: PreFlightChecklist.validar(ag), 20000), "us/llamada"),
+    }
+
+
+def _display_virtual() -> Optional[subprocess.Popen]:
+    """Lanza Xvfb si no hay DISPLAY. Retorna el proceso (o None si no hace falta / no existe)."""
+    if os.environ.get("DISPLAY") or sys.platform.startswith("win") or sys.platform == "darwin":
+        return None
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        return None
+    proceso = subprocess.Popen([xvfb, ":97", "-screen", "0", "1600x900x24"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = ":97"
+    time.sleep(0.5)
+    return proceso
+
+
+def bench_gui(tamanos: List[int]) -> Resultados:
+    """Refresco de los widgets visibles (por widget) y refrescar_grid, con pantalla real o Xvfb."""
+    xvfb = _display_virtual()
+    try:
+        import tkinter as tk
+        from interfaz import DashboardApp
+        try:
+            app = DashboardApp()
+        except tk.TclError:
+            print("benchmarks: sin pantalla ni Xvfb, se omite el caso gui", file=sys.stderr)
+            return {}
+        resultados: Resultados = {}
+        try:
+            app.deiconify()
+            app._construir_interfaz()
+            for n in tamanos:
+                while len(app.controller.ags) < n:
+                    app.controller.agregar_aerogenerador("ALTA")
+
+                def refrescar():
+                    app.refrescar_grid()
+                    app.update()
+
+                def actualizar() -> float:
+                    """Mejor tiempo (s) del bucle de actualizar_datos_ui; el tick y el dibujado quedan afuera."""
+                    mejor = float("inf")
+                    for _ in range(3):
+                        app.controller.avanzar_ciclo_simulacion()
+                        widgets = app.widgets_ag
+                        t0 = time.perf_counter()
+                        for w in widgets:
+                            w.actualizar_datos_ui()
+                        mejor = min(mejor, time.perf_counter() - t0)
+                        app.update()
+                    return mejor
+
+                t_grid = _medir(refrescar)
+                t_ui = actualizar()
+                visibles = max(1, len(app.widgets_ag)) # La grilla recicla: solo se refrescan los visibles
+                resultados[f"gui/refrescar_grid/{n}"] = _resultado(t_grid * 1e3, "ms/llamada")
+                resultados[f"gui/actualizar_datos_ui/{n}"] = _resultado(t_ui / visibles * 1e6, "us/widget")
+        finally:
+            app.destroy()
+        return resultados
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+
+# --- Comparacion contra linea base ---
+
+def comparar(actual: Resultados, base: Resultados, tolerancia: float) -> List[str]:
+    """Lineas de reporte; las regresiones (peor que base mas alla de la tolerancia relativa y del ruido
+    absoluto de su unidad, RUIDO_ABSOLUTO) llevan 'REGRESION'."""
+    lineas = []
+    for nombre in sorted(set(actual) & set(base)):
+        nuevo, viejo = actual[nombre]["valor"], base[nombre]["valor"]
+        if not viejo:
+            continue
+        cambio = nuevo / viejo - 1 # > 0: el valor subio
+        empeora = -cambio if actual[nombre]["mayor_es_mejor"] else cambio
+        ruido = abs(nuevo - viejo) <= RUIDO_ABSOLUTO.get(actual[nombre]["unidad"], 0.0)
+        marca = "REGRESION" if empeora > tolerancia and not ruido else "ok"
+        lineas.append(f"{marca:<9} {nombre:<40} {viejo:12.3f} -> {nuevo:12.3f} "
+                      f"{actual[nombre]['unidad']} ({cambio:+.1%})")
+    return lineas
+
+
+CASOS = ["curvas", "ciclo", "escalado", "eventos", "alarmas", "reglas", "gui"]
+
+
+def ejecutar(casos: List[str], rapido: bool = False) -> Resultados:
+    tamanos = [3, 1000, 10000] if rapido else [3, 1000, 10000, 100000]
+    resultados: Resultados = {}
+    if "curvas" in casos:
+        resultados.update(bench_curvas(100_000 if rapido else 1_000_000))
+    if "ciclo" in casos:
+        resultados.update(bench_ciclo(tamanos, SimuladorController.MOTORES, 0.3 if rapido else 1.0))
+    if "escalado" in casos:
+        nucleos = os.cpu_count() or 1
+        procesos = sorted({1, 2, nucleos} | {2 ** k for k in range(nucleos.bit_length()) if 2 ** k <= nucleos})
+        resultados.update(bench_escalado(tamanos[-1], procesos, 0.3 if rapido else 1.0))
+    if "eventos" in casos:
+        resultados.update(bench_eventos(tamanos[1:3], presupuesto_s=0.3 if rapido else 1.0))
+    if "alarmas" in casos:
+        resultados.update(bench_alarmas([0, 10, 100, 1000]))
+    if "reglas" in casos:
+        resultados.update(bench_reglas())
+    if "gui" in casos:
+        resultados.update(bench_gui([3, 50] if rapido else [3, 50, 200]))
+    return resultados
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador SCADA.")
+    parser.add_argument("--solo", default=",".join(CASOS), help=f"Casos separados por coma: {','.join(CASOS)}")
+    parser.add_argument("--rapido", action="store_true", help="Tamanos reducidos (sin 100k turbinas).")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--comparar", help="JSON de linea base contra el que buscar regresiones.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento relativo tolerado (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    casos = [c.strip() for c in args.solo.split(",") if c.strip()]
+    desconocidos = set(casos) - set(CASOS)
+    if desconocidos:
+        parser.error(f"Casos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    resultados = ejecutar(casos, args.rapido)
+    documento = {
+        "meta": {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "numpy": np.__version__,
+        },
+        "resultados": resultados,
+    }
+    texto = json.dumps(documento, indent=2, sort_keys=True)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)["resultados"]
+        lineas = comparar(resultados, base, args.tolerancia)
+        for linea in lineas:
+            print(linea, file=sys.stderr)
+        if any(l.startswith("REGRESION") for l in lineas):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
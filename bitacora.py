@@ -0,0 +1,393 @@
+# bitacora.py
+"""Bitacora determinista de una simulacion y su reproduccion.
+
+La simulacion solo depende de sus entradas: lecturas de sensores, comandos de operador (marcha, parada,
+mantenimiento), fallas inyectadas y altas de turbinas. La bitacora las registra en un archivo de solo
+agregado y cada 'instantanea_cada' ticks guarda un checkpoint completo. Reproducir es restaurar la
+instantanea anterior al tick buscado y volver a aplicar las entradas: sin sensores propios ni sorteos, el
+estado resultante es identico al de la corrida original y el costo de saltar a un tick esta acotado por
+la distancia entre instantaneas.
+
+Formato de bitacora.jrn (little-endian, version 1):
+  CABECERA | meta (JSON) | registros
+Cada registro es REGISTRO (tipo, largo del contenido, tick) seguido de su contenido:
+  LECTURAS     por canal: CANAL (dtype, disperso, cantidad) | indices <u4 (si es disperso) | valores.
+               El dtype es el mas chico que representa los valores sin perdida; disperso guarda solo
+               las filas que cambiaron respecto del registro anterior.
+  COMANDO      JSON con la turbina, la accion y (para fallas, advertencias y reparaciones) la falla inyectada.
+  ALTA         JSON con el tipo de la turbina agregada.
+  INSTANTANEA  JSON con la secuencia del checkpoint guardado en instantaneas/.
+Los comandos y altas quedan antes de las LECTURAS del tick que ejecutan.
+
+Uso:
+    python bitacora.py corrida/ --hasta 86400 --factor 600
+    python bitacora.py corrida/ --desde 3600 --hasta 7200 --seguir 17
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from alarmas import AlarmManager
+from checkpoint import CLASES_FALLA, GestorCheckpoints, _ruta
+from fallas import Falla
+from sensores import FuenteSensor
+
+MAGIC = b"JRN1"
+VERSION = 1
+ARCHIVO = "bitacora.jrn"
+INSTANTANEAS = "instantaneas"
+LECTURAS, COMANDO, ALTA, INSTANTANEA = 1, 2, 3, 4
+
+CABECERA = np.dtype([("magic", "S4"), ("version", "<u2"), ("largo_meta", "<u4")])
+REGISTRO = np.dtype([("tipo", "u1"), ("largo", "<u4"), ("tick", "<i8")])
+CANAL = np.dtype([("dtype", "S3"), ("disperso", "u1"), ("cantidad", "<u4")])
+CANALES = ("viento", "temp")
+
+# Candidatos en orden de tamano; los enteros solo si todos los valores lo son
+_ENTEROS = (np.dtype("<i1"), np.dtype("<i2"), np.dtype("<i4"))
+_REALES = (np.dtype("<f4"), np.dtype("<f8"))
+
+
+def _dtype_compacto(valores: np.ndarray) -> np.dtype:
+    """Dtype mas chico que representa 'valores' sin perdida."""
+    if not len(valores):
+        return _ENTEROS[0]
+    if np.isfinite(valores).all() and np.array_equal(valores, np.trunc(valores)):
+        minimo, maximo = valores.min(), valores.max()
+        for dtype in _ENTEROS:
+            info = np.iinfo(dtype)
+            if info.min <= minimo and maximo <= info.max:
+                return dtype
+    if np.array_equal(valores.astype(_REALES[0]), valores, equal_nan=True):
+        return _REALES[0]
+    return _REALES[1]
+
+
+def codificar_lecturas(lecturas: Dict[str, np.ndarray], previas: Optional[Dict[str, np.ndarray]]) -> bytes:
+    """Contenido de un registro LECTURAS. Con 'previas' (mismo n), los canales con pocos cambios
+    se guardan dispersos."""
+    partes = []
+    for canal in CANALES:
+        valores = lecturas[canal]
+        dtype = _dtype_compacto(valores) # Sobre todo el canal: indica tambien si son enteros
+        cambiadas = None
+        if previas is not None and len(previas[canal]) == len(valores):
+            cambiadas = np.flatnonzero(valores != previas[canal])
+            if 2 * len(cambiadas) >= len(valores):
+                cambiadas = None
+        datos = valores if cambiadas is None else valores[cambiadas]
+        partes.append(np.array((dtype.str[1:], cambiadas is not None, len(datos)), dtype=CANAL).tobytes())
+        if cambiadas is not None:
+            partes.append(cambiadas.astype("<u4").tobytes())
+        partes.append(datos.astype(dtype).tobytes())
+    return b"".join(partes)
+
+
+def decodificar_lecturas(contenido: memoryview, n: int, previas: Dict[str, np.ndarray]
+                         ) -> Tuple[Dict[str, np.ndarray], Dict[str, bool]]:
+    """Lecturas completas de n turbinas (los canales dispersos parten de 'previas').
+    Retorna tambien si cada canal era entero."""
+    lecturas, enteros = {}, {}
+    offset = 0
+    for canal in CANALES:
+        cabecera = np.frombuffer(contenido, dtype=CANAL, count=1, offset=offset)[0]
+        offset += CANAL.itemsize
+        dtype = np.dtype("<" + cabecera["dtype"].decode())
+        cantidad = int(cabecera["cantidad"])
+        if cabecera["disperso"]:
+            indices = np.frombuffer(contenido, dtype="<u4", count=cantidad, offset=offset)
+            offset += 4 * cantidad
+            valores = previas[canal].copy()
+            valores[indices] = np.frombuffer(contenido, dtype=dtype, count=cantidad, offset=offset)
+        else:
+            valores = np.frombuffer(contenido, dtype=dtype, count=cantidad, offset=offset).astype(np.float64)
+        offset += dtype.itemsize * cantidad
+        if len(valores) != n:
+            raise ValueError(f"Lecturas de {len(valores)} turbinas para un parque de {n}.")
+        lecturas[canal] = valores
+        enteros[canal] = dtype.kind == "i"
+    return lecturas, enteros
+
+
+def _codificar_falla(falla: Any) -> Dict[str, Any]:
+    return {"clase": type(falla).__name__, "ubicacion": str(falla.ubicacion), "mensaje": str(falla.mensaje),
+            "nivel": str(falla.nivel_peligro), "timestamp": falla.timestamp}
+
+
+def _decodificar_falla(datos: Dict[str, Any]) -> Falla:
+    clase = next((c for c in CLASES_FALLA if c.__name__ == datos["clase"]), Falla)
+    falla = clase.__new__(clase) # Sin __init__: se conserva el timestamp original
+    falla.ubicacion, falla.mensaje, falla.nivel_peligro = datos["ubicacion"], datos["mensaje"], datos["nivel"]
+    falla.timestamp = datos["timestamp"]
+    falla.id_ag = None
+    return falla
+
+
+class Bitacora:
+    """Registra las entradas de un SimuladorController en 'directorio' (ver el formato arriba).
+    La habilita SimuladorController.habilitar_bitacora; arranca con una instantanea del estado actual.
+    """
+    def __init__(self, controller, directorio: str, instantanea_cada: int = 3600):
+        self.controller = controller
+        self.directorio = directorio
+        self.instantanea_cada = instantanea_cada
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, ARCHIVO)
+        if os.path.exists(ruta) and os.path.getsize(ruta):
+            raise ValueError(f"{directorio} ya contiene una bitacora.")
+        self.instantaneas = GestorCheckpoints(controller, os.path.join(directorio, INSTANTANEAS),
+                                              completo_cada=1, conservar=None)
+        self._lock = threading.Lock() # Comandos desde otros hilos (servidor)
+        self._archivo = open(ruta, "wb")
+        meta = json.dumps({"motor": controller.motor, "tick": controller.tick, "dt": controller.dt}).encode("utf-8")
+        self._archivo.write(np.array((MAGIC, VERSION, len(meta)), dtype=CABECERA).tobytes() + meta)
+        self._previas: Optional[Dict[str, np.ndarray]] = None
+        self._tick_instantanea = controller.tick
+        self._instantanea()
+        self.instantaneas.esperar() # Sin la primera no se puede reproducir nada
+
+    # --- Entradas ---
+    def comando(self, ag, accion: str, falla: Any = None, componente: Optional[str] = None) -> None:
+        """Comando sobre un AG (lo llama AerogeneradorBase antes de aplicarlo)."""
+        datos: Dict[str, Any] = {"id": ag.id_a, "accion": accion}
+        if falla is not None:
+            datos["falla"] = _codificar_falla(falla)
+            datos["componente"] = componente
+        self._escribir(COMANDO, self.controller.tick, json.dumps(datos).encode("utf-8"))
+
+    def alta(self, tipo: str) -> None:
+        """Alta de una turbina (antes de crearla: su parada inicial no se registra como comando)."""
+        self._escribir(ALTA, self.controller.tick, json.dumps({"tipo": tipo}).encode("utf-8"))
+
+    def al_avanzar(self, tick: int, viento: np.ndarray, temp: np.ndarray) -> None:
+        """Lecturas usadas en el tick; cada 'instantanea_cada' ticks, una instantanea."""
+        lecturas = {"viento": viento, "temp": temp}
+        self._escribir(LECTURAS, tick, codificar_lecturas(lecturas, self._previas))
+        self._previas = {canal: valores.copy() for canal, valores in lecturas.items()}
+        if (self.instantanea_cada and tick - self._tick_instantanea >= self.instantanea_cada
+                and not self.instantaneas.en_curso()):
+            self._tick_instantanea = tick
+            self._instantanea()
+        self._archivo.flush()
+
+    def _instantanea(self) -> None:
+        self.instantaneas.guardar(completo=True)
+        secuencia = json.dumps({"secuencia": self.instantaneas.secuencia}).encode("utf-8")
+        self._escribir(INSTANTANEA, self.controller.tick, secuencia)
+        self._previas = None # El registro siguiente va completo: la reproduccion puede empezar ahi
+
+    def _escribir(self, tipo: int, tick: int, contenido: bytes) -> None:
+        with self._lock:
+            self._archivo.write(np.array((tipo, len(contenido), tick), dtype=REGISTRO).tobytes())
+            self._archivo.write(contenido)
+
+    def cerrar(self) -> None:
+        self.instantaneas.esperar()
+        with self._lock:
+            self._archivo.close()
+
+
+class FuenteBitacora(FuenteSensor):
+    """Lecturas cargadas por el Reproductor antes de cada tick."""
+    def __init__(self):
+        self.valores: Dict[str, np.ndarray] = {canal: np.zeros(0) for canal in CANALES}
+        self.enteros: Dict[str, bool] = dict.fromkeys(CANALES, True)
+
+    def avanzar(self) -> None:
+        pass # Las lecturas ya las cargo el Reproductor
+
+    def leer(self, canal: str, indice: int) -> float:
+        valor = self.valores[canal][indice]
+        # Los sensores propios sortean enteros: mismo tipo que en la corrida original
+        return int(valor) if self.enteros[canal] else float(valor)
+
+    def leer_lote(self, canal: str, n: int) -> np.ndarray:
+        return self.valores[canal][:n]
+
+
+class Reproductor:
+    """Reproduce una bitacora sobre un controlador restaurado de sus instantaneas.
+    ir_a(tick) deja self.controller en el estado del final de ese tick; paso() ejecuta el tick siguiente.
+    """
+    def __init__(self, directorio: str, procesos: Optional[int] = None):
+        self.directorio = directorio
+        self.procesos = procesos
+        with open(os.path.join(directorio, ARCHIVO), "rb") as f:
+            self._datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        cabecera = np.frombuffer(self._datos, dtype=CABECERA, count=1)[0]
+        if cabecera["magic"] != MAGIC or cabecera["version"] != VERSION:
+            raise ValueError(f"{directorio}: no es una bitacora (version {VERSION}).")
+        inicio = CABECERA.itemsize + int(cabecera["largo_meta"])
+        self.meta = json.loads(self._datos[CABECERA.itemsize:inicio].decode("utf-8"))
+        self._registros = self._indexar(inicio) # (tipo, tick, offset, largo)
+        # (tick, posicion del registro INSTANTANEA, secuencia)
+        self._instantaneas = [(tick, k, json.loads(self._contenido(k).tobytes())["secuencia"])
+                              for k, (tipo, tick, _, _) in enumerate(self._registros) if tipo == INSTANTANEA]
+        ticks = [tick for tipo, tick, _, _ in self._registros if tipo == LECTURAS]
+        self.tick_inicial = self._instantaneas[0][0] if self._instantaneas else self.meta["tick"]
+        self.tick_final = ticks[-1] if ticks else self.tick_inicial
+        self.controller = None
+        self.fuente = FuenteBitacora()
+        self._siguiente = 0 # Proximo registro a aplicar
+        self._lecturas: Dict[str, np.ndarray] = {}
+
+    def _indexar(self, offset: int) -> List[Tuple[int, int, int, int]]:
+        registros = []
+        while offset + REGISTRO.itemsize <= len(self._datos):
+            tipo, largo, tick = np.frombuffer(self._datos, dtype=REGISTRO, count=1, offset=offset)[0].tolist()
+            offset += REGISTRO.itemsize
+            if offset + largo > len(self._datos):
+                break # Registro truncado (la corrida se corto mientras escribia)
+            registros.append((tipo, tick, offset, largo))
+            offset += largo
+        return registros
+
+    def _contenido(self, k: int) -> memoryview:
+        _, _, offset, largo = self._registros[k]
+        return memoryview(self._datos)[offset:offset + largo]
+
+    # --- Navegacion ---
+    def ir_a(self, tick: int):
+        """Estado al final de 'tick' (antes de los comandos dados hasta el tick siguiente).
+        Restaura la instantanea mas cercana, salvo que avanzar desde el estado actual sea mas corto."""
+        if not self.tick_inicial <= tick <= self.tick_final:
+            raise ValueError(f"Tick fuera de la bitacora ({self.tick_inicial}..{self.tick_final}).")
+        candidatas = [i for i in self._instantaneas if i[0] <= tick]
+        actual = self.controller.tick if self.controller is not None else None
+        for tick_instantanea, k, secuencia in reversed(candidatas):
+            if actual is not None and tick_instantanea <= actual <= tick:
+                break # Seguir desde el estado actual no requiere restaurar
+            ruta = _ruta(os.path.join(self.directorio, INSTANTANEAS), secuencia)
+            if os.path.exists(ruta):
+                self._restaurar(ruta, k)
+                break
+        else:
+            if actual is None or actual > tick:
+                raise ValueError(f"No hay instantaneas anteriores al tick {tick}.")
+        while self.controller.tick < tick:
+            if not self.paso():
+                break
+        return self.controller
+
+    def _restaurar(self, ruta: str, k: int) -> None:
+        from controlador import SimuladorController # Evita la importacion circular
+        if self.controller is not None:
+            self.controller.cerrar()
+        self.controller = SimuladorController.restaurar(ruta, self.procesos)
+        self.controller.conectar_fuente(self.fuente)
+        self._siguiente = k + 1
+        self._lecturas = {}
+
+    def paso(self) -> bool:
+        """Aplica los comandos y altas pendientes y ejecuta el tick siguiente. False al final de la bitacora."""
+        while self._siguiente < len(self._registros):
+            k = self._siguiente
+            tipo, tick, _, _ = self._registros[k]
+            self._siguiente += 1
+            if tipo == COMANDO:
+                self._aplicar_comando(json.loads(self._contenido(k).tobytes()))
+            elif tipo == ALTA:
+                self.controller.agregar_aerogenerador(json.loads(self._contenido(k).tobytes())["tipo"])
+            elif tipo == LECTURAS:
+                n = len(self.controller.ags)
+                self._lecturas, enteros = decodificar_lecturas(self._contenido(k), n, self._lecturas)
+                self.fuente.valores = self._lecturas
+                self.fuente.enteros = enteros
+                self.controller.avanzar_ciclo_simulacion()
+                if self.controller.tick != tick:
+                    raise ValueError(f"La bitacora esperaba el tick {tick} y el controlador esta en "
+                                     f"{self.controller.tick}.")
+                return True
+        return False
+
+    def _aplicar_comando(self, datos: Dict[str, Any]) -> None:
+        ag = self.controller.buscar(datos["id"])
+        if ag is None:
+            raise ValueError(f"Comando sobre el AG {datos['id']}, que no existe en el parque.")
+        accion = datos["accion"]
+        if accion == "marcha":
+            ag.solicitar_marcha()
+        elif accion == "parada":
+            ag.forzar_parada_manual()
+        elif accion == "mantenimiento":
+            ag.realizar_mantenimiento()
+        elif accion == "falla":
+            ag.registrar_falla_externa(_decodificar_falla(datos["falla"]), datos.get("componente"))
+        elif accion == "advertencia":
+            ag.registrar_advertencia(_decodificar_falla(datos["falla"]), datos.get("componente"))
+        elif accion == "reparacion":
+            componente = datos.get("componente")
+            parte = ag._buscar_parte(componente)
+            falla = next((f for f in parte.fallas_activas if _codificar_falla(f) == datos["falla"]), None)
+            if falla is None:
+                raise ValueError(f"Reparacion de una falla que el AG {ag.id_a} no tiene activa.")
+            ag.reparar_falla(falla, componente)
+        else:
+            raise ValueError(f"Accion desconocida en la bitacora: {accion}")
+
+    def ejecutar(self, hasta: Optional[int] = None, factor: float = 0.0) -> Iterator[int]:
+        """Avanza hasta 'hasta' (por defecto, el final) a 'factor' veces el tiempo real (0: sin esperas).
+        Genera el tick alcanzado despues de cada paso."""
+        hasta = self.tick_final if hasta is None else hasta
+        if self.controller is None:
+            self.ir_a(self.tick_inicial)
+        periodo = self.controller.dt / factor if factor else 0.0
+        inicio = time.perf_counter()
+        pasos = 0
+        while self.controller.tick < hasta and self.paso():
+            pasos += 1
+            yield self.controller.tick
+            if periodo:
+                espera = inicio + pasos * periodo - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+
+    def cerrar(self) -> None:
+        if self.controller is not None:
+            self.controller.cerrar()
+        self._datos.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reproduce una bitacora de simulacion.")
+    parser.add_argument("directorio", help="Directorio de la bitacora (bitacora.jrn e instantaneas/).")
+    parser.add_argument("--desde", type=int, default=None, help="Tick desde el cual reproducir.")
+    parser.add_argument("--hasta", type=int, default=None, help="Tick final (por defecto, el ultimo).")
+    parser.add_argument("--factor", type=float, default=0.0,
+                        help="Multiplo del tiempo real (0 = lo mas rapido posible).")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del motor distribuido.")
+    parser.add_argument("--seguir", type=int, default=None, help="Id de un AG cuyos cambios de estado mostrar.")
+    parser.add_argument("--alarmas", action="store_true", help="Mostrar las alarmas reproducidas.")
+    args = parser.parse_args(argv)
+
+    if not args.alarmas:
+        AlarmManager.configurar(sinks=[])
+    reproductor = Reproductor(args.directorio, args.procesos)
+    try:
+        inicio = time.perf_counter()
+        controller = reproductor.ir_a(reproductor.tick_inicial if args.desde is None else args.desde)
+        desde = controller.tick
+        anterior = None
+        for tick in reproductor.ejecutar(args.hasta, args.factor):
+            if args.seguir is not None:
+                ag = reproductor.controller.buscar(args.seguir)
+                estado = None if ag is None else ag.get_estado()
+                if estado != anterior:
+                    print(f"{tick}\tAG{args.seguir}\t{estado}")
+                    anterior = estado
+        segundos = time.perf_counter() - inicio
+        controller = reproductor.controller
+        print(f"ticks {desde}..{controller.tick} ({len(controller.ags)} AG) en {segundos:.2f} s, "
+              f"estados {controller.contar_estados()}", file=sys.stderr)
+    finally:
+        reproductor.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
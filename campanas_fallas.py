@@ -0,0 +1,190 @@
+# campanas_fallas.py
+"""Campanas de inyeccion de fallas con modelos de confiabilidad.
+
+Cada ModoFalla asigna a un componente (Buje, Gondola, Torre) y una clase de falla (FallaMecanica,
+FallaElectrica) una distribucion del tiempo entre fallas (MTBF) y, opcionalmente, del tiempo de
+reparacion (MTTR), en horas. Al habilitar la campana se sortea la primera falla de cada modo en cada
+turbina del parque y todas van a una sola cola de prioridad (heap por tick). En cada tick solo se
+miran los eventos vencidos: las fallas entran por registrar_falla_externa y cada reparacion quita con
+reparar_falla solo las fallas que puso la campana en esa turbina, sin recorrer el parque. Las fallas
+de otros origenes (operador, vibracion, anomalias) y la parada manual no se tocan.
+"""
+import heapq
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+import numpy as np
+from fallas import Falla, FallaElectrica, FallaMecanica
+
+COMPONENTES = ("Buje", "Gondola", "Torre")
+HORAS_POR_ANIO = 8760
+# Tipo de evento; en un mismo tick las reparaciones van antes que las fallas nuevas
+REPARACION, FALLA = 0, 1
+
+
+class DistribucionTiempo(ABC): #Abstraccion
+    """Distribucion de un tiempo (en horas)."""
+    @abstractmethod
+    def sortear(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        pass
+
+    @property
+    @abstractmethod
+    def media(self) -> float:
+        pass
+
+
+class Exponencial(DistribucionTiempo):
+    """Tasa constante (fallas aleatorias): sin memoria."""
+    def __init__(self, media_horas: float):
+        if media_horas <= 0:
+            raise ValueError("La media debe ser positiva.")
+        self._media = media_horas
+
+    def sortear(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return rng.exponential(self._media, n)
+
+    @property
+    def media(self) -> float:
+        return self._media
+
+
+class Weibull(DistribucionTiempo):
+    """Weibull de forma k (k > 1: desgaste, k < 1: mortalidad infantil) con la media indicada."""
+    def __init__(self, forma: float, media_horas: float):
+        if forma <= 0 or media_horas <= 0:
+            raise ValueError("Forma y media deben ser positivas.")
+        self.forma = forma
+        self.escala = media_horas / math.gamma(1 + 1 / forma)
+
+    def sortear(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return self.escala * rng.weibull(self.forma, n)
+
+    @property
+    def media(self) -> float:
+        return self.escala * math.gamma(1 + 1 / self.forma)
+
+
+class ModoFalla(NamedTuple):
+    """Como falla un componente. Sin 'reparacion' la turbina queda detenida hasta un mantenimiento manual
+    y la proxima falla del modo se sortea desde la anterior."""
+    componente: str
+    clase: Type[Falla]
+    entre_fallas: DistribucionTiempo
+    reparacion: Optional[DistribucionTiempo] = None
+    mensaje: str = "Falla por desgaste"
+    nivel: Optional[str] = None # Por defecto, el de la clase de falla
+
+
+# Campana de referencia (tiempos en horas)
+MODOS_POR_DEFECTO: Tuple[ModoFalla, ...] = (
+    ModoFalla("Buje", FallaMecanica, Weibull(1.5, 3 * HORAS_POR_ANIO), Exponencial(72), "Desgaste de rodamiento de pala"),
+    ModoFalla("Buje", FallaElectrica, Exponencial(2 * HORAS_POR_ANIO), Exponencial(12), "Falla del sistema de pitch"),
+    ModoFalla("Gondola", FallaMecanica, Weibull(1.2, 4 * HORAS_POR_ANIO), Exponencial(96), "Falla de caja multiplicadora"),
+    ModoFalla("Gondola", FallaElectrica, Exponencial(HORAS_POR_ANIO), Exponencial(8), "Falla del convertidor"),
+    ModoFalla("Torre", FallaMecanica, Weibull(2.0, 20 * HORAS_POR_ANIO), Exponencial(240), "Fisura estructural"),
+    ModoFalla("Torre", FallaElectrica, Exponencial(10 * HORAS_POR_ANIO), Exponencial(24), "Falla del transformador"),
+)
+
+
+class CampanaFallas:
+    """Cola unica de eventos de falla y reparacion de todo el parque (fila i = controller.ags[i]).
+    'aceleracion' divide los tiempos entre fallas (pruebas de estres: 1000 = mil anios de fallas por anio).
+    """
+    def __init__(self, controller, modos: Sequence[ModoFalla] = MODOS_POR_DEFECTO,
+                 semilla: Optional[int] = None, aceleracion: float = 1.0):
+        for modo in modos:
+            if modo.componente not in COMPONENTES:
+                raise ValueError(f"Componente desconocido: {modo.componente}")
+        if aceleracion <= 0:
+            raise ValueError("La aceleracion debe ser positiva.")
+        self.controller = controller
+        self.modos = list(modos)
+        self.aceleracion = aceleracion
+        self.rng = np.random.default_rng(semilla)
+        self._cola: List[Tuple[int, int, int, int, int]] = [] # (tick, tipo, secuencia, fila, modo)
+        self._secuencia = 0
+        self._fin_reparacion: Dict[int, int] = {} # fila -> tick de la reparacion vigente
+        self._en_reparacion: Dict[int, List[Tuple[str, Falla]]] = {} # fila -> (componente, falla) que cubre
+        self.fallas_por_modo = [0] * len(self.modos)
+        self.reparaciones = 0
+        self.agregar_turbinas(0, len(controller.ags))
+
+    def _ticks(self, horas: np.ndarray) -> np.ndarray:
+        """Horas -> ticks del controlador (al menos 1)."""
+        return np.maximum(1, np.ceil(horas * 3600 / self.controller.dt)).astype(np.int64)
+
+    def agregar_turbinas(self, inicio: int, cantidad: int) -> None:
+        """Sortea la primera falla de cada modo para las filas inicio .. inicio + cantidad - 1."""
+        if cantidad <= 0:
+            return
+        ahora = self.controller.tick
+        filas = range(inicio, inicio + cantidad)
+        eventos = []
+        for m, modo in enumerate(self.modos):
+            ticks = ahora + self._ticks(modo.entre_fallas.sortear(self.rng, cantidad) / self.aceleracion)
+            for fila, tick in zip(filas, ticks.tolist()):
+                eventos.append((tick, FALLA, self._secuencia, fila, m))
+                self._secuencia += 1
+        if self._cola:
+            for evento in eventos:
+                heapq.heappush(self._cola, evento)
+        else: # Alta inicial: se arma el heap de una vez, O(n)
+            heapq.heapify(eventos)
+            self._cola = eventos
+
+    def _programar(self, tick: int, tipo: int, fila: int, modo: int) -> None:
+        heapq.heappush(self._cola, (tick, tipo, self._secuencia, fila, modo))
+        self._secuencia += 1
+
+    def al_avanzar(self, tick: int) -> None:
+        """Aplica los eventos vencidos hasta 'tick' inclusive (el controlador lo llama al final del tick)."""
+        cola = self._cola
+        while cola and cola[0][0] <= tick:
+            vence, tipo, _, fila, m = heapq.heappop(cola)
+            if tipo == FALLA:
+                self._fallar(vence, fila, m)
+            elif self._fin_reparacion.get(fila) == vence: # Las reparaciones reemplazadas quedan obsoletas
+                del self._fin_reparacion[fila]
+                ag = self.controller.ags[fila]
+                cubiertas = self._en_reparacion.pop(fila)
+                reparadas = [ag.reparar_falla(falla, componente) for componente, falla in cubiertas]
+                if any(reparadas): # Puede haberlas reparado antes un operador
+                    self.reparaciones += 1
+
+    def _fallar(self, tick: int, fila: int, m: int) -> None:
+        modo = self.modos[m]
+        falla = modo.clase(modo.componente, modo.mensaje) if modo.nivel is None else \
+            modo.clase(modo.componente, modo.mensaje, modo.nivel)
+        falla.timestamp = self.controller.tiempo_simulado()
+        self.controller.ags[fila].registrar_falla_externa(falla, modo.componente)
+        self.fallas_por_modo[m] += 1
+
+        siguiente = tick # La proxima falla del modo se cuenta desde la reparacion (tiempo en operacion)
+        if modo.reparacion is not None:
+            fin = tick + int(self._ticks(modo.reparacion.sortear(self.rng, 1))[0])
+            fin = max(fin, self._fin_reparacion.get(fila, fin)) # Una sola reparacion cubre las fallas superpuestas
+            self._fin_reparacion[fila] = fin
+            self._en_reparacion.setdefault(fila, []).append((modo.componente, falla))
+            self._programar(fin, REPARACION, fila, m)
+            siguiente = fin
+        siguiente += int(self._ticks(modo.entre_fallas.sortear(self.rng, 1) / self.aceleracion)[0])
+        self._programar(siguiente, FALLA, fila, m)
+
+    # --- Consultas ---
+    def pendientes(self) -> int:
+        """Eventos en la cola (incluye reparaciones obsoletas)."""
+        return len(self._cola)
+
+    def proximo_evento(self) -> Optional[int]:
+        """Tick del proximo evento, o None."""
+        return self._cola[0][0] if self._cola else None
+
+    def resumen(self) -> Dict[str, int]:
+        """Fallas disparadas por componente y clase, y reparaciones."""
+        conteo: Dict[str, int] = {}
+        for modo, cantidad in zip(self.modos, self.fallas_por_modo):
+            clave = f"{modo.componente}/{modo.clase.__name__}"
+            conteo[clave] = conteo.get(clave, 0) + cantidad
+        conteo["reparaciones"] = self.reparaciones
+        return conteo
@@ -0,0 +1,193 @@
+# campo_viento.py
+import math
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from sensores import FuenteSensor
+
+
+class CampoViento(FuenteSensor):
+    """Modelo de viento a nivel parque: todas las velocidades de un tick salen de un solo sorteo.
+
+    velocidad_i(t) = U(t) * (1 + TI * x_i(t)) * estela_i
+      - U(t): viento medio del parque, marginal Weibull(k, c) con persistencia AR(1) (tau_clima).
+      - x_i(t): turbulencia AR(1) (tau_turbulencia) con innovaciones correlacionadas en el espacio
+        (ruido compartido sobre una grilla de paso 'longitud_correlacion', interpolado bilinealmente).
+      - estela_i: deficit de estela de Jensen desde las turbinas aguas arriba (direccion fija).
+    """
+    def __init__(self, weibull_k: float = 2.0, weibull_c: float = 9.0, tau_clima: float = 3600.0,
+                 intensidad_turbulencia: float = 0.12, tau_turbulencia: float = 30.0,
+                 longitud_correlacion: float = 500.0, fraccion_compartida: float = 0.7,
+                 direccion: float = 270.0, diametro_rotor: float = 90.0, coef_empuje: float = 0.8,
+                 k_estela: float = 0.075, dt: float = 1.0, semilla: Optional[int] = None):
+        self.weibull_k = weibull_k
+        self.weibull_c = weibull_c
+        self.tau_clima = tau_clima
+        self.intensidad_turbulencia = intensidad_turbulencia
+        self.tau_turbulencia = tau_turbulencia
+        self.longitud_correlacion = longitud_correlacion
+        self.fraccion_compartida = fraccion_compartida
+        self.diametro_rotor = diametro_rotor
+        self.coef_empuje = coef_empuje
+        self.k_estela = k_estela
+        self.dt = dt
+        self.rng = np.random.default_rng(semilla)
+
+        self.n = 0
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.turbulencia = np.zeros(0)
+        self.velocidades = np.zeros(0)
+        self._z_clima = float(self.rng.standard_normal())
+        self.viento_medio = self._weibull(self._z_clima)
+        self._direccion = direccion
+        self._estela = np.ones(0)
+        self._geometria_sucia = True
+
+    # --- Disposicion del parque ---
+    @staticmethod
+    def posicion_grilla(i: int, columnas: int = 10, separacion_x: float = 630.0,
+                        separacion_y: float = 450.0) -> Tuple[float, float]:
+        """Layout por defecto: filas de 'columnas' AG (7 D x 5 D con D = 90 m)."""
+        return (i % columnas) * separacion_x, (i // columnas) * separacion_y
+
+    def agregar_turbina(self, x: float, y: float) -> int:
+        """Agrega una turbina en (x, y) metros. Retorna su indice en el campo."""
+        return self.agregar_turbinas([x], [y])
+
+    def agregar_turbinas(self, xs: Sequence[float], ys: Sequence[float]) -> int:
+        """Agrega varias turbinas de una vez. Retorna el indice de la primera."""
+        inicio = self.n
+        xs = np.asarray(xs, dtype=float)
+        self.x = np.concatenate([self.x, xs])
+        self.y = np.concatenate([self.y, np.asarray(ys, dtype=float)])
+        self.turbulencia = np.concatenate([self.turbulencia, self.rng.standard_normal(len(xs))])
+        self.velocidades = np.concatenate([self.velocidades, np.full(len(xs), self.viento_medio)])
+        self.n = len(self.x)
+        self._geometria_sucia = True # Las estelas se recalculan en el proximo avanzar()
+        return inicio
+
+    @property
+    def direccion(self) -> float:
+        return self._direccion
+
+    @direccion.setter
+    def direccion(self, grados: float) -> None:
+        """Direccion meteorologica (de donde viene el viento), en grados."""
+        self._direccion = grados
+        self._geometria_sucia = True
+
+    # --- Paso de tiempo ---
+    def avanzar(self) -> np.ndarray:
+        """Genera las velocidades de todas las turbinas para el proximo tick."""
+        if self._geometria_sucia:
+            self._preparar_geometria()
+
+        # Clima: AR(1) latente -> marginal Weibull
+        phi = math.exp(-self.dt / self.tau_clima)
+        self._z_clima = phi * self._z_clima + math.sqrt(1 - phi * phi) * float(self.rng.standard_normal())
+        self.viento_medio = self._weibull(self._z_clima)
+
+        # Turbulencia: AR(1) por turbina con innovaciones correlacionadas espacialmente
+        phi = math.exp(-self.dt / self.tau_turbulencia)
+        ruido_grilla = self.rng.standard_normal(self._nodos)
+        compartido = (ruido_grilla[self._vecinos] * self._pesos).sum(axis=1)
+        local = self.rng.standard_normal(self.n)
+        f = self.fraccion_compartida
+        innovacion = math.sqrt(f) * compartido + math.sqrt(1 - f) * local
+        self.turbulencia = phi * self.turbulencia + math.sqrt(1 - phi * phi) * innovacion
+
+        v = self.viento_medio * (1 + self.intensidad_turbulencia * self.turbulencia) * self._estela
+        np.maximum(v, 0.0, out=v)
+        self.velocidades = v
+        return v
+
+    def factores_estela(self) -> np.ndarray:
+        """Factor de estela (0, 1] de cada turbina para la direccion actual."""
+        if self._geometria_sucia:
+            self._preparar_geometria()
+        return self._estela.copy()
+
+    def velocidad(self, indice: int) -> float:
+        return float(self.velocidades[indice])
+
+    # --- FuenteSensor ---
+    def leer(self, canal: str, indice: int) -> float:
+        return float(self.velocidades[indice])
+
+    def leer_lote(self, canal: str, n: int) -> np.ndarray:
+        return self.velocidades[:n]
+
+    def registrar_turbinas(self, inicio: int, ids: Sequence[int]) -> None:
+        """Las turbinas sin posicion se ubican con posicion_grilla."""
+        faltantes = range(self.n, inicio + len(ids))
+        if faltantes:
+            xs, ys = zip(*(self.posicion_grilla(i) for i in faltantes))
+            self.agregar_turbinas(xs, ys)
+
+    def _weibull(self, z: float) -> float:
+        """Cuantil Weibull de una normal estandar (transformacion de probabilidad)."""
+        u = 0.5 * math.erfc(-z / math.sqrt(2)) # Phi(z)
+        u = min(u, 1 - 1e-12)
+        return self.weibull_c * (-math.log(1 - u)) ** (1 / self.weibull_k)
+
+    # --- Geometria: grilla de correlacion y estelas (se calculan una vez) ---
+    def _preparar_geometria(self) -> None:
+        self._preparar_grilla()
+        self._estela = self._calcular_estelas()
+        self._geometria_sucia = False
+
+    def _preparar_grilla(self) -> None:
+        """Pesos bilineales de cada turbina sobre los 4 nodos de grilla que la rodean."""
+        L = self.longitud_correlacion
+        if self.n == 0:
+            self._nodos, self._vecinos, self._pesos = 1, np.zeros((0, 4), dtype=np.int64), np.zeros((0, 4))
+            return
+        gx = (self.x - self.x.min()) / L
+        gy = (self.y - self.y.min()) / L
+        ix, iy = np.floor(gx).astype(np.int64), np.floor(gy).astype(np.int64)
+        fx, fy = gx - ix, gy - iy
+        ancho = int(ix.max()) + 2
+        self._nodos = ancho * (int(iy.max()) + 2)
+        base = iy * ancho + ix
+        self._vecinos = np.stack([base, base + 1, base + ancho, base + ancho + 1], axis=1)
+        pesos = np.stack([(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy], axis=1)
+        # Normalizacion para que el ruido compartido siga siendo N(0, 1)
+        self._pesos = pesos / np.sqrt((pesos ** 2).sum(axis=1, keepdims=True))
+
+    def _calcular_estelas(self, alcance_diametros: float = 20.0) -> np.ndarray:
+        """Factor (0, 1] por turbina: modelo de Jensen, deficits combinados por suma cuadratica.
+        Solo se evaluan pares dentro de 'alcance_diametros' usando celdas (no es O(n^2) global).
+        """
+        n = self.n
+        if n < 2:
+            return np.ones(n)
+        D = self.diametro_rotor
+        theta = math.radians(self._direccion)
+        # Vector hacia donde sopla el viento (direccion meteorologica: de donde viene)
+        ux, uy = -math.sin(theta), -math.cos(theta)
+        a = self.x * ux + self.y * uy     # coordenada a favor del viento
+        c = -self.x * uy + self.y * ux    # coordenada transversal
+        deficit_inicial = 1 - math.sqrt(1 - self.coef_empuje)
+        alcance = alcance_diametros * D
+
+        celda_a = np.floor(a / alcance).astype(np.int64)
+        celda_c = np.floor(c / alcance).astype(np.int64)
+        celdas = {}
+        for i, clave in enumerate(zip(celda_a.tolist(), celda_c.tolist())):
+            celdas.setdefault(clave, []).append(i)
+        celdas = {k: np.array(v) for k, v in celdas.items()}
+
+        suma_cuadrados = np.zeros(n)
+        for (ca, cc), abajo in celdas.items():
+            # Candidatas aguas arriba: misma fila de celdas o la anterior, celdas transversales vecinas
+            arriba = [celdas[k] for k in ((ca - da, cc + dc) for da in (0, 1) for dc in (-1, 0, 1)) if k in celdas]
+            if not arriba:
+                continue
+            arriba = np.concatenate(arriba)
+            dx = a[abajo][:, None] - a[arriba][None, :]
+            dy = np.abs(c[abajo][:, None] - c[arriba][None, :])
+            radio = D / 2 + self.k_estela * dx
+            dentro = (dx > 0) & (dx <= alcance) & (dy < radio)
+            deficit = np.where(dentro, deficit_inicial * (D / (D + 2 * self.k_estela * np.maximum(dx, 0))) ** 2, 0.0)
+            suma_cuadrados[abajo] += (deficit ** 2).sum(axis=1)
+        return np.clip(1 - np.sqrt(suma_cuadrados), 0.0, 1.0)
@@ -0,0 +1,529 @@
+# checkpoint.py
+"""Checkpoints binarios del estado completo del parque.
+
+Formato de un archivo .ckp (little-endian, version 3):
+  CABECERA | meta (JSON) | tabla de secciones (SECCION) | secciones alineadas a 64 bytes
+Cada seccion es un array NumPy de una o dos dimensiones; la restauracion lee el archivo de una vez y
+arma cada seccion con np.frombuffer, sin recorrer registros.
+Un checkpoint COMPLETO guarda todas las filas. Uno INCREMENTAL guarda solo las filas que cambiaron
+(estado, fallas o historial) desde el ultimo completo, que se identifica por su numero de secuencia;
+las lecturas de sensores, los KPI (si estan habilitados) y la ventana de alarmas van siempre completos.
+"""
+import json
+import mmap
+import os
+import random
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from aerogenerador import AerogeneradorBase, AG_AltaPotencia, AG_BajaPotencia
+from alarmas import AlarmManager, EntradaAlarma, RegistroFallasParque
+from curvas import CurvaPotenciaAlta, CurvaPotenciaBaja
+from fallas import Falla, FallaElectrica, FallaMecanica
+from historial import exportar_historiales, importar_historiales
+from kpis import MotorKPI
+from parque_distribuido import ParqueDistribuido
+from parque_vectorizado import CODIGOS_ESTADO
+
+MAGIC = b"CKP1"
+VERSION = 3 # 2: historial por objetos con nivel de muestras crudas; 3: idem en los motores vectorizados
+EXTENSION = ".ckp"
+ALINEACION = 64
+COMPLETO, INCREMENTAL = 0, 1
+
+CABECERA = np.dtype([("magic", "S4"), ("version", "<u2"), ("tipo", "u1"), ("reservado", "u1"),
+                     ("secuencia", "<u8"), ("base", "<u8"), ("largo_meta", "<u8"), ("secciones", "<u4")])
+# forma[1] = -1: seccion de una dimension
+SECCION = np.dtype([("nombre", "S48"), ("dtype", "S8"), ("forma", "<i8", (2,)), ("offset", "<u8")])
+
+# Columnas por turbina ("tipo": 0 = BAJA, 1 = ALTA). Las LECTURAS cambian en cada tick en casi todas
+# las filas: se guardan siempre completas y no cuentan para decidir que filas cambiaron.
+LECTURAS = ("viento", "temp")
+COLUMNAS: Dict[str, type] = {
+    "id_a": np.int64, "tipo": np.int8, "estado": np.int8,
+    "bloqueo_manual": np.bool_, "bloqueo_critico": np.bool_, "timer_rearme": np.int32,
+    "viento": np.float64, "temp": np.float64, "potencia": np.float64, "max_temp": np.float64,
+}
+CLASES_FALLA = (Falla, FallaMecanica, FallaElectrica)
+
+# (fila, parte, falla): fila = indice en controller.ags, parte = indice en ag.partes
+FallaGuardada = Tuple[int, int, Falla]
+
+
+class Imagen(NamedTuple):
+    """Contenido de un checkpoint ya decodificado."""
+    tipo: int
+    secuencia: int
+    base: int
+    meta: dict
+    secciones: Dict[str, np.ndarray]
+    fallas: List[FallaGuardada]
+    alarmas: List[EntradaAlarma]
+
+
+# --- Archivo ---
+def _alinear(offset: int) -> int:
+    return -(-offset // ALINEACION) * ALINEACION
+
+
+def escribir(ruta: str, tipo: int, secuencia: int, base: int, meta: dict,
+             secciones: Dict[str, np.ndarray]) -> int:
+    """Escribe un checkpoint (archivo temporal + rename atomico). Retorna los bytes escritos."""
+    datos_meta = json.dumps(meta).encode("utf-8")
+    tabla = np.zeros(len(secciones), dtype=SECCION)
+    offset = _alinear(CABECERA.itemsize + len(datos_meta) + tabla.nbytes)
+    contenidos = []
+    for j, (nombre, array) in enumerate(secciones.items()):
+        array = np.ascontiguousarray(array)
+        if array.ndim not in (1, 2) or len(nombre.encode()) > SECCION["nombre"].itemsize:
+            raise ValueError(f"Seccion '{nombre}': nombre muy largo o array de mas de dos dimensiones.")
+        columnas = array.shape[1] if array.ndim == 2 else -1
+        tabla[j] = (nombre.encode(), array.dtype.str.encode(), (array.shape[0], columnas), offset)
+        contenidos.append((offset, array))
+        offset = _alinear(offset + array.nbytes)
+    cabecera = np.zeros(1, dtype=CABECERA)
+    cabecera[0] = (MAGIC, VERSION, tipo, 0, secuencia, base, len(datos_meta), len(secciones))
+
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(cabecera.tobytes())
+        f.write(datos_meta)
+        f.write(tabla.tobytes())
+        for inicio, array in contenidos:
+            f.seek(inicio)
+            f.write(array.data)
+        f.truncate(offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+    return offset
+
+
+def leer_cabecera(ruta: str) -> np.void:
+    with open(ruta, "rb") as f:
+        cabecera = np.frombuffer(f.read(CABECERA.itemsize), dtype=CABECERA)
+    if len(cabecera) != 1 or cabecera[0]["magic"] != MAGIC:
+        raise ValueError(f"{ruta}: no es un checkpoint.")
+    if cabecera[0]["version"] != VERSION:
+        raise ValueError(f"{ruta}: version {cabecera[0]['version']} no soportada.")
+    return cabecera[0]
+
+
+def leer(ruta: str) -> Imagen:
+    """Lee un archivo .ckp; las secciones son vistas sobre el archivo mapeado en memoria (copy-on-write:
+    se pueden modificar sin tocar el archivo) y las paginas se leen recien al usarlas."""
+    cabecera = leer_cabecera(ruta)
+    with open(ruta, "rb") as f:
+        datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    inicio = CABECERA.itemsize
+    fin_meta = inicio + int(cabecera["largo_meta"])
+    meta = json.loads(bytes(datos[inicio:fin_meta]).decode("utf-8"))
+    secciones = {}
+    for seccion in np.frombuffer(datos, dtype=SECCION, count=int(cabecera["secciones"]), offset=fin_meta):
+        filas, columnas = (int(x) for x in seccion["forma"])
+        forma = (filas,) if columnas < 0 else (filas, columnas)
+        secciones[seccion["nombre"].decode()] = np.frombuffer(
+            datos, dtype=np.dtype(seccion["dtype"].decode()), count=int(np.prod(forma)),
+            offset=int(seccion["offset"])).reshape(forma)
+    fallas = _decodificar_fallas(secciones)
+    alarmas = _decodificar_alarmas(secciones)
+    return Imagen(int(cabecera["tipo"]), int(cabecera["secuencia"]), int(cabecera["base"]), meta,
+                  secciones, fallas, alarmas)
+
+
+def _ruta(directorio: str, secuencia: int) -> str:
+    return os.path.join(directorio, f"{secuencia:08d}{EXTENSION}")
+
+
+def listar(directorio: str) -> List[int]:
+    """Numeros de secuencia de los checkpoints del directorio, en orden."""
+    if not os.path.isdir(directorio):
+        return []
+    return sorted(int(nombre[:-len(EXTENSION)]) for nombre in os.listdir(directorio)
+                  if nombre.endswith(EXTENSION) and nombre[:-len(EXTENSION)].isdigit())
+
+
+def cargar(ruta: str) -> Imagen:
+    """Imagen de un checkpoint (archivo, o directorio: el mas reciente). Un incremental se aplica
+    sobre su completo, asi que el resultado siempre tiene todas las filas."""
+    if os.path.isdir(ruta):
+        secuencias = listar(ruta)
+        if not secuencias:
+            raise FileNotFoundError(f"{ruta}: no hay checkpoints.")
+        ruta = _ruta(ruta, secuencias[-1])
+    imagen = leer(ruta)
+    if imagen.tipo == INCREMENTAL:
+        imagen = _combinar(leer(_ruta(os.path.dirname(ruta), imagen.base)), imagen)
+    return imagen
+
+
+def _combinar(base: Imagen, incremental: Imagen) -> Imagen:
+    n = incremental.meta["n"]
+    filas = incremental.secciones["filas"]
+    secciones = {"filas": np.arange(n)}
+    for nombre, array in incremental.secciones.items():
+        if not nombre.startswith(("estado.", "historial.")):
+            secciones.setdefault(nombre, array)
+            continue
+        completo = base.secciones[nombre]
+        if len(completo) != n: # Hubo altas: se agranda (las secciones del completo no se pueden estirar)
+            completo = np.concatenate([completo, np.zeros((n - len(completo),) + completo.shape[1:],
+                                                          dtype=completo.dtype)])
+        completo[filas] = array
+        secciones[nombre] = completo
+    reemplazadas = set(filas.tolist())
+    fallas = [f for f in base.fallas if f[0] not in reemplazadas] + incremental.fallas
+    return incremental._replace(tipo=COMPLETO, secciones=secciones, fallas=fallas)
+
+
+# --- Textos, fallas y alarmas ---
+def _empaquetar_textos(textos: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    codificados = [t.encode("utf-8") for t in textos]
+    largos = np.fromiter((len(c) for c in codificados), dtype=np.int64, count=len(codificados))
+    return np.frombuffer(b"".join(codificados), dtype=np.uint8), largos
+
+
+def _desempaquetar_textos(bytes_: np.ndarray, largos: np.ndarray) -> List[str]:
+    datos = bytes_.tobytes()
+    fines = np.cumsum(largos).tolist()
+    return [datos[a:b].decode("utf-8") for a, b in zip([0] + fines[:-1], fines)]
+
+
+def _codificar_fallas(fallas: List[FallaGuardada]) -> Dict[str, np.ndarray]:
+    m = len(fallas)
+    textos, largos = _empaquetar_textos([t for _, _, f in fallas
+                                         for t in (str(f.ubicacion), str(f.mensaje), str(f.nivel_peligro))])
+    clases = [CLASES_FALLA.index(type(f)) if type(f) in CLASES_FALLA else 0 for _, _, f in fallas]
+    return {"fallas.fila": np.array([fila for fila, _, _ in fallas], dtype=np.int64),
+            "fallas.parte": np.array([parte for _, parte, _ in fallas], dtype=np.int8),
+            "fallas.clase": np.array(clases, dtype=np.int8),
+            "fallas.timestamp": np.array([f.timestamp for _, _, f in fallas], dtype=np.float64),
+            "fallas.id_ag": np.array([-1 if f.id_ag is None else f.id_ag for _, _, f in fallas], dtype=np.int64),
+            "fallas.bloqueante": np.array([f.bloqueante for _, _, f in fallas], dtype=np.bool_),
+            "fallas.textos": textos, "fallas.largos": largos.reshape(m, 3)}
+
+
+def _decodificar_fallas(secciones: Dict[str, np.ndarray]) -> List[FallaGuardada]:
+    if "fallas.fila" not in secciones:
+        return []
+    textos = _desempaquetar_textos(secciones["fallas.textos"], secciones["fallas.largos"].ravel())
+    fallas = []
+    for j, (fila, parte, clase, timestamp, id_ag, bloqueante) in enumerate(zip(
+            *(secciones[f"fallas.{c}"].tolist() for c in ("fila", "parte", "clase", "timestamp", "id_ag", "bloqueante")))):
+        falla = CLASES_FALLA[clase].__new__(CLASES_FALLA[clase]) # Sin __init__: se conserva el timestamp
+        falla.ubicacion, falla.mensaje, falla.nivel_peligro = textos[3 * j:3 * j + 3]
+        falla.timestamp = timestamp
+        falla.id_ag = None if id_ag < 0 else id_ag
+        falla.bloqueante = bloqueante
+        fallas.append((fila, parte, falla))
+    return fallas
+
+
+def _codificar_alarmas(alarmas: List[EntradaAlarma]) -> Dict[str, np.ndarray]:
+    textos, largos = _empaquetar_textos([t for e in alarmas for t in (e.nivel, e.mensaje)])
+    return {"alarmas.t": np.array([e.t for e in alarmas], dtype=np.float64),
+            "alarmas.id_ag": np.array([-1 if e.id_ag is None else e.id_ag for e in alarmas], dtype=np.int64),
+            "alarmas.textos": textos, "alarmas.largos": largos.reshape(len(alarmas), 2)}
+
+
+def _decodificar_alarmas(secciones: Dict[str, np.ndarray]) -> List[EntradaAlarma]:
+    if "alarmas.t" not in secciones:
+        return []
+    textos = _desempaquetar_textos(secciones["alarmas.textos"], secciones["alarmas.largos"].ravel())
+    return [EntradaAlarma(t, None if id_ag < 0 else id_ag, textos[2 * j], textos[2 * j + 1])
+            for j, (t, id_ag) in enumerate(zip(secciones["alarmas.t"].tolist(), secciones["alarmas.id_ag"].tolist()))]
+
+
+# --- Captura ---
+def _columnas(controller) -> Dict[str, np.ndarray]:
+    """Columnas de todo el parque (en los motores vectorizados, vistas sobre sus arrays)."""
+    parque = controller.parque
+    if parque is not None:
+        n = parque.n
+        altas = np.array([isinstance(c, CurvaPotenciaAlta) for c in parque._curvas], dtype=np.int8)
+        columnas = {campo: getattr(parque, campo)[:n] for campo in COLUMNAS if campo != "tipo"}
+        columnas["tipo"] = altas[parque.tipo[:n]]
+        return columnas
+    ags = controller.ags
+    lectores = {
+        "id_a": lambda ag: ag.id_a, "tipo": lambda ag: isinstance(ag, AG_AltaPotencia),
+        "estado": lambda ag: CODIGOS_ESTADO[ag._estado],
+        "bloqueo_manual": lambda ag: ag._bloqueo_manual, "bloqueo_critico": lambda ag: ag._bloqueo_critico,
+        "timer_rearme": lambda ag: ag.get_timer_rearme(), # Sincroniza las turbinas dormidas del planificador
+        "viento": lambda ag: ag.obtener_viento(), "temp": lambda ag: ag.obtener_temp(),
+        "potencia": lambda ag: ag.potencia_actual, "max_temp": lambda ag: ag.MAX_TEMP,
+    }
+    return {campo: np.fromiter((leer(ag) for ag in ags), dtype=COLUMNAS[campo], count=len(ags))
+            for campo, leer in lectores.items()}
+
+
+def _fallas(controller) -> Dict[int, List[Tuple[int, Falla]]]:
+    """Fila -> [(parte, falla)] de las turbinas con fallas activas (las indica el registro del parque)."""
+    ids = controller.turbinas_con_falla()
+    if not ids:
+        return {}
+    parque = controller.parque
+    if parque is not None:
+        filas = np.flatnonzero(np.isin(parque.id_a[:parque.n], list(ids))).tolist()
+    else:
+        filas = [i for i, ag in enumerate(controller.ags) if ag.id_a in ids]
+    return {i: [(k, f) for k, parte in enumerate(controller.ags[i].partes) for f in parte.fallas_activas]
+            for i in filas}
+
+
+def _firma(fallas: List[Tuple[int, Falla]]) -> tuple:
+    return tuple((k, type(f), f.ubicacion, f.mensaje, f.nivel_peligro, f.timestamp, f.id_ag, f.bloqueante) for k, f in fallas)
+
+
+def _distintas(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    distintas = a != b
+    if a.dtype.kind == "f":
+        distintas &= ~(np.isnan(a) & np.isnan(b))
+    return distintas
+
+
+class _Base:
+    """Lo necesario del ultimo checkpoint completo para armar los incrementales."""
+    def __init__(self, secuencia: int, columnas: Dict[str, np.ndarray], fallas: Dict[int, List[Tuple[int, Falla]]]):
+        self.secuencia = secuencia
+        self.columnas = {campo: np.array(c) for campo, c in columnas.items() if campo not in LECTURAS}
+        self.firmas = {i: _firma(f) for i, f in fallas.items()}
+
+
+def aleatorios(controller) -> Tuple[tuple, Optional[dict]]:
+    """Estado del modulo random (sensores del motor por objetos) y de los generadores del parque.
+    Se toma en el proceso de la simulacion: un hijo creado con fork tiene el modulo random resembrado."""
+    parque = controller.parque
+    return random.getstate(), None if parque is None else parque.estado_aleatorio()
+
+
+def capturar(controller, base: Optional[_Base], alarmas: List[EntradaAlarma], copiar: bool = True,
+             estado_aleatorio: Optional[Tuple[tuple, Optional[dict]]] = None) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """(meta, secciones) del parque: todas las filas si base es None, si no solo las modificadas.
+    copiar=False deja vistas sobre los arrays vivos (solo si nadie los modifica hasta escribir).
+    'estado_aleatorio' (ver aleatorios()) se pasa cuando la captura no corre en el proceso de la simulacion."""
+    parque = controller.parque
+    columnas = _columnas(controller)
+    fallas = _fallas(controller)
+    n = len(columnas["id_a"])
+    if base is None:
+        filas = None
+    else:
+        n_base = len(base.columnas["id_a"])
+        modificadas = np.zeros(n, dtype=bool)
+        modificadas[n_base:] = True
+        for campo, anterior in base.columnas.items():
+            modificadas[:n_base] |= _distintas(columnas[campo][:n_base], anterior)
+        if parque is not None:
+            modificadas |= parque.filas_historial_modificadas()
+        for i in set(fallas) | set(base.firmas):
+            if _firma(fallas.get(i, [])) != base.firmas.get(i):
+                modificadas[i] = True
+        filas = np.flatnonzero(modificadas)
+    seleccion = slice(None) if filas is None else filas
+
+    secciones = {"filas": np.arange(n) if filas is None else filas}
+    for campo, columna in columnas.items():
+        if campo in LECTURAS:
+            secciones["lecturas." + campo] = columna
+        else:
+            secciones["estado." + campo] = columna[seleccion]
+    if parque is not None: # Reloj comun: solo las filas seleccionadas
+        meta_historial, historial = parque.exportar_historial(filas)
+        prefijo = "historial."
+    else: # Un reloj por turbina: siempre completo
+        meta_historial, historial = exportar_historiales([ag.historial_potencia for ag in controller.ags])
+        prefijo = "historial_objetos."
+    secciones.update((prefijo + nombre, array) for nombre, array in historial.items())
+    incluidas = set(range(n)) if filas is None else set(filas.tolist())
+    secciones.update(_codificar_fallas([(i, k, f) for i, lista in fallas.items() if i in incluidas
+                                        for k, f in lista]))
+    secciones.update(_codificar_alarmas(alarmas))
+    meta_kpis = None
+    if controller.kpis is not None:
+        meta_kpis, kpis = controller.kpis.exportar()
+        secciones.update(("kpis." + nombre, array) for nombre, array in kpis.items())
+    if copiar:
+        secciones = {nombre: np.array(array) for nombre, array in secciones.items()}
+
+    estado_random, rng = estado_aleatorio or aleatorios(controller)
+    meta = {"motor": controller.motor, "procesos": getattr(parque, "procesos", None), "n": n,
+            "tick": controller.tick, "dt": controller.dt, "t_inicio": controller.t_inicio,
+            "random": estado_random, "rng": rng, "historial": meta_historial, "kpis": meta_kpis}
+    return meta, secciones
+
+
+# --- Restauracion ---
+def aplicar(controller, imagen: Imagen) -> None:
+    """Lleva un controlador recien creado (mismo motor) al estado de la imagen (completa)."""
+    meta, secciones = imagen.meta, imagen.secciones
+    n = meta["n"]
+    columnas = {campo: secciones[("lecturas." if campo in LECTURAS else "estado.") + campo] for campo in COLUMNAS}
+    controller.registro_fallas = RegistroFallasParque()
+    controller.tick, controller.dt, controller.t_inicio = meta["tick"], meta["dt"], meta["t_inicio"]
+    version, estado, gauss = meta["random"]
+    random.setstate((version, tuple(estado), gauss))
+
+    parque = controller.parque
+    if parque is not None:
+        parque.restablecer(n)
+        curvas = np.array([parque._registrar_curva(CurvaPotenciaBaja()),
+                           parque._registrar_curva(CurvaPotenciaAlta())], dtype=np.int16)
+        for campo, columna in columnas.items():
+            getattr(parque, campo)[:n] = curvas[columna] if campo == "tipo" else columna
+        parque.importar_historial(meta["historial"], {nombre[len("historial."):]: array
+                                                      for nombre, array in secciones.items()
+                                                      if nombre.startswith("historial.")})
+        if meta["rng"] is not None:
+            parque.fijar_estado_aleatorio(meta["rng"])
+        controller.ags = parque.vistas # Las vistas se crean a demanda
+    else:
+        historiales = importar_historiales(meta["historial"], {nombre[len("historial_objetos."):]: array
+                                                               for nombre, array in secciones.items()
+                                                               if nombre.startswith("historial_objetos.")})
+        valores = {campo: columna.tolist() for campo, columna in columnas.items()}
+        controller.ags = []
+        for i in range(n):
+            ag = (AG_AltaPotencia if valores["tipo"][i] else AG_BajaPotencia)(valores["id_a"][i], meta["dt"])
+            ag._estado = AerogeneradorBase.ESTADOS[valores["estado"][i]]
+            ag._bloqueo_manual = valores["bloqueo_manual"][i]
+            ag._bloqueo_critico = valores["bloqueo_critico"][i]
+            ag._timer_rearme = valores["timer_rearme"][i]
+            ag.potencia_actual = valores["potencia"][i]
+            ag.MAX_TEMP = valores["max_temp"][i]
+            ag.buje.sensores["viento"]._valor = valores["viento"][i]
+            ag.gondola.sensores["temp"]._valor = valores["temp"][i]
+            ag.historial_potencia = historiales[i]
+            ag.observador = controller.registro_fallas
+            controller.ags.append(ag)
+
+    # Los contadores de fallas (AG, registro del parque, criticas del array) se rehacen por eventos
+    for fila, parte, falla in imagen.fallas:
+        controller.ags[fila].partes[parte].registrar_falla(falla)
+    bloqueadas = columnas["id_a"][columnas["bloqueo_critico"].astype(bool)]
+    controller.registro_fallas.bloqueadas_criticas = set(bloqueadas.tolist())
+    if meta.get("kpis") is not None:
+        controller.kpis = MotorKPI.importar(meta["kpis"], {nombre[len("kpis."):]: array
+                                                           for nombre, array in secciones.items()
+                                                           if nombre.startswith("kpis.")})
+    AlarmManager.cargar(imagen.alarmas)
+
+
+# --- Escritura en segundo plano ---
+class GestorCheckpoints:
+    """Checkpoints completos e incrementales de un SimuladorController en un directorio.
+    guardar() no detiene la simulacion: en POSIX (motores por objetos y vectorizado), si el proceso no
+    tiene otros hilos, un proceso hijo creado con fork escribe su copia copy-on-write de la memoria; si no
+    (Windows, motor distribuido, hilos de alarmas, dashboard o metricas) se copian los arrays y un hilo
+    escribe el archivo. Un hijo de un proceso con hilos podria heredar locks tomados y quedar bloqueado.
+    """
+    def __init__(self, controller, directorio: str, completo_cada: int = 10, conservar: Optional[int] = 2):
+        self.controller = controller
+        self.directorio = directorio
+        self.completo_cada = completo_cada # Cada cuantos checkpoints uno es completo
+        self.conservar = conservar         # Completos (con sus incrementales) que quedan en disco; None: todos
+        self.cada: Optional[int] = None    # Ticks entre checkpoints automaticos (ver el controlador)
+        os.makedirs(directorio, exist_ok=True)
+        secuencias = listar(directorio)
+        self.secuencia = secuencias[-1] if secuencias else 0
+        self.ultimo: Optional[str] = None # Ultimo checkpoint escrito con exito
+        self.errores: List[str] = []
+        self._base: Optional[_Base] = None
+        self._hilo: Optional[threading.Thread] = None
+        self._tick_ultimo = controller.tick
+        self._fork = hasattr(os, "fork") and not isinstance(controller.parque, ParqueDistribuido)
+
+    def guardar(self, completo: Optional[bool] = None) -> str:
+        """Inicia un checkpoint y retorna su ruta (se escribe en segundo plano; ver esperar()).
+        Por defecto es completo el primero y uno de cada 'completo_cada'."""
+        self.esperar()
+        if self._base is None:
+            completo = True
+        elif completo is None:
+            completo = self.secuencia + 1 - self._base.secuencia >= self.completo_cada
+        self.secuencia += 1
+        ruta = _ruta(self.directorio, self.secuencia)
+        base = None if completo else self._base
+        alarmas = AlarmManager.consultar()
+        parque = self.controller.parque
+
+        if self._fork and threading.active_count() == 1:
+            estado_aleatorio = aleatorios(self.controller) # En el hijo, random ya no es el de la simulacion
+            pid = os.fork()
+            if pid == 0: # Hijo: su memoria es una foto del parque en este instante
+                codigo = 1
+                try:
+                    self._escribir(ruta, base, *capturar(self.controller, base, alarmas, copiar=False,
+                                                         estado_aleatorio=estado_aleatorio))
+                    codigo = 0
+                finally:
+                    os._exit(codigo)
+            trabajo = (self._esperar_hijo, (pid, ruta, completo))
+        else:
+            imagen = capturar(self.controller, base, alarmas)
+            trabajo = (self._escribir_hilo, (ruta, base, completo) + imagen)
+
+        if completo:
+            self._base = _Base(self.secuencia, _columnas(self.controller), _fallas(self.controller))
+            if parque is not None:
+                parque.rastrear_cambios_historial()
+        self._hilo = threading.Thread(target=trabajo[0], args=trabajo[1], name="checkpoint", daemon=True)
+        self._hilo.start()
+        return ruta
+
+    def al_avanzar(self, tick: int) -> None:
+        """Checkpoint automatico cada 'cada' ticks; si el anterior sigue escribiendose, se posterga."""
+        if self.cada and tick - self._tick_ultimo >= self.cada and not self.en_curso():
+            self._tick_ultimo = tick
+            self.guardar()
+
+    def en_curso(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def esperar(self) -> Optional[str]:
+        """Bloquea hasta que termine el checkpoint en curso. Retorna el ultimo escrito con exito."""
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        return self.ultimo
+
+    def _escribir(self, ruta: str, base: Optional[_Base], meta: dict, secciones: Dict[str, np.ndarray]) -> None:
+        escribir(ruta, COMPLETO if base is None else INCREMENTAL, self.secuencia,
+                 0 if base is None else base.secuencia, meta, secciones)
+
+    def _escribir_hilo(self, ruta: str, base: Optional[_Base], completo: bool, meta: dict,
+                       secciones: Dict[str, np.ndarray]) -> None:
+        try:
+            self._escribir(ruta, base, meta, secciones)
+        except OSError as e:
+            self._fallo(ruta, completo, str(e))
+        else:
+            self._exito(ruta, completo)
+
+    def _esperar_hijo(self, pid: int, ruta: str, completo: bool) -> None:
+        _, estado = os.waitpid(pid, 0)
+        if os.waitstatus_to_exitcode(estado) == 0:
+            self._exito(ruta, completo)
+        else:
+            self._fallo(ruta, completo, "el proceso de escritura termino con error")
+
+    def _exito(self, ruta: str, completo: bool) -> None:
+        self.ultimo = ruta
+        if completo and self.conservar is not None:
+            self._podar()
+
+    def _fallo(self, ruta: str, completo: bool, motivo: str) -> None:
+        self.errores.append(f"{ruta}: {motivo}")
+        if completo: # Los incrementales necesitan un completo en disco
+            self._base = None
+
+    def _podar(self) -> None:
+        """Borra las cadenas (completo + incrementales) anteriores a los 'conservar' completos mas nuevos."""
+        secuencias = listar(self.directorio)
+        completos = [s for s in secuencias if leer_cabecera(_ruta(self.directorio, s))["tipo"] == COMPLETO]
+        if len(completos) <= self.conservar:
+            return
+        limite = completos[-self.conservar]
+        for s in secuencias:
+            if s < limite:
+                os.remove(_ruta(self.directorio, s))
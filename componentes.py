@@ -1,5 +1,5 @@
 # componentes.py
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 
 class ParteAerogenerador: #Encapsulamiento / Modularidad
     """Representa una seccion fisica (Buje, Torre, etc)."""
@@ -7,6 +7,9 @@ class ParteAerogenerador: #Encapsulamiento / Modularidad
         self.nombre = nombre
         self.sensores: Dict[str, Any] = {} 
         self.fallas_activas: List[Any] = []
+        self._fallas_por_nivel: Dict[str, int] = {}
+        # Callback (parte, nivel, delta) para que el AG mantenga sus contadores sin recorrer listas
+        self.al_cambiar_fallas: Optional[Callable[['ParteAerogenerador', str, int], None]] = None
 
     def agregar_sensor(self, key: str, sensor: Any) -> None:
         self.sensores[key] = sensor
@@ -19,4 +22,39 @@ class ParteAerogenerador: #Encapsulamiento / Modularidad
         if key in self.sensores:
             # Accedemos al atributo protegido _valor de la clase Sensor
             return self.sensores[key]._valor
-        return None
\ No newline at end of file
+        return None
+
+    # --- Fallas (contadores incrementales por nivel) ---
+    def registrar_falla(self, falla: Any) -> None:
+        self.fallas_activas.append(falla)
+        nivel = falla.nivel_peligro
+        self._fallas_por_nivel[nivel] = self._fallas_por_nivel.get(nivel, 0) + 1
+        if self.al_cambiar_fallas is not None:
+            self.al_cambiar_fallas(self, nivel, 1)
+
+    def quitar_falla(self, falla: Any) -> bool:
+        """Quita esa falla (por identidad); False si ya no estaba activa."""
+        for k, activa in enumerate(self.fallas_activas):
+            if activa is falla:
+                del self.fallas_activas[k]
+                nivel = falla.nivel_peligro
+                self._fallas_por_nivel[nivel] -= 1
+                if not self._fallas_por_nivel[nivel]:
+                    del self._fallas_por_nivel[nivel]
+                if self.al_cambiar_fallas is not None:
+                    self.al_cambiar_fallas(self, nivel, -1)
+                return True
+        return False
+
+    def limpiar_fallas(self) -> None:
+        conteo = self._fallas_por_nivel
+        self.fallas_activas = []
+        self._fallas_por_nivel = {}
+        if self.al_cambiar_fallas is not None:
+            for nivel, cantidad in conteo.items():
+                self.al_cambiar_fallas(self, nivel, -cantidad)
+
+    def contar_fallas(self, nivel: Optional[str] = None) -> int:
+        if nivel is None:
+            return len(self.fallas_activas)
+        return self._fallas_por_nivel.get(nivel, 0)
@@ -1,42 +1,438 @@
 # controlador.py
-from typing import List, Dict
+import random
+import time
+from typing import List, Dict, Optional, Sequence, Tuple
+import numpy as np
 from aerogenerador import AerogeneradorBase, AG_BajaPotencia, AG_AltaPotencia
 from fallas import FallaMecanica
+from alarmas import AlarmManager, RegistroFallasParque
+from parque_vectorizado import ParqueVectorizado, CODIGOS_ESTADO
+from parque_distribuido import ParqueDistribuido
+from telemetria import AlmacenTelemetria
+from campo_viento import CampoViento
+from sensores import FuenteSensor
+from scada import FuenteSCADA, abrir_lector
+from planificador import PlanificadorEventos
+from checkpoint import GestorCheckpoints, aplicar, cargar
+from bitacora import Bitacora
+from metricas import MetricasSimulacion, RegistroMetricas
+from kpis import MotorKPI
+from campanas_fallas import MODOS_POR_DEFECTO, CampanaFallas, ModoFalla
+from topologia import TopologiaParque
+from vibracion import UMBRALES_POR_DEFECTO, GeneradorVibracion, MonitorVibracion, Umbral
+from anomalias import CARTA_POTENCIA, CARTA_TEMPERATURA, Carta, DetectorAnomalias
 
 class SimuladorController: #SRP coordinar la logica de negocio
     """Clase responsable de la logica de negocio (SRP).
     La Interfaz Grafica hablara con esta clase, NO con los aerogeneradores directamente.
     """
-    def __init__(self):
+    MOTORES = ["objetos", "vectorizado", "distribuido"]
+
+    def __init__(self, motor: str = "objetos", semilla: Optional[int] = None, procesos: Optional[int] = None,
+                 dt: float = 1.0):
+        if motor not in self.MOTORES:
+            raise ValueError(f"Motor desconocido: {motor}")
+        if dt <= 0:
+            raise ValueError("dt debe ser positivo.")
+        self.motor = motor
+        self.semilla = semilla
+        self.dt = dt # Segundos simulados por tick; los historiales se crean con este paso
+        if semilla is not None:
+            random.seed(semilla) # Los sensores del motor por objetos usan el modulo random
+        # Motor vectorizado: self.ags son las vistas sobre los arrays del parque (creadas a demanda)
+        self.parque: Optional[ParqueVectorizado] = None
+        if motor == "vectorizado":
+            self.parque = ParqueVectorizado(semilla, dt)
+        elif motor == "distribuido": # Mismo motor vectorizado, repartido en 'procesos' procesos
+            self.parque = ParqueDistribuido(semilla, procesos, dt=dt)
         self.ags: List[AerogeneradorBase] = []
+        if self.parque is not None:
+            self.ags = self.parque.vistas
+            self.parque.al_crear_vista = self._vincular_vista
+        self.tick = 0
+        self.t_inicio = time.time()
+        self.telemetria: Optional[AlmacenTelemetria] = None
+        self.registro_fallas = RegistroFallasParque()
+        self.campo_viento: Optional[CampoViento] = None
+        self.fuentes: Dict[str, FuenteSensor] = {} # canal -> fuente externa de lecturas
+        self.planificador: Optional[PlanificadorEventos] = None
+        self.checkpoints: Optional[GestorCheckpoints] = None
+        self.bitacora: Optional[Bitacora] = None
+        self.metricas: Optional[MetricasSimulacion] = None
+        self.kpis: Optional[MotorKPI] = None
+        self.campana_fallas: Optional[CampanaFallas] = None
+        self.topologia: Optional[TopologiaParque] = None # Strings, alimentadores y despacho
+        self.vibracion: Optional[MonitorVibracion] = None
+        self.anomalias: Optional[DetectorAnomalias] = None
+        self._por_id: Dict[int, int] = {} # id -> indice en self.ags (motor por objetos)
+        self._por_id_de: Optional[List[AerogeneradorBase]] = None # Lista sobre la que se armo _por_id
         self._inicializar_parque()
 
     def _inicializar_parque(self):
-        self.ags.append(AG_BajaPotencia(1))
-        self.ags.append(AG_AltaPotencia(2))
-        self.ags.append(AG_AltaPotencia(3))
+        self._crear_aerogenerador("BAJA", 1)
+        self._crear_aerogenerador("ALTA", 2)
+        self._crear_aerogenerador("ALTA", 3)
+
+    def _crear_aerogenerador(self, tipo: str, id_a: int) -> AerogeneradorBase:
+        """Alta al final de self.ags (en los motores vectorizados, parque.agregar ya la agrega)."""
+        i = len(self.ags)
+        if self.parque is not None:
+            nuevo = self.parque.agregar(tipo, id_a)
+        else:
+            nuevo = AG_BajaPotencia(id_a, self.dt) if tipo == "BAJA" else AG_AltaPotencia(id_a, self.dt)
+            self.ags.append(nuevo)
+        nuevo.observador = self.registro_fallas
+        nuevo.metricas = self.metricas
+        if self.kpis is not None:
+            self.kpis.agregar_turbinas([nuevo.curva.POTENCIA_NOMINAL])
+        if self.topologia is not None:
+            self.topologia.agregar_turbinas([nuevo.curva.POTENCIA_NOMINAL])
+        if self.planificador is not None:
+            self.planificador.agregar(nuevo)
+        if self.campana_fallas is not None:
+            self.campana_fallas.agregar_turbinas(i, 1)
+        if self.vibracion is not None:
+            self.vibracion.agregar_turbinas(1)
+            self.vibracion.instalar(nuevo, i)
+        if self.anomalias is not None:
+            self.anomalias.agregar_turbinas([nuevo.curva])
+        if self.fuentes:
+            for fuente in self._fuentes_distintas():
+                fuente.registrar_turbinas(i, [id_a])
+            self._conectar_sensores(nuevo, i)
+        return nuevo
+
+    def _vincular_vista(self, vista: AerogeneradorBase, i: int) -> None:
+        """Vista creada a demanda sobre una fila existente: mismos enlaces que un alta."""
+        vista.observador = self.registro_fallas
+        vista.bitacora = self.bitacora
+        vista.metricas = self.metricas
+        self._conectar_sensores(vista, i)
+        if self.vibracion is not None:
+            self.vibracion.instalar(vista, i)
+
+    def habilitar_planificacion_eventos(self) -> PlanificadorEventos:
+        """Solo se evaluan las turbinas que pueden cambiar de estado (ver PlanificadorEventos).
+        El motor vectorizado ya evalua todo el parque en operaciones por lote: no aplica.
+        Reproduce exactamente la evaluacion completa solo con fuentes externas de lecturas; con los
+        sensores aleatorios, la misma semilla da otra corrida.
+        """
+        if self.parque is not None:
+            raise ValueError("La planificacion por eventos es para el motor por objetos.")
+        if self.topologia is not None:
+            raise ValueError("La planificacion por eventos no reevalua las turbinas recortadas por el despacho.")
+        if self.planificador is None:
+            self.planificador = PlanificadorEventos()
+            for ag in self.ags:
+                self.planificador.agregar(ag)
+        return self.planificador
+
+    # --- Fuentes de lecturas ---
+    def conectar_fuente(self, fuente: FuenteSensor, canales: Tuple[str, ...] = ("viento", "temp")) -> FuenteSensor:
+        """Los sensores de 'canales' leen de 'fuente' en lugar de sortear valores propios."""
+        for canal in canales:
+            self.fuentes[canal] = fuente
+            if self.parque is not None:
+                self.parque.fuentes[canal] = fuente
+        if self.parque is not None: # Las vistas que falten se conectan al crearse
+            fuente.registrar_turbinas(0, self.parque.id_a[:self.parque.n].tolist())
+            vinculadas = self.parque.vistas.creadas()
+        else:
+            fuente.registrar_turbinas(0, [ag.id_a for ag in self.ags])
+            vinculadas = enumerate(self.ags)
+        for i, ag in vinculadas:
+            self._conectar_sensores(ag, i)
+        return fuente
+
+    def habilitar_campo_viento(self, campo: Optional[CampoViento] = None,
+                               semilla: Optional[int] = None) -> CampoViento:
+        """Reemplaza el sorteo independiente por sensor por un campo de viento del parque.
+        Las turbinas sin posicion se ubican con CampoViento.posicion_grilla. Sin 'semilla', el campo
+        creado aqui usa una derivada de la del controlador (la misma semilla da el mismo viento).
+        """
+        if campo is None:
+            if semilla is None and self.semilla is not None: # Flujo propio, distinto del de los sensores
+                semilla = int(np.random.SeedSequence((self.semilla, 1)).generate_state(1)[0])
+            campo = CampoViento(dt=self.dt, semilla=semilla)
+        self.campo_viento = campo
+        self.conectar_fuente(self.campo_viento, ("viento",))
+        return self.campo_viento
+
+    def habilitar_scada(self, ruta: str, canales: Tuple[str, ...] = ("viento", "temp"),
+                        desde: Optional[float] = None, ciclico: bool = False) -> FuenteSCADA:
+        """Reproduce un registro SCADA (CSV o .tlm): un instante del archivo por tick, asignado por id."""
+        fuente = FuenteSCADA(abrir_lector(ruta), ciclico)
+        if desde is not None:
+            fuente.buscar(desde)
+        self.conectar_fuente(fuente, canales)
+        return fuente
+
+    def _fuentes_distintas(self) -> List[FuenteSensor]:
+        return list(dict.fromkeys(self.fuentes.values()))
+
+    def _conectar_sensores(self, ag: AerogeneradorBase, i: int) -> None:
+        for canal, fuente in self.fuentes.items():
+            for parte in ag.partes:
+                sensor = parte.sensores.get(canal)
+                if sensor is not None:
+                    sensor.conectar(fuente, i)
 
     def agregar_aerogenerador(self, tipo: str) -> int: #Acoplamiento Debil
         new_id = len(self.ags) + 1
-        nuevo = None
-        if tipo == "BAJA":
-            nuevo = AG_BajaPotencia(new_id)
-        else:
-            nuevo = AG_AltaPotencia(new_id)
+        if self.bitacora is not None:
+            self.bitacora.alta(tipo)
+        nuevo = self._crear_aerogenerador(tipo, new_id)
         
         nuevo.forzar_parada_manual() # Inicia parado
-        self.ags.append(nuevo)
+        nuevo.bitacora = self.bitacora # Despues de la parada inicial: ya queda implicita en el alta
         return new_id
 
+    def buscar(self, id_a: int) -> Optional[AerogeneradorBase]:
+        """AG con ese id, o None. En los motores vectorizados busca en el array de ids (no crea vistas)."""
+        i = self.indice(id_a)
+        return None if i is None else self.ags[i]
+
+    def indice(self, id_a: int) -> Optional[int]:
+        """Posicion en self.ags (y fila de los arrays del parque) del AG con ese id, o None."""
+        if self.parque is not None:
+            indices = np.flatnonzero(self.parque.id_a[:self.parque.n] == id_a)
+            return int(indices[0]) if len(indices) else None
+        if self._por_id_de is not self.ags or len(self._por_id) != len(self.ags):
+            self._por_id = {ag.id_a: i for i, ag in enumerate(self.ags)}
+            self._por_id_de = self.ags
+        return self._por_id.get(id_a)
+
     def avanzar_ciclo_simulacion(self) -> float:
         """Ejecuta un paso de tiempo en todo el parque."""
-        total_kw = 0.0
-        for ag in self.ags:
-            ag.actualizar_sensores()
-            ag.ejecutar_ciclo_control()
-            total_kw += ag.potencia_actual
+        if self.metricas is not None:
+            return self.metricas.medir_tick(self, self._avanzar_ciclo)
+        return self._avanzar_ciclo()
+
+    def _avanzar_ciclo(self) -> float:
+        self.tick += 1
+        for fuente in self._fuentes_distintas():
+            fuente.avanzar()
+        if self.parque is not None:
+            total_kw = self.parque.avanzar()
+        elif self.planificador is not None:
+            total_kw = self.planificador.avanzar()
+        else:
+            total_kw = 0.0
+            for ag in self.ags:
+                ag.actualizar_sensores()
+                ag.ejecutar_ciclo_control()
+                total_kw += ag.potencia_actual
+        if self.topologia is not None:
+            total_kw = self._despachar()
+        if self.kpis is not None: # Antes de los checkpoints: la captura incluye este tick
+            _, estados, _, _, potencia = self.arrays_parque()
+            self.kpis.al_avanzar(estados, potencia)
+        if self.telemetria is not None:
+            self.telemetria.agregar_lote(self.tiempo_simulado(), *self.arrays_parque())
+        if self.checkpoints is not None:
+            self.checkpoints.al_avanzar(self.tick)
+        if self.bitacora is not None:
+            _, _, viento, temp, _ = self.arrays_parque()
+            self.bitacora.al_avanzar(self.tick, viento, temp)
+        if self.vibracion is not None:
+            _, _, viento, _, potencia = self.arrays_parque()
+            self.vibracion.al_avanzar(viento, potencia)
+        if self.anomalias is not None:
+            _, estados, viento, temp, potencia = self.arrays_parque()
+            if self.topologia is not None: # Un recorte del despacho no es bajo rendimiento
+                potencia = self.topologia.disponible[:len(potencia)]
+            self.anomalias.al_avanzar(estados, viento, temp, potencia)
+        if self.campana_fallas is not None: # Despues del tick, como un comando del operador
+            self.campana_fallas.al_avanzar(self.tick)
         return total_kw
 
+    def _despachar(self) -> float:
+        """Recorta la potencia recien calculada con las consignas del despacho. Retorna la entregada."""
+        if self.parque is not None:
+            potencia = self.parque.potencia[:self.parque.n]
+            potencia[:] = self.topologia.despachar(potencia)
+        else:
+            disponible = np.fromiter((ag.potencia_actual for ag in self.ags), dtype=np.float64, count=len(self.ags))
+            entregada = self.topologia.despachar(disponible)
+            for i in np.flatnonzero(entregada != disponible):
+                self.ags[i].potencia_actual = float(entregada[i])
+        return self.topologia.total_entregado
+
+    def tiempo_simulado(self) -> float:
+        """Timestamp (epoch) del tick actual."""
+        return self.t_inicio + self.tick * self.dt
+
+    def habilitar_telemetria(self, directorio: str, registros_por_segmento: int = 1 << 20) -> AlmacenTelemetria:
+        """Persiste viento/temperatura/potencia de todo el parque, un lote por tick.
+        ValueError si 'directorio' ya tiene registros posteriores al tick actual (p. ej. un controlador
+        restaurado de un checkpoint sobre la telemetria de la corrida original)."""
+        almacen = AlmacenTelemetria(directorio, registros_por_segmento)
+        if almacen.t_max > self.tiempo_simulado():
+            almacen.cerrar()
+            raise ValueError(f"{directorio} tiene telemetria hasta t={almacen.t_max}, posterior al tick actual "
+                             f"(t={self.tiempo_simulado()}).")
+        self.telemetria = almacen
+        return self.telemetria
+
+    # --- Checkpoints ---
+    def habilitar_checkpoints(self, directorio: str, cada: Optional[int] = None,
+                              completo_cada: int = 10) -> GestorCheckpoints:
+        """Checkpoints binarios en 'directorio' (ver checkpoint.py). Con 'cada', uno automatico cada
+        tantos ticks; uno de cada 'completo_cada' es completo y el resto incrementales."""
+        self.checkpoints = GestorCheckpoints(self, directorio, completo_cada)
+        self.checkpoints.cada = cada
+        return self.checkpoints
+
+    # --- KPI ---
+    def habilitar_kpis(self) -> MotorKPI:
+        """Energia, disponibilidad, factor de capacidad y medias moviles por turbina y del parque,
+        acumulados desde ahora (ver kpis.py)."""
+        if self.kpis is None:
+            self.kpis = MotorKPI(self.dt)
+            if self.parque is not None:
+                nominales = self.parque.potencias_nominales()
+            else:
+                nominales = [ag.curva.POTENCIA_NOMINAL for ag in self.ags]
+            self.kpis.agregar_turbinas(nominales)
+        return self.kpis
+
+    def kpis_turbina(self, id_a: int) -> Optional[Dict[str, float]]:
+        """KPI del AG con ese id (None si no existe o los KPI no estan habilitados)."""
+        i = self.indice(id_a)
+        return None if self.kpis is None or i is None else self.kpis.turbina(i)
+
+    # --- Topologia y despacho ---
+    def habilitar_despacho(self, turbinas_por_string: int = 10, strings_por_alimentador: int = 6,
+                           modo: str = "proporcional") -> TopologiaParque:
+        """Agrupa el parque en strings y alimentadores y aplica en cada tick los limites de exportacion
+        (topologia.fijar_limite_parque / fijar_limite_alimentador) repartiendo consignas (ver topologia.py)."""
+        if self.planificador is not None:
+            raise ValueError("El despacho no se puede combinar con la planificacion por eventos.")
+        if self.topologia is None:
+            self.topologia = TopologiaParque(turbinas_por_string, strings_por_alimentador, modo)
+            if self.parque is not None:
+                nominales = self.parque.potencias_nominales()
+            else:
+                nominales = [ag.curva.POTENCIA_NOMINAL for ag in self.ags]
+            self.topologia.agregar_turbinas(nominales)
+        return self.topologia
+
+    def despacho_turbina(self, id_a: int) -> Optional[Dict[str, float]]:
+        """String, alimentador, potencia disponible, consigna y entregada del AG (None sin despacho)."""
+        i = self.indice(id_a)
+        return None if self.topologia is None or i is None else self.topologia.turbina(i)
+
+    # --- Campanas de fallas ---
+    def habilitar_campana_fallas(self, modos: Sequence[ModoFalla] = MODOS_POR_DEFECTO, semilla: Optional[int] = None,
+                                 aceleracion: float = 1.0) -> CampanaFallas:
+        """Fallas y reparaciones sorteadas con modelos MTBF/MTTR por componente (ver campanas_fallas.py).
+        La cola de eventos no se guarda en los checkpoints."""
+        self.campana_fallas = CampanaFallas(self, modos, semilla, aceleracion)
+        return self.campana_fallas
+
+    # --- Vibracion ---
+    def habilitar_vibracion(self, frecuencia: float = 50.0, ventana: int = 256,
+                            umbrales: Sequence[Umbral] = UMBRALES_POR_DEFECTO,
+                            generador: Optional[GeneradorVibracion] = None,
+                            semilla: Optional[int] = None) -> MonitorVibracion:
+        """Acelerometros de rodamiento en buje y gondola muestreados a 'frecuencia' Hz, con RMS, curtosis
+        y energia por bandas de todo el parque en cada tick y fallas al cruzar 'umbrales' (ver vibracion.py).
+        Los sensores quedan en parte.sensores["vibracion_buje"] / ["vibracion_gondola"]."""
+        if self.vibracion is None:
+            self.vibracion = MonitorVibracion(self, frecuencia, ventana, umbrales, generador, semilla)
+            vinculadas = self.parque.vistas.creadas() if self.parque is not None else enumerate(self.ags)
+            for i, ag in vinculadas:
+                self.vibracion.instalar(ag, i)
+        return self.vibracion
+
+    # --- Deteccion de anomalias ---
+    def habilitar_anomalias(self, aprendizaje: int = 600, carta_temperatura: Carta = CARTA_TEMPERATURA,
+                            carta_potencia: Carta = CARTA_POTENCIA) -> DetectorAnomalias:
+        """Cartas EWMA/CUSUM por turbina sobre la temperatura (relativa al parque) y el deficit de potencia
+        contra la curva; avisan con FallaElectrica de nivel Advertencia (ver anomalias.py)."""
+        if self.anomalias is None:
+            self.anomalias = DetectorAnomalias(self, aprendizaje, carta_temperatura, carta_potencia)
+            if self.parque is not None:
+                curvas = [self.parque._curvas[k] for k in self.parque.tipo[:self.parque.n].tolist()]
+            else:
+                curvas = [ag.curva for ag in self.ags]
+            self.anomalias.agregar_turbinas(curvas)
+        return self.anomalias
+
+    # --- Metricas ---
+    def habilitar_metricas(self, registro: Optional[RegistroMetricas] = None) -> MetricasSimulacion:
+        """Instrumenta el tick, el ciclo de control y las alarmas (ver metricas.py).
+        El registro se exporta con registro.escribir(ruta) o registro.servir(puerto)."""
+        if self.metricas is None:
+            self.metricas = MetricasSimulacion(registro)
+            AlarmManager.agregar_sink(self.metricas)
+            vinculadas = self.parque.vistas.creadas() if self.parque is not None else enumerate(self.ags)
+            for _, ag in vinculadas:
+                ag.metricas = self.metricas
+        return self.metricas
+
+    # --- Bitacora ---
+    def habilitar_bitacora(self, directorio: str, instantanea_cada: int = 3600) -> Bitacora:
+        """Registra lecturas, comandos, fallas inyectadas y altas en 'directorio', con una instantanea
+        (checkpoint completo) cada 'instantanea_cada' ticks. Se reproduce con bitacora.Reproductor."""
+        self.bitacora = Bitacora(self, directorio, instantanea_cada)
+        vinculadas = self.parque.vistas.creadas() if self.parque is not None else enumerate(self.ags)
+        for _, ag in vinculadas: # Las vistas que falten la reciben al crearse
+            ag.bitacora = self.bitacora
+        return self.bitacora
+
+    @classmethod
+    def restaurar(cls, ruta: str, procesos: Optional[int] = None) -> 'SimuladorController':
+        """Controlador con el estado de un checkpoint (archivo .ckp, o directorio: el mas reciente).
+        Vuelven los KPI si estaban habilitados; las fuentes externas, la planificacion por eventos y los
+        checkpoints se vuelven a habilitar aparte."""
+        imagen = cargar(ruta)
+        controller = cls(imagen.meta["motor"], procesos=procesos or imagen.meta["procesos"], dt=imagen.meta["dt"])
+        aplicar(controller, imagen)
+        return controller
+
+    def arrays_parque(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(ids, codigos de estado, viento, temperatura, potencia) de todo el parque."""
+        if self.parque is not None:
+            n = self.parque.n
+            p = self.parque
+            return p.id_a[:n], p.estado[:n], p.viento[:n], p.temp[:n], p.potencia[:n]
+        n = len(self.ags)
+        ids = np.fromiter((ag.id_a for ag in self.ags), dtype=np.int64, count=n)
+        estados = np.fromiter((CODIGOS_ESTADO[ag.get_estado()] for ag in self.ags), dtype=np.int8, count=n)
+        viento = np.fromiter((ag.obtener_viento() for ag in self.ags), dtype=np.float64, count=n)
+        temp = np.fromiter((ag.obtener_temp() for ag in self.ags), dtype=np.float64, count=n)
+        potencia = np.fromiter((ag.potencia_actual for ag in self.ags), dtype=np.float64, count=n)
+        return ids, estados, viento, temp, potencia
+
+    def contar_estados(self) -> Dict[str, int]:
+        """Cantidad de aerogeneradores en cada estado."""
+        if self.parque is not None:
+            cuenta = np.bincount(self.parque.estado[:self.parque.n], minlength=len(AerogeneradorBase.ESTADOS))
+            return dict(zip(AerogeneradorBase.ESTADOS, cuenta.tolist()))
+        conteo = dict.fromkeys(AerogeneradorBase.ESTADOS, 0)
+        for ag in self.ags:
+            conteo[ag.get_estado()] += 1
+        return conteo
+
+    def turbinas_con_falla(self) -> set:
+        """Ids de los AG con al menos una falla activa (sin recorrer el parque)."""
+        return self.registro_fallas.turbinas_con_falla
+
+    def cantidad_bloqueadas_criticas(self) -> int:
+        return self.registro_fallas.cantidad_bloqueadas_criticas()
+
+    def cerrar(self) -> None:
+        """Cierra la bitacora y la telemetria (baja a disco el ultimo segmento) y libera procesos y memoria
+        compartida del motor distribuido."""
+        if self.bitacora is not None:
+            self.bitacora.cerrar()
+        if self.telemetria is not None:
+            self.telemetria.cerrar()
+            self.telemetria = None # Se vuelve a abrir con habilitar_telemetria
+        if isinstance(self.parque, ParqueDistribuido):
+            self.parque.cerrar()
+
     def provocar_falla_demo(self):
         if not self.ags: return
         target = self.ags[0]
@@ -1,9 +1,16 @@
 #curvas.py
+import csv
+import numpy as np
+
 class CurvaPotencia:
     """Clase Base para el calculo de potencia."""
     def calcular_potencia(self, velocidad_viento):
         raise NotImplementedError
 
+    def calcular_potencia_batch(self, velocidades):
+        """Evalua un array de velocidades. Las subclases lo sobreescriben vectorizado."""
+        return np.array([self.calcular_potencia(v) for v in velocidades], dtype=float)
+
 class CurvaPotenciaBaja(CurvaPotencia):
     POTENCIA_NOMINAL = 800 # kW
 
@@ -12,9 +19,72 @@ class CurvaPotenciaBaja(CurvaPotencia):
         if v < 12: return self.POTENCIA_NOMINAL * (v - 5) / 7
         return self.POTENCIA_NOMINAL
 
+    def calcular_potencia_batch(self, v):
+        v = np.asarray(v, dtype=float)
+        p = np.where(v < 12, self.POTENCIA_NOMINAL * (v - 5) / 7, self.POTENCIA_NOMINAL)
+        return np.where((v < 5) | (v > 20), 0.0, p)
+
 class CurvaPotenciaAlta(CurvaPotencia):
     POTENCIA_NOMINAL = 2500 # kW
     def calcular_potencia(self, v):
         if v < 8 or v > 25: return 0
         if v < 15: return self.POTENCIA_NOMINAL * (v - 8) / 7
-        return self.POTENCIA_NOMINAL
\ No newline at end of file
+        return self.POTENCIA_NOMINAL
+
+    def calcular_potencia_batch(self, v):
+        v = np.asarray(v, dtype=float)
+        p = np.where(v < 15, self.POTENCIA_NOMINAL * (v - 8) / 7, self.POTENCIA_NOMINAL)
+        return np.where((v < 8) | (v > 25), 0.0, p)
+
+class CurvaPotenciaTabulada(CurvaPotencia):
+    """Curva de fabricante: tabla velocidad (m/s) -> potencia (kW).
+    Se interpola sobre una grilla uniforme precalculada, con correccion por densidad del aire.
+    """
+    DENSIDAD_REFERENCIA = 1.225 # kg/m3, condicion estandar de las hojas de datos
+    PASO_GRILLA = 0.01 # m/s
+
+    def __init__(self, velocidades, potencias, densidad_aire: float = DENSIDAD_REFERENCIA):
+        v = np.asarray(velocidades, dtype=float)
+        p = np.asarray(potencias, dtype=float)
+        if v.ndim != 1 or v.shape != p.shape or len(v) < 2:
+            raise ValueError("La tabla necesita dos columnas del mismo largo (minimo 2 puntos).")
+        if np.any(np.diff(v) <= 0):
+            raise ValueError("Las velocidades de la tabla deben ser estrictamente crecientes.")
+        self.velocidades = v
+        self.potencias = p
+        self.densidad_aire = densidad_aire
+        self.POTENCIA_NOMINAL = float(p.max())
+
+        # Correccion de densidad: la turbina ve un viento equivalente v * (rho / rho_ref)^(1/3)
+        factor = (densidad_aire / self.DENSIDAD_REFERENCIA) ** (1 / 3)
+        self._v_min = v[0] / factor
+        self._v_max = v[-1] / factor
+        puntos = np.arange(0.0, self._v_max + 2 * self.PASO_GRILLA, self.PASO_GRILLA)
+        # Fuera de la tabla la grilla repite los extremos: la ultima celda antes del corte no cae hacia 0.
+        # El corte (cut-in / cut-out) se aplica al evaluar.
+        self._grilla = np.interp(np.clip(puntos * factor, v[0], v[-1]), v, p)
+
+    @classmethod
+    def desde_csv(cls, ruta: str, densidad_aire: float = DENSIDAD_REFERENCIA) -> 'CurvaPotenciaTabulada':
+        """Lee un CSV 'velocidad,potencia' (con o sin encabezado)."""
+        velocidades, potencias = [], []
+        with open(ruta, newline="") as f:
+            for fila in csv.reader(f):
+                try:
+                    v, p = float(fila[0]), float(fila[1])
+                except (ValueError, IndexError):
+                    continue # encabezado o linea vacia
+                velocidades.append(v)
+                potencias.append(p)
+        return cls(velocidades, potencias, densidad_aire)
+
+    def calcular_potencia(self, v):
+        return float(self.calcular_potencia_batch(np.array([v], dtype=float))[0])
+
+    def calcular_potencia_batch(self, v):
+        v = np.asarray(v, dtype=float)
+        x = v / self.PASO_GRILLA
+        i = np.clip(x.astype(np.int64), 0, len(self._grilla) - 2)
+        frac = x - i
+        p = self._grilla[i] + (self._grilla[i + 1] - self._grilla[i]) * frac
+        return np.where((v < self._v_min) | (v > self._v_max), 0.0, p)
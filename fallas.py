@@ -3,6 +3,8 @@ import time
 
 class Falla:
     """Clase Padre para tipos de fallas."""
+    bloqueante = False # True si la registro registrar_falla_externa (puso el bloqueo critico)
+
     def __init__(self, ubicacion, mensaje, nivel="Advertencia"):
         self.ubicacion = ubicacion
         self.mensaje = mensaje
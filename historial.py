@@ -0,0 +1,631 @@
+# historial.py
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+# (nombre, periodo en segundos, cantidad de periodos guardados). Los niveles con periodo <= dt no se
+# crean: el nivel de muestras crudas ya tiene esa resolucion.
+NIVELES_DEFECTO: Tuple[Tuple[str, float, int], ...] = (
+    ("minuto", 60, 1440),     # 1 dia
+    ("hora", 3600, 24 * 30),  # 30 dias
+)
+MUESTRAS_DEFECTO = 3600 # Nivel mas fino: una muestra por tick (1 hora con dt = 1 s)
+
+# El motor vectorizado guarda una fila por turbina: niveles mas cortos para acotar memoria
+NIVELES_PARQUE: Tuple[Tuple[str, float, int], ...] = (
+    ("minuto", 60, 60),       # 1 hora
+    ("hora", 3600, 72),       # 3 dias
+)
+MUESTRAS_PARQUE = 300 # 5 minutos con dt = 1 s
+
+Serie = Tuple[List[float], List[float], List[float], List[float]] # (t, min, media, max)
+
+
+class BufferCircular:
+    """Buffer circular de floats sobre array('d').
+    agregar() es O(1): crece hasta la capacidad y luego sobreescribe la muestra mas antigua.
+    """
+    def __init__(self, capacidad: int, relleno: Optional[float] = None):
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1.")
+        self.capacidad = capacidad
+        self._datos = array('d') if relleno is None else array('d', [relleno]) * capacidad
+        self._pos = 0 # Indice de la muestra mas antigua una vez lleno
+
+    def agregar(self, valor: float) -> None:
+        if len(self._datos) < self.capacidad:
+            self._datos.append(valor)
+        else:
+            self._datos[self._pos] = valor
+            self._pos = (self._pos + 1) % self.capacidad
+
+    def a_lista(self) -> List[float]:
+        """Muestras ordenadas de la mas antigua a la mas reciente."""
+        return (self._datos[self._pos:] + self._datos[:self._pos]).tolist()
+
+    def cargar(self, valores) -> None:
+        """Reemplaza el contenido (mas antigua -> mas reciente); se conservan las ultimas 'capacidad'."""
+        self._datos = array('d')
+        self._datos.frombytes(np.asarray(valores, dtype=np.float64)[-self.capacidad:].tobytes())
+        self._pos = 0
+
+    def ultimos(self, n: int) -> List[float]:
+        """Las n muestras mas recientes, en O(n)."""
+        largo = len(self._datos)
+        n = min(n, largo)
+        if n <= 0:
+            return []
+        inicio = (self._pos + largo - n) % largo
+        if inicio + n <= largo:
+            return self._datos[inicio:inicio + n].tolist()
+        return (self._datos[inicio:] + self._datos[:inicio + n - largo]).tolist()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.a_lista())
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.a_lista()[i]
+        largo = len(self._datos)
+        if not -largo <= i < largo:
+            raise IndexError("Indice fuera del buffer.")
+        return self._datos[(self._pos + i % largo) % largo]
+
+
+class NivelAgregado:
+    """Un nivel de submuestreo: guarda min/media/max por cada periodo cerrado."""
+    def __init__(self, nombre: str, periodo: float, capacidad: int):
+        self.nombre = nombre
+        self.periodo = float(periodo)
+        self.capacidad = capacidad
+        self.t = BufferCircular(capacidad)
+        self.minimo = BufferCircular(capacidad)
+        self.media = BufferCircular(capacidad)
+        self.maximo = BufferCircular(capacidad)
+        self._bucket: Optional[int] = None
+        self._reiniciar_acumulador()
+
+    def _reiniciar_acumulador(self) -> None:
+        self._min = float("inf")
+        self._max = float("-inf")
+        self._suma = 0.0
+        self._n = 0
+
+    def agregar(self, t: float, valor: float) -> None:
+        bucket = int(t // self.periodo)
+        if bucket != self._bucket:
+            self._cerrar()
+            self._bucket = bucket
+        if valor < self._min: self._min = valor
+        if valor > self._max: self._max = valor
+        self._suma += valor
+        self._n += 1
+
+    def rellenar(self, tiempos: np.ndarray, valor: float) -> None:
+        """Equivale a agregar(t, valor) para cada t de 'tiempos' (ordenados), en O(capacidad)."""
+        buckets, cantidades = np.unique((tiempos // self.periodo).astype(np.int64), return_counts=True)
+        if len(buckets) > self.capacidad + 1:
+            # Los periodos anteriores quedarian desalojados del buffer: no hace falta cerrarlos
+            buckets, cantidades = buckets[-(self.capacidad + 1):], cantidades[-(self.capacidad + 1):]
+            self._bucket = None
+            self._reiniciar_acumulador()
+        for bucket, cantidad in zip(buckets.tolist(), cantidades.tolist()):
+            if bucket != self._bucket:
+                self._cerrar()
+                self._bucket = bucket
+            if valor < self._min: self._min = valor
+            if valor > self._max: self._max = valor
+            self._suma += valor * cantidad
+            self._n += cantidad
+
+    def _cerrar(self) -> None:
+        if self._n:
+            self.t.agregar(self._bucket * self.periodo)
+            self.minimo.agregar(self._min)
+            self.media.agregar(self._suma / self._n)
+            self.maximo.agregar(self._max)
+        self._reiniciar_acumulador()
+
+    def serie(self) -> Serie:
+        """Periodos cerrados mas el periodo en curso (parcial)."""
+        t, mn, me, mx = self.t.a_lista(), self.minimo.a_lista(), self.media.a_lista(), self.maximo.a_lista()
+        if self._n:
+            t.append(self._bucket * self.periodo)
+            mn.append(self._min)
+            me.append(self._suma / self._n)
+            mx.append(self._max)
+        return t, mn, me, mx
+
+    def serie_desde(self, t0: float) -> Serie:
+        """Como serie(), pero solo los periodos con t >= t0 (costo proporcional a los devueltos)."""
+        k = 0
+        if len(self.t):
+            # Cota superior: dos periodos cerrados estan separados al menos 'periodo' segundos
+            k = int(min(len(self.t), max(0, (self.t[-1] - t0) // self.periodo + 1)))
+        t = self.t.ultimos(k)
+        desde = bisect_left(t, t0)
+        serie = (t[desde:], self.minimo.ultimos(k)[desde:], self.media.ultimos(k)[desde:],
+                 self.maximo.ultimos(k)[desde:])
+        if self._n and self._bucket * self.periodo >= t0:
+            serie[0].append(self._bucket * self.periodo)
+            serie[1].append(self._min)
+            serie[2].append(self._suma / self._n)
+            serie[3].append(self._max)
+        return serie
+
+
+class NivelMuestras:
+    """Nivel mas fino: las muestras crudas, una por tick (periodo = dt del historial).
+    Guarda solo el valor; el tiempo de cada muestra sale de su posicion (muestras equiespaciadas)."""
+    def __init__(self, nombre: str, periodo: float, capacidad: int):
+        self.nombre = nombre
+        self.periodo = float(periodo)
+        self.capacidad = capacidad
+        self.valores = BufferCircular(capacidad)
+        self.t_ultimo: Optional[float] = None
+
+    def agregar(self, t: float, valor: float) -> None:
+        self.valores.agregar(valor)
+        self.t_ultimo = t
+
+    def rellenar(self, tiempos: np.ndarray, valor: float) -> None:
+        for _ in range(min(len(tiempos), self.capacidad)):
+            self.valores.agregar(valor)
+        self.t_ultimo = float(tiempos[-1])
+
+    def _serie(self, valores: List[float]) -> Serie:
+        k = len(valores)
+        t = (self.t_ultimo - self.periodo * np.arange(k - 1, -1, -1)).tolist() if k else []
+        return t, valores, list(valores), list(valores)
+
+    def serie(self) -> Serie:
+        return self._serie(self.valores.a_lista())
+
+    def serie_desde(self, t0: float) -> Serie:
+        """Como serie(), pero solo las muestras con t >= t0 (costo proporcional a las devueltas)."""
+        if self.t_ultimo is None or self.t_ultimo < t0:
+            return [], [], [], []
+        k = int(min(len(self.valores), (self.t_ultimo - t0) // self.periodo + 2))
+        return _filtrar_desde(self._serie(self.valores.ultimos(k)), t0)
+
+
+def _filtrar_desde(serie: Serie, t0: float) -> Serie:
+    desde = bisect_left(serie[0], t0)
+    return tuple(columna[desde:] for columna in serie)
+
+
+class HistorialMultiResolucion:
+    """Historial de una senal: las ultimas muestras crudas como secuencia, el nivel "muestra" (una por
+    tick, periodo dt) y niveles min/media/max mas gruesos que dt.
+    Se comporta como una secuencia de las muestras crudas (mas antigua -> mas reciente).
+    """
+    def __init__(self, capacidad: int = 50, dt: float = 1.0,
+                 niveles: Sequence[Tuple[str, float, int]] = NIVELES_DEFECTO,
+                 relleno: Optional[float] = 0.0, muestras: int = MUESTRAS_DEFECTO):
+        self.crudo = BufferCircular(capacidad, relleno)
+        self.dt = dt # Segundos simulados entre muestras
+        self.niveles: Dict[str, object] = {"muestra": NivelMuestras("muestra", dt, muestras)}
+        self.niveles.update((n, NivelAgregado(n, p, c)) for n, p, c in niveles if p > dt)
+        self._muestras = 0
+        self._t0 = 0.0 # Tiempo de la primera muestra: la muestra m esta en _t0 + m * dt
+        self.t_ultimo: Optional[float] = None # Tiempo de la muestra mas reciente
+
+    def agregar(self, valor: float, t: Optional[float] = None) -> None:
+        """Agrega la muestra del proximo tick. Con 't', los ticks salteados desde la ultima muestra
+        repiten el ultimo valor (las muestras quedan equiespaciadas)."""
+        if t is not None:
+            if self._muestras == 0:
+                self._t0 = t
+            else:
+                pasos = round((t - self.t_ultimo) / self.dt)
+                if pasos < 1:
+                    raise ValueError("Cada muestra debe avanzar al menos dt.")
+                self.rellenar(self.crudo[-1], pasos - 1)
+        t = self._t0 + self._muestras * self.dt
+        self._muestras += 1
+        self.t_ultimo = t
+        self.crudo.agregar(valor)
+        for nivel in self.niveles.values():
+            nivel.agregar(t, valor)
+
+    def rellenar(self, valor: float, veces: int) -> None:
+        """Agrega 'veces' muestras iguales (p. ej. ticks en los que la turbina estuvo detenida)."""
+        if veces <= 0:
+            return
+        for _ in range(min(veces, self.crudo.capacidad)):
+            self.crudo.agregar(valor)
+        tiempos = self._t0 + (self._muestras + np.arange(veces)) * self.dt
+        for nivel in self.niveles.values():
+            nivel.rellenar(tiempos, valor)
+        self._muestras += veces
+        self.t_ultimo = float(tiempos[-1])
+
+    def serie(self, nivel: str) -> Serie:
+        return self.niveles[nivel].serie()
+
+    def serie_para(self, duracion: float) -> Serie:
+        """Serie del nivel mas fino que cubre 'duracion' segundos (o el mas grueso disponible)."""
+        return _nivel_para(list(self.niveles.values()), duracion).serie()
+
+    def __len__(self) -> int:
+        return len(self.crudo)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.crudo)
+
+    def __getitem__(self, i):
+        return self.crudo[i]
+
+
+def _nivel_para(niveles: list, duracion: float):
+    if not niveles:
+        raise ValueError("El historial no tiene niveles agregados.")
+    for nivel in sorted(niveles, key=lambda n: n.periodo):
+        if nivel.periodo * nivel.capacidad >= duracion:
+            return nivel
+    return max(niveles, key=lambda n: n.periodo)
+
+
+def _aplanar(listas: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Listas de largo variable -> (valores concatenados, largos)."""
+    largos = np.fromiter((len(l) for l in listas), dtype=np.int64, count=len(listas))
+    valores = np.fromiter((v for l in listas for v in l), dtype=np.float64, count=int(largos.sum()))
+    return valores, largos
+
+
+def _partir(valores: np.ndarray, largos: np.ndarray) -> List[np.ndarray]:
+    return np.split(valores, np.cumsum(largos)[:-1]) if len(largos) else []
+
+
+def exportar_historiales(historiales: Sequence[HistorialMultiResolucion]) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """(meta, arrays) de varios historiales con la misma configuracion (motor por objetos).
+    Cada historial tiene su propio reloj: los buffers se guardan concatenados con sus largos."""
+    if not historiales:
+        return {"capacidad": 0, "niveles": []}, {}
+    h0 = historiales[0]
+    meta = {"capacidad": h0.crudo.capacidad, "capacidad_muestras": h0.niveles["muestra"].capacidad,
+            "niveles": [[n.nombre, n.periodo, n.capacidad] for n in h0.niveles.values()
+                        if isinstance(n, NivelAgregado)]}
+    m = len(historiales)
+    arrays = {"muestras": np.fromiter((h._muestras for h in historiales), dtype=np.int64, count=m),
+              "dt": np.fromiter((h.dt for h in historiales), dtype=np.float64, count=m),
+              "t0": np.fromiter((h._t0 for h in historiales), dtype=np.float64, count=m),
+              "t_ultimo": np.fromiter((np.nan if h.t_ultimo is None else h.t_ultimo for h in historiales),
+                                      dtype=np.float64, count=m)}
+    arrays["crudo"], arrays["crudo.largos"] = _aplanar([h.crudo.a_lista() for h in historiales])
+    arrays["muestra.valores"], arrays["muestra.largos"] = _aplanar([h.niveles["muestra"].valores.a_lista()
+                                                                    for h in historiales])
+    for nombre, _, _ in meta["niveles"]:
+        niveles = [h.niveles[nombre] for h in historiales]
+        for campo in ("t", "minimo", "media", "maximo"):
+            arrays[f"{nombre}.{campo}"], largos = _aplanar([getattr(n, campo).a_lista() for n in niveles])
+        arrays[f"{nombre}.largos"] = largos
+        arrays[f"{nombre}.bucket"] = np.fromiter((-1 if n._bucket is None else n._bucket for n in niveles),
+                                                 dtype=np.int64, count=m)
+        arrays[f"{nombre}.acumulado"] = np.array([(n._min, n._max, n._suma, n._n) for n in niveles],
+                                                 dtype=np.float64).reshape(m, 4)
+    return meta, arrays
+
+
+def importar_historiales(meta: dict, arrays: Dict[str, np.ndarray]) -> List[HistorialMultiResolucion]:
+    """Inverso de exportar_historiales()."""
+    m = len(arrays.get("muestras", ()))
+    if not m:
+        return []
+    historiales = [HistorialMultiResolucion(meta["capacidad"], dt, meta["niveles"], muestras=meta["capacidad_muestras"])
+                   for dt in arrays["dt"].tolist()]
+    crudos = _partir(arrays["crudo"], arrays["crudo.largos"])
+    valores = _partir(arrays["muestra.valores"], arrays["muestra.largos"])
+    for h, crudo, muestra, muestras, t0, t_ultimo in zip(historiales, crudos, valores, arrays["muestras"].tolist(),
+                                                        arrays["t0"].tolist(), arrays["t_ultimo"].tolist()):
+        h.crudo.cargar(crudo)
+        h._muestras, h._t0 = muestras, t0
+        h.t_ultimo = None if t_ultimo != t_ultimo else t_ultimo # NaN: sin muestras
+        h.niveles["muestra"].valores.cargar(muestra)
+        h.niveles["muestra"].t_ultimo = h.t_ultimo
+    for nombre, _, _ in meta["niveles"]:
+        largos = arrays[f"{nombre}.largos"]
+        columnas = [_partir(arrays[f"{nombre}.{campo}"], largos) for campo in ("t", "minimo", "media", "maximo")]
+        buckets = arrays[f"{nombre}.bucket"].tolist()
+        acumulados = arrays[f"{nombre}.acumulado"].tolist()
+        for j, h in enumerate(historiales):
+            nivel = h.niveles[nombre]
+            for campo, partes in zip(("t", "minimo", "media", "maximo"), columnas):
+                getattr(nivel, campo).cargar(partes[j])
+            nivel._bucket = None if buckets[j] < 0 else buckets[j]
+            nivel._min, nivel._max, nivel._suma, n = acumulados[j]
+            nivel._n = int(n)
+    return historiales
+
+
+class _NivelParque:
+    """NivelAgregado vectorizado: todas las turbinas cierran el periodo en el mismo tick."""
+    def __init__(self, nombre: str, periodo: float, capacidad: int, filas: int):
+        self.nombre = nombre
+        self.periodo = float(periodo)
+        self.capacidad = capacidad
+        self.t = BufferCircular(capacidad)
+        self.minimo = np.zeros((filas, capacidad))
+        self.media = np.zeros((filas, capacidad))
+        self.maximo = np.zeros((filas, capacidad))
+        self._min = np.zeros(filas)
+        self._max = np.zeros(filas)
+        self._suma = np.zeros(filas)
+        self._n = 0
+        self._bucket: Optional[int] = None
+        self._pos = 0
+
+    def reubicar(self, filas: int, inicio: int, fin: int, destinos: slice) -> None:
+        for nombre in ("minimo", "media", "maximo", "_min", "_max", "_suma"):
+            viejo = getattr(self, nombre)
+            nuevo = np.zeros((filas,) + viejo.shape[1:])
+            nuevo[destinos] = viejo[inicio:fin]
+            setattr(self, nombre, nuevo)
+
+    def agregar(self, t: float, valores: np.ndarray, n: int, sucias: Optional[np.ndarray] = None) -> None:
+        bucket = int(t // self.periodo)
+        if bucket != self._bucket:
+            self._cerrar(n, sucias)
+            self._bucket = bucket
+        if sucias is not None: # Filas cuyo acumulador cambia con este valor
+            if self._n == 0:
+                sucias[:n] |= (self._min[:n] != valores) | (self._max[:n] != valores) | (self._suma[:n] != valores)
+            else:
+                sucias[:n] |= (valores != 0) | (valores < self._min[:n]) | (valores > self._max[:n])
+        if self._n == 0:
+            self._min[:n] = valores
+            self._max[:n] = valores
+            self._suma[:n] = valores
+        else:
+            np.minimum(self._min[:n], valores, out=self._min[:n])
+            np.maximum(self._max[:n], valores, out=self._max[:n])
+            self._suma[:n] += valores
+        self._n += 1
+
+    def _cerrar(self, n: int, sucias: Optional[np.ndarray] = None) -> None:
+        if self._n:
+            self.t.agregar(self._bucket * self.periodo)
+            media = self._suma[:n] / self._n
+            if sucias is not None:
+                sucias[:n] |= ((self.minimo[:n, self._pos] != self._min[:n]) | (self.media[:n, self._pos] != media)
+                               | (self.maximo[:n, self._pos] != self._max[:n]))
+            self.minimo[:n, self._pos] = self._min[:n]
+            self.media[:n, self._pos] = media
+            self.maximo[:n, self._pos] = self._max[:n]
+            self._pos = (self._pos + 1) % self.capacidad
+        self._n = 0
+
+    def serie_fila(self, i: int) -> Serie:
+        cerrados = len(self.t)
+        orden = (np.arange(cerrados) + (self._pos - cerrados)) % self.capacidad
+        t = self.t.a_lista()
+        mn, me, mx = (self.minimo[i, orden].tolist(), self.media[i, orden].tolist(),
+                      self.maximo[i, orden].tolist())
+        if self._n:
+            t.append(self._bucket * self.periodo)
+            mn.append(float(self._min[i]))
+            me.append(float(self._suma[i] / self._n))
+            mx.append(float(self._max[i]))
+        return t, mn, me, mx
+
+
+class _MuestrasParque:
+    """Nivel "muestra" de HistorialParque: las columnas del buffer crudo, una por tick (periodo = dt)."""
+    nombre = "muestra"
+
+    def __init__(self, historial: 'HistorialParque'):
+        self._h = historial
+
+    @property
+    def periodo(self) -> float:
+        return self._h.dt
+
+    @property
+    def capacidad(self) -> int:
+        return self._h.columnas
+
+    def serie_fila(self, i: int) -> Serie:
+        h = self._h
+        k = min(h._muestras, h.columnas)
+        valores = h.crudo[i, np.arange(h._pos - k, h._pos) % h.columnas].tolist()
+        t = (np.arange(h._muestras - k, h._muestras) * h.dt).tolist()
+        return t, valores, list(valores), list(valores)
+
+
+class _NivelFila:
+    """Un nivel de HistorialParque visto como el NivelAgregado de una sola turbina."""
+    def __init__(self, nivel: _NivelParque, i: int):
+        self._nivel = nivel
+        self._i = i
+        self.nombre = nivel.nombre
+        self.periodo = nivel.periodo
+        self.capacidad = nivel.capacidad
+
+    def serie(self) -> Serie:
+        return self._nivel.serie_fila(self._i)
+
+    def serie_desde(self, t0: float) -> Serie:
+        return _filtrar_desde(self.serie(), t0)
+
+
+class HistorialParque:
+    """Historial vectorizado del motor struct-of-arrays: una fila por turbina.
+    Cada muestra se guarda una sola vez, en un buffer circular de max(capacidad, muestras) columnas:
+    las ultimas 'capacidad' son la secuencia cruda y todas juntas el nivel "muestra"."""
+    def __init__(self, filas: int, capacidad: int = 50, dt: float = 1.0,
+                 niveles: Sequence[Tuple[str, float, int]] = NIVELES_PARQUE, muestras: int = MUESTRAS_PARQUE):
+        self.capacidad = capacidad
+        self.columnas = max(capacidad, muestras)
+        self.dt = dt
+        self.crudo = np.zeros((filas, self.columnas))
+        self.niveles: Dict[str, _NivelParque] = {n: _NivelParque(n, p, c, filas) for n, p, c in niveles if p > dt}
+        # Niveles de lectura (VistaHistorial): el de muestras y los agregados
+        self.lectura: Dict[str, object] = {"muestra": _MuestrasParque(self), **self.niveles}
+        self._pos = 0 # Columna donde va la proxima muestra (la mas antigua una vez lleno)
+        self._muestras = 0
+        self.sucias: Optional[np.ndarray] = None # Filas modificadas desde rastrear_cambios() (checkpoints)
+
+    def redimensionar(self, filas: int, n: int) -> None:
+        self.reubicar(filas, 0, n, 0)
+
+    def reubicar(self, filas: int, inicio: int, fin: int, destino: int) -> None:
+        """Deja 'filas' filas: las filas [inicio, fin) pasan a empezar en 'destino' y el resto queda en cero
+        (y marcado como modificado). Lo usan el crecimiento y el reparto de filas entre shards."""
+        fin = max(inicio, fin)
+        destinos = slice(destino, destino + fin - inicio)
+        crudo = np.zeros((filas, self.columnas))
+        crudo[destinos] = self.crudo[inicio:fin]
+        self.crudo = crudo
+        for nivel in self.niveles.values():
+            nivel.reubicar(filas, inicio, fin, destinos)
+        if self.sucias is not None:
+            sucias = np.ones(filas, dtype=bool)
+            sucias[destinos] = self.sucias[inicio:fin]
+            self.sucias = sucias
+
+    def agregar(self, valores: np.ndarray, n: int) -> None:
+        t = self._muestras * self.dt
+        self._muestras += 1
+        if self.sucias is not None:
+            self.sucias[:n] |= self.crudo[:n, self._pos] != valores
+        self.crudo[:n, self._pos] = valores
+        self._pos = (self._pos + 1) % self.columnas
+        for nivel in self.niveles.values():
+            nivel.agregar(t, valores, n, self.sucias)
+
+    def rastrear_cambios(self) -> None:
+        """Empieza (o reinicia) el registro de filas cuyo contenido cambia. El reloj comun no cuenta."""
+        self.sucias = np.zeros(self.crudo.shape[0], dtype=bool)
+
+    def exportar(self, n: int, filas: Optional[np.ndarray] = None) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """(meta, arrays) de las filas pedidas; filas=None: las primeras n (vistas, sin copiar)."""
+        sel = slice(0, n) if filas is None else filas
+        meta = {"dt": self.dt, "capacidad": self.capacidad, "columnas": self.columnas, "pos": self._pos,
+                "muestras": self._muestras, "niveles": {}}
+        arrays = {"crudo": self.crudo[sel]}
+        for nombre, nivel in self.niveles.items():
+            meta["niveles"][nombre] = {"periodo": nivel.periodo, "capacidad": nivel.capacidad,
+                                       "t": nivel.t.a_lista(), "n": nivel._n, "bucket": nivel._bucket,
+                                       "pos": nivel._pos}
+            arrays[f"{nombre}.minimo"] = nivel.minimo[sel]
+            arrays[f"{nombre}.media"] = nivel.media[sel]
+            arrays[f"{nombre}.maximo"] = nivel.maximo[sel]
+            arrays[f"{nombre}.acumulado"] = np.stack([nivel._min[sel], nivel._max[sel], nivel._suma[sel]], axis=1)
+        return meta, arrays
+
+    def importar(self, meta: dict, arrays: Dict[str, np.ndarray], filas: Optional[np.ndarray] = None) -> None:
+        """Inverso de exportar(); filas=None: las primeras len(arrays['crudo']) filas."""
+        niveles = {nombre: (nivel.periodo, nivel.capacidad) for nombre, nivel in self.niveles.items()}
+        guardados = {nombre: (m["periodo"], m["capacidad"]) for nombre, m in meta["niveles"].items()}
+        if (meta["capacidad"], meta["columnas"]) != (self.capacidad, self.columnas) or niveles != guardados:
+            raise ValueError("El historial guardado tiene otra configuracion de capacidad o niveles.")
+        sel = slice(0, len(arrays["crudo"])) if filas is None else filas
+        self.dt, self._pos, self._muestras = meta["dt"], meta["pos"], meta["muestras"]
+        self.crudo[sel] = arrays["crudo"]
+        for nombre, nivel in self.niveles.items():
+            m = meta["niveles"][nombre]
+            nivel.t.cargar(m["t"])
+            nivel._n, nivel._bucket, nivel._pos = m["n"], m["bucket"], m["pos"]
+            nivel.minimo[sel] = arrays[f"{nombre}.minimo"]
+            nivel.media[sel] = arrays[f"{nombre}.media"]
+            nivel.maximo[sel] = arrays[f"{nombre}.maximo"]
+            acumulado = arrays[f"{nombre}.acumulado"]
+            nivel._min[sel], nivel._max[sel], nivel._suma[sel] = acumulado[:, 0], acumulado[:, 1], acumulado[:, 2]
+
+    def crudo_fila(self, i: int) -> List[float]:
+        """Las ultimas 'capacidad' muestras de la fila i (mas antigua -> mas reciente)."""
+        return self.crudo[i, (np.arange(-self.capacidad, 0) + self._pos) % self.columnas].tolist()
+
+    def escribir_crudo(self, i: int, valores: Sequence[float]) -> None:
+        """Reemplaza las ultimas 'capacidad' muestras de la fila i (se conservan las ultimas de 'valores');
+        las anteriores del nivel "muestra" no cambian."""
+        if self.sucias is not None:
+            self.sucias[i] = True
+        valores = list(valores)[-self.capacidad:]
+        self.crudo[i, (np.arange(-self.capacidad, 0) + self._pos) % self.columnas] = 0.0
+        columnas = (np.arange(len(valores)) + self._pos - len(valores)) % self.columnas
+        self.crudo[i, columnas] = valores
+
+    def fila(self, i: int) -> 'VistaHistorial':
+        return VistaHistorial(self, i)
+
+
+class VistaHistorial:
+    """Misma interfaz de lectura que HistorialMultiResolucion, sobre una fila de HistorialParque."""
+    def __init__(self, historial: HistorialParque, i: int):
+        self._h = historial
+        self._i = i
+
+    def serie(self, nivel: str) -> Serie:
+        return self._h.lectura[nivel].serie_fila(self._i)
+
+    def serie_para(self, duracion: float) -> Serie:
+        return _nivel_para(list(self._h.lectura.values()), duracion).serie_fila(self._i)
+
+    @property
+    def niveles(self) -> Dict[str, _NivelFila]:
+        return {nombre: _NivelFila(nivel, self._i) for nombre, nivel in self._h.lectura.items()}
+
+    @property
+    def t_ultimo(self) -> Optional[float]:
+        return (self._h._muestras - 1) * self._h.dt if self._h._muestras else None
+
+    @property
+    def dt(self) -> float:
+        return self._h.dt
+
+    def __len__(self) -> int:
+        return self._h.capacidad
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._h.crudo_fila(self._i))
+
+    def __getitem__(self, i):
+        return self._h.crudo_fila(self._i)[i]
+
+    def copia(self) -> 'CopiaHistorial':
+        niveles = {nombre: (nivel.periodo, nivel.capacidad, nivel.serie_fila(self._i))
+                   for nombre, nivel in self._h.lectura.items()}
+        return CopiaHistorial(self._h.crudo_fila(self._i), niveles, self.t_ultimo, self._h.dt)
+
+
+class _NivelCopia:
+    def __init__(self, periodo: float, capacidad: int, serie: Serie):
+        self.periodo = periodo
+        self.capacidad = capacidad
+        self._serie = serie
+
+    def serie(self) -> Serie:
+        return self._serie
+
+    def serie_desde(self, t0: float) -> Serie:
+        return _filtrar_desde(self._serie, t0)
+
+
+class CopiaHistorial:
+    """Instantanea de solo lectura con la interfaz de VistaHistorial (se puede enviar entre procesos)."""
+    def __init__(self, crudo: List[float], niveles: Dict[str, Tuple[float, int, Serie]],
+                 t_ultimo: Optional[float] = None, dt: float = 1.0):
+        self.crudo = crudo
+        self.niveles = {nombre: _NivelCopia(*datos) for nombre, datos in niveles.items()}
+        self.t_ultimo = t_ultimo
+        self.dt = dt
+
+    def serie(self, nivel: str) -> Serie:
+        return self.niveles[nivel].serie()
+
+    def serie_para(self, duracion: float) -> Serie:
+        return _nivel_para(list(self.niveles.values()), duracion).serie()
+
+    def __len__(self) -> int:
+        return len(self.crudo)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.crudo)
+
+    def __getitem__(self, i):
+        return self.crudo[i]
@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
+import argparse
 import math
+import time
+from concurrent.futures import Future
 from controlador import SimuladorController
 from alarmas import AlarmManager
 from aerogenerador import AG_AltaPotencia, AG_BajaPotencia
 from fallas import FallaMecanica
+from historial import HistorialMultiResolucion
+from tendencias import GraficoTendencia
+from simulacion_hilo import AGInstantanea, SimulacionEnHilo, TurbinasInstantanea
 
 # --- CONFIGURACION DE COLORES ---
 COLOR_BG = "#1e1e1e"
@@ -15,6 +21,7 @@ COLOR_SUCCESS = "#4caf50"
 COLOR_WARNING = "#ff9800"
 COLOR_DANGER = "#f44336"
 COLOR_GRAPH = "#00e5ff"
+COLOR_VIENTO = "#8bc34a"
 
 class Estilos:
     @staticmethod
@@ -34,6 +41,18 @@ class Estilos:
         style.configure("Danger.TButton", background=COLOR_DANGER)
         style.map("Danger.TButton", background=[('active', '#d32f2f')])
         style.configure("Success.TButton", background=COLOR_SUCCESS)
+        style.configure("TCheckbutton", background=COLOR_BG, foreground=COLOR_TEXT)
+        style.map("TCheckbutton", background=[('active', COLOR_BG)])
+
+def al_terminar(widget, resultado, accion):
+    """Llama accion(valor) en el hilo de Tk. Con la simulacion en hilo los comandos devuelven un Future:
+    se consulta con after (Tk no admite llamadas desde otros hilos)."""
+    if isinstance(resultado, Future):
+        if not resultado.done():
+            widget.after(50, al_terminar, widget, resultado, accion)
+            return
+        resultado = resultado.result()
+    accion(resultado)
 
 # --- VENTANA DE LOGIN (RECUPERADA) ---
 class LoginWindow(tk.Toplevel):
@@ -79,13 +98,33 @@ class VentanaDetalle(tk.Toplevel):
         super().__init__(parent)
         self.ag = aerogenerador
         self.title(f"Detalles Tecnicos AG-{self.ag.id_a}")
-        self.geometry("600x500")
+        self.geometry("600x540")
         self.configure(bg=COLOR_BG)
         self.resizable(False, False)
         
-        ttk.Label(self, text="Curva de Generacion (Tiempo Real)", style="TLabel", font=("Segoe UI", 12)).pack(pady=10)
-        self.canvas_graph = tk.Canvas(self, width=500, height=200, bg="black", highlightthickness=1, highlightbackground=COLOR_PANEL)
-        self.canvas_graph.pack()
+        ttk.Label(self, text="Curva de Generacion (Tiempo Real)", style="TLabel", font=("Segoe UI", 12)).pack(pady=(10,0))
+        ttk.Label(self, text="Rueda: zoom | Arrastrar: desplazar | Doble clic: en vivo", style="TLabel", font=("Segoe UI", 8)).pack()
+        self.grafico = GraficoTendencia(self, width=500, height=200, highlightbackground=COLOR_PANEL)
+        self.grafico.pack()
+        self.controller = getattr(parent, "controller", None)
+        if isinstance(self.ag, AGInstantanea): # Simulacion en hilo: historial y fallas llegan en la instantanea
+            self.ag.observar()
+            self.bind("<Destroy>", lambda e: self.ag.observar(False) if e.widget is self else None)
+        self.lbl_kpi = ttk.Label(self, style="TLabel", font=("Consolas", 9))
+        self.lbl_kpi.pack(pady=(5, 0))
+
+        # Viento y temperatura se registran mientras la ventana esta abierta, con el reloj del historial de potencia
+        self._crear_historiales_lecturas()
+        self.grafico.agregar_serie("Potencia", lambda: self.ag.historial_potencia, COLOR_GRAPH, "kW")
+        self.grafico.agregar_serie("Viento", lambda: self.hist_viento, COLOR_VIENTO, "m/s", visible=False)
+        self.grafico.agregar_serie("Temp", lambda: self.hist_temp, COLOR_WARNING, "C", visible=False)
+
+        frame_series = ttk.Frame(self, style="TFrame")
+        frame_series.pack()
+        for nombre, texto in (("Viento", "Superponer viento"), ("Temp", "Superponer temperatura")):
+            var = tk.BooleanVar(value=False)
+            ttk.Checkbutton(frame_series, text=texto, variable=var,
+                            command=lambda n=nombre, v=var: self.grafico.mostrar_serie(n, v.get())).pack(side="left", padx=10)
         
         ttk.Label(self, text="Catalogo de Fallas / Mantenimiento", style="TLabel", font=("Segoe UI", 12)).pack(pady=(20,5))
         
@@ -104,25 +143,23 @@ class VentanaDetalle(tk.Toplevel):
 
         self.actualizar_popup()
 
+    def _crear_historiales_lecturas(self):
+        dt = self.ag.historial_potencia.dt
+        self.hist_viento = HistorialMultiResolucion(1, dt)
+        self.hist_temp = HistorialMultiResolucion(1, dt)
+        self._t_registrado = None
+
     def dibujar_grafico(self):
-        self.canvas_graph.delete("all")
-        data = self.ag.historial_potencia
-        w = 500
-        h = 200
-        max_val = 2600 
-        step = w / len(data)
-        
-        self.canvas_graph.create_line(0, h/2, w, h/2, fill="#333", dash=(2,2))
-
-        points = []
-        for i, val in enumerate(data):
-            x = i * step
-            y = h - (val / max_val * h)
-            points.append(x)
-            points.append(y)
-        
-        if len(points) >= 4:
-            self.canvas_graph.create_line(points, fill=COLOR_GRAPH, width=2, smooth=True)
+        historial = self.ag.historial_potencia
+        t = historial.t_ultimo
+        if historial.dt != self.hist_viento.dt or (t is not None and self._t_registrado is not None
+                                                   and t < self._t_registrado):
+            self._crear_historiales_lecturas() # Otro paso o el reloj volvio atras (p. ej. una reproduccion)
+        if t is not None and t != self._t_registrado:
+            self.hist_viento.agregar(self.ag.obtener_viento(), t)
+            self.hist_temp.agregar(self.ag.obtener_temp(), t)
+            self._t_registrado = t
+        self.grafico.actualizar()
 
     def actualizar_lista_fallas(self):
         self.listbox_fallas.delete(0, tk.END)
@@ -137,13 +174,27 @@ class VentanaDetalle(tk.Toplevel):
             self.listbox_fallas.insert(tk.END, "Sin fallas registradas. Sistema nominal.")
 
     def accion_corregir(self):
-        self.ag.realizar_mantenimiento()
+        al_terminar(self, self.ag.realizar_mantenimiento(), lambda _: self._mantenimiento_hecho())
+
+    def _mantenimiento_hecho(self):
         messagebox.showinfo("Mantenimiento", "Fallas corregidas. El aerogenerador ha sido desbloqueado.\nPuede ponerlo en marcha nuevamente.")
         self.actualizar_lista_fallas()
 
+    def actualizar_kpi(self):
+        if isinstance(self.ag, AGInstantanea):
+            kpi = self.ag.kpi()
+        else:
+            kpi = self.controller.kpis_turbina(self.ag.id_a) if self.controller is not None else None
+        if kpi is not None:
+            self.lbl_kpi.config(text=f"Energia {kpi['energia_kwh']:.1f} kWh | Disp. {kpi['disponibilidad']:.1%} | "
+                                     f"FC {kpi['factor_capacidad']:.1%}\n"
+                                     f"Media 10min {kpi['media_10min_kw']:.0f} kW | 1h {kpi['media_1h_kw']:.0f} kW | "
+                                     f"1d {kpi['media_1d_kw']:.0f} kW")
+
     def actualizar_popup(self):
         if self.winfo_exists():
             self.dibujar_grafico()
+            self.actualizar_kpi()
             self.actualizar_lista_fallas()
             self.after(1000, self.actualizar_popup)
 
@@ -153,11 +204,10 @@ class WidgetAerogenerador(ttk.Frame):
         super().__init__(parent, style="Card.TFrame", padding=10)
         self.ag = aerogenerador
         
-        self.lbl_titulo = ttk.Label(self, text=f"AG-{self.ag.id_a}", style="Header.TLabel")
+        self.lbl_titulo = ttk.Label(self, style="Header.TLabel")
         self.lbl_titulo.pack(anchor="w")
         
-        tipo = "Alta Potencia" if isinstance(self.ag, AG_AltaPotencia) else "Baja Potencia"
-        self.lbl_tipo = ttk.Label(self, text=tipo, style="Card.TLabel", font=("Segoe UI", 8))
+        self.lbl_tipo = ttk.Label(self, style="Card.TLabel", font=("Segoe UI", 8))
         self.lbl_tipo.pack(anchor="w")
 
         self.canvas = tk.Canvas(self, width=150, height=150, bg=COLOR_PANEL, highlightthickness=0)
@@ -181,7 +231,19 @@ class WidgetAerogenerador(ttk.Frame):
         
         ttk.Button(self, text="STATUS / GRAFICO", command=self.abrir_detalles).pack(fill="x", pady=(5,0))
 
+        self.asignar(aerogenerador)
+
+    def asignar(self, aerogenerador):
+        """Muestra otro aerogenerador en este widget (la grilla virtual recicla widgets al desplazarse)."""
+        self.ag = aerogenerador
+        self.lbl_titulo.config(text=f"AG-{self.ag.id_a}")
+        alta = self.ag.es_alta if isinstance(self.ag, AGInstantanea) else isinstance(self.ag, AG_AltaPotencia)
+        tipo = "Alta Potencia" if alta else "Baja Potencia"
+        self.lbl_tipo.config(text=tipo)
         self.angulo = 0
+        self._ultimo = None       # (estado, timer, potencia) mostrados
+        self._color_palas = None
+        self._posicionar_palas()
 
     def _crear_fila_dato(self, label, variable):
         f = ttk.Frame(self.frame_datos, style="Card.TFrame")
@@ -190,15 +252,24 @@ class WidgetAerogenerador(ttk.Frame):
         ttk.Label(f, textvariable=variable, style="Card.TLabel", font=("Segoe UI", 9, "bold")).pack(side="right")
 
     def dibujar_base(self):
+        # Los items se crean una sola vez; despues solo cambian coordenadas y colores
         self.canvas.create_rectangle(70, 80, 80, 150, fill="#7f8c8d", outline="")
         self.canvas.create_oval(65, 70, 85, 90, fill="#ecf0f1", outline="")
+        self.palas = [self.canvas.create_line(75, 80, 75, 80, width=5, fill="#ecf0f1", capstyle="round")
+                      for _ in range(3)]
+
+    def _posicionar_palas(self):
+        cx, cy = 75, 80
+        radio = 60
+        for i, pala in enumerate(self.palas):
+            theta = math.radians(self.angulo + (i * 120))
+            self.canvas.coords(pala, cx, cy, cx + radio * math.cos(theta), cy + radio * math.sin(theta))
+
+    def actualizar_animacion(self, estado_actual=None):
+        if estado_actual is None:
+            estado_actual = self.ag.get_estado()
 
-    def actualizar_animacion(self):
-        self.canvas.delete("palas")
         color_palas = "#ecf0f1" 
-        
-        estado_actual = self.ag.get_estado()
-        
         if "stop" in estado_actual: 
             color_palas = "#c0392b" 
         elif "espera" in estado_actual:
@@ -206,31 +277,34 @@ class WidgetAerogenerador(ttk.Frame):
         elif estado_actual == "pausado":
             color_palas = "#f39c12" 
         
-        cx, cy = 75, 80
-        radio = 60
+        if color_palas != self._color_palas:
+            for pala in self.palas:
+                self.canvas.itemconfigure(pala, fill=color_palas)
+            self._color_palas = color_palas
         
         if estado_actual == "generando":
             self.angulo = (self.angulo + 20) % 360
-        
-        for i in range(3):
-            theta = math.radians(self.angulo + (i * 120))
-            x_end = cx + radio * math.cos(theta)
-            y_end = cy + radio * math.sin(theta)
-            self.canvas.create_line(cx, cy, x_end, y_end, width=5, fill=color_palas, tags="palas", capstyle="round")
+            self._posicionar_palas()
 
     def actualizar_datos_ui(self):
-        estado_display = self.ag.get_estado().upper()
+        estado = self.ag.get_estado()
         timer = self.ag.get_timer_rearme()
-        
-        if timer > 0:
-            estado_display = f"REARME ({timer}s)"
-        
-        self.var_estado.set(estado_display)
-        self.var_potencia.set(f"{self.ag.potencia_actual:.1f} kW")
-        self.actualizar_animacion()
+        potencia = f"{self.ag.potencia_actual:.1f} kW"
+        datos = (estado, timer, potencia)
+
+        # Solo se tocan los Label si algo cambio (set() con el mismo texto igual fuerza un redibujo)
+        if datos != self._ultimo:
+            if self._ultimo is None or self._ultimo[:2] != datos[:2]:
+                self.var_estado.set(f"REARME ({timer}s)" if timer > 0 else estado.upper())
+            if self._ultimo is None or self._ultimo[2] != potencia:
+                self.var_potencia.set(potencia)
+            self._ultimo = datos
+        self.actualizar_animacion(estado)
 
     def accion_marcha(self):
-        res = self.ag.solicitar_marcha()
+        al_terminar(self, self.ag.solicitar_marcha(), self._resultado_marcha)
+
+    def _resultado_marcha(self, res):
         if res != "OK":
              messagebox.showerror("Error", res)
     
@@ -240,9 +314,96 @@ class WidgetAerogenerador(ttk.Frame):
     def abrir_detalles(self):
         VentanaDetalle(self.winfo_toplevel(), self.ag)
 
+# --- GRILLA VIRTUAL DE AEROGENERADORES ---
+class GrillaVirtual(ttk.Frame):
+    """Fila desplazable de tarjetas. Solo existen widgets para las posiciones visibles (mas un margen):
+    al desplazarse, los que salen de la ventana se reasignan a las turbinas que entran."""
+    SEPARACION = 10 # px alrededor de cada tarjeta
+    MARGEN = 1      # Tarjetas extra a cada lado de la ventana visible
+
+    def __init__(self, parent, ags):
+        super().__init__(parent, style="TFrame")
+        self.ags = ags # Lista del controlador (crece con agregar_aerogenerador) o TurbinasInstantanea
+        self.n = 0
+        self.paso = None # Ancho de una tarjeta + separacion (se mide con el primer widget)
+        self.visibles = {} # indice en ags -> widget
+        self._libres = []
+        self._ventanas = {} # widget -> item 'window' del canvas
+
+        self.canvas = tk.Canvas(self, bg=COLOR_BG, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self, orient="horizontal", command=self._desplazar)
+        self.canvas.configure(xscrollcommand=scrollbar.set)
+        scrollbar.pack(side="bottom", fill="x")
+        self.canvas.pack(side="bottom", fill="both", expand=True)
+        self.canvas.bind("<Configure>", lambda e: self._actualizar_ventana())
+        self.canvas.bind("<Shift-MouseWheel>", lambda e: self._desplazar("scroll", -1 if e.delta > 0 else 1, "units"))
+
+        self.sincronizar()
+
+    def sincronizar(self):
+        """Incorpora las turbinas agregadas al final de 'ags' sin reconstruir los widgets existentes."""
+        if len(self.ags) == self.n:
+            return
+        self.n = len(self.ags)
+        if self.n and self.paso is None:
+            self._medir()
+        if self.paso is not None:
+            self.canvas.configure(scrollregion=(0, 0, self.n * self.paso, self._alto))
+        self._actualizar_ventana()
+
+    def refrescar(self):
+        """Actualiza los datos de los widgets visibles (los demas no existen)."""
+        for w in self.visibles.values():
+            w.actualizar_datos_ui()
+
+    def _medir(self):
+        w = self._crear(self.ags[0])
+        w.update_idletasks()
+        self.paso = w.winfo_reqwidth() + 2 * self.SEPARACION
+        self._alto = w.winfo_reqheight() + 2 * self.SEPARACION
+        self.canvas.configure(height=self._alto, xscrollincrement=self.paso)
+        self._libres.append(w)
+
+    def _crear(self, ag):
+        w = WidgetAerogenerador(self.canvas, ag)
+        self._ventanas[w] = self.canvas.create_window(0, 0, window=w, anchor="nw", state="hidden")
+        return w
+
+    def _desplazar(self, *args):
+        self.canvas.xview(*args)
+        self._actualizar_ventana()
+
+    def _actualizar_ventana(self):
+        if self.paso is None:
+            return
+        x0 = self.canvas.canvasx(0)
+        primero = max(0, int(x0 // self.paso) - self.MARGEN)
+        ultimo = min(self.n, int((x0 + self.canvas.winfo_width()) // self.paso) + 1 + self.MARGEN)
+
+        for i in [i for i in self.visibles if not primero <= i < ultimo]:
+            w = self.visibles.pop(i)
+            self.canvas.itemconfigure(self._ventanas[w], state="hidden")
+            self._libres.append(w)
+        for i in range(primero, ultimo):
+            if i in self.visibles:
+                continue
+            if self._libres:
+                w = self._libres.pop()
+                if w.ag is not self.ags[i]:
+                    w.asignar(self.ags[i])
+            else:
+                w = self._crear(self.ags[i])
+            ventana = self._ventanas[w]
+            self.canvas.coords(ventana, i * self.paso + self.SEPARACION, self.SEPARACION)
+            self.canvas.itemconfigure(ventana, state="normal")
+            w.actualizar_datos_ui()
+            self.visibles[i] = w
+
 # --- VENTANA PRINCIPAL ---
 class DashboardApp(tk.Tk):
-    def __init__(self):
+    """Con en_hilo=True la simulacion corre en su propio hilo (un tick por segundo) y la interfaz solo
+    dibuja la ultima instantanea, a 'fps' cuadros por segundo."""
+    def __init__(self, en_hilo: bool = False, fps: float = 10):
         super().__init__()
         Estilos.configurar()
         self.title("SCADA Eolico - Control Avanzado (SRP)")
@@ -254,8 +415,12 @@ class DashboardApp(tk.Tk):
 
         # 2. INICIALIZAMOS EL CONTROLADOR
         self.controller = SimuladorController()
+        self.controller.habilitar_kpis()
+        self.simulacion = SimulacionEnHilo(self.controller) if en_hilo else None
+        self.periodo_cuadro_ms = max(1, round(1000 / fps))
+        self._tick_mostrado = None
         
-        self.widgets_ag = []
+        self.grilla = None
         
         # 3. LANZAMOS LA VENTANA DE LOGIN
         # Pasamos 'self.mostrar_dashboard' como la funcion a ejecutar si el login es correcto
@@ -264,8 +429,14 @@ class DashboardApp(tk.Tk):
     def mostrar_dashboard(self):
         """Este metodo solo se ejecuta si el usuario pone bien la clave"""
         self.deiconify() # Volvemos a mostrar la ventana principal
-        self._construir_interfaz()
-        self._loop_simulacion()
+        if self.simulacion is not None:
+            self.simulacion.iniciar()
+            self.simulacion.tomar()
+            self._construir_interfaz()
+            self._loop_render()
+        else:
+            self._construir_interfaz()
+            self._loop_simulacion()
 
     def _construir_interfaz(self):
         frame_top = ttk.Frame(self, style="TFrame")
@@ -279,56 +450,96 @@ class DashboardApp(tk.Tk):
         self.lbl_total_potencia = ttk.Label(frame_total, text="0.0 kW", style="BigNumber.TLabel", background=COLOR_PANEL)
         self.lbl_total_potencia.pack()
 
+        frame_kpi = ttk.Frame(frame_top, style="Card.TFrame", padding=10)
+        frame_kpi.pack(side="right", padx=10)
+        ttk.Label(frame_kpi, text="KPI DEL PARQUE", style="Card.TLabel").pack()
+        self.lbl_kpi = ttk.Label(frame_kpi, text="", style="Card.TLabel", font=("Consolas", 9))
+        self.lbl_kpi.pack()
+
         frame_toolbar = ttk.Frame(self, style="TFrame")
         frame_toolbar.pack(fill="x", padx=20, pady=5)
         
         ttk.Button(frame_toolbar, text="+ AGREGAR AEROGENERADOR", command=self.agregar_nuevo_aero).pack(side="left")
         ttk.Button(frame_toolbar, text="! PROVOCAR FALLA GRAVE (DEMO)", style="Danger.TButton", command=self.demo_falla).pack(side="right")
 
-        canvas_scroll = tk.Canvas(self, bg=COLOR_BG, highlightthickness=0)
-        scrollbar = ttk.Scrollbar(self, orient="horizontal", command=canvas_scroll.xview)
-        self.frame_grid = ttk.Frame(canvas_scroll, style="TFrame")
+        ags = TurbinasInstantanea(self.simulacion) if self.simulacion is not None else self.controller.ags
+        self.grilla = GrillaVirtual(self, ags)
+        self.grilla.pack(side="bottom", fill="both", expand=True, padx=20)
 
-        self.frame_grid.bind("<Configure>", lambda e: canvas_scroll.configure(scrollregion=canvas_scroll.bbox("all")))
-        canvas_scroll.create_window((0, 0), window=self.frame_grid, anchor="nw")
-        canvas_scroll.configure(xscrollcommand=scrollbar.set)
-
-        scrollbar.pack(side="bottom", fill="x")
-        canvas_scroll.pack(side="bottom", fill="both", expand=True, padx=20)
-        
-        self.refrescar_grid()
+    @property
+    def widgets_ag(self):
+        """Widgets existentes (solo los de la ventana visible de la grilla)."""
+        return list(self.grilla.visibles.values()) if self.grilla is not None else []
 
     def refrescar_grid(self):
-        for w in self.frame_grid.winfo_children():
-            w.destroy()
-        self.widgets_ag = []
-        
-        for ag in self.controller.ags:
-            w = WidgetAerogenerador(self.frame_grid, ag)
-            w.pack(side="left", padx=10, pady=10, anchor="n")
-            self.widgets_ag.append(w)
+        """Agrega a la grilla las turbinas nuevas del controlador (no reconstruye las existentes)."""
+        self.grilla.sincronizar()
 
     def agregar_nuevo_aero(self):
         resp = simpledialog.askinteger("Nuevo Aero", "Ingrese potencia esperada (kW):\n< 1000 para Baja Potencia\n> 1000 para Alta Potencia", minvalue=100, maxvalue=5000)
         if resp:
             tipo = "BAJA" if resp < 1000 else "ALTA"
-            new_id = self.controller.agregar_aerogenerador(tipo)
-            self.refrescar_grid()
-            messagebox.showinfo("Exito", f"AG-{new_id} agregado correctamente.\nEstado inicial: STOP MANUAL.")
+            if self.simulacion is not None: # La grilla lo incorpora con la proxima instantanea
+                al_terminar(self, self.simulacion.enviar(self.controller.agregar_aerogenerador, tipo), self._aero_agregado)
+            else:
+                self._aero_agregado(self.controller.agregar_aerogenerador(tipo))
+                self.grilla.sincronizar()
+
+    def _aero_agregado(self, new_id):
+        messagebox.showinfo("Exito", f"AG-{new_id} agregado correctamente.\nEstado inicial: STOP MANUAL.")
 
     def demo_falla(self):
-        self.controller.provocar_falla_demo()
+        if self.simulacion is not None:
+            self.simulacion.enviar(self.controller.provocar_falla_demo)
+        else:
+            self.controller.provocar_falla_demo()
         messagebox.showwarning("Simulacion", "Se ha forzado una ruptura en AG-1.\nEl sistema debe bloquearse.")
 
     def _loop_simulacion(self):
         total_kw = self.controller.avanzar_ciclo_simulacion()
+        inicio = time.perf_counter()
         self.lbl_total_potencia.config(text=f"{total_kw:.1f} kW")
+        self._mostrar_kpi(self.controller.kpis.parque())
         
-        for w in self.widgets_ag:
-            w.actualizar_datos_ui()
+        self.grilla.refrescar()
+        if self.controller.metricas is not None:
+            self.controller.metricas.refresco.observar(time.perf_counter() - inicio)
             
         self.after(1000, self._loop_simulacion)
 
+    def _mostrar_kpi(self, kpi):
+        self.lbl_kpi.config(text=f"Energia {kpi['energia_kwh']:.1f} kWh  Disp. {kpi['disponibilidad']:.1%}  "
+                                 f"FC {kpi['factor_capacidad']:.1%}\n"
+                                 f"Media 10min {kpi['media_10min_kw']:.0f}  1h {kpi['media_1h_kw']:.0f}  "
+                                 f"1d {kpi['media_1d_kw']:.0f} kW")
+
+    def _loop_render(self):
+        """Dibuja la ultima instantanea publicada por el hilo de simulacion (si hay una nueva)."""
+        if self.simulacion.error is not None:
+            messagebox.showerror("Simulacion", f"La simulacion se detuvo: {self.simulacion.error}")
+            return
+        inst = self.simulacion.tomar()
+        if inst.tick != self._tick_mostrado:
+            inicio = time.perf_counter()
+            self.lbl_total_potencia.config(text=f"{inst.total_kw:.1f} kW")
+            if inst.kpi is not None:
+                self._mostrar_kpi(inst.kpi)
+            self.grilla.sincronizar()
+            self.grilla.refrescar()
+            self._tick_mostrado = inst.tick
+            if self.controller.metricas is not None:
+                self.controller.metricas.refresco.observar(time.perf_counter() - inicio)
+        self.after(self.periodo_cuadro_ms, self._loop_render)
+
+    def destroy(self):
+        if self.simulacion is not None:
+            self.simulacion.detener(timeout=2)
+        super().destroy()
+
 if __name__ == "__main__":
-    app = DashboardApp()
+    parser = argparse.ArgumentParser(description="Dashboard SCADA del parque eolico.")
+    parser.add_argument("--hilo", action="store_true", help="Simulacion en un hilo propio (la interfaz solo dibuja)")
+    parser.add_argument("--fps", type=float, default=10, help="Cuadros por segundo de la interfaz con --hilo")
+    args = parser.parse_args()
+    app = DashboardApp(en_hilo=args.hilo, fps=args.fps)
     app.mainloop()
\ No newline at end of file
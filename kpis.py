@@ -0,0 +1,269 @@
+# kpis.py
+"""Indicadores de operacion (KPI) calculados en linea, tick a tick.
+
+Por turbina y por parque: energia producida, tiempo en cada estado (disponibilidad por tiempo), factor
+de capacidad contra POTENCIA_NOMINAL y potencia media en ventanas deslizantes de 10 minutos, 1 hora y
+1 dia. Cada tick son unas pocas operaciones NumPy sobre los estados y potencias que ya produjo el ciclo
+de control (O(1) por turbina) y ninguna consulta recorre historiales.
+"""
+import math
+from typing import Dict, Sequence, Tuple
+import numpy as np
+from aerogenerador import AerogeneradorBase
+
+# Disponible: generando o listo para generar esperando viento (suficiente o por debajo del de corte)
+ESTADOS_DISPONIBLES = ("generando", "pausado", "espera_viento")
+# nombre -> (duracion, periodo de cubeta) en segundos simulados
+VENTANAS: Dict[str, tuple] = {"10min": (600, 60), "1h": (3600, 300), "1d": (86400, 3600)}
+
+
+def _agrandar(array: np.ndarray, filas: int) -> np.ndarray:
+    """Copia de 'array' con 'filas' en el ultimo eje (las nuevas en cero)."""
+    nuevo = np.zeros(array.shape[:-1] + (filas,), dtype=array.dtype)
+    nuevo[..., :array.shape[-1]] = array
+    return nuevo
+
+
+class VentanaDeslizante:
+    """Suma de valor * dt por fila en los ultimos 'duracion' segundos, en cubetas de 'periodo'.
+    Guarda duracion / periodo - 1 cubetas cerradas mas la cubeta en curso: la ventana cubre entre
+    duracion - periodo y duracion segundos. Cerrar una cubeta resta la mas vieja de la suma, sin
+    volver a recorrer las demas.
+    """
+    def __init__(self, duracion: float, periodo: float, filas: int):
+        self.duracion = duracion
+        self.periodo = periodo
+        self.cubetas = max(1, round(duracion / periodo) - 1)
+        self._cerradas = np.zeros((self.cubetas, filas))
+        self._segundos = np.zeros(self.cubetas) # Tiempo cubierto por cada cubeta cerrada
+        self._suma = np.zeros(filas)            # Suma de las cubetas cerradas
+        self._actual = np.zeros(filas)
+        self._segundos_actual = 0.0
+        self._pos = 0
+        self._cubeta = 0 # Numero de la cubeta en curso (t // periodo)
+
+    def redimensionar(self, filas: int) -> None:
+        self._cerradas = _agrandar(self._cerradas, filas)
+        self._suma = _agrandar(self._suma, filas)
+        self._actual = _agrandar(self._actual, filas)
+
+    def agregar(self, t: float, valores: np.ndarray, dt: float) -> None:
+        """Suma el tick que termina en 't' (cae en la cubeta de su inicio)."""
+        cubeta = math.floor((t - dt) / self.periodo)
+        if cubeta > self._cubeta:
+            # Con saltos mayores a la ventana basta con vaciarla
+            for _ in range(min(cubeta - self._cubeta, self.cubetas + 1)):
+                self._cerrar()
+            self._cubeta = cubeta
+        self._actual[:len(valores)] += valores * dt
+        self._segundos_actual += dt
+
+    def _cerrar(self) -> None:
+        vieja = self._cerradas[self._pos]
+        self._suma += self._actual - vieja
+        vieja[:] = self._actual
+        self._segundos[self._pos] = self._segundos_actual
+        self._actual[:] = 0.0
+        self._segundos_actual = 0.0
+        self._pos = (self._pos + 1) % self.cubetas
+        if self._pos == 0: # Una vez por vuelta se recalcula la suma: no acumula error de redondeo
+            self._suma = self._cerradas.sum(axis=0)
+
+    def segundos(self) -> float:
+        """Tiempo que cubre hoy la ventana."""
+        return float(self._segundos.sum()) + self._segundos_actual
+
+    def sumas(self, n: int) -> np.ndarray:
+        return self._suma[:n] + self._actual[:n]
+
+    def exportar(self, n: int) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """(meta, arrays) de las primeras n filas (vistas, sin copiar)."""
+        meta = {"cubetas": self.cubetas, "segundos_actual": self._segundos_actual, "pos": self._pos,
+                "cubeta": self._cubeta}
+        return meta, {"cerradas": self._cerradas[:, :n], "segundos": self._segundos,
+                      "suma": self._suma[:n], "actual": self._actual[:n]}
+
+    def importar(self, meta: dict, arrays: Dict[str, np.ndarray]) -> None:
+        """Inverso de exportar() (la ventana ya tiene al menos esas filas)."""
+        if meta["cubetas"] != self.cubetas:
+            raise ValueError("La ventana guardada tiene otra cantidad de cubetas.")
+        n = len(arrays["suma"])
+        self._cerradas[:, :n] = arrays["cerradas"]
+        self._segundos[:] = arrays["segundos"]
+        self._suma[:n] = arrays["suma"]
+        self._actual[:n] = arrays["actual"]
+        self._segundos_actual, self._pos, self._cubeta = meta["segundos_actual"], meta["pos"], meta["cubeta"]
+
+
+class MotorKPI:
+    """KPI por turbina (fila i = controller.ags[i]) y del parque. Lo alimenta el controlador despues
+    de cada tick con los codigos de estado y las potencias; las turbinas se registran al darse de alta.
+    El tiempo por estado se acumula solo cuando una turbina cambia de estado (el tramo en curso se
+    suma al consultar): cada tick es una comparacion mas un trabajo proporcional a los cambios.
+    """
+    CAPACIDAD_INICIAL = 64
+
+    def __init__(self, dt: float = 1.0):
+        self.dt = dt
+        self.n = 0
+        self.t = 0.0 # Segundos simulados desde que se habilito
+        self.capacidad = self.CAPACIDAD_INICIAL
+        self.energia_kwh = np.zeros(self.capacidad)
+        self.segundos_estado = np.zeros((len(AerogeneradorBase.ESTADOS), self.capacidad)) # Tramos cerrados
+        self.estado = np.full(self.capacidad, -1, dtype=np.int8) # Estado del tramo en curso (-1: sin datos)
+        self.desde = np.zeros(self.capacidad)    # Inicio del tramo en curso
+        self.alta = np.zeros(self.capacidad)     # Instante del alta (las turbinas nuevas se miden desde ahi)
+        self.nominal_kw = np.zeros(self.capacidad)
+        self.ventanas = {nombre: VentanaDeslizante(d, p, self.capacidad) for nombre, (d, p) in VENTANAS.items()}
+        # Parque: acumuladores escalares (no suman las filas en cada consulta)
+        self.energia_parque_kwh = 0.0
+        self.segundos_estado_parque = np.zeros(len(AerogeneradorBase.ESTADOS)) # turbina-segundos
+        self._cuenta = np.zeros(len(AerogeneradorBase.ESTADOS), dtype=np.int64) # Turbinas en cada estado
+        self.nominal_parque_kwh = 0.0 # Energia que hubiera dado el parque a potencia nominal
+        self._nominal_total_kw = 0.0
+        self.ventanas_parque = {nombre: VentanaDeslizante(d, p, 1) for nombre, (d, p) in VENTANAS.items()}
+        self._disponibles = np.array([AerogeneradorBase.ESTADOS.index(e) for e in ESTADOS_DISPONIBLES])
+
+    def agregar_turbinas(self, nominales_kw: Sequence[float]) -> None:
+        """Alta de turbinas al final (en el orden de controller.ags)."""
+        nominales_kw = np.asarray(nominales_kw, dtype=float)
+        n = self.n + len(nominales_kw)
+        if n > self.capacidad:
+            capacidad = max(n, 2 * self.capacidad)
+            for nombre in ("energia_kwh", "segundos_estado", "desde", "alta", "nominal_kw"):
+                setattr(self, nombre, _agrandar(getattr(self, nombre), capacidad))
+            estado = np.full(capacidad, -1, dtype=np.int8)
+            estado[:self.n] = self.estado[:self.n]
+            self.estado = estado
+            for ventana in self.ventanas.values():
+                ventana.redimensionar(capacidad)
+            self.capacidad = capacidad
+        self.nominal_kw[self.n:n] = nominales_kw
+        self.alta[self.n:n] = self.t
+        self._nominal_total_kw += float(nominales_kw.sum())
+        self.n = n
+
+    def al_avanzar(self, estados: np.ndarray, potencia: np.ndarray) -> None:
+        """Acumula un tick: 'estados' son codigos (posicion en AerogeneradorBase.ESTADOS), potencia en kW."""
+        n = len(potencia)
+        if n != self.n:
+            raise ValueError(f"KPI de {self.n} turbinas y un tick de {n}.")
+        dt = self.dt
+        inicio = self.t
+        self.t += dt
+        # El estado que dejo el ciclo vale para todo el tick [inicio, inicio + dt)
+        cambiaron = np.flatnonzero(estados != self.estado[:n])
+        if len(cambiaron):
+            anteriores = self.estado[cambiaron]
+            previos = anteriores >= 0
+            self.segundos_estado[anteriores[previos], cambiaron[previos]] += inicio - self.desde[cambiaron[previos]]
+            self._cuenta -= np.bincount(anteriores[previos], minlength=len(self._cuenta))
+            self._cuenta += np.bincount(estados[cambiaron], minlength=len(self._cuenta))
+            self.estado[cambiaron] = estados[cambiaron]
+            self.desde[cambiaron] = inicio
+        self.energia_kwh[:n] += potencia * (dt / 3600)
+        for ventana in self.ventanas.values():
+            ventana.agregar(self.t, potencia, dt)
+
+        total_kw = float(potencia.sum())
+        self.energia_parque_kwh += total_kw * dt / 3600
+        self.segundos_estado_parque += self._cuenta * dt
+        self.nominal_parque_kwh += self._nominal_total_kw * dt / 3600
+        for ventana in self.ventanas_parque.values():
+            ventana.agregar(self.t, np.array([total_kw]), dt)
+
+    # --- Checkpoints ---
+    def exportar(self) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """(meta, arrays) de todo el estado acumulado (vistas, sin copiar)."""
+        n = self.n
+        meta = {"dt": self.dt, "n": n, "t": self.t, "energia_parque_kwh": self.energia_parque_kwh,
+                "nominal_parque_kwh": self.nominal_parque_kwh, "ventanas": {}, "ventanas_parque": {}}
+        arrays = {"energia_kwh": self.energia_kwh[:n], "segundos_estado": self.segundos_estado[:, :n],
+                  "estado": self.estado[:n], "desde": self.desde[:n], "alta": self.alta[:n],
+                  "nominal_kw": self.nominal_kw[:n], "segundos_estado_parque": self.segundos_estado_parque,
+                  "cuenta": self._cuenta}
+        for grupo, ventanas, filas in (("ventanas", self.ventanas, n), ("ventanas_parque", self.ventanas_parque, 1)):
+            for nombre, ventana in ventanas.items():
+                meta[grupo][nombre], datos = ventana.exportar(filas)
+                arrays.update((f"{grupo}.{nombre}.{campo}", array) for campo, array in datos.items())
+        return meta, arrays
+
+    @classmethod
+    def importar(cls, meta: dict, arrays: Dict[str, np.ndarray]) -> 'MotorKPI':
+        """Inverso de exportar()."""
+        kpis = cls(meta["dt"])
+        kpis.agregar_turbinas(arrays["nominal_kw"]) # Capacidad y potencia nominal del parque
+        n = kpis.n
+        for nombre in ("energia_kwh", "estado", "desde", "alta"):
+            getattr(kpis, nombre)[:n] = arrays[nombre]
+        kpis.segundos_estado[:, :n] = arrays["segundos_estado"]
+        kpis.segundos_estado_parque[:] = arrays["segundos_estado_parque"]
+        kpis._cuenta[:] = arrays["cuenta"]
+        kpis.t, kpis.energia_parque_kwh = meta["t"], meta["energia_parque_kwh"]
+        kpis.nominal_parque_kwh = meta["nominal_parque_kwh"]
+        for grupo, ventanas in (("ventanas", kpis.ventanas), ("ventanas_parque", kpis.ventanas_parque)):
+            for nombre, ventana in ventanas.items():
+                prefijo = f"{grupo}.{nombre}."
+                ventana.importar(meta[grupo][nombre], {campo[len(prefijo):]: array for campo, array in arrays.items()
+                                                       if campo.startswith(prefijo)})
+        return kpis
+
+    # --- Consultas (arrays de las n turbinas) ---
+    def segundos(self) -> np.ndarray:
+        """Tiempo observado de cada turbina."""
+        return self.t - self.alta[:self.n]
+
+    def segundos_por_estado(self, filas=slice(None)) -> np.ndarray:
+        """(estados, filas): tramos cerrados mas el tramo en curso."""
+        filas = np.arange(self.n)[filas]
+        segundos = self.segundos_estado[:, filas].copy()
+        estado = self.estado[filas]
+        con_datos = estado >= 0
+        segundos[estado[con_datos], np.flatnonzero(con_datos)] += self.t - self.desde[filas[con_datos]]
+        return segundos
+
+    def disponibilidad(self) -> np.ndarray:
+        """Fraccion del tiempo observado en ESTADOS_DISPONIBLES."""
+        disponibles = self.segundos_por_estado()[self._disponibles].sum(axis=0)
+        return disponibles / np.maximum(self.segundos(), 1e-12)
+
+    def fraccion_estado(self, estado: str) -> np.ndarray:
+        codigo = AerogeneradorBase.ESTADOS.index(estado)
+        return self.segundos_por_estado()[codigo] / np.maximum(self.segundos(), 1e-12)
+
+    def factor_capacidad(self) -> np.ndarray:
+        posible_kwh = self.nominal_kw[:self.n] * self.segundos() / 3600
+        return self.energia_kwh[:self.n] / np.maximum(posible_kwh, 1e-12)
+
+    def media(self, ventana: str) -> np.ndarray:
+        """Potencia media (kW) de cada turbina en la ventana (las turbinas nuevas, desde su alta)."""
+        v = self.ventanas[ventana]
+        cubiertos = np.minimum(v.segundos(), self.segundos())
+        return v.sumas(self.n) / np.maximum(cubiertos, 1e-12)
+
+    # --- Resumenes ---
+    def turbina(self, i: int) -> Dict[str, float]:
+        """KPI de la fila i."""
+        observados = self.t - float(self.alta[i])
+        segundos = max(observados, 1e-12)
+        por_estado = self.segundos_por_estado([i])[:, 0]
+        resumen = {"energia_kwh": float(self.energia_kwh[i]), "horas": observados / 3600,
+                   "disponibilidad": float(por_estado[self._disponibles].sum()) / segundos,
+                   "factor_capacidad": float(self.energia_kwh[i]) / max(float(self.nominal_kw[i]) * segundos / 3600, 1e-12)}
+        for codigo, estado in enumerate(AerogeneradorBase.ESTADOS):
+            resumen[f"fraccion_{estado}"] = float(por_estado[codigo]) / segundos
+        for nombre, v in self.ventanas.items():
+            resumen[f"media_{nombre}_kw"] = float(v.sumas(i + 1)[i]) / max(min(v.segundos(), segundos), 1e-12)
+        return resumen
+
+    def parque(self) -> Dict[str, float]:
+        """KPI del parque completo (disponibilidad y fracciones en turbina-tiempo)."""
+        turbina_segundos = max(float(self.segundos_estado_parque.sum()), 1e-12)
+        resumen = {"energia_kwh": self.energia_parque_kwh, "horas": self.t / 3600, "turbinas": self.n,
+                   "disponibilidad": float(self.segundos_estado_parque[self._disponibles].sum()) / turbina_segundos,
+                   "factor_capacidad": self.energia_parque_kwh / max(self.nominal_parque_kwh, 1e-12)}
+        for codigo, estado in enumerate(AerogeneradorBase.ESTADOS):
+            resumen[f"fraccion_{estado}"] = float(self.segundos_estado_parque[codigo]) / turbina_segundos
+        for nombre, v in self.ventanas_parque.items():
+            resumen[f"media_{nombre}_kw"] = float(v.sumas(1)[0]) / max(v.segundos(), 1e-12)
+        return resumen
@@ -0,0 +1,284 @@
+# metricas.py
+"""Metricas de rendimiento de la simulacion en formato de texto de Prometheus.
+
+RegistroMetricas agrupa contadores, medidores e histogramas; exportar() genera el texto que lee
+Prometheus, escribir() lo deja en un archivo (p. ej. para el textfile collector de node_exporter) y
+servir() lo publica en http://host:puerto/metrics.
+MetricasSimulacion instrumenta el ciclo de control y el tick del controlador. Se habilita con
+SimuladorController.habilitar_metricas(); sin habilitarla, cada punto instrumentado cuesta un
+'is None'.
+"""
+import bisect
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from aerogenerador import AerogeneradorBase
+from parque_vectorizado import TICKS_REARME
+
+# Segundos: de 10 us a 10 s
+LIMITES_LATENCIA = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    """Una familia de series: una por combinacion de valores de 'etiquetas'."""
+    TIPO = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock() # Solo para altas de series y exportacion
+
+    def _serie(self, valores: Tuple[str, ...], sufijo: str = "", extra: str = "") -> str:
+        pares = [f'{e}="{_escapar(str(v))}"' for e, v in zip(self.etiquetas, valores)]
+        if extra:
+            pares.append(extra)
+        return f"{self.nombre}{sufijo}{{{','.join(pares)}}}" if pares else f"{self.nombre}{sufijo}"
+
+    def exportar(self) -> List[str]:
+        return [f"# HELP {self.nombre} {_escapar(self.ayuda)}", f"# TYPE {self.nombre} {self.TIPO}"]
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (eventos, segundos acumulados)."""
+    TIPO = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, cantidad: float = 1.0, etiquetas: Tuple[str, ...] = ()) -> None:
+        try:
+            self._valores[etiquetas] += cantidad
+        except KeyError:
+            with self._lock:
+                self._valores[etiquetas] = self._valores.get(etiquetas, 0.0) + cantidad
+
+    def valor(self, etiquetas: Tuple[str, ...] = ()) -> float:
+        return self._valores.get(etiquetas, 0.0)
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._valores.items())
+        return super().exportar() + [f"{self._serie(k)} {_numero(v)}" for k, v in series]
+
+
+class Medidor(Contador):
+    """Valor que sube y baja (tamano del parque, ultima duracion, ...)."""
+    TIPO = "gauge"
+
+    def fijar(self, valor: float, etiquetas: Tuple[str, ...] = ()) -> None:
+        with self._lock:
+            self._valores[etiquetas] = valor
+
+
+class Histograma(_Metrica):
+    """Distribucion de observaciones en cubetas acumulativas (le = limite superior)."""
+    TIPO = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, limites: Sequence[float] = LIMITES_LATENCIA,
+                 etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites))
+        self._series: Dict[Tuple[str, ...], List[float]] = {} # cuentas por cubeta (+Inf al final), suma
+
+    def observar(self, valor: float, etiquetas: Tuple[str, ...] = ()) -> None:
+        serie = self._series.get(etiquetas)
+        if serie is None:
+            with self._lock:
+                serie = self._series.setdefault(etiquetas, [0] * (len(self.limites) + 1) + [0.0])
+        serie[bisect.bisect_left(self.limites, valor)] += 1
+        serie[-1] += valor
+
+    def cantidad(self, etiquetas: Tuple[str, ...] = ()) -> int:
+        serie = self._series.get(etiquetas)
+        return 0 if serie is None else int(sum(serie[:-1]))
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, list(v)) for k, v in self._series.items())
+        lineas = super().exportar()
+        for etiquetas, serie in series:
+            acumuladas = np.cumsum(serie[:-1]).tolist()
+            for limite, cuenta in zip(self.limites + (math.inf,), acumuladas):
+                le = 'le="%s"' % _numero(limite)
+                lineas.append(f"{self._serie(etiquetas, '_bucket', le)} {cuenta}")
+            lineas.append(f"{self._serie(etiquetas, '_sum')} {_numero(serie[-1])}")
+            lineas.append(f"{self._serie(etiquetas, '_count')} {acumuladas[-1]}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Conjunto de metricas con nombre unico; pedir una que ya existe devuelve la misma."""
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._lock = threading.Lock()
+        self._servidor: Optional[ThreadingHTTPServer] = None
+
+    def _obtener(self, clase: type, nombre: str, *argumentos) -> _Metrica:
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(nombre, *argumentos)
+            elif type(metrica) is not clase:
+                raise ValueError(f"La metrica {nombre} ya existe como {metrica.TIPO}.")
+            return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        return self._obtener(Contador, nombre, ayuda, etiquetas)
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Medidor:
+        return self._obtener(Medidor, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre: str, ayuda: str, limites: Sequence[float] = LIMITES_LATENCIA,
+                   etiquetas: Sequence[str] = ()) -> Histograma:
+        return self._obtener(Histograma, nombre, ayuda, limites, etiquetas)
+
+    # --- Exportacion ---
+    def exportar(self) -> str:
+        """Todas las metricas en formato de texto de Prometheus (version 0.0.4)."""
+        with self._lock:
+            metricas = sorted(self._metricas.items())
+        return "".join(linea + "\n" for _, metrica in metricas for linea in metrica.exportar())
+
+    def escribir(self, ruta: str) -> None:
+        """Vuelca exportar() a 'ruta' de forma atomica (nunca queda un archivo a medio escribir)."""
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8", newline="\n") as f:
+            f.write(self.exportar())
+        os.replace(temporal, ruta)
+
+    def servir(self, puerto: int = 9108, host: str = "127.0.0.1") -> Tuple[str, int]:
+        """Publica las metricas en http://host:puerto/metrics desde un hilo (puerto=0 elige uno libre)."""
+        registro = self
+
+        class _Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                cuerpo = registro.exportar().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", TIPO_CONTENIDO)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, formato, *args):
+                pass # Sin una linea por cada scrape
+
+        self.detener()
+        self._servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, name="metricas", daemon=True).start()
+        return self._servidor.server_address[:2]
+
+    def detener(self) -> None:
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+
+class TemporizadorFases:
+    """Tiempo acumulado por fase: entrar() cierra la fase en curso y abre otra; terminar() cierra la ultima.
+    Se llama varias veces por turbina y por tick: suma directo sobre las series ya creadas del contador."""
+    def __init__(self, segundos: Contador, entradas: Contador, fases: Sequence[str]):
+        self.segundos = segundos
+        self.entradas = entradas
+        self._claves = {fase: (fase,) for fase in fases}
+        for clave in self._claves.values():
+            segundos.inc(0.0, clave)
+            entradas.inc(0.0, clave)
+        self._fase: Optional[Tuple[str, ...]] = None
+        self._t = 0.0
+
+    def entrar(self, fase: str) -> None:
+        t = time.perf_counter()
+        if self._fase is not None:
+            self.segundos._valores[self._fase] += t - self._t
+        self._fase = clave = self._claves[fase]
+        self._t = t
+        self.entradas._valores[clave] += 1.0
+
+    def terminar(self) -> None:
+        if self._fase is not None:
+            self.segundos._valores[self._fase] += time.perf_counter() - self._t
+            self._fase = None
+
+
+class MetricasSimulacion:
+    """Metricas de un SimuladorController:
+    - tiempo por fase de AerogeneradorBase.ejecutar_ciclo_control (motor por objetos),
+    - histogramas de duracion del tick y del refresco de la GUI,
+    - transiciones de estado, alarmas y rearmes por viento de corte.
+    En los motores vectorizados el ciclo es por lotes: transiciones y rearmes salen de comparar los
+    arrays antes y despues del tick.
+    """
+    FASES = ("bloqueos", "autodiagnostico", "timer", "viento", "checklist", "curva")
+
+    def __init__(self, registro: Optional[RegistroMetricas] = None):
+        self.registro = registro or RegistroMetricas()
+        r = self.registro
+        self.fases = TemporizadorFases(
+            r.contador("parque_ciclo_control_segundos_total",
+                       "Tiempo acumulado en cada fase de ejecutar_ciclo_control.", ("fase",)),
+            r.contador("parque_ciclo_control_fases_total",
+                       "Ciclos de control que llegaron a cada fase.", ("fase",)),
+            self.FASES)
+        self.tick = r.histograma("parque_tick_segundos", "Duracion de avanzar_ciclo_simulacion.")
+        self.refresco = r.histograma("parque_refresco_gui_segundos", "Duracion del refresco del dashboard.")
+        self.transiciones = r.contador("parque_transiciones_total", "Cambios de estado por estado destino.",
+                                       ("estado",))
+        self.alarmas = r.contador("parque_alarmas_total", "Alarmas registradas por nivel.", ("nivel",))
+        self.rearmes = r.contador("parque_rearmes_viento_total", "Esperas de rearme por viento de corte.")
+        self.turbinas = r.medidor("parque_turbinas", "Turbinas del parque.")
+
+    def medir_tick(self, controller, paso: Callable[[], float]) -> float:
+        """Ejecuta 'paso' (el tick del controlador) midiendo su duracion."""
+        parque = controller.parque
+        if parque is not None:
+            antes = (parque.estado[:parque.n].copy(), parque.timer_rearme[:parque.n].copy())
+        inicio = time.perf_counter()
+        total_kw = paso()
+        self.tick.observar(time.perf_counter() - inicio)
+        if parque is not None:
+            self._contar_lote(*antes, parque)
+        self.turbinas.fijar(len(controller.ags))
+        return total_kw
+
+    def _contar_lote(self, estado: np.ndarray, timer: np.ndarray, parque) -> None:
+        n = len(estado)
+        despues = parque.estado[:n]
+        cuenta = np.bincount(despues[estado != despues], minlength=len(AerogeneradorBase.ESTADOS))
+        for codigo in np.flatnonzero(cuenta):
+            self.transiciones.inc(float(cuenta[codigo]), (AerogeneradorBase.ESTADOS[codigo],))
+        # Un timer recien cargado vale TICKS_REARME (uno que ya corria se desconto o sigue bloqueado igual)
+        ahora = parque.timer_rearme[:n]
+        rearmes = int(np.count_nonzero((ahora == TICKS_REARME) & (timer != TICKS_REARME)))
+        if rearmes:
+            self.rearmes.inc(rearmes)
+
+    def transicion(self, estado: str) -> None:
+        self.transiciones.inc(1.0, (estado,))
+
+    def __call__(self, lote) -> None:
+        """Sink de AlarmManager: cuenta las alarmas por nivel."""
+        for entrada in lote:
+            self.alarmas.inc(1.0, (entrada.nivel,))
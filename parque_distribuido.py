@@ -0,0 +1,403 @@
+# parque_distribuido.py
+"""Motor vectorizado repartido en varios procesos.
+
+El estado del parque (los arrays de ParqueVectorizado) vive en bloques de memoria compartida.
+Cada shard es duenio de un bloque contiguo de filas [limites[k], limites[k + 1]) y lo avanza con las
+mismas operaciones de ParqueVectorizado sobre vistas contiguas de esos bloques, sin copiar ni
+serializar estado (ni compartir lineas de cache salvo en los bordes). Cuando cambia la cantidad de
+turbinas, el coordinador vuelve a repartir bloques parejos antes del proximo tick: solo viaja el
+historial de las filas que cambian de shard.
+Los sensores aleatorios sortean por bloques fijos de BLOQUE_ALEATORIO filas, cada uno con un flujo
+propio por tick (SeedSequence con spawn_key (bloque, tick)): la misma semilla da la misma corrida
+con cualquier cantidad de procesos, y el estado aleatorio de un checkpoint es solo la entropia.
+Cada tick corre entre dos esperas de una Barrier: el coordinador publica la orden, los procesos
+trabajan y el coordinador suma los parciales.
+Los comandos (solicitar_marcha, forzar_parada_manual, registrar_falla_externa, ...) se ejecutan en
+las vistas del coordinador y escriben directamente las filas del shard duenio entre dos ticks,
+mientras los procesos esperan en la barrera.
+El historial de cada fila vive en el proceso de su shard; las consultas (fila, exportar/importar para
+checkpoints) viajan por el Pipe del shard con la orden ATENDER.
+"""
+import atexit
+import multiprocessing as mp
+import os
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from curvas import CurvaPotenciaAlta, CurvaPotenciaBaja
+from historial import CopiaHistorial
+from parque_vectorizado import ParqueVectorizado
+
+# Ordenes del bloque de control
+TICK, ATENDER, SALIR = 0, 1, 2
+# Posiciones del bloque de control
+ORDEN, N, LEER_VIENTO, LEER_TEMP = range(4)
+BLOQUE_ALEATORIO = 4096 # Filas por flujo aleatorio (no depende de la cantidad de procesos)
+
+
+def _registrar_curvas(parque: ParqueVectorizado) -> None:
+    """Coordinador y procesos deben usar el mismo indice de curva por tipo."""
+    for curva in (CurvaPotenciaBaja(), CurvaPotenciaAlta()):
+        parque._registrar_curva(curva)
+
+
+def _sortear_sensores(entropia: int, tick: int, n_total: int, inicio: int, fin: int,
+                      viento: bool, temp: bool) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """Viento y temperatura de las filas [inicio, fin): cada bloque que las cubre sortea todas sus filas
+    con su flujo del tick y se toma la parte pedida, asi el resultado no depende del reparto."""
+    vientos, temps = [], []
+    for b in range(inicio // BLOQUE_ALEATORIO, (fin - 1) // BLOQUE_ALEATORIO + 1 if fin > inicio else 0):
+        base = b * BLOQUE_ALEATORIO
+        rng = np.random.default_rng(np.random.SeedSequence(entropia, spawn_key=(b, tick)))
+        m = min(BLOQUE_ALEATORIO, n_total - base)
+        parte = slice(max(inicio, base) - base, min(fin, base + m) - base)
+        if viento:
+            vientos.append(rng.integers(0, 36, m)[parte])
+        if temp:
+            temps.append(rng.integers(40, 96, m)[parte])
+    return (np.concatenate(vientos) if viento and vientos else None,
+            np.concatenate(temps) if temp and temps else None)
+
+
+class _ParqueShard(ParqueVectorizado):
+    """Las filas [inicio, fin) del parque, dentro de un proceso de trabajo (fila local = global - inicio)."""
+    def __init__(self, k: int, procesos: int, bloques: Dict[str, shared_memory.SharedMemory],
+                 capacidad: int, entropia: int, dt: float):
+        self._k = k
+        self._bloques = bloques
+        self._capacidad_total = capacidad
+        self.inicio = self.fin = 0
+        self.n_total = 0
+        self.entropia = entropia
+        super().__init__(None, dt)
+        _registrar_curvas(self)
+        self.eventos = np.ndarray((capacidad,), dtype=np.int64, buffer=bloques["eventos"].buf)
+        self.cuentas = np.ndarray((procesos,), dtype=np.int64, buffer=bloques["cuentas"].buf)
+        self.totales = np.ndarray((procesos,), dtype=np.float64, buffer=bloques["totales"].buf)
+
+    def _reservar(self, capacidad: int) -> None:
+        """Los arrays son vistas contiguas del bloque propio en la memoria compartida; solo crece el
+        historial (local)."""
+        for nombre, dtype in self.CAMPOS.items():
+            completo = np.ndarray((self._capacidad_total,), dtype=dtype, buffer=self._bloques[nombre].buf)
+            setattr(self, nombre, completo[self.inicio:self.fin])
+        self.capacidad = self.fin - self.inicio
+        filas = self.historial.crudo.shape[0]
+        if capacidad > filas:
+            self.historial.redimensionar(capacidad, min(self.n, filas))
+
+    # --- Reparto de filas ---
+    def ceder(self, inicio: int, fin: int) -> Tuple[np.ndarray, dict, Dict[str, np.ndarray]]:
+        """(filas globales, meta, arrays) del historial de las filas propias que quedan fuera de [inicio, fin)."""
+        propias = np.arange(self.inicio, self.fin)
+        salen = propias[(propias < inicio) | (propias >= fin)]
+        meta, arrays = self.historial.exportar(self.n, salen - self.inicio)
+        return salen, meta, arrays
+
+    def recibir(self, inicio: int, fin: int, piezas: List[Tuple[np.ndarray, dict, Dict[str, np.ndarray]]]) -> None:
+        """Pasa a ser duenio de [inicio, fin): conserva el historial de las filas que ya tenia e importa el
+        de las que cedieron otros shards (las filas nuevas del parque empiezan en cero)."""
+        desde, hasta = max(inicio, self.inicio), min(fin, self.fin)
+        self.historial.reubicar(max(fin - inicio, self.CAPACIDAD_INICIAL), desde - self.inicio,
+                                hasta - self.inicio, desde - inicio)
+        self.inicio, self.fin, self.n = inicio, fin, fin - inicio
+        self._reservar(self.n)
+        for filas, meta, arrays in piezas:
+            self.historial.importar(meta, arrays, filas - inicio)
+
+    # --- Paso de simulacion ---
+    def leer_sensores_shard(self, viento: bool, temp: bool) -> None:
+        if not (viento or temp):
+            return
+        vientos, temps = _sortear_sensores(self.entropia, self.historial._muestras, self.n_total,
+                                           self.inicio, self.fin, viento, temp)
+        if vientos is not None:
+            self.viento[:] = vientos
+        if temps is not None:
+            self.temp[:] = temps
+
+    def _notificar_bloqueos(self, indices: np.ndarray) -> None:
+        c = len(indices)
+        self.eventos[self.inicio:self.inicio + c] = indices + self.inicio # Indices globales para el coordinador
+        self.cuentas[self._k] = c
+
+
+def _trabajador(k: int, procesos: int, nombres: Dict[str, str], capacidad: int,
+                barrera, conexion, entropia: int, dt: float) -> None:
+    """Bucle de un proceso de trabajo (funcion de modulo para poder usar 'spawn')."""
+    bloques = {campo: shared_memory.SharedMemory(name=nombre) for campo, nombre in nombres.items()}
+    shard = _ParqueShard(k, procesos, bloques, capacidad, entropia, dt)
+    control = np.ndarray((4,), dtype=np.int64, buffer=bloques["control"].buf)
+    conexion.send("listo")
+    try:
+        while True:
+            barrera.wait() # Inicio: el coordinador ya publico la orden
+            orden = int(control[ORDEN])
+            if orden == SALIR:
+                break
+            shard.n_total = int(control[N])
+            if orden == ATENDER:
+                mensaje = conexion.recv() # Uno por shard en cada ATENDER (None: nada que hacer)
+                if mensaje is not None:
+                    conexion.send(_atender(shard, *mensaje))
+            else:
+                shard.cuentas[k] = 0
+                shard.leer_sensores_shard(bool(control[LEER_VIENTO]), bool(control[LEER_TEMP]))
+                shard.ejecutar_ciclo_control()
+                shard.totales[k] = float(shard.potencia[:shard.n].sum())
+            barrera.wait() # Fin del tick
+    finally:
+        del shard, control
+        for bloque in bloques.values():
+            bloque.close()
+
+
+def _atender(shard: _ParqueShard, consulta: str, *args):
+    """Consultas del coordinador sobre el historial del shard (indices de fila locales) y el reparto."""
+    if consulta == "ceder":
+        return shard.ceder(*args)
+    if consulta == "recibir":
+        return shard.recibir(*args)
+    if consulta == "entropia":
+        shard.entropia = args[0]
+        return None
+    if consulta == "historial":
+        return shard.historial.fila(args[0]).copia()
+    if consulta == "rastrear":
+        return shard.rastrear_cambios_historial()
+    if consulta == "modificadas":
+        return shard.filas_historial_modificadas()
+    if consulta == "exportar":
+        return shard.exportar_historial(*args)
+    if consulta == "importar":
+        return shard.importar_historial(*args)
+    raise ValueError(f"Consulta desconocida: {consulta}")
+
+
+class _HistorialRemoto:
+    """Sustituye al HistorialParque del coordinador: las filas se piden al shard duenio."""
+    def __init__(self, parque: 'ParqueDistribuido'):
+        self._parque = parque
+
+    def fila(self, i: int) -> CopiaHistorial:
+        return self._parque.historial_fila(i)
+
+    def crudo_fila(self, i: int) -> list:
+        return [] # Solo lo usa _crear_vista para escribir_crudo, que aca no modifica nada
+
+    def escribir_crudo(self, i: int, valores) -> None:
+        pass # Las filas nuevas ya empiezan en cero en el shard
+
+
+class ParqueDistribuido(ParqueVectorizado):
+    """ParqueVectorizado cuyo ciclo de control corre en 'procesos' procesos sobre memoria compartida.
+    La capacidad es fija (la memoria compartida no se puede agrandar sin reiniciar los procesos).
+    """
+    CAPACIDAD_MAXIMA = 1 << 18
+    TIEMPO_ARRANQUE = 60.0  # s para que cada proceso se conecte a la memoria compartida
+    TIEMPO_MAXIMO = 600.0   # s de espera en la barrera antes de dar por caido un proceso
+
+    def __init__(self, semilla: Optional[int] = None, procesos: Optional[int] = None,
+                 capacidad: Optional[int] = None, dt: float = 1.0):
+        self.procesos = procesos or os.cpu_count() or 1
+        self._capacidad_total = capacidad or self.CAPACIDAD_MAXIMA
+        self.entropia = np.random.SeedSequence(semilla).entropy # Comun a todos los shards
+        self._limites = np.zeros(self.procesos + 1, dtype=np.int64) # Shard k: filas [limites[k], limites[k + 1])
+        self._bloques: Dict[str, shared_memory.SharedMemory] = {}
+        self._crear_bloques()
+        super().__init__(semilla, dt)
+        self.historial = _HistorialRemoto(self)
+        _registrar_curvas(self)
+        self._control = np.ndarray((4,), dtype=np.int64, buffer=self._bloques["control"].buf)
+        self._totales = np.ndarray((self.procesos,), dtype=np.float64, buffer=self._bloques["totales"].buf)
+        self._cuentas = np.ndarray((self.procesos,), dtype=np.int64, buffer=self._bloques["cuentas"].buf)
+        self._eventos = np.ndarray((self._capacidad_total,), dtype=np.int64, buffer=self._bloques["eventos"].buf)
+
+        contexto = mp.get_context()
+        self._barrera = contexto.Barrier(self.procesos + 1)
+        self._conexiones = []
+        self._trabajadores: List[mp.Process] = []
+        nombres = {campo: bloque.name for campo, bloque in self._bloques.items()}
+        for k in range(self.procesos):
+            propia, remota = contexto.Pipe()
+            proceso = contexto.Process(target=_trabajador, name=f"shard-{k}", daemon=True,
+                                       args=(k, self.procesos, nombres, self._capacidad_total,
+                                             self._barrera, remota, self.entropia, dt))
+            proceso.start()
+            self._conexiones.append(propia)
+            self._trabajadores.append(proceso)
+        atexit.register(self.cerrar)
+        for k, conexion in enumerate(self._conexiones):
+            if not conexion.poll(self.TIEMPO_ARRANQUE) or conexion.recv() != "listo":
+                self.cerrar()
+                raise RuntimeError(f"El proceso shard-{k} no pudo iniciar.")
+
+    # --- Memoria compartida ---
+    def _crear_bloques(self) -> None:
+        tamanos = {campo: np.dtype(dtype).itemsize * self._capacidad_total for campo, dtype in self.CAMPOS.items()}
+        tamanos["eventos"] = 8 * self._capacidad_total
+        tamanos["control"] = 8 * 4
+        tamanos["totales"] = 8 * self.procesos
+        tamanos["cuentas"] = 8 * self.procesos
+        for campo, tamano in tamanos.items():
+            bloque = shared_memory.SharedMemory(create=True, size=tamano)
+            np.ndarray((tamano,), dtype=np.uint8, buffer=bloque.buf)[:] = 0
+            self._bloques[campo] = bloque
+
+    def _reservar(self, capacidad: int) -> None:
+        if getattr(self, "estado", None) is not None:
+            raise RuntimeError(f"Capacidad del parque distribuido agotada ({self._capacidad_total} AG).")
+        for nombre, dtype in self.CAMPOS.items():
+            setattr(self, nombre, np.ndarray((self._capacidad_total,), dtype=dtype,
+                                             buffer=self._bloques[nombre].buf))
+        self.capacidad = self._capacidad_total
+
+    # --- Coordinacion ---
+    def _repartir(self) -> np.ndarray:
+        """Limites de los bloques contiguos de cada shard. Si cambio la cantidad de turbinas, primero
+        reparte bloques parejos: cada shard cede el historial de las filas que salen de su bloque y recibe
+        el de las que entran (al crecer de a poco, solo las filas de los bordes)."""
+        n = self.n
+        if self._limites[-1] == n:
+            return self._limites
+        nuevos = np.arange(self.procesos + 1, dtype=np.int64) * n // self.procesos
+        cedidas = self._atender({k: ("ceder", int(nuevos[k]), int(nuevos[k + 1])) for k in range(self.procesos)})
+        piezas: Dict[int, list] = {k: [] for k in range(self.procesos)}
+        for filas, meta, arrays in cedidas.values():
+            duenios = np.searchsorted(nuevos, filas, side="right") - 1 # >= procesos: fila eliminada
+            for k in np.unique(duenios[duenios < self.procesos]).tolist():
+                sel = duenios == k
+                piezas[k].append((filas[sel], meta, {nombre: a[sel] for nombre, a in arrays.items()}))
+        self._atender({k: ("recibir", int(nuevos[k]), int(nuevos[k + 1]), piezas[k]) for k in range(self.procesos)})
+        self._limites = nuevos
+        return nuevos
+
+    def _ejecutar(self, orden: int) -> None:
+        """Publica la orden y espera a que todos los procesos la terminen."""
+        self._repartir()
+        self._control[ORDEN] = orden
+        self._control[N] = self.n
+        self._esperar()
+        self._esperar()
+
+    def _esperar(self) -> None:
+        try:
+            self._barrera.wait(self.TIEMPO_MAXIMO)
+        except threading.BrokenBarrierError:
+            raise RuntimeError("Un proceso del parque distribuido dejo de responder.") from None
+
+    def avanzar(self, viento: Optional[np.ndarray] = None, temp: Optional[np.ndarray] = None) -> float:
+        n = self.n
+        if viento is None and "viento" in self.fuentes:
+            viento = self.fuentes["viento"].leer_lote("viento", n)
+        if temp is None and "temp" in self.fuentes:
+            temp = self.fuentes["temp"].leer_lote("temp", n)
+        if viento is not None:
+            self.viento[:n] = viento
+        if temp is not None:
+            self.temp[:n] = temp
+        self._control[LEER_VIENTO] = viento is None
+        self._control[LEER_TEMP] = temp is None
+        self._ejecutar(TICK)
+        for k in np.flatnonzero(self._cuentas).tolist(): # Bloqueos por autodiagnostico (poco frecuentes)
+            inicio = self._limites[k]
+            self._notificar_bloqueos(self._eventos[inicio:inicio + self._cuentas[k]])
+        return float(self._totales.sum())
+
+    def ejecutar_ciclo_control(self) -> None:
+        self._control[LEER_VIENTO] = self._control[LEER_TEMP] = False
+        self._ejecutar(TICK)
+
+    def _consultar(self, mensajes: Dict[int, tuple]) -> Dict[int, object]:
+        """Como _atender(), con las filas ya repartidas (los indices locales de 'mensajes' se calculan con
+        shard_de / _locales, que reparten antes)."""
+        self._repartir()
+        return self._atender(mensajes)
+
+    def _atender(self, mensajes: Dict[int, tuple]) -> Dict[int, object]:
+        """Envia una consulta a cada shard de 'mensajes' y junta las respuestas.
+        Los mensajes viajan despues de la primera espera (los procesos ya estan leyendo) y las respuestas
+        se leen antes de la segunda: ninguna de las dos puntas se bloquea con el Pipe lleno."""
+        self._control[ORDEN] = ATENDER
+        self._control[N] = self.n
+        self._esperar()
+        for k, conexion in enumerate(self._conexiones):
+            conexion.send(mensajes.get(k))
+        respuestas = {k: self._conexiones[k].recv() for k in mensajes}
+        self._esperar()
+        return respuestas
+
+    def historial_fila(self, i: int) -> CopiaHistorial:
+        k = self.shard_de(i)
+        return self._consultar({k: ("historial", i - int(self._limites[k]))})[k]
+
+    # --- Generadores aleatorios: los flujos salen de la entropia, el bloque y el tick ---
+    def estado_aleatorio(self) -> dict:
+        return {"entropia": self.entropia}
+
+    def fijar_estado_aleatorio(self, estado: dict) -> None:
+        self.entropia = estado["entropia"]
+        self._atender({k: ("entropia", self.entropia) for k in range(self.procesos)})
+
+    # --- Checkpoints: el historial se reparte por shard (fila local = fila global - limites[k]) ---
+    def _locales(self, filas: Optional[np.ndarray]) -> Dict[int, Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """Por shard: (posiciones en 'filas', filas locales). Sin 'filas': todas (filas locales None)."""
+        limites = self._repartir()
+        if filas is None:
+            return {k: (np.arange(limites[k], limites[k + 1]), None) for k in range(self.procesos)}
+        duenios = np.searchsorted(limites, filas, side="right") - 1
+        return {k: (np.flatnonzero(duenios == k), filas[duenios == k] - limites[k]) for k in range(self.procesos)}
+
+    def rastrear_cambios_historial(self) -> None:
+        self._consultar({k: ("rastrear",) for k in range(self.procesos)})
+
+    def filas_historial_modificadas(self) -> np.ndarray:
+        modificadas = np.zeros(self.n, dtype=bool)
+        limites = self._repartir()
+        for k, locales in self._consultar({k: ("modificadas",) for k in range(self.procesos)}).items():
+            modificadas[limites[k]:limites[k + 1]] = locales
+        return modificadas
+
+    def exportar_historial(self, filas: Optional[np.ndarray] = None) -> Tuple[dict, Dict[str, np.ndarray]]:
+        partes = self._locales(filas)
+        respuestas = self._consultar({k: ("exportar", locales) for k, (_, locales) in partes.items()})
+        meta = respuestas[0][0]
+        m = self.n if filas is None else len(filas)
+        arrays = {}
+        for nombre, ejemplo in respuestas[0][1].items():
+            arrays[nombre] = np.empty((m,) + ejemplo.shape[1:], dtype=ejemplo.dtype)
+            for k, (posiciones, _) in partes.items():
+                arrays[nombre][posiciones] = respuestas[k][1][nombre]
+        return meta, arrays
+
+    def importar_historial(self, meta: dict, arrays: Dict[str, np.ndarray], filas: Optional[np.ndarray] = None) -> None:
+        partes = self._locales(filas)
+        self._consultar({k: ("importar", meta, {nombre: a[posiciones] for nombre, a in arrays.items()}, locales)
+                         for k, (posiciones, locales) in partes.items()})
+
+    def shard_de(self, i: int) -> int:
+        return int(np.searchsorted(self._repartir(), i, side="right")) - 1
+
+    def cerrar(self) -> None:
+        """Detiene los procesos y libera la memoria compartida."""
+        if not self._bloques:
+            return
+        if self._trabajadores and all(p.is_alive() for p in self._trabajadores):
+            self._control[ORDEN] = SALIR
+            try:
+                self._barrera.wait(self.TIEMPO_ARRANQUE)
+            except threading.BrokenBarrierError:
+                pass
+        for proceso in self._trabajadores:
+            proceso.join(timeout=5)
+            if proceso.is_alive():
+                proceso.terminate()
+        for nombre in list(self.CAMPOS):
+            setattr(self, nombre, None)
+        self._control = self._totales = self._cuentas = self._eventos = None
+        for bloque in self._bloques.values():
+            bloque.close()
+            bloque.unlink()
+        self._bloques = {}
+        atexit.unregister(self.cerrar)
@@ -0,0 +1,333 @@
+# parque_vectorizado.py
+from typing import Callable, List, Optional, Dict, Tuple, Type
+import numpy as np
+from aerogenerador import AerogeneradorBase, AG_BajaPotencia, AG_AltaPotencia
+from curvas import CurvaPotencia, CurvaPotenciaBaja
+from historial import HistorialParque, VistaHistorial
+from sensores import FuenteSensor
+
+# Codigo numerico de cada estado = su posicion en AerogeneradorBase.ESTADOS
+CODIGOS_ESTADO: Dict[str, int] = {nombre: i for i, nombre in enumerate(AerogeneradorBase.ESTADOS)}
+MANTENIMIENTO, GENERANDO, PAUSADO, STOP, STOP_CRITICO, ESPERA_VIENTO = range(6)
+
+VIENTO_CORTE = 25   # m/s, igual que ejecutar_ciclo_control
+VIENTO_MINIMO = 5   # m/s, igual que VientoFactory / PreFlightChecklist
+TICKS_REARME = 10
+
+
+class _VistaAerogenerador:
+    """Mixin: redirige el estado escalar de AerogeneradorBase a una fila de los arrays del parque.
+    Los metodos publicos (solicitar_marcha, forzar_parada_manual, ...) se heredan sin cambios.
+    """
+    def __init__(self, parque: 'ParqueVectorizado', indice: int, id_a: int):
+        self._parque = parque # Se asigna antes del super() porque los setters lo necesitan
+        self._i = indice
+        super().__init__(id_a)
+
+    # --- Estado respaldado por arrays ---
+    @property
+    def _estado(self) -> str:
+        return AerogeneradorBase.ESTADOS[self._parque.estado[self._i]]
+
+    @_estado.setter
+    def _estado(self, valor: str) -> None:
+        self._parque.estado[self._i] = CODIGOS_ESTADO[valor]
+
+    @property
+    def _bloqueo_manual(self) -> bool:
+        return bool(self._parque.bloqueo_manual[self._i])
+
+    @_bloqueo_manual.setter
+    def _bloqueo_manual(self, valor: bool) -> None:
+        self._parque.bloqueo_manual[self._i] = valor
+
+    @property
+    def _bloqueo_critico(self) -> bool:
+        return bool(self._parque.bloqueo_critico[self._i])
+
+    @_bloqueo_critico.setter
+    def _bloqueo_critico(self, valor: bool) -> None:
+        self._parque.bloqueo_critico[self._i] = valor
+
+    @property
+    def _timer_rearme(self) -> int:
+        return int(self._parque.timer_rearme[self._i])
+
+    @_timer_rearme.setter
+    def _timer_rearme(self, valor: int) -> None:
+        self._parque.timer_rearme[self._i] = valor
+
+    @property
+    def potencia_actual(self) -> float:
+        return float(self._parque.potencia[self._i])
+
+    @potencia_actual.setter
+    def potencia_actual(self, valor: float) -> None:
+        self._parque.potencia[self._i] = valor
+
+    @property
+    def MAX_TEMP(self) -> float:
+        return float(self._parque.max_temp[self._i])
+
+    @MAX_TEMP.setter
+    def MAX_TEMP(self, valor: float) -> None:
+        self._parque.max_temp[self._i] = valor
+
+    @property
+    def historial_potencia(self) -> VistaHistorial:
+        return self._parque.historial.fila(self._i)
+
+    @historial_potencia.setter
+    def historial_potencia(self, valores) -> None:
+        self._parque.historial.escribir_crudo(self._i, valores)
+
+    # --- Sensores: los arrays son la fuente de verdad ---
+    def obtener_viento(self) -> float:
+        return float(self._parque.viento[self._i])
+
+    def obtener_temp(self) -> float:
+        return float(self._parque.temp[self._i])
+
+    def actualizar_sensores(self) -> None:
+        super().actualizar_sensores()
+        self._parque.viento[self._i] = self.buje.obtener_lectura("viento")
+        self._parque.temp[self._i] = self.gondola.obtener_lectura("temp")
+
+    # --- Fallas: el contador de criticas del array sigue a los contadores del AG ---
+    def _actualizar_conteo_fallas(self, parte, nivel: str, delta: int) -> None:
+        super()._actualizar_conteo_fallas(parte, nivel, delta)
+        if nivel == "Critica":
+            self._parque.criticas[self._i] += delta
+
+
+class VistaBajaPotencia(_VistaAerogenerador, AG_BajaPotencia):
+    pass
+
+
+class VistaAltaPotencia(_VistaAerogenerador, AG_AltaPotencia):
+    pass
+
+
+class _ListaVistas:
+    """Secuencia de las vistas del parque; la vista de una fila se crea recien al pedirla.
+    Restaurar un checkpoint de 100k turbinas no instancia 100k objetos."""
+    def __init__(self, parque: 'ParqueVectorizado'):
+        self._parque = parque
+        self._vistas: List[Optional[AerogeneradorBase]] = []
+
+    def __len__(self) -> int:
+        return len(self._vistas)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self._vistas)))]
+        vista = self._vistas[i]
+        if vista is None:
+            i = i % len(self._vistas)
+            vista = self._vistas[i] = self._parque._crear_vista(i)
+        return vista
+
+    def __iter__(self):
+        for i in range(len(self._vistas)):
+            yield self[i]
+
+    def append(self, vista: AerogeneradorBase) -> None:
+        self._vistas.append(vista)
+
+    def reservar(self, cantidad: int) -> None:
+        """Agrega 'cantidad' filas sin vista creada."""
+        self._vistas.extend([None] * cantidad)
+
+    def creadas(self) -> List[Tuple[int, AerogeneradorBase]]:
+        """(indice, vista) de las vistas ya instanciadas."""
+        return [(i, v) for i, v in enumerate(self._vistas) if v is not None]
+
+
+class ParqueVectorizado:
+    """Motor struct-of-arrays: todo el parque avanza en un solo paso de operaciones NumPy.
+    Replica la maquina de estados de AerogeneradorBase.ejecutar_ciclo_control.
+    """
+    CAPACIDAD_INICIAL = 64
+    CAMPOS: Dict[str, type] = {
+        "id_a": np.int64, "estado": np.int8, "tipo": np.int16,
+        "bloqueo_manual": np.bool_, "bloqueo_critico": np.bool_,
+        "criticas": np.int32, "timer_rearme": np.int32,
+        "viento": np.float64, "temp": np.float64,
+        "potencia": np.float64, "max_temp": np.float64,
+    }
+
+    def __init__(self, semilla: Optional[int] = None, dt: float = 1.0):
+        self.n = 0
+        self.rng = np.random.default_rng(semilla)
+        self._curvas: List[CurvaPotencia] = []
+        self._indice_curva: Dict[Type[CurvaPotencia], int] = {}
+        self.historial = HistorialParque(self.CAPACIDAD_INICIAL, AerogeneradorBase.LARGO_HISTORIAL, dt)
+        self.vistas = _ListaVistas(self)
+        self.al_crear_vista: Optional[Callable[[AerogeneradorBase, int], None]] = None # Vistas creadas a demanda
+        self.fuentes: Dict[str, FuenteSensor] = {} # canal -> fuente; su fila i es la turbina i
+        self._reservar(self.CAPACIDAD_INICIAL)
+
+    # --- Gestion de memoria ---
+    def _reservar(self, capacidad: int) -> None:
+        """Crea (o agranda) los arrays conservando las primeras self.n filas."""
+        viejos = getattr(self, "estado", None)
+        for nombre, dtype in self.CAMPOS.items():
+            nuevo = np.zeros(capacidad, dtype=dtype)
+            if viejos is not None:
+                nuevo[:self.n] = getattr(self, nombre)[:self.n]
+            setattr(self, nombre, nuevo)
+        if viejos is not None:
+            self.historial.redimensionar(capacidad, self.n)
+        self.capacidad = capacidad
+
+    def _registrar_curva(self, curva: CurvaPotencia) -> int:
+        clase = type(curva)
+        if clase not in self._indice_curva:
+            self._indice_curva[clase] = len(self._curvas)
+            self._curvas.append(curva)
+        return self._indice_curva[clase]
+
+    # --- Alta de turbinas ---
+    def agregar(self, tipo: str, id_a: int) -> AerogeneradorBase:
+        """Reserva una fila y devuelve la vista por objeto (misma API que AerogeneradorBase)."""
+        if self.n == self.capacidad:
+            self._reservar(self.capacidad * 2)
+        i = self.n
+        self.n += 1
+        self.id_a[i] = id_a
+        clase = VistaBajaPotencia if tipo == "BAJA" else VistaAltaPotencia
+        vista = clase(self, i, id_a)
+        self.tipo[i] = self._registrar_curva(vista.curva)
+        self.vistas.append(vista)
+        return vista
+
+    def _crear_vista(self, i: int) -> AerogeneradorBase:
+        """Vista de una fila existente. El constructor de AerogeneradorBase escribe valores iniciales:
+        se restituye lo que ya tenia la fila."""
+        valores = {nombre: getattr(self, nombre)[i] for nombre in self.CAMPOS}
+        crudo = self.historial.crudo_fila(i)
+        es_baja = isinstance(self._curvas[self.tipo[i]], CurvaPotenciaBaja)
+        vista = (VistaBajaPotencia if es_baja else VistaAltaPotencia)(self, i, int(self.id_a[i]))
+        for nombre, valor in valores.items():
+            getattr(self, nombre)[i] = valor
+        self.historial.escribir_crudo(i, crudo)
+        if self.al_crear_vista is not None:
+            self.al_crear_vista(vista, i)
+        return vista
+
+    def restablecer(self, n: int) -> None:
+        """Deja n filas sin vistas creadas (restauracion de checkpoints); el llamador escribe los arrays."""
+        if n > self.capacidad:
+            self._reservar(max(n, self.CAPACIDAD_INICIAL))
+        self.n = n
+        self.vistas = _ListaVistas(self)
+        self.vistas.reservar(n)
+        self.criticas[:n] = 0
+
+    def potencias_nominales(self) -> np.ndarray:
+        """POTENCIA_NOMINAL (kW) de cada una de las n turbinas."""
+        return np.array([c.POTENCIA_NOMINAL for c in self._curvas], dtype=float)[self.tipo[:self.n]]
+
+    # --- Checkpoints ---
+    def estado_aleatorio(self) -> dict:
+        """Estado del generador de los sensores (se guarda en los checkpoints)."""
+        return self.rng.bit_generator.state
+
+    def fijar_estado_aleatorio(self, estado: dict) -> None:
+        self.rng.bit_generator.state = estado
+
+    def rastrear_cambios_historial(self) -> None:
+        """Empieza (o reinicia) el registro de filas cuyo historial cambia."""
+        self.historial.rastrear_cambios()
+
+    def filas_historial_modificadas(self) -> np.ndarray:
+        """Mascara de las n filas cuyo historial cambio desde rastrear_cambios_historial()."""
+        return self.historial.sucias[:self.n].copy()
+
+    def exportar_historial(self, filas: Optional[np.ndarray] = None) -> Tuple[dict, Dict[str, np.ndarray]]:
+        return self.historial.exportar(self.n, filas)
+
+    def importar_historial(self, meta: dict, arrays: Dict[str, np.ndarray], filas: Optional[np.ndarray] = None) -> None:
+        self.historial.importar(meta, arrays, filas)
+
+    # --- Paso de simulacion ---
+    def leer_sensores(self) -> None:
+        """Equivalente vectorizado de SensorVelocidadViento/SensorTemperatura."""
+        n = self.n
+        if "viento" in self.fuentes:
+            self.viento[:n] = self.fuentes["viento"].leer_lote("viento", n)
+        else:
+            self.viento[:n] = self.rng.integers(0, 36, n)
+        if "temp" in self.fuentes:
+            self.temp[:n] = self.fuentes["temp"].leer_lote("temp", n)
+        else:
+            self.temp[:n] = self.rng.integers(40, 96, n)
+
+    def avanzar(self, viento: Optional[np.ndarray] = None, temp: Optional[np.ndarray] = None) -> float:
+        """Ejecuta un ciclo de control para todo el parque. Retorna la potencia total (kW)."""
+        n = self.n
+        if viento is None or temp is None:
+            self.leer_sensores()
+        if viento is not None:
+            self.viento[:n] = viento
+        if temp is not None:
+            self.temp[:n] = temp
+        self.ejecutar_ciclo_control()
+        return float(self.potencia[:n].sum())
+
+    def _notificar_bloqueos(self, indices: np.ndarray) -> None:
+        """Bloqueo critico por autodiagnostico en las filas 'indices'."""
+        for i in indices:
+            vista = self.vistas[i]
+            if vista.observador is not None:
+                vista.observador.bloqueo_critico_cambiado(vista, True)
+
+    def ejecutar_ciclo_control(self) -> None:
+        """Misma logica que AerogeneradorBase.ejecutar_ciclo_control, en mascaras booleanas."""
+        n = self.n
+        estado = self.estado[:n]
+        potencia = self.potencia[:n]
+        bloqueo_critico = self.bloqueo_critico[:n]
+        timer = self.timer_rearme[:n]
+        v = self.viento[:n]
+
+        # Historial (potencia del ciclo anterior)
+        self.historial.agregar(potencia, n)
+
+        # 1. Bloqueos
+        critico = bloqueo_critico.copy()
+        manual = ~critico & self.bloqueo_manual[:n]
+
+        # 2. Autodiagnostico
+        autodiag = ~critico & ~manual & (self.criticas[:n] > 0)
+        bloqueo_critico |= autodiag
+        critico |= autodiag
+        if autodiag.any(): # Poco frecuente: se avisa al registro de fallas del parque
+            self._notificar_bloqueos(np.flatnonzero(autodiag))
+        libre = ~(critico | manual)
+
+        # 3. Timer Viento
+        en_timer = libre & (timer > 0)
+        timer[en_timer] -= 1
+        operativo = libre & ~en_timer
+
+        # 4. Logica Operativa (VientoFactory + PreFlightChecklist)
+        corte = operativo & (v >= VIENTO_CORTE)
+        timer[corte] = TICKS_REARME
+        insuficiente = operativo & (v < VIENTO_MINIMO)
+        optimo = operativo & (v >= VIENTO_MINIMO) & (v < VIENTO_CORTE)
+        extremo = operativo & ~corte & ~insuficiente & ~optimo
+        checklist_ok = ~(self.temp[:n] > self.max_temp[:n]) # Como el checklist: NaN no se compara como alta
+        generando = optimo & checklist_ok
+
+        potencia[:] = 0.0
+        for k, curva in enumerate(self._curvas):
+            m = generando & (self.tipo[:n] == k)
+            if m.any():
+                potencia[m] = curva.calcular_potencia_batch(v[m])
+
+        estado[critico] = STOP_CRITICO
+        estado[manual] = STOP
+        estado[en_timer | corte | extremo] = ESPERA_VIENTO
+        estado[insuficiente | (optimo & ~checklist_ok)] = PAUSADO
+        estado[generando] = GENERANDO
@@ -0,0 +1,107 @@
+# planificador.py
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+from aerogenerador import AerogeneradorBase
+
+
+class _Dormida:
+    """Turbina fuera del conjunto activo."""
+    __slots__ = ("registrado", "vence")
+
+    def __init__(self, registrado: int, vence: Optional[int]):
+        self.registrado = registrado # Ultimo tick reflejado en su historial
+        self.vence = vence           # Tick en que vuelve a evaluarse (None: espera un comando)
+
+
+class PlanificadorEventos:
+    """Planificacion por eventos para el motor por objetos.
+    - Las turbinas bloqueadas (stop / stop_critico) salen del conjunto activo hasta recibir un
+      comando (solicitar_marcha, realizar_mantenimiento, ...) o una falla.
+    - Las esperas de rearme por viento se guardan en un heap ordenado por el tick de vencimiento.
+    - Una turbina activa solo se reevalua si cambiaron sus lecturas o recibio un comando.
+    Los ticks no evaluados se completan con potencia 0 en el historial al despertar o al consultarlo.
+    Con lecturas de fuentes externas (FuenteSensor: SCADA, campo de viento, ...) estados, potencias,
+    timers e historiales coinciden con la evaluacion completa. Con los sensores aleatorios por defecto
+    no: las turbinas que no se evaluan no sortean lecturas, asi que con la misma semilla la secuencia
+    de 'random' (y la corrida) difiere de la evaluacion completa, aunque con la misma distribucion.
+    """
+    def __init__(self):
+        self.tick = 0 # Ticks completados
+        self.activas: Dict[AerogeneradorBase, None] = {} # Conjunto ordenado (orden de alta)
+        self._dormidas: Dict[AerogeneradorBase, _Dormida] = {}
+        self._rearmes: List[Tuple[int, int, AerogeneradorBase, _Dormida]] = [] # heap por vencimiento
+        self._secuencia = 0
+        self._pendientes: Set[AerogeneradorBase] = set()
+        self._entradas: Dict[AerogeneradorBase, Tuple[float, float]] = {}
+
+    def agregar(self, ag: AerogeneradorBase) -> None:
+        ag.planificador = self
+        self.activas[ag] = None
+        self._pendientes.add(ag)
+
+    # --- Eventos ---
+    def despertar(self, ag: AerogeneradorBase) -> None:
+        """Vuelve a poner la turbina en evaluacion en el proximo tick."""
+        if ag in self._dormidas:
+            self.sincronizar(ag)
+            del self._dormidas[ag] # Su entrada del heap (si tiene) queda obsoleta
+            self.activas[ag] = None
+        self._pendientes.add(ag)
+
+    def sincronizar(self, ag: AerogeneradorBase) -> None:
+        """Lleva historial y timer de una turbina dormida al ultimo tick completado."""
+        dormida = self._dormidas.get(ag)
+        if dormida is None or dormida.registrado == self.tick:
+            return
+        ag._historial_potencia.rellenar(0.0, self.tick - dormida.registrado)
+        dormida.registrado = self.tick
+        if dormida.vence is not None:
+            ag._timer_rearme = max(0, dormida.vence - 1 - self.tick)
+
+    # --- Paso de simulacion ---
+    def avanzar(self) -> float:
+        """Ejecuta un tick sobre las turbinas activas. Retorna la potencia total (kW)."""
+        t = self.tick + 1
+        while self._rearmes and self._rearmes[0][0] <= t:
+            _, _, ag, dormida = heapq.heappop(self._rearmes)
+            if self._dormidas.get(ag) is dormida:
+                self.despertar(ag)
+
+        total_kw = 0.0
+        for ag in list(self.activas):
+            ag.actualizar_sensores()
+            entradas = (ag.obtener_viento(), ag.obtener_temp())
+            if ag not in self._pendientes and self._entradas.get(ag) == entradas:
+                # Mismas entradas y sin comandos: el resultado del ciclo no cambia
+                ag._historial_potencia.agregar(ag.potencia_actual)
+            else:
+                en_rearme = ag._timer_rearme > 0
+                ag.ejecutar_ciclo_control()
+                if en_rearme: # Solo desconto el timer: el proximo ciclo no depende solo de las entradas
+                    self._entradas.pop(ag, None)
+                else:
+                    self._entradas[ag] = entradas
+                self._pendientes.discard(ag)
+                self._clasificar(ag, t)
+            total_kw += ag.potencia_actual
+        self.tick = t
+        return total_kw
+
+    def _clasificar(self, ag: AerogeneradorBase, t: int) -> None:
+        """Saca del conjunto activo a las turbinas que no pueden cambiar de estado por si solas."""
+        if ag._bloqueo_critico or ag._bloqueo_manual:
+            self._dormir(ag, t, None)
+        elif ag._timer_rearme > 0:
+            # Quedan _timer_rearme ticks de espera; el siguiente vuelve a la logica operativa
+            vence = t + ag._timer_rearme + 1
+            dormida = self._dormir(ag, t, vence)
+            self._secuencia += 1
+            heapq.heappush(self._rearmes, (vence, self._secuencia, ag, dormida))
+
+    def _dormir(self, ag: AerogeneradorBase, t: int, vence: Optional[int]) -> _Dormida:
+        del self.activas[ag]
+        dormida = self._dormidas[ag] = _Dormida(t, vence)
+        return dormida
+
+    def cantidad_activas(self) -> int:
+        return len(self.activas)
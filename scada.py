@@ -0,0 +1,279 @@
+# scada.py
+"""Reproduccion de datos SCADA registrados como fuente de los sensores.
+
+Formatos soportados:
+  - CSV ordenado por tiempo, con cabecera (por defecto: timestamp,id,viento,temp). El tiempo puede ser
+    epoch en segundos o ISO 8601 (sin zona horaria se toma UTC).
+  - Binario: segmentos de telemetria .tlm (ver telemetria.py), un archivo o un directorio.
+Los archivos se recorren por bloques de tamano fijo: nunca se cargan enteros en memoria.
+"""
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from sensores import FuenteSensor
+from telemetria import AlmacenTelemetria, Segmento
+
+
+class Instante(NamedTuple):
+    """Todas las lecturas registradas con un mismo timestamp."""
+    t: float
+    ids: np.ndarray
+    viento: np.ndarray
+    temp: np.ndarray
+
+
+# (t, ids, viento, temp) de un bloque del archivo; un instante puede quedar partido entre dos bloques
+Bloque = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class LectorSCADA(ABC): #Abstraccion
+    """Recorre un archivo ordenado por tiempo como una secuencia de instantes."""
+
+    @abstractmethod
+    def _bloques(self) -> Iterator[Bloque]:
+        """Bloques de registros desde la posicion actual."""
+
+    @abstractmethod
+    def buscar(self, t: float) -> None:
+        """Posiciona la lectura en el primer registro con tiempo >= t."""
+
+    def instantes(self) -> Iterator[Instante]:
+        """Agrupa los registros consecutivos con el mismo timestamp."""
+        pendiente: Optional[Bloque] = None
+        for bloque in self._bloques():
+            if pendiente is not None:
+                bloque = tuple(np.concatenate([a, b]) for a, b in zip(pendiente, bloque))
+            t = bloque[0]
+            if not len(t):
+                continue
+            inicios = [0] + (np.flatnonzero(t[1:] != t[:-1]) + 1).tolist()
+            for a, b in zip(inicios[:-1], inicios[1:]):
+                yield Instante(float(t[a]), *(columna[a:b] for columna in bloque[1:]))
+            pendiente = tuple(columna[inicios[-1]:] for columna in bloque)
+        if pendiente is not None and len(pendiente[0]):
+            yield Instante(float(pendiente[0][0]), *pendiente[1:])
+
+    def cerrar(self) -> None:
+        pass
+
+
+def _tiempo(texto: str) -> float:
+    """Epoch en segundos a partir de un numero o de una fecha ISO 8601."""
+    try:
+        return float(texto)
+    except ValueError:
+        fecha = datetime.fromisoformat(texto.strip())
+        if fecha.tzinfo is None:
+            fecha = fecha.replace(tzinfo=timezone.utc)
+        return fecha.timestamp()
+
+
+def _numeros(columna: Sequence[str]) -> np.ndarray:
+    """Convierte una columna de texto; los campos vacios quedan en NaN."""
+    try:
+        return np.asarray(columna).astype(np.float64)
+    except ValueError:
+        return np.array([float(x) if x.strip() else np.nan for x in columna])
+
+
+class LectorCSV(LectorSCADA):
+    """CSV leido de a 'bytes_por_bloque'. buscar() hace busqueda binaria sobre offsets del archivo."""
+    VENTANA_BUSQUEDA = 1 << 16 # Bytes que se recorren linealmente al final de la busqueda
+
+    def __init__(self, ruta: str, columnas: Sequence[str] = ("timestamp", "id", "viento", "temp"),
+                 delimitador: str = ",", bytes_por_bloque: int = 1 << 22):
+        self.ruta = ruta
+        self.delimitador = delimitador
+        self.bytes_por_bloque = bytes_por_bloque
+        self._archivo = open(ruta, "rb")
+        cabecera = self._archivo.readline().decode().strip().split(delimitador)
+        faltantes = [c for c in columnas if c not in cabecera]
+        if faltantes:
+            raise ValueError(f"{ruta}: faltan las columnas {', '.join(faltantes)}")
+        self._columnas = [cabecera.index(c) for c in columnas]
+        self._inicio_datos = self._archivo.tell()
+        self._posicion = self._inicio_datos
+
+    def _bloques(self) -> Iterator[Bloque]:
+        f = self._archivo
+        f.seek(self._posicion)
+        resto = b""
+        while True:
+            datos = f.read(self.bytes_por_bloque)
+            if not datos:
+                break
+            datos = resto + datos
+            corte = datos.rfind(b"\n") + 1 # Solo lineas completas; el resto pasa al proximo bloque
+            resto = datos[corte:]
+            if corte:
+                yield self._parsear(datos[:corte])
+        if resto.strip():
+            yield self._parsear(resto)
+
+    def _parsear(self, datos: bytes) -> Bloque:
+        filas = [linea.split(self.delimitador) for linea in datos.decode().splitlines() if linea.strip()]
+        if not filas:
+            vacio = np.zeros(0)
+            return vacio, vacio.astype(np.int64), vacio, vacio
+        columnas = list(zip(*filas))
+        it, ii, iv, itemp = self._columnas
+        try:
+            t = np.asarray(columnas[it]).astype(np.float64)
+        except ValueError: # Fechas ISO: se parsea una vez cada timestamp distinto
+            unicos, inversa = np.unique(columnas[it], return_inverse=True)
+            t = np.array([_tiempo(u) for u in unicos])[inversa]
+        ids = np.asarray(columnas[ii]).astype(np.int64)
+        return t, ids, _numeros(columnas[iv]), _numeros(columnas[itemp])
+
+    def _tiempo_linea(self, linea: bytes) -> float:
+        return _tiempo(linea.decode().split(self.delimitador)[self._columnas[0]])
+
+    def buscar(self, t: float) -> None:
+        f = self._archivo
+        lo = self._inicio_datos # Siempre inicio de una linea con tiempo < t (o el inicio de los datos)
+        hi = os.path.getsize(self.ruta)
+        while hi - lo > self.VENTANA_BUSQUEDA:
+            medio = (lo + hi) // 2
+            f.seek(medio)
+            f.readline() # Descarta la linea partida
+            inicio_linea = f.tell()
+            linea = f.readline()
+            if not linea.strip() or self._tiempo_linea(linea) >= t:
+                hi = medio
+            else:
+                lo = inicio_linea
+        f.seek(lo)
+        posicion = lo
+        for linea in iter(f.readline, b""):
+            if linea.strip() and self._tiempo_linea(linea) >= t:
+                break
+            posicion += len(linea)
+        self._posicion = posicion
+
+    def cerrar(self) -> None:
+        self._archivo.close()
+
+
+class LectorBinario(LectorSCADA):
+    """Segmentos .tlm mapeados en memoria (solo lectura); buscar() usa busqueda binaria sobre t."""
+
+    def __init__(self, ruta: str, registros_por_bloque: int = 1 << 16):
+        if os.path.isdir(ruta):
+            rutas = [os.path.join(ruta, nombre) for nombre in sorted(os.listdir(ruta))
+                     if nombre.endswith(AlmacenTelemetria.EXTENSION)]
+        else:
+            rutas = [ruta]
+        self.registros_por_bloque = registros_por_bloque
+        self.segmentos: List[Segmento] = [Segmento(r, solo_lectura=True) for r in rutas]
+        self._segmento = 0
+        self._registro = 0
+
+    def _bloques(self) -> Iterator[Bloque]:
+        desde = self._registro
+        for segmento in self.segmentos[self._segmento:]:
+            for a in range(desde, segmento.cantidad, self.registros_por_bloque):
+                r = segmento.registros[a:min(a + self.registros_por_bloque, segmento.cantidad)]
+                yield r["t"], r["id_a"], r["viento"], r["temp"]
+            desde = 0
+
+    def buscar(self, t: float) -> None:
+        for k, segmento in enumerate(self.segmentos):
+            if segmento.t_max >= t:
+                self._segmento = k
+                self._registro = int(np.searchsorted(segmento.registros["t"][:segmento.cantidad], t))
+                return
+        self._segmento, self._registro = len(self.segmentos), 0
+
+    def cerrar(self) -> None:
+        for segmento in self.segmentos:
+            segmento.cerrar()
+        self.segmentos = []
+
+
+def abrir_lector(ruta: str, **opciones) -> LectorSCADA:
+    """LectorBinario para .tlm o directorios de segmentos; LectorCSV para el resto."""
+    if os.path.isdir(ruta) or ruta.endswith(AlmacenTelemetria.EXTENSION):
+        return LectorBinario(ruta, **opciones)
+    return LectorCSV(ruta, **opciones)
+
+
+class FuenteSCADA(FuenteSensor):
+    """Cada avanzar() consume un instante del lector y lo reparte a las turbinas por id.
+    Las turbinas sin dato en un instante (o con campo vacio) conservan su ultima lectura.
+    """
+    CANALES = ("viento", "temp")
+
+    def __init__(self, lector: LectorSCADA, ciclico: bool = False):
+        self.lector = lector
+        self.ciclico = ciclico # Al agotarse el archivo vuelve a empezar
+        self.t_actual: Optional[float] = None
+        self.agotada = False
+        self.valores = {canal: np.zeros(0) for canal in self.CANALES} # Fila i = turbina i del parque
+        self._ids = np.zeros(0, dtype=np.int64)     # ids registrados, ordenados
+        self._indices = np.zeros(0, dtype=np.int64) # indice en el parque de cada id de self._ids
+        self._altas: List[Tuple[int, Sequence[int]]] = []
+        self._instantes = lector.instantes()
+
+    # --- FuenteSensor ---
+    def registrar_turbinas(self, inicio: int, ids: Sequence[int]) -> None:
+        # El indice por id se reconstruye una sola vez en el proximo avanzar()
+        self._altas.append((inicio, list(ids)))
+
+    def avanzar(self) -> None:
+        if self._altas:
+            self._indexar()
+        instante = next(self._instantes, None)
+        if instante is None and self.ciclico:
+            self.buscar(float("-inf"))
+            instante = next(self._instantes, None)
+        if instante is None:
+            self.agotada = True
+            return
+        self.t_actual = instante.t
+        if not len(self._ids):
+            return
+        pos = np.minimum(np.searchsorted(self._ids, instante.ids), len(self._ids) - 1)
+        conocido = self._ids[pos] == instante.ids
+        destino = self._indices[pos[conocido]]
+        for canal, datos in zip(self.CANALES, (instante.viento, instante.temp)):
+            datos = datos[conocido]
+            valido = ~np.isnan(datos)
+            self.valores[canal][destino[valido]] = datos[valido]
+
+    def leer(self, canal: str, indice: int) -> float:
+        if self._altas:
+            self._indexar()
+        return float(self.valores[canal][indice])
+
+    def leer_lote(self, canal: str, n: int) -> np.ndarray:
+        if self._altas:
+            self._indexar()
+        return self.valores[canal][:n]
+
+    # --- Navegacion ---
+    def buscar(self, t: float) -> None:
+        """Continua la reproduccion desde el primer registro con tiempo >= t."""
+        self.lector.buscar(t)
+        self._instantes = self.lector.instantes()
+        self.agotada = False
+
+    def cerrar(self) -> None:
+        self.lector.cerrar()
+
+    def _indexar(self) -> None:
+        ids = [self._ids]
+        indices = [self._indices]
+        fin = len(self.valores["viento"])
+        for inicio, nuevos in self._altas:
+            ids.append(np.asarray(nuevos, dtype=np.int64))
+            indices.append(np.arange(inicio, inicio + len(nuevos), dtype=np.int64))
+            fin = max(fin, inicio + len(nuevos))
+        self._altas = []
+        ids, indices = np.concatenate(ids), np.concatenate(indices)
+        orden = np.argsort(ids, kind="stable")
+        self._ids, self._indices = ids[orden], indices[orden]
+        for canal, valores in self.valores.items():
+            if len(valores) < fin:
+                self.valores[canal] = np.concatenate([valores, np.zeros(fin - len(valores))])
@@ -1,5 +1,28 @@
 #sensores.py simula el mundo fisico
 import random
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence
+import numpy as np
+
+
+class FuenteSensor(ABC): #Abstraccion
+    """Origen externo de lecturas (campo de viento, reproduccion de datos SCADA, ...).
+    Las lecturas se identifican por canal ("viento", "temp") e indice de la turbina en el parque.
+    """
+    @abstractmethod
+    def avanzar(self) -> None:
+        """Prepara las lecturas del proximo tick (se llama una vez por tick, antes de leer)."""
+
+    @abstractmethod
+    def leer(self, canal: str, indice: int) -> float:
+        pass
+
+    def leer_lote(self, canal: str, n: int) -> np.ndarray:
+        """Lecturas de las turbinas 0..n-1 (las fuentes vectorizadas lo redefinen)."""
+        return np.array([self.leer(canal, i) for i in range(n)], dtype=float)
+
+    def registrar_turbinas(self, inicio: int, ids: Sequence[int]) -> None:
+        """Avisa el alta de turbinas: ids[k] ocupa el indice inicio + k del parque."""
 
 class Sensor:
     """Clase Padre Abstracta para todos los sensores."""
@@ -14,13 +37,63 @@ class Sensor:
         return f"{self.__class__.__name__} @ {self.ubicacion}: {self._valor}"
 
 class SensorVelocidadViento(Sensor):
+    CANAL = "viento"
+
+    def __init__(self, ubicacion, fuente: Optional[FuenteSensor] = None, indice=0):
+        super().__init__(ubicacion)
+        self._fuente = fuente # Campo de viento o datos SCADA (opcional)
+        self._indice = indice
+
+    def conectar(self, fuente: FuenteSensor, indice: int):
+        """Lee de una fuente del parque en lugar de sortear un valor propio."""
+        self._fuente = fuente
+        self._indice = indice
+
     def leer_valor(self):
+        if self._fuente is not None:
+            self._valor = self._fuente.leer(self.CANAL, self._indice)
+            return self._valor
         # Simulacion: viento entre 0 y 35 m/s
         self._valor = random.randint(0, 35) 
         return self._valor
 
 class SensorTemperatura(Sensor):
+    CANAL = "temp"
+
+    def __init__(self, ubicacion, fuente: Optional[FuenteSensor] = None, indice=0):
+        super().__init__(ubicacion)
+        self._fuente = fuente
+        self._indice = indice
+
+    def conectar(self, fuente: FuenteSensor, indice: int):
+        self._fuente = fuente
+        self._indice = indice
+
     def leer_valor(self):
+        if self._fuente is not None:
+            self._valor = self._fuente.leer(self.CANAL, self._indice)
+            return self._valor
         # Simulacion: temp entre 40 y 95 C
         self._valor = random.randint(40, 95) 
+        return self._valor
+
+class SensorVibracion(Sensor):
+    """Acelerometro de rodamiento de alta frecuencia (decenas de muestras por tick). Las muestras viven
+    en los buffers circulares de un MonitorVibracion (vibracion.py); el sensor lee el RMS de la ultima
+    ventana, en mm/s."""
+    CANAL = "vibracion"
+
+    def __init__(self, ubicacion, monitor=None, indice=0):
+        super().__init__(ubicacion)
+        self.canal = f"{self.CANAL}_{ubicacion.lower()}" # vibracion_buje, vibracion_gondola
+        self._monitor = monitor
+        self._indice = indice
+
+    def conectar(self, monitor, indice: int):
+        self._monitor = monitor
+        self._indice = indice
+
+    def leer_valor(self):
+        if self._monitor is not None: # Sin monitor no hay muestras: queda en 0
+            self._valor = self._monitor.leer(self.canal, self._indice)
         return self._valor
\ No newline at end of file
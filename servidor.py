@@ -0,0 +1,402 @@
+# servidor.py
+"""Servidor asyncio de telemetria y comandos del parque.
+
+Protocolo binario (little endian). Cada trama: <I largo><B tipo> + cuerpo (largo = bytes de tipo + cuerpo).
+  Servidor -> cliente
+    DELTA      <Q version><d t><B campos> y, por cada campo de la mascara (en orden de CAMPOS):
+               <I k> + ids u4[k] + valores[k]   (solo las turbinas cuyo valor cambio)
+    RESPUESTA  <I id_peticion><B ok><H largo> + mensaje utf-8
+  Cliente -> servidor
+    SUSCRIBIR  <B campos><I k> + ids u4[k]      (k = 0: todas las turbinas)
+    COMANDO    <I id_peticion><B comando><I id_a> + texto utf-8 opcional
+
+Cada cliente tiene su propia tarea de envio: toma la ultima instantanea publicada, envia la
+diferencia contra lo que ese cliente ya recibio y espera drain(). Un cliente lento se saltea
+instantaneas intermedias (coalescencia) y nunca frena el tick de la simulacion.
+Una trama del cliente mal formada (largo fuera de 1..MAX_TRAMA o cuerpo que no respeta su formato)
+es un error de protocolo: el servidor cierra esa conexion.
+"""
+import argparse
+import asyncio
+import struct
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from controlador import SimuladorController
+from fallas import FallaMecanica
+
+# Tipos de trama
+DELTA, RESPUESTA, SUSCRIBIR, COMANDO = 1, 2, 10, 11
+# Comandos
+MARCHA, PARADA, FALLA, MANTENIMIENTO = 1, 2, 3, 4
+
+# campo -> (bit de la mascara, dtype en la trama)
+CAMPOS: Dict[str, Tuple[int, np.dtype]] = {
+    "estado": (1, np.dtype("u1")),
+    "viento": (2, np.dtype("<f4")),
+    "temp": (4, np.dtype("<f4")),
+    "potencia": (8, np.dtype("<f4")),
+}
+TODOS_LOS_CAMPOS = 15
+
+_CABECERA = struct.Struct("<IB")
+_DELTA = struct.Struct("<QdB")
+_RESPUESTA = struct.Struct("<IBH")
+_SUSCRIBIR = struct.Struct("<BI")
+_COMANDO = struct.Struct("<IBI")
+_CANTIDAD = struct.Struct("<I")
+
+
+def _trama(tipo: int, cuerpo: bytes) -> bytes:
+    return _CABECERA.pack(len(cuerpo) + 1, tipo) + cuerpo
+
+
+# --- Instantaneas y diferencias ---
+class Instantanea:
+    """Estado publicado del parque en un tick (no se modifica despues de creada)."""
+    def __init__(self, version: int, t: float, ids: np.ndarray, valores: Dict[str, np.ndarray]):
+        self.version = version
+        self.t = t
+        self.ids = ids
+        self.valores = valores
+        self._cambios: Dict[int, Dict[str, np.ndarray]] = {} # version base -> posiciones por campo
+        self._tramas: Dict[int, bytes] = {}                  # version base -> trama completa
+
+    def cambios_desde(self, base: Optional['Instantanea']) -> Dict[str, np.ndarray]:
+        """Posiciones que cambiaron por campo respecto de 'base' (None: todas). Se calcula una vez por base."""
+        clave = -1 if base is None else base.version
+        if clave not in self._cambios:
+            n = len(self.ids)
+            cambios = {}
+            for campo, actual in self.valores.items():
+                if base is None:
+                    cambios[campo] = np.arange(n)
+                    continue
+                m = len(base.ids)
+                anterior = base.valores[campo][:m]
+                distinto = np.ones(n, dtype=bool)
+                distinto[:m] = actual[:m] != anterior
+                if actual.dtype.kind == "f": # NaN -> NaN no es un cambio
+                    distinto[:m] &= ~(np.isnan(actual[:m]) & np.isnan(anterior))
+                cambios[campo] = np.flatnonzero(distinto)
+            self._cambios[clave] = cambios
+        return self._cambios[clave]
+
+    def codificar(self, cambios: Dict[str, np.ndarray], campos: int) -> bytes:
+        partes = [_DELTA.pack(self.version, self.t, campos)]
+        for campo, (bit, _) in CAMPOS.items():
+            if campos & bit:
+                pos = cambios[campo]
+                partes.append(_CANTIDAD.pack(len(pos)))
+                partes.append(self.ids[pos].tobytes())
+                partes.append(self.valores[campo][pos].tobytes())
+        return _trama(DELTA, b"".join(partes))
+
+    def trama_desde(self, base: Optional['Instantanea']) -> bytes:
+        """Trama de todos los campos y turbinas, compartida por los clientes con la misma base."""
+        clave = -1 if base is None else base.version
+        if clave not in self._tramas:
+            self._tramas[clave] = self.codificar(self.cambios_desde(base), TODOS_LOS_CAMPOS)
+        return self._tramas[clave]
+
+
+def decodificar_delta(cuerpo: bytes) -> Tuple[int, float, Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+    """(version, t, {campo: (ids, valores)}) de una trama DELTA (sin cabecera)."""
+    version, t, campos = _DELTA.unpack_from(cuerpo)
+    pos = _DELTA.size
+    datos = {}
+    for campo, (bit, dtype) in CAMPOS.items():
+        if campos & bit:
+            (k,) = _CANTIDAD.unpack_from(cuerpo, pos)
+            pos += _CANTIDAD.size
+            ids = np.frombuffer(cuerpo, dtype="<u4", count=k, offset=pos)
+            pos += 4 * k
+            valores = np.frombuffer(cuerpo, dtype=dtype, count=k, offset=pos)
+            pos += dtype.itemsize * k
+            datos[campo] = (ids, valores)
+    return version, t, datos
+
+
+# --- Servidor ---
+class _Suscriptor:
+    def __init__(self, escritor: asyncio.StreamWriter):
+        self.escritor = escritor
+        self.campos = 0 # Sin suscripcion no se envia telemetria
+        self.ids: Optional[np.ndarray] = None
+        self.base: Optional[Instantanea] = None # Ultima instantanea enviada
+        self.hay_datos = asyncio.Event()
+        self._filtro: Optional[np.ndarray] = None
+
+    def filtro(self, instantanea: Instantanea) -> Optional[np.ndarray]:
+        """Mascara de posiciones suscriptas (None: todas). Se recalcula si el parque crecio."""
+        if self.ids is None:
+            return None
+        if self._filtro is None or len(self._filtro) != len(instantanea.ids):
+            self._filtro = np.isin(instantanea.ids, self.ids)
+        return self._filtro
+
+
+class ServidorTelemetria:
+    """Expone un SimuladorController por TCP: telemetria por diferencias y comandos de operador."""
+    LIMITE_BUFFER = 1 << 16 # Bytes pendientes por cliente antes de que drain() espere
+    MAX_TRAMA = 1 << 24     # Largo maximo (tipo + cuerpo) de una trama del cliente: ~4 millones de ids
+
+    def __init__(self, controller: SimuladorController, host: str = "127.0.0.1", puerto: int = 0):
+        self.controller = controller
+        self.host = host
+        self.puerto = puerto
+        self.suscriptores: List[_Suscriptor] = []
+        self.instantanea: Optional[Instantanea] = None
+        self._version = 0
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._tareas: List[asyncio.Task] = []
+
+    async def iniciar(self) -> Tuple[str, int]:
+        """Abre el puerto (puerto=0 elige uno libre). Retorna (host, puerto)."""
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.host, self.puerto = self._servidor.sockets[0].getsockname()[:2]
+        self.publicar()
+        return self.host, self.puerto
+
+    async def ejecutar(self, periodo: float = 1.0, ticks: Optional[int] = None) -> None:
+        """Avanza la simulacion cada 'periodo' segundos y publica cada tick."""
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        i = 0
+        while ticks is None or i < ticks:
+            i += 1
+            self.controller.avanzar_ciclo_simulacion()
+            self.publicar()
+            # Se programa contra el inicio para no acumular deriva; sleep(0) deja correr a los clientes
+            await asyncio.sleep(max(0.0, inicio + i * periodo - loop.time()))
+
+    def publicar(self) -> None:
+        """Toma una instantanea del parque y avisa a los suscriptores (no espera a ninguno)."""
+        ids, estados, viento, temp, potencia = self.controller.arrays_parque()
+        self._version += 1
+        self.instantanea = Instantanea(self._version, self.controller.tiempo_simulado(), ids.astype("<u4"), {
+            "estado": estados.astype("u1"),
+            "viento": viento.astype("<f4"),
+            "temp": temp.astype("<f4"),
+            "potencia": potencia.astype("<f4"),
+        })
+        for suscriptor in self.suscriptores:
+            suscriptor.hay_datos.set()
+
+    async def cerrar(self) -> None:
+        if self._servidor is not None:
+            self._servidor.close()
+        for suscriptor in list(self.suscriptores):
+            suscriptor.escritor.close()
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        if self._servidor is not None:
+            await self._servidor.wait_closed()
+
+    def cantidad_clientes(self) -> int:
+        return len(self.suscriptores)
+
+    # --- Conexiones ---
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        escritor.transport.set_write_buffer_limits(high=self.LIMITE_BUFFER)
+        suscriptor = _Suscriptor(escritor)
+        self.suscriptores.append(suscriptor)
+        emisor = asyncio.create_task(self._emitir(suscriptor))
+        self._tareas.append(emisor)
+        try:
+            while True:
+                cabecera = await lector.readexactly(_CABECERA.size)
+                largo, tipo = _CABECERA.unpack(cabecera)
+                if not 1 <= largo <= self.MAX_TRAMA:
+                    raise ValueError(f"Largo de trama invalido: {largo}")
+                cuerpo = await lector.readexactly(largo - 1)
+                if tipo == SUSCRIBIR:
+                    self._suscribir(suscriptor, cuerpo)
+                elif tipo == COMANDO:
+                    escritor.write(self._ejecutar_comando(cuerpo))
+                    await escritor.drain() # Un cliente que no lee respuestas no acumula buffer
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (struct.error, ValueError):
+            pass # Error de protocolo: se cierra la conexion
+        finally:
+            self.suscriptores.remove(suscriptor)
+            emisor.cancel()
+            self._tareas.remove(emisor)
+            escritor.close()
+
+    def _suscribir(self, suscriptor: _Suscriptor, cuerpo: bytes) -> None:
+        campos, k = _SUSCRIBIR.unpack_from(cuerpo)
+        if len(cuerpo) != _SUSCRIBIR.size + 4 * k:
+            raise ValueError(f"SUSCRIBIR de {len(cuerpo)} bytes para {k} ids")
+        ids = np.frombuffer(cuerpo, dtype="<u4", count=k, offset=_SUSCRIBIR.size)
+        suscriptor.campos = campos & TODOS_LOS_CAMPOS
+        suscriptor.ids = ids.copy() if k else None
+        suscriptor._filtro = None
+        suscriptor.base = None # La proxima trama lleva el estado completo
+        suscriptor.hay_datos.set()
+
+    async def _emitir(self, suscriptor: _Suscriptor) -> None:
+        """Envia siempre la ultima instantanea: las intermedias se descartan si el cliente es lento."""
+        try:
+            await self._emitir_siempre(suscriptor)
+        except ConnectionError:
+            pass # La desconexion la resuelve _atender
+
+    async def _emitir_siempre(self, suscriptor: _Suscriptor) -> None:
+        while True:
+            await suscriptor.hay_datos.wait()
+            suscriptor.hay_datos.clear()
+            actual = self.instantanea
+            if not suscriptor.campos or actual is None or actual is suscriptor.base:
+                continue
+            if suscriptor.campos == TODOS_LOS_CAMPOS and suscriptor.ids is None:
+                trama = actual.trama_desde(suscriptor.base)
+            else:
+                cambios = actual.cambios_desde(suscriptor.base)
+                filtro = suscriptor.filtro(actual)
+                if filtro is not None:
+                    cambios = {campo: pos[filtro[pos]] for campo, pos in cambios.items()}
+                trama = actual.codificar(cambios, suscriptor.campos)
+            suscriptor.base = actual
+            suscriptor.escritor.write(trama)
+            await suscriptor.escritor.drain() # Contrapresion: solo este cliente espera
+
+    def _ejecutar_comando(self, cuerpo: bytes) -> bytes:
+        peticion, comando, id_a = _COMANDO.unpack_from(cuerpo)
+        texto = cuerpo[_COMANDO.size:].decode("utf-8", "replace")
+        ag = self._buscar(id_a)
+        if ag is None:
+            ok, mensaje = False, f"AG {id_a} inexistente"
+        elif comando == MARCHA:
+            mensaje = ag.solicitar_marcha()
+            ok = mensaje == "OK"
+        elif comando == PARADA:
+            ag.forzar_parada_manual()
+            ok, mensaje = True, "OK"
+        elif comando == FALLA:
+            ag.registrar_falla_externa(FallaMecanica("Remoto", texto or "Falla reportada por cliente"))
+            ok, mensaje = True, "OK"
+        elif comando == MANTENIMIENTO:
+            ag.realizar_mantenimiento()
+            ok, mensaje = True, "OK"
+        else:
+            ok, mensaje = False, f"Comando desconocido: {comando}"
+        datos = mensaje.encode("utf-8")[:0xFFFF]
+        return _trama(RESPUESTA, _RESPUESTA.pack(peticion, ok, len(datos)) + datos)
+
+    def _buscar(self, id_a: int):
+        return self.controller.buscar(id_a)
+
+
+# --- Cliente ---
+class ClienteTelemetria:
+    """Cliente asyncio: mantiene un espejo local del parque y envia comandos."""
+    def __init__(self):
+        self.version = 0
+        self.t = 0.0
+        self.estado: Dict[int, Dict[str, float]] = {} # id_a -> {campo: valor}
+        self._lector: Optional[asyncio.StreamReader] = None
+        self._escritor: Optional[asyncio.StreamWriter] = None
+        self._recepcion: Optional[asyncio.Task] = None
+        self._respuestas: Dict[int, asyncio.Future] = {}
+        self._peticion = 0
+        self._actualizado = asyncio.Condition()
+
+    async def conectar(self, host: str, puerto: int) -> None:
+        self._lector, self._escritor = await asyncio.open_connection(host, puerto)
+        self._recepcion = asyncio.create_task(self._recibir())
+
+    async def suscribir(self, ids: Sequence[int] = (), campos: Sequence[str] = tuple(CAMPOS)) -> None:
+        mascara = 0
+        for campo in campos:
+            mascara |= CAMPOS[campo][0]
+        cuerpo = _SUSCRIBIR.pack(mascara, len(ids)) + np.asarray(ids, dtype="<u4").tobytes()
+        self._escritor.write(_trama(SUSCRIBIR, cuerpo))
+        await self._escritor.drain()
+
+    async def comando(self, comando: int, id_a: int, texto: str = "") -> Tuple[bool, str]:
+        """Envia un comando (MARCHA, PARADA, FALLA, MANTENIMIENTO) y espera la respuesta."""
+        self._peticion += 1
+        futuro = asyncio.get_running_loop().create_future()
+        self._respuestas[self._peticion] = futuro
+        cuerpo = _COMANDO.pack(self._peticion, comando, id_a) + texto.encode("utf-8")
+        self._escritor.write(_trama(COMANDO, cuerpo))
+        await self._escritor.drain()
+        return await futuro
+
+    async def esperar_version(self, version: int) -> None:
+        """Espera hasta haber recibido una trama de version >= 'version'."""
+        async with self._actualizado:
+            await self._actualizado.wait_for(lambda: self.version >= version)
+
+    async def cerrar(self) -> None:
+        if self._recepcion is not None:
+            self._recepcion.cancel()
+            await asyncio.gather(self._recepcion, return_exceptions=True)
+        if self._escritor is not None:
+            self._escritor.close()
+
+    async def _recibir(self) -> None:
+        try:
+            while True:
+                largo, tipo = _CABECERA.unpack(await self._lector.readexactly(_CABECERA.size))
+                cuerpo = await self._lector.readexactly(largo - 1)
+                if tipo == DELTA:
+                    self._aplicar(cuerpo)
+                    async with self._actualizado:
+                        self._actualizado.notify_all()
+                elif tipo == RESPUESTA:
+                    peticion, ok, n = _RESPUESTA.unpack_from(cuerpo)
+                    mensaje = cuerpo[_RESPUESTA.size:_RESPUESTA.size + n].decode("utf-8")
+                    futuro = self._respuestas.pop(peticion, None)
+                    if futuro is not None and not futuro.done():
+                        futuro.set_result((bool(ok), mensaje))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            for futuro in self._respuestas.values():
+                if not futuro.done():
+                    futuro.set_exception(ConnectionError("Conexion cerrada por el servidor."))
+
+    def _aplicar(self, cuerpo: bytes) -> None:
+        self.version, self.t, datos = decodificar_delta(cuerpo)
+        for campo, (ids, valores) in datos.items():
+            for id_a, valor in zip(ids.tolist(), valores.tolist()):
+                self.estado.setdefault(id_a, {})[campo] = valor
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor de telemetria y comandos del parque.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--turbinas", type=int, default=3)
+    parser.add_argument("--motor", choices=SimuladorController.MOTORES, default="vectorizado")
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--periodo", type=float, default=1.0, help="Segundos reales entre ticks.")
+    args = parser.parse_args(argv)
+
+    controller = SimuladorController(motor=args.motor, semilla=args.semilla)
+    while len(controller.ags) < args.turbinas:
+        nuevo = controller.agregar_aerogenerador("ALTA")
+        controller.ags[nuevo - 1].solicitar_marcha()
+
+    async def correr():
+        servidor = ServidorTelemetria(controller, args.host, args.puerto)
+        host, puerto = await servidor.iniciar()
+        print(f"Escuchando en {host}:{puerto}", file=sys.stderr)
+        try:
+            await servidor.ejecutar(args.periodo)
+        finally:
+            await servidor.cerrar()
+
+    try:
+        asyncio.run(correr())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# simulacion_headless.py
+"""Ejecucion de la simulacion sin interfaz grafica.
+
+Uso:
+    python simulacion_headless.py --ticks 604800 --turbinas 1000 --motor vectorizado --semilla 42
+    python simulacion_headless.py --ticks 3600 --factor 60 --salida totales.csv
+    python simulacion_headless.py --ticks 52560 --turbinas 40 --dt 600 --scada historico.csv
+    python simulacion_headless.py --ticks 86400 --turbinas 100000 --motor vectorizado --checkpoints ckp/
+    python simulacion_headless.py --ticks 3600 --restaurar ckp/
+    python simulacion_headless.py --ticks 86400 --turbinas 1000 --bitacora corrida/   (ver bitacora.py)
+    python simulacion_headless.py --ticks 3600 --turbinas 1000 --metricas metricas.prom --metricas-puerto 9108
+    python simulacion_headless.py --ticks 86400 --turbinas 5000 --motor vectorizado --campana-fallas 1000
+    python simulacion_headless.py --ticks 3600 --turbinas 10000 --motor vectorizado --limite-parque 5000 --despacho nominal
+    python simulacion_headless.py --ticks 3600 --turbinas 1000 --motor vectorizado --vibracion 50
+    python simulacion_headless.py --ticks 86400 --turbinas 100000 --motor vectorizado --anomalias
+"""
+import argparse
+import sys
+import time
+from typing import Dict, Optional, TextIO
+from aerogenerador import AerogeneradorBase
+from alarmas import AlarmManager, SinkConsola
+from controlador import SimuladorController
+
+
+class EjecutorHeadless:
+    """Avanza un SimuladorController sin Tk, con ticks de controller.dt segundos simulados.
+    factor_tiempo_real = 0 corre tan rapido como permita la CPU; k > 0 corre a k veces el tiempo real.
+    """
+    COLUMNAS = ["tick", "t_simulado", "potencia_total_kw"] + AerogeneradorBase.ESTADOS
+
+    def __init__(self, controller: SimuladorController, factor_tiempo_real: float = 0.0,
+                 salida: Optional[TextIO] = None):
+        if factor_tiempo_real < 0:
+            raise ValueError("El factor de tiempo real no puede ser negativo.")
+        self.controller = controller
+        self.factor_tiempo_real = factor_tiempo_real
+        self.salida = salida
+
+    def ejecutar(self, ticks: int) -> Dict[str, float]:
+        """Corre 'ticks' ciclos y devuelve un resumen de rendimiento y energia."""
+        if self.salida is not None:
+            self.salida.write(",".join(self.COLUMNAS) + "\n")
+
+        dt = self.controller.dt
+        periodo = dt / self.factor_tiempo_real if self.factor_tiempo_real else 0.0
+        inicio = time.perf_counter()
+        energia_kwh = 0.0
+        for i in range(1, ticks + 1):
+            total_kw = self.controller.avanzar_ciclo_simulacion()
+            energia_kwh += total_kw * dt / 3600
+            if self.salida is not None:
+                self._escribir_fila(total_kw)
+            if periodo:
+                # Se programa contra el inicio para no acumular deriva
+                espera = inicio + i * periodo - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+        segundos = time.perf_counter() - inicio
+
+        return {
+            "ticks": ticks,
+            "turbinas": len(self.controller.ags),
+            "segundos": segundos,
+            "ticks_por_segundo": ticks / segundos if segundos > 0 else float("inf"),
+            "energia_kwh": energia_kwh,
+        }
+
+    def _escribir_fila(self, total_kw: float) -> None:
+        tick = self.controller.tick
+        conteo = self.controller.contar_estados()
+        valores = [str(tick), f"{tick * self.controller.dt:g}", f"{total_kw:.1f}"]
+        valores += [str(conteo[e]) for e in AerogeneradorBase.ESTADOS]
+        self.salida.write(",".join(valores) + "\n")
+
+
+def crear_controlador(turbinas: int, tipo: str, motor: str, semilla: Optional[int],
+                      scada: Optional[str] = None, scada_desde: Optional[float] = None,
+                      eventos: bool = False, procesos: Optional[int] = None,
+                      restaurar: Optional[str] = None, dt: Optional[float] = None) -> SimuladorController:
+    """Parque por defecto (3 AG) ampliado hasta 'turbinas'; los agregados se ponen en marcha.
+    Con 'scada' los sensores reproducen ese registro en lugar de valores aleatorios.
+    Con 'restaurar' el parque (y su motor) sale de ese checkpoint en lugar de crearse.
+    'dt' (segundos simulados por tick) se pasa al crear el controlador, asi que los historiales de las
+    turbinas usan ese paso; sin 'dt', 1 s. Un checkpoint conserva su propio dt.
+    """
+    if restaurar is not None:
+        controller = SimuladorController.restaurar(restaurar, procesos)
+        if dt is not None and dt != controller.dt:
+            raise ValueError(f"El checkpoint usa dt = {controller.dt:g} s; no se puede cambiar al restaurar.")
+    else:
+        controller = SimuladorController(motor=motor, semilla=semilla, procesos=procesos,
+                                         dt=1.0 if dt is None else dt)
+        while len(controller.ags) < turbinas:
+            nuevo = controller.agregar_aerogenerador(tipo)
+            controller.ags[nuevo - 1].solicitar_marcha()
+    if eventos:
+        controller.habilitar_planificacion_eventos()
+    if scada is not None:
+        controller.habilitar_scada(scada, desde=scada_desde)
+    return controller
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulacion SCADA del parque eolico sin interfaz grafica.")
+    parser.add_argument("--ticks", type=int, default=3600, help="Cantidad de ciclos a simular.")
+    parser.add_argument("--turbinas", type=int, default=3, help="Tamano total del parque (minimo 3).")
+    parser.add_argument("--tipo", choices=["BAJA", "ALTA"], default="ALTA", help="Tipo de los AG agregados.")
+    parser.add_argument("--motor", choices=SimuladorController.MOTORES, default="objetos")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Procesos del motor distribuido (por defecto, uno por nucleo).")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla para resultados reproducibles.")
+    parser.add_argument("--factor", type=float, default=0.0,
+                        help="Multiplo del tiempo real (0 = lo mas rapido posible).")
+    parser.add_argument("--dt", type=float, default=None,
+                        help="Segundos simulados por tick (por defecto 1, o el del checkpoint restaurado).")
+    parser.add_argument("--salida", default="-", help="Archivo CSV de totales por tick ('-' = stdout).")
+    parser.add_argument("--sin-salida", action="store_true", help="No escribir totales (solo el resumen).")
+    parser.add_argument("--eventos", action="store_true",
+                        help="Planificacion por eventos: no evalua turbinas detenidas ni en espera (motor objetos). "
+                             "Identica a la evaluacion completa solo con lecturas externas (--scada); con sensores "
+                             "aleatorios la misma --semilla da otra corrida.")
+    parser.add_argument("--scada", help="Registro SCADA a reproducir (CSV o segmentos .tlm).")
+    parser.add_argument("--scada-desde", type=float, default=None, help="Timestamp (epoch) desde el cual reproducir.")
+    parser.add_argument("--restaurar", help="Checkpoint (.ckp o directorio) desde el cual continuar.")
+    parser.add_argument("--checkpoints", help="Directorio donde guardar checkpoints durante la simulacion.")
+    parser.add_argument("--checkpoint-cada", type=int, default=3600, help="Ticks entre checkpoints.")
+    parser.add_argument("--bitacora", help="Directorio donde registrar la bitacora para reproducir la corrida.")
+    parser.add_argument("--instantanea-cada", type=int, default=3600, help="Ticks entre instantaneas de la bitacora.")
+    parser.add_argument("--metricas", help="Archivo donde volcar las metricas (formato Prometheus) al terminar.")
+    parser.add_argument("--metricas-puerto", type=int, default=None,
+                        help="Publicar las metricas en http://127.0.0.1:PUERTO/metrics durante la corrida.")
+    parser.add_argument("--campana-fallas", type=float, default=None, metavar="ACELERACION",
+                        help="Fallas MTBF/MTTR por componente (campana por defecto), con los tiempos entre "
+                             "fallas divididos por ACELERACION.")
+    parser.add_argument("--limite-parque", type=float, default=None, help="Limite de exportacion del parque (kW).")
+    parser.add_argument("--despacho", choices=["proporcional", "nominal", "prioridad"], default="proporcional",
+                        help="Reparto de consignas cuando hay limite de exportacion.")
+    parser.add_argument("--vibracion", type=float, default=None, metavar="HZ",
+                        help="Acelerometros de rodamiento muestreados a HZ, con fallas por umbral de RMS, "
+                             "curtosis y energia de alta frecuencia.")
+    parser.add_argument("--anomalias", action="store_true",
+                        help="Avisos tempranos por deriva de temperatura y bajo rendimiento (EWMA/CUSUM).")
+    args = parser.parse_args(argv)
+
+    if args.salida == "-" and not args.sin_salida:
+        AlarmManager.configurar(sinks=[SinkConsola(sys.stderr)]) # stdout queda solo para el CSV
+    controller = crear_controlador(args.turbinas, args.tipo, args.motor, args.semilla,
+                                   args.scada, args.scada_desde, args.eventos, args.procesos, args.restaurar, args.dt)
+    if args.checkpoints:
+        controller.habilitar_checkpoints(args.checkpoints, cada=args.checkpoint_cada)
+    if args.bitacora:
+        controller.habilitar_bitacora(args.bitacora, args.instantanea_cada)
+    if args.metricas or args.metricas_puerto is not None:
+        metricas = controller.habilitar_metricas()
+        if args.metricas_puerto is not None:
+            metricas.registro.servir(args.metricas_puerto)
+    if args.limite_parque is not None:
+        controller.habilitar_despacho(modo=args.despacho).fijar_limite_parque(args.limite_parque)
+    if args.campana_fallas is not None:
+        controller.habilitar_campana_fallas(semilla=args.semilla, aceleracion=args.campana_fallas)
+    if args.vibracion is not None:
+        controller.habilitar_vibracion(args.vibracion, semilla=args.semilla)
+    if args.anomalias:
+        controller.habilitar_anomalias()
+
+    archivo = None
+    if args.sin_salida:
+        salida = None
+    elif args.salida == "-":
+        salida = sys.stdout
+    else:
+        archivo = salida = open(args.salida, "w", newline="")
+    try:
+        resumen = EjecutorHeadless(controller, args.factor, salida).ejecutar(args.ticks)
+    finally:
+        if archivo is not None:
+            archivo.close()
+        if controller.checkpoints is not None:
+            controller.checkpoints.esperar()
+        controller.cerrar()
+        if controller.metricas is not None:
+            AlarmManager.vaciar() # Las alarmas se cuentan en el hilo escritor
+            if args.metricas:
+                controller.metricas.registro.escribir(args.metricas)
+            controller.metricas.registro.detener()
+
+    print(f"{resumen['ticks']} ticks, {resumen['turbinas']} AG en {resumen['segundos']:.2f} s "
+          f"({resumen['ticks_por_segundo']:.1f} ticks/s), energia {resumen['energia_kwh']:.1f} kWh",
+          file=sys.stderr)
+    if controller.campana_fallas is not None:
+        print(f"Campana de fallas: {controller.campana_fallas.resumen()}", file=sys.stderr)
+    if controller.vibracion is not None:
+        print(f"Fallas por vibracion: {controller.vibracion.resumen()}", file=sys.stderr)
+    if controller.anomalias is not None:
+        print(f"Avisos de anomalias: {controller.anomalias.resumen()}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+# simulacion_hilo.py
+"""Simulacion en un hilo propio, desacoplada de la interfaz grafica.
+
+El hilo de simulacion avanza el controlador a ritmo fijo y, despues de cada tick, publica una
+InstantaneaParque inmutable. La interfaz toma la ultima publicada a su propio ritmo de cuadros y nunca
+toca el controlador: los comandos del operador viajan por una cola y se aplican entre dos ticks, en el
+hilo de simulacion, con el resultado en un Future. Asi el ritmo de la simulacion no depende de cuanto
+tarde en dibujarse la interfaz, y un parque grande no bloquea el lazo de eventos de Tk.
+
+Las instantaneas reutilizan sus arrays (doble buffer): el hilo escribe siempre en un buffer que no es
+el publicado ni el que esta leyendo la interfaz, de modo que ninguno de los dos espera al otro.
+"""
+import queue
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from aerogenerador import AerogeneradorBase, AG_AltaPotencia
+from curvas import CurvaPotenciaAlta
+from historial import CopiaHistorial
+
+CAMPOS = {"ids": np.int64, "estados": np.int8, "viento": np.float64, "temp": np.float64,
+          "potencia": np.float64, "timer": np.int32, "critico": np.bool_, "alta": np.bool_}
+
+
+def copiar_historial(historial) -> CopiaHistorial:
+    """Copia de solo lectura de un historial (de objeto o fila del parque vectorizado)."""
+    if hasattr(historial, "copia"):
+        return historial.copia()
+    niveles = {nombre: (nivel.periodo, nivel.capacidad, nivel.serie()) for nombre, nivel in historial.niveles.items()}
+    return CopiaHistorial(historial.crudo.a_lista(), niveles, historial.t_ultimo, historial.dt)
+
+
+class DetalleTurbina:
+    """Datos de una turbina observada (ventana de detalle abierta) que no entran en los arrays."""
+    __slots__ = ("historial", "fallas", "kpi")
+
+    def __init__(self, historial: CopiaHistorial, fallas: List[Tuple[str, list]], kpi: Optional[Dict[str, float]]):
+        self.historial = historial
+        self.fallas = fallas # [(parte, [fallas activas])]
+        self.kpi = kpi
+
+
+class InstantaneaParque:
+    """Estado del parque al final de un tick. Mientras esta publicada sus arrays son de solo lectura."""
+    def __init__(self):
+        self.tick = -1
+        self.t = 0.0
+        self.total_kw = 0.0
+        self.n = 0
+        self.kpi: Optional[Dict[str, float]] = None
+        self.detalle: Dict[int, DetalleTurbina] = {} # id -> detalle de las turbinas observadas
+        self._arrays = {campo: np.zeros(0, dtype=dtype) for campo, dtype in CAMPOS.items()}
+
+    def __getattr__(self, campo: str) -> np.ndarray:
+        try:
+            return self.__dict__["_arrays"][campo][:self.__dict__["n"]]
+        except KeyError:
+            raise AttributeError(campo) from None
+
+    def _preparar(self, n: int) -> Dict[str, np.ndarray]:
+        """Arrays escribibles con lugar para n filas (crecen al doble, no se achican)."""
+        for campo, array in self._arrays.items():
+            if len(array) < n:
+                array = np.zeros(max(n, 2 * len(array)), dtype=array.dtype)
+                self._arrays[campo] = array
+            array.flags.writeable = True
+        self.n = n
+        return {campo: array[:n] for campo, array in self._arrays.items()}
+
+    def _sellar(self) -> None:
+        for array in self._arrays.values():
+            array.flags.writeable = False
+
+
+class BufferInstantaneas:
+    """Publicacion sin esperas entre un escritor y un lector. Hay a lo sumo tres instantaneas: la
+    publicada, la que tomo el lector y la que se esta escribiendo."""
+    def __init__(self):
+        self._lock = threading.Lock() # Solo protege el intercambio de referencias
+        self._publicada: Optional[InstantaneaParque] = None
+        self._leida: Optional[InstantaneaParque] = None
+        self._libres: List[InstantaneaParque] = []
+
+    def para_escribir(self) -> InstantaneaParque:
+        with self._lock:
+            return self._libres.pop() if self._libres else InstantaneaParque()
+
+    def publicar(self, instantanea: InstantaneaParque) -> None:
+        instantanea._sellar()
+        with self._lock:
+            anterior, self._publicada = self._publicada, instantanea
+            if anterior is not None and anterior is not self._leida:
+                self._libres.append(anterior)
+
+    def tomar(self) -> Optional[InstantaneaParque]:
+        """Ultima instantanea publicada. La anterior que tomo el lector deja de ser valida."""
+        with self._lock:
+            anterior, self._leida = self._leida, self._publicada
+            if anterior is not None and anterior is not self._leida and anterior is not self._publicada:
+                self._libres.append(anterior)
+            return self._leida
+
+
+class SimulacionEnHilo:
+    """Corre 'controller' en un hilo a un tick cada 'periodo' segundos reales (0: tan rapido como pueda).
+    Desde que se inicia, solo el hilo de simulacion toca el controlador: el resto usa enviar/comando.
+    """
+    def __init__(self, controller, periodo: float = 1.0):
+        self.controller = controller
+        self.periodo = periodo
+        self.buffers = BufferInstantaneas()
+        self.actual: Optional[InstantaneaParque] = None # Ultima que tomo el lector
+        self.ticks_atrasados = 0 # Ticks que terminaron despues de su hora
+        self._comandos: queue.SimpleQueue = queue.SimpleQueue()
+        self._observadas: Dict[int, int] = {} # id -> ventanas que la observan (solo en el hilo de simulacion)
+        self._alta: List[bool] = [] # Tipo de cada fila (las filas no cambian de tipo)
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self.error: Optional[BaseException] = None
+
+    # --- Ciclo de vida ---
+    def iniciar(self) -> None:
+        self._publicar(0.0) # La interfaz tiene algo que mostrar antes del primer tick
+        self._hilo = threading.Thread(target=self._ejecutar, name="simulacion", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: Optional[float] = None) -> None:
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    @property
+    def activa(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def _ejecutar(self) -> None:
+        proximo = time.perf_counter()
+        try:
+            while not self._detener.is_set():
+                self._atender_comandos()
+                total_kw = self.controller.avanzar_ciclo_simulacion()
+                self._publicar(total_kw)
+                proximo += self.periodo
+                espera = proximo - time.perf_counter()
+                if espera > 0:
+                    self._detener.wait(espera)
+                elif self.periodo > 0:
+                    self.ticks_atrasados += 1
+                    if -espera > self.periodo: # Atrasado mas de un tick: no se intenta recuperar
+                        proximo = time.perf_counter()
+        except BaseException as e: # Queda a la vista del lector; el hilo no debe morir en silencio
+            self.error = e
+            raise
+        finally:
+            self._atender_comandos()
+
+    # --- Comandos (desde cualquier hilo) ---
+    def enviar(self, funcion: Callable, *args) -> Future:
+        """Encola funcion(*args) para el hilo de simulacion, entre dos ticks."""
+        futuro: Future = Future()
+        self._comandos.put((funcion, args, futuro))
+        if not self.activa and self._hilo is not None:
+            self._atender_comandos() # Hilo terminado: no quedan comandos sin respuesta
+        return futuro
+
+    def comando(self, id_a: int, accion: str, *args) -> Future:
+        """Llama el metodo 'accion' del AG con ese id (ValueError si no existe)."""
+        return self.enviar(self._comando, id_a, accion, args)
+
+    def _comando(self, id_a: int, accion: str, args: tuple):
+        ag = self.controller.buscar(id_a)
+        if ag is None:
+            raise ValueError(f"AG-{id_a} no existe.")
+        return getattr(ag, accion)(*args)
+
+    def observar(self, id_a: int, observar: bool = True) -> Future:
+        """Incluye (o deja de incluir) el detalle de la turbina en las proximas instantaneas."""
+        return self.enviar(self._observar, id_a, 1 if observar else -1)
+
+    def _observar(self, id_a: int, delta: int) -> None:
+        cuenta = self._observadas.get(id_a, 0) + delta
+        if cuenta > 0:
+            self._observadas[id_a] = cuenta
+        else:
+            self._observadas.pop(id_a, None)
+
+    def _atender_comandos(self) -> None:
+        while True:
+            try:
+                funcion, args, futuro = self._comandos.get_nowait()
+            except queue.Empty:
+                return
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                futuro.set_result(funcion(*args))
+            except Exception as e:
+                futuro.set_exception(e)
+
+    # --- Lectura (hilo de la interfaz) ---
+    def tomar(self) -> Optional[InstantaneaParque]:
+        """Toma la ultima instantanea; queda en self.actual hasta el proximo tomar()."""
+        self.actual = self.buffers.tomar()
+        return self.actual
+
+    # --- Publicacion (hilo de simulacion) ---
+    def _tipos(self, n: int) -> List[bool]:
+        """Alta potencia por fila; solo se calcula para las filas nuevas."""
+        if len(self._alta) < n:
+            parque = self.controller.parque
+            if parque is not None:
+                tabla = np.array([isinstance(c, CurvaPotenciaAlta) for c in parque._curvas], dtype=bool)
+                self._alta.extend(tabla[parque.tipo[len(self._alta):n]].tolist())
+            else:
+                self._alta.extend(isinstance(ag, AG_AltaPotencia) for ag in self.controller.ags[len(self._alta):n])
+        return self._alta
+
+    def _publicar(self, total_kw: float) -> None:
+        c = self.controller
+        ids, estados, viento, temp, potencia = c.arrays_parque()
+        n = len(ids)
+        inst = self.buffers.para_escribir()
+        arrays = inst._preparar(n)
+        arrays["ids"][:] = ids
+        arrays["estados"][:] = estados
+        arrays["viento"][:] = viento
+        arrays["temp"][:] = temp
+        arrays["potencia"][:] = potencia
+        if c.parque is not None:
+            arrays["timer"][:] = c.parque.timer_rearme[:n]
+            arrays["critico"][:] = c.parque.bloqueo_critico[:n]
+        else:
+            arrays["timer"][:] = np.fromiter((ag.get_timer_rearme() for ag in c.ags), dtype=np.int32, count=n)
+            arrays["critico"][:] = np.fromiter((ag.es_bloqueo_critico() for ag in c.ags), dtype=bool, count=n)
+        arrays["alta"][:] = self._tipos(n)[:n]
+        inst.tick = c.tick
+        inst.t = c.tiempo_simulado()
+        inst.total_kw = total_kw
+        inst.kpi = c.kpis.parque() if c.kpis is not None else None
+        inst.detalle = {}
+        for id_a in self._observadas:
+            ag = c.buscar(id_a)
+            if ag is not None:
+                fallas = [(parte.nombre, list(parte.fallas_activas)) for parte in ag.partes]
+                inst.detalle[id_a] = DetalleTurbina(copiar_historial(ag.historial_potencia), fallas, c.kpis_turbina(id_a))
+        self.buffers.publicar(inst)
+
+
+# --- Vistas para la interfaz ---
+class _ParteInstantanea:
+    __slots__ = ("nombre", "fallas_activas")
+
+    def __init__(self, nombre: str, fallas_activas: list):
+        self.nombre = nombre
+        self.fallas_activas = fallas_activas
+
+
+class AGInstantanea:
+    """Lectura de la fila i en la instantanea que tomo la interfaz, con la interfaz de AerogeneradorBase
+    que usan los widgets. Los comandos devuelven un Future en lugar del resultado."""
+    def __init__(self, simulacion: SimulacionEnHilo, i: int):
+        self._sim = simulacion
+        self._i = i
+        self.id_a = int(simulacion.actual.ids[i])
+
+    @property
+    def _inst(self) -> InstantaneaParque:
+        return self._sim.actual
+
+    @property
+    def es_alta(self) -> bool:
+        return bool(self._inst.alta[self._i])
+
+    def get_estado(self) -> str:
+        return AerogeneradorBase.ESTADOS[self._inst.estados[self._i]]
+
+    def get_timer_rearme(self) -> int:
+        return int(self._inst.timer[self._i])
+
+    def es_bloqueo_critico(self) -> bool:
+        return bool(self._inst.critico[self._i])
+
+    @property
+    def potencia_actual(self) -> float:
+        return float(self._inst.potencia[self._i])
+
+    def obtener_viento(self) -> float:
+        return float(self._inst.viento[self._i])
+
+    def obtener_temp(self) -> float:
+        return float(self._inst.temp[self._i])
+
+    # Solo para turbinas observadas; hasta la primera instantanea que las incluya quedan vacios
+    @property
+    def historial_potencia(self) -> CopiaHistorial:
+        detalle = self._inst.detalle.get(self.id_a)
+        return detalle.historial if detalle is not None else CopiaHistorial([], {})
+
+    @property
+    def partes(self) -> List[_ParteInstantanea]:
+        detalle = self._inst.detalle.get(self.id_a)
+        return [_ParteInstantanea(*datos) for datos in detalle.fallas] if detalle is not None else []
+
+    def kpi(self) -> Optional[Dict[str, float]]:
+        detalle = self._inst.detalle.get(self.id_a)
+        return detalle.kpi if detalle is not None else None
+
+    def observar(self, observar: bool = True) -> Future:
+        return self._sim.observar(self.id_a, observar)
+
+    # --- Comandos ---
+    def solicitar_marcha(self) -> Future:
+        return self._sim.comando(self.id_a, "solicitar_marcha")
+
+    def forzar_parada_manual(self) -> Future:
+        return self._sim.comando(self.id_a, "forzar_parada_manual")
+
+    def realizar_mantenimiento(self) -> Future:
+        return self._sim.comando(self.id_a, "realizar_mantenimiento")
+
+
+class TurbinasInstantanea(Sequence):
+    """Secuencia de AGInstantanea del tamano de la instantanea actual (reemplaza a controller.ags en
+    la grilla). Las vistas se crean una vez por fila: la grilla compara por identidad."""
+    def __init__(self, simulacion: SimulacionEnHilo):
+        self._sim = simulacion
+        self._vistas: List[AGInstantanea] = []
+
+    def __len__(self) -> int:
+        return self._sim.actual.n if self._sim.actual is not None else 0
+
+    def __getitem__(self, i: int) -> AGInstantanea:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        while len(self._vistas) <= i:
+            self._vistas.append(AGInstantanea(self._sim, len(self._vistas)))
+        return self._vistas[i]
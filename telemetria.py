@@ -0,0 +1,247 @@
+# telemetria.py
+import os
+from typing import List, Optional, Tuple
+import numpy as np
+
+# Registro binario de ancho fijo (25 bytes, little endian, sin relleno)
+REGISTRO = np.dtype([
+    ("t", "<f8"),         # segundos (epoch)
+    ("id_a", "<u4"),
+    ("estado", "u1"),     # indice en AerogeneradorBase.ESTADOS
+    ("viento", "<f4"),    # m/s
+    ("temp", "<f4"),      # C
+    ("potencia", "<f4"),  # kW
+])
+
+MAGIC = b"TLM1"
+CABECERA = np.dtype([("magic", "S4"), ("version", "<u4"), ("cantidad", "<u8")]) # 16 bytes
+VERSION = 1
+
+
+class Segmento:
+    """Archivo de tamano fijo mapeado en memoria: cabecera + 'capacidad' registros."""
+    def __init__(self, ruta: str, capacidad: Optional[int] = None, solo_lectura: bool = False):
+        self.ruta = ruta
+        self.solo_lectura = solo_lectura
+        modo = "r" if solo_lectura else "r+"
+        if capacidad is not None: # Crear y preasignar
+            with open(ruta, "wb") as f:
+                f.truncate(CABECERA.itemsize + capacidad * REGISTRO.itemsize)
+            cab = np.memmap(ruta, dtype=CABECERA, mode="r+", shape=(1,))
+            cab[0] = (MAGIC, VERSION, 0)
+            cab.flush()
+            del cab
+        self._cabecera = np.memmap(ruta, dtype=CABECERA, mode=modo, shape=(1,))
+        if self._cabecera["magic"][0] != MAGIC:
+            raise ValueError(f"{ruta} no es un segmento de telemetria.")
+        if self._cabecera["version"][0] != VERSION:
+            raise ValueError(f"{ruta}: version {self._cabecera['version'][0]} no soportada.")
+        self.capacidad = (os.path.getsize(ruta) - CABECERA.itemsize) // REGISTRO.itemsize
+        self.registros = np.memmap(ruta, dtype=REGISTRO, mode=modo, offset=CABECERA.itemsize,
+                                   shape=(self.capacidad,))
+        # Indice por AG de los primeros _indexados registros: posiciones ordenadas por (id_a, posicion)
+        self._indexados = 0
+        self._orden = np.empty(0, dtype=np.int64)
+        self._ids_orden = np.empty(0, dtype=REGISTRO["id_a"])
+
+    @property
+    def cantidad(self) -> int:
+        return int(self._cabecera["cantidad"][0])
+
+    @property
+    def libres(self) -> int:
+        return self.capacidad - self.cantidad
+
+    @property
+    def t_min(self) -> float:
+        return float(self.registros["t"][0]) if self.cantidad else float("inf")
+
+    @property
+    def t_max(self) -> float:
+        return float(self.registros["t"][self.cantidad - 1]) if self.cantidad else float("-inf")
+
+    def agregar(self, lote: np.ndarray) -> None:
+        i = self.cantidad
+        self.registros[i:i + len(lote)] = lote
+        # La cantidad se publica despues de los datos: quien lea el mapeo (este proceso u otro que abra el
+        # archivo) nunca ve registros a medio escribir. Ante una caida del sistema el SO puede bajar a disco
+        # la cabecera antes que los registros: solo flush() (registros primero) deja el archivo consistente.
+        self._cabecera["cantidad"][0] = i + len(lote)
+
+    def limites(self, t_inicio: float, t_fin: float) -> Tuple[int, int]:
+        """Posiciones [a, b) de los registros con t_inicio <= t < t_fin. Busqueda binaria sobre t."""
+        t = self.registros["t"][:self.cantidad]
+        return int(np.searchsorted(t, t_inicio, side="left")), int(np.searchsorted(t, t_fin, side="left"))
+
+    def rango(self, t_inicio: float, t_fin: float) -> np.ndarray:
+        """Vista (sin copiar) de los registros con t_inicio <= t < t_fin."""
+        a, b = self.limites(t_inicio, t_fin)
+        return self.registros[a:b]
+
+    def rango_ag(self, t_inicio: float, t_fin: float, id_a: int) -> np.ndarray:
+        """Registros de un AG con t_inicio <= t < t_fin, sin recorrer los de los demas AG.
+        El indice se arma al primer uso y se rehace cuando la parte sin indexar supera a la indexada;
+        esa cola (solo en el segmento activo) se filtra directamente."""
+        a, b = self.limites(t_inicio, t_fin)
+        n = self.cantidad
+        if n - self._indexados > self._indexados:
+            self._indexar(n)
+        k = self._indexados
+        izq = np.searchsorted(self._ids_orden, id_a, side="left")
+        der = np.searchsorted(self._ids_orden, id_a, side="right")
+        posiciones = self._orden[izq:der] # Crecientes: el orden es estable
+        posiciones = posiciones[np.searchsorted(posiciones, a):np.searchsorted(posiciones, b)]
+        if b > k:
+            inicio = max(a, k)
+            cola = inicio + np.flatnonzero(self.registros["id_a"][inicio:b] == id_a)
+            posiciones = np.concatenate([posiciones, cola])
+        return self.registros[posiciones]
+
+    def _indexar(self, n: int) -> None:
+        ids = np.array(self.registros["id_a"][:n])
+        self._orden = np.argsort(ids, kind="stable")
+        self._ids_orden = ids[self._orden]
+        self._indexados = n
+
+    def flush(self) -> None:
+        """Baja a disco los registros y despues la cabecera (la cantidad nunca cubre datos sin escribir)."""
+        if self.solo_lectura:
+            return
+        self.registros.flush()
+        self._cabecera.flush()
+
+    def cerrar(self) -> None:
+        self.flush()
+        del self.registros
+        del self._cabecera
+
+
+class AlmacenTelemetria:
+    """Serie temporal append-only de todo el parque en segmentos mapeados en memoria.
+    Cada tick se escribe con una sola llamada a agregar_lote(). Los registros quedan ordenados por t
+    dentro de cada segmento y entre segmentos (consultar, compactar y scada.LectorBinario buscan por t),
+    asi que no se aceptan registros anteriores al ultimo guardado.
+    """
+    EXTENSION = ".tlm"
+
+    def __init__(self, directorio: str, registros_por_segmento: int = 1 << 20):
+        self.directorio = directorio
+        self.registros_por_segmento = registros_por_segmento
+        os.makedirs(directorio, exist_ok=True)
+        self.segmentos: List[Segmento] = [Segmento(os.path.join(directorio, nombre))
+                                          for nombre in sorted(os.listdir(directorio))
+                                          if nombre.endswith(self.EXTENSION)]
+
+    def _nombre(self, numero: int) -> str:
+        return os.path.join(self.directorio, f"seg_{numero:08d}{self.EXTENSION}")
+
+    def _numero(self, segmento: Segmento) -> int:
+        return int(os.path.basename(segmento.ruta)[4:12])
+
+    def _segmento_activo(self) -> Segmento:
+        """Rotacion: abre un segmento nuevo cuando el actual se llena."""
+        if not self.segmentos or self.segmentos[-1].libres == 0:
+            numero = self._numero(self.segmentos[-1]) + 1 if self.segmentos else 0
+            self.segmentos.append(Segmento(self._nombre(numero), self.registros_por_segmento))
+        return self.segmentos[-1]
+
+    # --- Escritura ---
+    def agregar_lote(self, t: float, ids: np.ndarray, estados: np.ndarray, viento: np.ndarray,
+                     temp: np.ndarray, potencia: np.ndarray) -> None:
+        """Agrega un registro por turbina, todos con el mismo timestamp."""
+        lote = np.empty(len(ids), dtype=REGISTRO)
+        lote["t"] = t
+        lote["id_a"] = ids
+        lote["estado"] = estados
+        lote["viento"] = viento
+        lote["temp"] = temp
+        lote["potencia"] = potencia
+        self.agregar_registros(lote)
+
+    def agregar_registros(self, lote: np.ndarray) -> None:
+        """ValueError si el lote retrocede en el tiempo (p. ej. un controlador restaurado de un checkpoint,
+        o un Reproductor que volvio atras, escribiendo en el directorio de la corrida original)."""
+        if not len(lote):
+            return
+        t = lote["t"]
+        if t[0] < self.t_max or (len(t) > 1 and (np.diff(t) < 0).any()):
+            raise ValueError(f"{self.directorio}: registros desde t={float(t[0])} anteriores al ultimo "
+                             f"guardado (t={self.t_max}); la telemetria es append-only, use otro directorio.")
+        while len(lote):
+            segmento = self._segmento_activo()
+            parte = lote[:segmento.libres]
+            segmento.agregar(parte)
+            lote = lote[len(parte):]
+
+    # --- Consultas ---
+    @property
+    def t_max(self) -> float:
+        """Timestamp del ultimo registro (-inf si el almacen esta vacio)."""
+        return next((s.t_max for s in reversed(self.segmentos) if s.cantidad), float("-inf"))
+
+    def consultar(self, t_inicio: float = float("-inf"), t_fin: float = float("inf"),
+                  id_a: Optional[int] = None) -> np.ndarray:
+        """Registros con t_inicio <= t < t_fin (opcionalmente de un solo AG, por el indice de cada segmento).
+        Solo se leen los segmentos que se solapan con el rango.
+        """
+        partes = []
+        for segmento in self.segmentos:
+            if segmento.t_max < t_inicio or segmento.t_min >= t_fin:
+                continue
+            if id_a is None:
+                partes.append(np.array(segmento.rango(t_inicio, t_fin)))
+            else:
+                partes.append(segmento.rango_ag(t_inicio, t_fin, id_a))
+        if not partes:
+            return np.empty(0, dtype=REGISTRO)
+        return np.concatenate(partes)
+
+    def __len__(self) -> int:
+        return sum(s.cantidad for s in self.segmentos)
+
+    # --- Mantenimiento ---
+    def compactar(self, hasta: float, resolucion: Optional[float] = None) -> int:
+        """Une en un solo segmento los segmentos cerrados con datos anteriores a 'hasta'.
+        Con 'resolucion' (s) conserva solo la primera muestra de cada AG por intervalo.
+        Retorna la cantidad de segmentos eliminados.
+        """
+        viejos = [s for s in self.segmentos[:-1] if s.t_max < hasta]
+        if not viejos or (len(viejos) < 2 and resolucion is None):
+            return 0
+        datos = np.concatenate([np.array(s.registros[:s.cantidad]) for s in viejos])
+        if resolucion is not None:
+            bucket = np.floor(datos["t"] / resolucion).astype(np.int64)
+            _, primeros = np.unique(np.stack([bucket, datos["id_a"].astype(np.int64)]), axis=1,
+                                    return_index=True)
+            datos = datos[np.sort(primeros)]
+
+        destino = viejos[0].ruta
+        temporal = destino + ".tmp"
+        nuevo = Segmento(temporal, max(len(datos), 1))
+        nuevo.agregar(datos)
+        nuevo.cerrar()
+        for s in viejos:
+            s.cerrar()
+            os.remove(s.ruta)
+        os.replace(temporal, destino)
+
+        self.segmentos = [Segmento(destino)] + [s for s in self.segmentos if s not in viejos]
+        return len(viejos) - 1
+
+    def eliminar_anteriores(self, t: float) -> int:
+        """Retencion: borra los segmentos cerrados cuyos datos son todos anteriores a t."""
+        viejos = [s for s in self.segmentos[:-1] if s.t_max < t]
+        for s in viejos:
+            s.cerrar()
+            os.remove(s.ruta)
+        self.segmentos = [s for s in self.segmentos if s not in viejos]
+        return len(viejos)
+
+    def flush(self) -> None:
+        for s in self.segmentos:
+            s.flush()
+
+    def cerrar(self) -> None:
+        for s in self.segmentos:
+            s.cerrar()
+        self.segmentos = []
@@ -0,0 +1,230 @@
+# tendencias.py
+"""Grafico de tendencias sobre historiales multi-resolucion.
+
+Cada serie se dibuja como una sola polilinea con a lo sumo dos puntos (minimo y maximo) por columna de
+pixeles. Los datos salen del nivel de historial mas grueso que todavia resuelve una columna, asi que el
+costo depende del ancho del canvas y de la capacidad de los niveles, no de la duracion del historial.
+"""
+import math
+import tkinter as tk
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+
+
+def decimar_minmax(t, minimo, maximo, ancho_columna: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Agrupa muestras ordenadas en columnas de 'ancho_columna' segundos (alineadas a t = 0).
+    Retorna (columna, min, max) de cada columna con datos: conserva picos y valles."""
+    t = np.asarray(t, dtype=float)
+    if not len(t):
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+    columnas = np.floor(t / ancho_columna).astype(np.int64)
+    inicios = np.flatnonzero(np.r_[True, columnas[1:] != columnas[:-1]])
+    return (columnas[inicios], np.minimum.reduceat(np.asarray(minimo, dtype=float), inicios),
+            np.maximum.reduceat(np.asarray(maximo, dtype=float), inicios))
+
+
+def elegir_nivel(niveles, t0: float, t_ultimo: float, ancho_columna: float):
+    """Nivel mas grueso con periodo <= ancho_columna que llega hasta t0.
+    Si ninguno resuelve la columna, el mas fino que llegue; si ninguno llega, el de mayor alcance."""
+    orden = sorted(niveles, key=lambda n: n.periodo)
+    cubren = [n for n in orden if t_ultimo - n.periodo * n.capacidad <= t0]
+    if not cubren:
+        return orden[-1]
+    finos = [n for n in cubren if n.periodo <= ancho_columna]
+    return finos[-1] if finos else cubren[0]
+
+
+class SerieTendencia:
+    """Columnas decimadas de un historial dentro de la ventana visible.
+    Si la ventana solo avanzo, se recalculan unicamente las columnas de la cola."""
+    def __init__(self, nombre: str, fuente: Callable[[], object], color: str, unidad: str):
+        self.nombre = nombre
+        self.fuente = fuente # Retorna el historial (HistorialMultiResolucion, VistaHistorial, ...)
+        self.color = color
+        self.unidad = unidad
+        self.visible = True
+        self.columnas = np.zeros(0, dtype=np.int64)
+        self.minimo = np.zeros(0)
+        self.maximo = np.zeros(0)
+        self._clave = None # (periodo del nivel, ancho_columna, primera columna) del ultimo calculo
+
+    def t_ultimo(self) -> Optional[float]:
+        return self.fuente().t_ultimo
+
+    def calcular(self, t0: float, t1: float, ancho_columna: float) -> None:
+        historial = self.fuente()
+        if historial.t_ultimo is None:
+            self._vaciar()
+            return
+        nivel = elegir_nivel(historial.niveles.values(), t0, historial.t_ultimo, ancho_columna)
+        primera = math.floor(t0 / ancho_columna)
+        ultima = math.floor(t1 / ancho_columna)
+        clave = (nivel.periodo, ancho_columna, primera)
+
+        if (self._clave is not None and self._clave[:2] == clave[:2] and self._clave[2] <= primera
+                and len(self.columnas)):
+            # Solo cambia la cola: se rehace la ultima columna (puede estar incompleta) y las nuevas
+            desde = int(self.columnas[-1])
+            conservar = self.columnas < desde
+            previas = (self.columnas[conservar], self.minimo[conservar], self.maximo[conservar])
+        else:
+            desde = primera
+            previas = (self.columnas[:0], self.minimo[:0], self.maximo[:0])
+        t, mn, _, mx = nivel.serie_desde(desde * ancho_columna)
+        nuevas = decimar_minmax(t, mn, mx, ancho_columna)
+        columnas, minimo, maximo = (np.concatenate([a, b]) for a, b in zip(previas, nuevas))
+
+        dentro = (columnas >= primera) & (columnas <= ultima)
+        self.columnas, self.minimo, self.maximo = columnas[dentro], minimo[dentro], maximo[dentro]
+        self._clave = clave
+
+    def _vaciar(self) -> None:
+        self.columnas = self.columnas[:0]
+        self.minimo = self.minimo[:0]
+        self.maximo = self.maximo[:0]
+        self._clave = None
+
+
+def _formato_duracion(segundos: float) -> str:
+    segundos = int(round(segundos))
+    if segundos < 120:
+        return f"{segundos}s"
+    if segundos < 7200:
+        return f"{segundos // 60}m"
+    if segundos < 172800:
+        return f"{segundos // 3600}h {segundos % 3600 // 60:02d}m"
+    return f"{segundos // 86400}d {segundos % 86400 // 3600:02d}h"
+
+
+class GraficoTendencia(tk.Canvas):
+    """Series superpuestas (cada una con su propia escala vertical).
+    Rueda: zoom alrededor del cursor. Arrastre: desplazamiento en el tiempo. Doble clic: vuelve al vivo.
+    Los items se crean una sola vez; cada actualizacion solo cambia coordenadas y textos."""
+    DURACION_INICIAL = 300.0
+    DURACION_MINIMA = 10.0
+    DURACION_MAXIMA = 30 * 86400.0
+
+    def __init__(self, parent, width: int = 500, height: int = 200, **opciones):
+        opciones.setdefault("bg", "black")
+        opciones.setdefault("highlightthickness", 1)
+        super().__init__(parent, width=width, height=height, **opciones)
+        self.ancho = width
+        self.alto = height
+        self.duracion = self.DURACION_INICIAL
+        self.t_fin: Optional[float] = None # None: el borde derecho sigue a la ultima muestra
+        self.series: Dict[str, SerieTendencia] = {}
+        self._lineas: Dict[str, int] = {}
+        self._leyendas: Dict[str, int] = {}
+        self._arrastre: Optional[Tuple[int, float]] = None
+
+        self._eje = self.create_line(0, height / 2, width, height / 2, fill="#333", dash=(2, 2))
+        self._texto_tiempo = self.create_text(width - 5, height - 5, anchor="se", fill="#888",
+                                              font=("Consolas", 8))
+
+        self.bind("<Configure>", self._redimensionar)
+        self.bind("<MouseWheel>", lambda e: self.zoom(0.8 if e.delta > 0 else 1.25, e.x))
+        self.bind("<Button-4>", lambda e: self.zoom(0.8, e.x))  # Rueda en X11
+        self.bind("<Button-5>", lambda e: self.zoom(1.25, e.x))
+        self.bind("<ButtonPress-1>", self._iniciar_arrastre)
+        self.bind("<B1-Motion>", self._arrastrar)
+        self.bind("<ButtonRelease-1>", lambda e: setattr(self, "_arrastre", None))
+        self.bind("<Double-Button-1>", lambda e: self.seguir())
+
+    # --- Series ---
+    def agregar_serie(self, nombre: str, fuente: Callable[[], object], color: str, unidad: str = "",
+                      visible: bool = True) -> SerieTendencia:
+        serie = SerieTendencia(nombre, fuente, color, unidad)
+        serie.visible = visible
+        self.series[nombre] = serie
+        self._lineas[nombre] = self.create_line(0, 0, 0, 0, fill=color, width=2, state="hidden")
+        self._leyendas[nombre] = self.create_text(5, 5 + 14 * (len(self.series) - 1), anchor="nw",
+                                                  fill=color, font=("Consolas", 8), state="hidden")
+        return serie
+
+    def mostrar_serie(self, nombre: str, visible: bool) -> None:
+        self.series[nombre].visible = visible
+        self.actualizar()
+
+    # --- Navegacion ---
+    def zoom(self, factor: float, x: Optional[float] = None) -> None:
+        """Multiplica la duracion visible por 'factor', dejando fijo el instante bajo la coordenada x."""
+        t0, t1 = self._ventana()
+        if t1 is None:
+            return
+        x = self.ancho if x is None else x
+        duracion = min(max(self.duracion * factor, self.DURACION_MINIMA), self.DURACION_MAXIMA)
+        fijo = t0 + x / self.ancho * self.duracion
+        if self.t_fin is not None:
+            self._fijar_fin(fijo + (1 - x / self.ancho) * duracion)
+        self.duracion = duracion
+        self.actualizar()
+
+    def desplazar(self, segundos: float) -> None:
+        """Mueve la ventana en el tiempo (negativo: hacia el pasado)."""
+        _, t1 = self._ventana()
+        if t1 is not None:
+            self._fijar_fin(t1 + segundos)
+            self.actualizar()
+
+    def seguir(self) -> None:
+        """Vuelve a seguir la ultima muestra."""
+        self.t_fin = None
+        self.actualizar()
+
+    def _fijar_fin(self, t_fin: float) -> None:
+        ultimo = self._t_ultimo()
+        self.t_fin = None if ultimo is None or t_fin >= ultimo else t_fin
+
+    def _iniciar_arrastre(self, evento) -> None:
+        _, t1 = self._ventana()
+        self._arrastre = None if t1 is None else (evento.x, t1)
+
+    def _arrastrar(self, evento) -> None:
+        if self._arrastre is not None:
+            x0, t1 = self._arrastre
+            self._fijar_fin(t1 + (x0 - evento.x) / self.ancho * self.duracion)
+            self.actualizar()
+
+    def _redimensionar(self, evento) -> None:
+        self.ancho, self.alto = max(evento.width, 2), max(evento.height, 2)
+        self.coords(self._eje, 0, self.alto / 2, self.ancho, self.alto / 2)
+        self.coords(self._texto_tiempo, self.ancho - 5, self.alto - 5)
+        self.actualizar()
+
+    # --- Dibujo ---
+    def _t_ultimo(self) -> Optional[float]:
+        tiempos = [t for t in (s.t_ultimo() for s in self.series.values()) if t is not None]
+        return max(tiempos) if tiempos else None
+
+    def _ventana(self) -> Tuple[Optional[float], Optional[float]]:
+        t1 = self.t_fin if self.t_fin is not None else self._t_ultimo()
+        return (None, None) if t1 is None else (t1 - self.duracion, t1)
+
+    def actualizar(self) -> None:
+        """Recalcula las series visibles y mueve sus polilineas (costo acotado por el ancho)."""
+        t0, t1 = self._ventana()
+        ancho_columna = self.duracion / self.ancho
+        for nombre, serie in self.series.items():
+            linea, leyenda = self._lineas[nombre], self._leyendas[nombre]
+            if t0 is None or not serie.visible:
+                self.itemconfigure(linea, state="hidden")
+                self.itemconfigure(leyenda, state="hidden")
+                continue
+            serie.calcular(t0, t1, ancho_columna)
+            if not len(serie.columnas):
+                self.itemconfigure(linea, state="hidden")
+                self.itemconfigure(leyenda, state="normal", text=f"{serie.nombre}: sin datos")
+                continue
+            bajo = min(0.0, float(serie.minimo.min()))
+            alto = max(float(serie.maximo.max()) * 1.1, bajo + 1e-9)
+            escala = (self.alto - 4) / (alto - bajo)
+            x = ((serie.columnas + 0.5) * ancho_columna - t0) / ancho_columna
+            y_min = self.alto - 2 - (serie.minimo - bajo) * escala
+            y_max = self.alto - 2 - (serie.maximo - bajo) * escala
+            self.coords(linea, *np.column_stack([x, y_min, x, y_max]).ravel().tolist())
+            self.itemconfigure(linea, state="normal")
+            self.itemconfigure(leyenda, state="normal",
+                               text=f"{serie.nombre}: {serie.maximo[-1]:.1f} {serie.unidad} (max {alto / 1.1:.1f})")
+        if t1 is not None:
+            vivo = "EN VIVO" if self.t_fin is None else f"hasta -{_formato_duracion(self._t_ultimo() - t1)}"
+            self.itemconfigure(self._texto_tiempo, text=f"ventana {_formato_duracion(self.duracion)} | {vivo}")
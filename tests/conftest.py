@@ -0,0 +1,32 @@
+# conftest.py
+"""Los modulos del simulador estan en la raiz del repositorio (sin paquete instalable)."""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import checkpoint
+from alarmas import AlarmManager
+
+
+@pytest.fixture(autouse=True)
+def sin_consola():
+    """Las alarmas de las pruebas no se imprimen."""
+    sinks = AlarmManager.sinks
+    AlarmManager.configurar(sinks=[])
+    yield
+    AlarmManager.vaciar() # Las pendientes se entregan a los sinks vacios
+    AlarmManager.configurar(sinks=sinks)
+
+
+@pytest.fixture(params=["hilo", "fork"])
+def escritura(request, monkeypatch):
+    """Los dos caminos de escritura de GestorCheckpoints.guardar."""
+    if request.param == "fork":
+        if not hasattr(checkpoint.os, "fork"):
+            pytest.skip("Sin fork en esta plataforma")
+        monkeypatch.setattr(checkpoint.threading, "active_count", lambda: 1)
+    else:
+        monkeypatch.setattr(checkpoint.threading, "active_count", lambda: 2)
+    return request.param
@@ -0,0 +1,89 @@
+# test_alarmas.py
+"""Consultas por tiempo con alarmas fuera de orden y cola acotada hacia los sinks."""
+import threading
+from alarmas import AlarmManager
+from controlador import SimuladorController
+from fallas import FallaMecanica
+
+
+def test_consulta_por_tiempo_mezcla_reloj_simulado_y_operador():
+    AlarmManager.limpiar()
+    c = SimuladorController("vectorizado", semilla=1)
+    for _ in range(5000):
+        c.avanzar_ciclo_simulacion()
+    campana = FallaMecanica("Gondola", "Falla de caja multiplicadora") # Como la campana: tiempo simulado
+    campana.timestamp = c.tiempo_simulado()
+    c.ags[1].registrar_falla_externa(campana, "Gondola")
+    c.provocar_falla_demo() # Reloj de pared, anterior al tiempo simulado
+
+    recientes = AlarmManager.consultar(hasta=c.t_inicio + 10)
+    assert [(e.id_ag, "RUPTURA DE PALA" in e.mensaje) for e in recientes] == [(c.ags[0].id_a, True)]
+    assert [e.t for e in AlarmManager.consultar(desde=c.t_inicio + 10)] == [campana.timestamp]
+    todas = AlarmManager.consultar()
+    assert [e.t for e in todas] == sorted(e.t for e in todas)
+    assert [e.id_ag for e in AlarmManager.consultar(nivel="Critica", hasta=c.t_inicio + 10)] == [c.ags[0].id_a]
+    c.cerrar()
+
+
+def test_desalojo_con_alarmas_fuera_de_orden():
+    AlarmManager.limpiar()
+    AlarmManager.configurar(capacidad=3)
+    try:
+        for t in (100.0, 5.0, 50.0, 1.0, 70.0):
+            falla = FallaMecanica("Torre", f"t={t}")
+            falla.timestamp, falla.id_ag = t, 7
+            AlarmManager.registrar_alarma(falla)
+        # Se desalojan las primeras en llegar (100 y 5), no las de menor tiempo
+        assert [e.t for e in AlarmManager.consultar()] == [1.0, 50.0, 70.0]
+        assert [e.t for e in AlarmManager.consultar(id_ag=7, desde=2.0)] == [50.0, 70.0]
+    finally:
+        AlarmManager.configurar(capacidad=10000)
+        AlarmManager.limpiar()
+
+
+def test_sink_lento_no_hace_crecer_la_cola(caplog):
+    liberar = threading.Event()
+    entregadas = []
+
+    def sink_lento(lote):
+        liberar.wait(5)
+        entregadas.extend(lote)
+
+    def productor(k):
+        for i in range(50):
+            AlarmManager.registrar_alarma(FallaMecanica("Torre", f"alarma {k}.{i}"))
+
+    AlarmManager.configurar(sinks=[sink_lento], cola_maxima=10)
+    AlarmManager.descartadas = 0
+    try:
+        hilos = [threading.Thread(target=productor, args=(k,)) for k in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert AlarmManager._cola.qsize() <= 10
+        assert AlarmManager.descartadas > 0
+        assert len(entregadas) == 0
+    finally:
+        liberar.set()
+        AlarmManager.vaciar()
+        AlarmManager.configurar(cola_maxima=50000)
+    # Con varios productores no se pierde ningun incremento del contador
+    assert len(entregadas) + AlarmManager.descartadas == 200
+    avisos = [r for r in caplog.records if r.name == "alarmas" and "cola llena" in r.getMessage()]
+    assert avisos and sum(int(r.args[0]) for r in avisos) == AlarmManager.descartadas
+    AlarmManager.descartadas = 0
+
+
+def test_sink_roto_se_informa_por_logging(caplog):
+    entregadas = []
+
+    def sink_roto(lote):
+        raise RuntimeError("disco lleno")
+
+    AlarmManager.configurar(sinks=[sink_roto, entregadas.extend])
+    AlarmManager.registrar_alarma(FallaMecanica("Torre", "alarma"))
+    AlarmManager.vaciar()
+    assert len(entregadas) == 1 # Los demas sinks siguen recibiendo
+    errores = [r for r in caplog.records if r.name == "alarmas" and r.levelname == "ERROR"]
+    assert errores and "disco lleno" in caplog.text
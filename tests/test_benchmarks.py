@@ -0,0 +1,16 @@
+# test_benchmarks.py
+"""La comparacion contra la linea base no marca como regresion el ruido de operaciones muy cortas."""
+from benchmarks import RUIDO_ABSOLUTO, _resultado, comparar
+
+
+def test_ruido_absoluto_no_es_regresion():
+    base = {"alarmas/x": _resultado(0.08, "us/llamada"), "ciclo/y": _resultado(100.0, "ticks/s", True)}
+    actual = {"alarmas/x": _resultado(0.08 + RUIDO_ABSOLUTO["us/llamada"] / 2, "us/llamada"),
+              "ciclo/y": _resultado(100.0, "ticks/s", True)}
+    assert all(l.startswith("ok") for l in comparar(actual, base, 0.2))
+
+
+def test_regresion_real():
+    base = {"alarmas/x": _resultado(0.08, "us/llamada"), "ciclo/y": _resultado(100.0, "ticks/s", True)}
+    actual = {"alarmas/x": _resultado(0.5, "us/llamada"), "ciclo/y": _resultado(70.0, "ticks/s", True)}
+    assert [l.split()[0] for l in comparar(actual, base, 0.2)] == ["REGRESION", "REGRESION"]
@@ -0,0 +1,81 @@
+# test_bitacora.py
+"""La reproduccion de una bitacora deja, en cada tick, el mismo parque que la corrida original."""
+import os
+import pytest
+import bitacora
+from bitacora import Reproductor
+from checkpoint import aleatorios
+from controlador import SimuladorController
+from fallas import FallaElectrica, FallaMecanica
+
+TICKS = 120
+INSTANTANEA_CADA = 25
+# Idas y vueltas: restauran una instantanea o siguen desde el estado actual segun el caso
+SALTOS = (TICKS, 37, 3, 80, 25, 26, 75, 99, 50, 0, 61, 62, 100)
+
+
+def _foto(c: SimuladorController):
+    return [(ag.id_a, ag.get_estado(), ag.potencia_actual, ag.get_timer_rearme(), ag._bloqueo_manual,
+             ag.es_bloqueo_critico(), [(f.mensaje, f.bloqueante) for p in ag.partes for f in p.fallas_activas],
+             list(ag.historial_potencia), ag.historial_potencia.serie("muestra"),
+             ag.historial_potencia.serie("minuto")) for ag in c.ags]
+
+
+def _incidente(c: SimuladorController, tick: int) -> None:
+    """Comandos, una falla con su reparacion, un aviso y una turbina nueva a mitad de la corrida."""
+    if tick == 10:
+        c.ags[1].forzar_parada_manual()
+    elif tick == 20:
+        c.ags[2].registrar_falla_externa(FallaElectrica("Buje", "Falla del sistema de pitch"), "Buje")
+    elif tick == 30:
+        c.agregar_aerogenerador("ALTA")
+        c.ags[-1].solicitar_marcha()
+    elif tick == 40:
+        c.ags[3].registrar_advertencia(FallaMecanica("Gondola", "Vibracion elevada"), "Gondola")
+    elif tick == 45:
+        c.ags[1].solicitar_marcha()
+    elif tick == 55:
+        falla = c.ags[2]._buscar_parte("Buje").fallas_activas[0]
+        c.ags[2].reparar_falla(falla, "Buje")
+    elif tick == 60:
+        c.ags[4].realizar_mantenimiento()
+
+
+@pytest.mark.parametrize("motor", ["objetos", "vectorizado"])
+def test_reproduccion_identica(motor, escritura, tmp_path):
+    # Los sensores propios sortean con random / el generador del parque: la corrida original va primero
+    c = SimuladorController(motor, semilla=7)
+    while len(c.ags) < 8:
+        c.agregar_aerogenerador("BAJA" if len(c.ags) % 2 else "ALTA")
+    for ag in c.ags:
+        ag.solicitar_marcha()
+    c.habilitar_bitacora(str(tmp_path), instantanea_cada=INSTANTANEA_CADA)
+    fotos = {c.tick: _foto(c)}
+    estados = {c.tick: aleatorios(c)}
+    while c.tick < TICKS:
+        _incidente(c, c.tick)
+        c.avanzar_ciclo_simulacion()
+        fotos[c.tick] = _foto(c)
+        estados[c.tick] = aleatorios(c)
+    c.cerrar()
+
+    r = Reproductor(str(tmp_path))
+    instantaneas = {tick for tick, _, _ in r._instantaneas}
+    assert len(instantaneas) > 3
+    for tick in SALTOS:
+        anterior = r.controller
+        assert r.ir_a(tick).tick == tick
+        assert _foto(r.controller) == fotos[tick], tick
+        if r.controller is not anterior and tick in instantaneas:
+            # Recien restaurada: random y el generador del parque quedan como en la corrida original
+            assert aleatorios(r.controller) == estados[tick], tick
+    r.cerrar()
+
+    # La ultima instantanea, sin la bitacora: los sensores vuelven a sortear y la corrida sigue igual
+    s = SimuladorController.restaurar(os.path.join(str(tmp_path), bitacora.INSTANTANEAS))
+    assert s.tick == max(instantaneas) and s.tick < TICKS
+    assert _foto(s) == fotos[s.tick]
+    while s.tick < TICKS:
+        s.avanzar_ciclo_simulacion()
+        assert _foto(s) == fotos[s.tick], s.tick
+    s.cerrar()
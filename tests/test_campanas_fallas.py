@@ -0,0 +1,156 @@
+# test_campanas_fallas.py
+"""Las reparaciones de la campana quitan solo sus fallas y respetan la parada manual."""
+import numpy as np
+import pytest
+from bitacora import Reproductor
+from campanas_fallas import DistribucionTiempo, Exponencial, ModoFalla
+from controlador import SimuladorController
+from fallas import FallaElectrica, FallaMecanica
+
+
+class PrimeraFalla(DistribucionTiempo):
+    """Solo la turbina 'fila' falla, a los ~36 s de habilitar la campana; despues, MTBF enorme."""
+    def __init__(self, fila: int):
+        self.fila = fila
+        self._sorteada = False
+
+    def sortear(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        horas = np.full(n, 1e9)
+        if not self._sorteada:
+            horas[self.fila] = 0.01
+            self._sorteada = True
+        return horas
+
+    @property
+    def media(self) -> float:
+        return 1e9
+
+
+def _modos(fila: int) -> tuple:
+    return (ModoFalla("Gondola", FallaMecanica, PrimeraFalla(fila), Exponencial(0.01), "Falla de caja multiplicadora"),)
+
+
+def _parque(motor: str, n: int = 6) -> SimuladorController:
+    c = SimuladorController(motor, semilla=1)
+    while len(c.ags) < n:
+        c.agregar_aerogenerador("ALTA")
+    for ag in c.ags:
+        ag.solicitar_marcha()
+    return c
+
+
+def _avanzar_hasta(c: SimuladorController, condicion, limite: int = 1000) -> None:
+    for _ in range(limite):
+        if condicion():
+            return
+        c.avanzar_ciclo_simulacion()
+    raise AssertionError("La campana no llego al evento esperado")
+
+
+def _fallar(c: SimuladorController, fila: int):
+    campana = c.habilitar_campana_fallas(_modos(fila), semilla=2)
+    _avanzar_hasta(c, lambda: campana.fallas_por_modo[0] == 1)
+    assert c.ags[fila].contar_fallas(componente="Gondola") >= 1
+    return campana
+
+
+def _fallar_y_reparar(c: SimuladorController, fila: int) -> None:
+    campana = _fallar(c, fila)
+    _avanzar_hasta(c, lambda: campana.reparaciones == 1)
+
+
+@pytest.mark.parametrize("motor", ["objetos", "vectorizado"])
+def test_reparacion_respeta_parada_manual(motor):
+    c = _parque(motor)
+    ag = c.ags[2]
+    ag.forzar_parada_manual()
+    _fallar_y_reparar(c, 2)
+    assert ag._bloqueo_manual
+    assert not ag.es_bloqueo_critico()
+    assert ag.contar_fallas() == 0
+    c.avanzar_ciclo_simulacion()
+    assert ag.get_estado() == "stop"
+    c.cerrar()
+
+
+@pytest.mark.parametrize("motor", ["objetos", "vectorizado"])
+def test_reparacion_conserva_fallas_de_otros_origenes(motor):
+    c = _parque(motor)
+    ag = c.ags[3]
+    aviso = FallaElectrica("Gondola", "Deriva de temperatura de gondola")
+    ag.registrar_advertencia(aviso, "Gondola")
+    _fallar_y_reparar(c, 3)
+    assert [f for p in ag.partes for f in p.fallas_activas] == [aviso]
+    assert not ag.es_bloqueo_critico()
+    c.avanzar_ciclo_simulacion()
+    assert ag.get_estado() != "stop_critico"
+
+    # Con una falla critica del operador, la reparacion de la campana no levanta el bloqueo
+    operador = FallaMecanica("Torre", "Fisura estructural")
+    ag = c.ags[4]
+    ag.registrar_falla_externa(operador, "Torre")
+    _fallar_y_reparar(c, 4)
+    assert ag.torre.fallas_activas == [operador] and ag.contar_fallas(componente="Gondola") == 0
+    assert ag.es_bloqueo_critico()
+    c.avanzar_ciclo_simulacion()
+    assert ag.get_estado() == "stop_critico"
+    c.cerrar()
+
+
+@pytest.mark.parametrize("motor", ["objetos", "vectorizado"])
+def test_reparacion_conserva_bloqueo_del_operador_con_advertencia(motor, tmp_path):
+    # Una falla electrica (nivel Advertencia) inyectada por el operador tambien sostiene el bloqueo critico
+    c = _parque(motor)
+    ag = c.ags[5]
+    operador = FallaElectrica("Buje", "Aislamiento degradado en pitch")
+    ag.registrar_falla_externa(operador, "Buje")
+    assert not ag.tiene_fallas_criticas()
+    _fallar_y_reparar(c, 5)
+    assert ag.buje.fallas_activas == [operador] and ag.contar_fallas(componente="Gondola") == 0
+    assert ag.es_bloqueo_critico()
+    c.avanzar_ciclo_simulacion()
+    assert ag.get_estado() == "stop_critico"
+
+    # El checkpoint recuerda que falla puso el bloqueo
+    gestor = c.habilitar_checkpoints(str(tmp_path))
+    gestor.guardar()
+    gestor.esperar()
+    restaurado = SimuladorController.restaurar(str(tmp_path))
+    copia = restaurado.ags[5]
+    falla = copia.buje.fallas_activas[0]
+    assert falla.bloqueante and copia.es_bloqueo_critico()
+    restaurado.cerrar()
+
+    assert ag.reparar_falla(operador, "Buje") # Al quitar la del operador, si se levanta
+    assert not ag.es_bloqueo_critico()
+    c.cerrar()
+
+
+def test_reparacion_despues_de_mantenimiento_no_cuenta():
+    c = _parque("objetos")
+    campana = _fallar(c, 1)
+    fin = campana.proximo_evento()
+    c.ags[1].realizar_mantenimiento()
+    _avanzar_hasta(c, lambda: c.tick >= fin)
+    assert campana.reparaciones == 0
+
+
+def test_bitacora_reproduce_reparaciones(tmp_path):
+    c = _parque("vectorizado")
+    c.habilitar_bitacora(str(tmp_path), instantanea_cada=10**6)
+    aviso = FallaElectrica("Gondola", "Bajo rendimiento")
+    c.ags[0].registrar_advertencia(aviso, "Gondola")
+    c.ags[0].forzar_parada_manual()
+    _fallar_y_reparar(c, 0)
+    c.avanzar_ciclo_simulacion()
+    c.cerrar()
+
+    r = Reproductor(str(tmp_path))
+    r.ir_a(c.tick)
+    for original, reproducido in zip(c.ags, r.controller.ags):
+        assert reproducido.get_estado() == original.get_estado()
+        assert reproducido._bloqueo_manual == original._bloqueo_manual
+        assert reproducido.es_bloqueo_critico() == original.es_bloqueo_critico()
+        assert [f.mensaje for p in reproducido.partes for f in p.fallas_activas] == \
+            [f.mensaje for p in original.partes for f in p.fallas_activas]
+    r.cerrar()
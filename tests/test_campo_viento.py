@@ -0,0 +1,28 @@
+# test_campo_viento.py
+"""El campo de viento creado por el controlador es reproducible con la semilla del controlador."""
+import numpy as np
+from controlador import SimuladorController
+
+
+def _vientos(semilla, ticks: int = 30, motor: str = "vectorizado", semilla_campo=None) -> np.ndarray:
+    c = SimuladorController(motor, semilla=semilla)
+    for _ in range(8):
+        c.agregar_aerogenerador("ALTA")
+    c.habilitar_campo_viento(semilla=semilla_campo)
+    filas = []
+    for _ in range(ticks):
+        c.avanzar_ciclo_simulacion()
+        filas.append(c.arrays_parque()[2].copy())
+    c.cerrar()
+    return np.array(filas)
+
+
+def test_misma_semilla_mismo_viento():
+    np.testing.assert_array_equal(_vientos(7), _vientos(7))
+    np.testing.assert_array_equal(_vientos(7, motor="objetos"), _vientos(7, motor="objetos"))
+    assert not np.array_equal(_vientos(7), _vientos(8))
+
+
+def test_semilla_explicita_del_campo():
+    # La semilla del campo manda sobre la del controlador
+    np.testing.assert_array_equal(_vientos(7, semilla_campo=3), _vientos(8, semilla_campo=3))
@@ -0,0 +1,121 @@
+# test_checkpoint.py
+"""Guardar y restaurar checkpoints (completos e incrementales) deja el mismo parque, y la corrida sigue igual."""
+import numpy as np
+import pytest
+import checkpoint
+from alarmas import AlarmManager
+from controlador import SimuladorController
+from fallas import FallaElectrica, FallaMecanica
+
+TURBINAS = 12
+
+
+def _parque(motor: str, procesos: int = None) -> SimuladorController:
+    c = SimuladorController(motor, semilla=4, procesos=procesos)
+    while len(c.ags) < TURBINAS:
+        c.agregar_aerogenerador("BAJA" if len(c.ags) % 3 else "ALTA")
+    for ag in c.ags:
+        ag.solicitar_marcha()
+    return c
+
+
+def _incidentes(c: SimuladorController) -> None:
+    """Comandos, fallas y avisos que quedan en el estado, las fallas y la ventana de alarmas."""
+    c.ags[1].forzar_parada_manual()
+    c.ags[2].registrar_falla_externa(FallaMecanica("Torre", "Fisura estructural"), "Torre")
+    c.ags[3].registrar_advertencia(FallaElectrica("Gondola", "Deriva de temperatura"), "Gondola")
+    c.ags[4].registrar_falla_externa(FallaElectrica("Buje", "Falla del sistema de pitch"), "Buje")
+
+
+def _foto(c: SimuladorController):
+    return [(ag.id_a, ag.get_estado(), ag.potencia_actual, ag.get_timer_rearme(), ag._bloqueo_manual,
+             ag.es_bloqueo_critico(), [(type(f).__name__, f.mensaje, f.nivel_peligro, f.bloqueante)
+                                       for p in ag.partes for f in p.fallas_activas],
+             list(ag.historial_potencia), ag.historial_potencia.serie("muestra"),
+             ag.historial_potencia.serie("minuto")) for ag in c.ags]
+
+
+def _alarmas():
+    return [(e.t, e.id_ag, e.nivel, e.mensaje) for e in AlarmManager.consultar()]
+
+
+def _guardar(c: SimuladorController, directorio, completo=None) -> None:
+    gestor = c.checkpoints or c.habilitar_checkpoints(str(directorio))
+    gestor.guardar(completo)
+    gestor.esperar()
+    assert not gestor.errores
+
+
+@pytest.mark.parametrize("motor", ["objetos", "vectorizado"])
+def test_restaurado_sigue_igual_que_el_original(motor, escritura, tmp_path):
+    # Sin fuentes externas: los sensores sortean con random / el generador del parque. El modulo random
+    # es uno solo por proceso, asi que primero corre el original y despues el restaurado.
+    c = _parque(motor)
+    for _ in range(90):
+        c.avanzar_ciclo_simulacion()
+    _incidentes(c)
+    c.avanzar_ciclo_simulacion()
+    _guardar(c, tmp_path)
+    fotos = [_foto(c)]
+    for _ in range(120):
+        fotos.append((c.avanzar_ciclo_simulacion(), _foto(c)))
+    c.cerrar()
+
+    r = SimuladorController.restaurar(str(tmp_path))
+    assert _foto(r) == fotos[0]
+    for tick, (total, foto) in enumerate(fotos[1:]):
+        assert r.avanzar_ciclo_simulacion() == pytest.approx(total, abs=1e-9), tick
+        assert _foto(r) == foto, tick
+    r.cerrar()
+
+
+@pytest.mark.parametrize("motor", ["objetos", "vectorizado"])
+def test_incremental_y_alarmas(motor, escritura, tmp_path):
+    c = _parque(motor)
+    for _ in range(30):
+        c.avanzar_ciclo_simulacion()
+    _guardar(c, tmp_path)
+    _incidentes(c)
+    c.agregar_aerogenerador("ALTA") # Fila nueva despues del completo
+    for _ in range(70):
+        c.avanzar_ciclo_simulacion()
+    _guardar(c, tmp_path)
+    assert checkpoint.leer_cabecera(c.checkpoints.ultimo)["tipo"] == checkpoint.INCREMENTAL
+    alarmas = _alarmas()
+    foto = _foto(c)
+
+    AlarmManager.limpiar()
+    c.ags[5].registrar_falla_externa(FallaMecanica("Gondola", "Falla posterior"), "Gondola")
+    r = SimuladorController.restaurar(str(tmp_path))
+    assert _foto(r) == foto
+    assert _alarmas() == alarmas and alarmas
+    assert r.turbinas_con_falla() == {c.ags[i].id_a for i in (2, 3, 4)}
+    assert r.registro_fallas.bloqueadas_criticas == {c.ags[2].id_a, c.ags[4].id_a}
+    c.cerrar()
+    r.cerrar()
+
+
+def test_distribuido_completo_e_incremental(tmp_path):
+    c = _parque("distribuido", procesos=2)
+    try:
+        for _ in range(30):
+            c.avanzar_ciclo_simulacion()
+        _guardar(c, tmp_path)
+        _incidentes(c)
+        for _ in range(70):
+            c.avanzar_ciclo_simulacion()
+        _guardar(c, tmp_path, completo=False)
+        foto = _foto(c)
+        r = SimuladorController.restaurar(str(tmp_path), procesos=3) # Otro reparto, misma corrida
+        try:
+            assert r.motor == "distribuido" and r.parque.procesos == 3
+            assert _foto(r) == foto
+            for tick in range(40):
+                assert r.avanzar_ciclo_simulacion() == c.avanzar_ciclo_simulacion(), tick
+                for a, b in zip(c.arrays_parque(), r.arrays_parque()):
+                    np.testing.assert_array_equal(a, b)
+            assert _foto(r) == _foto(c)
+        finally:
+            r.cerrar()
+    finally:
+        c.cerrar()
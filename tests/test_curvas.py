@@ -0,0 +1,27 @@
+# test_curvas.py
+"""La curva tabulada mantiene la potencia nominal hasta el corte, con cualquier densidad del aire."""
+import numpy as np
+import pytest
+from curvas import CurvaPotenciaTabulada
+
+VELOCIDADES = [3, 4, 6, 8, 10, 12, 25]
+POTENCIAS = [0, 80, 400, 1100, 1900, 2500, 2500]
+
+
+@pytest.mark.parametrize("densidad", [1.1, CurvaPotenciaTabulada.DENSIDAD_REFERENCIA, 1.3])
+def test_nominal_hasta_el_corte(densidad):
+    curva = CurvaPotenciaTabulada(VELOCIDADES, POTENCIAS, densidad_aire=densidad)
+    v_max = curva._v_max
+    v = np.array([v_max - 1.0, v_max - 0.003, v_max - 1e-9, v_max])
+    assert np.allclose(curva.calcular_potencia_batch(v), 2500.0)
+    assert curva.calcular_potencia(v_max) == pytest.approx(2500.0)
+    assert curva.calcular_potencia(v_max + 0.001) == 0.0
+
+
+def test_arranque_sin_rampa_previa():
+    curva = CurvaPotenciaTabulada(VELOCIDADES, POTENCIAS, densidad_aire=1.1)
+    assert curva.calcular_potencia(curva._v_min - 0.001) == 0.0
+    assert curva.calcular_potencia(curva._v_min) == pytest.approx(0.0, abs=1.0)
+    # Entre puntos de la tabla interpola linealmente el viento equivalente
+    factor = (1.1 / CurvaPotenciaTabulada.DENSIDAD_REFERENCIA) ** (1 / 3)
+    assert curva.calcular_potencia(7 / factor) == pytest.approx(750.0, abs=1.0)
@@ -0,0 +1,66 @@
+# test_historial.py
+"""Nivel de muestras crudas con el dt de la turbina y niveles agregados solo por encima de dt."""
+import pytest
+import numpy as np
+from historial import (MUESTRAS_DEFECTO, HistorialMultiResolucion, HistorialParque, exportar_historiales,
+                       importar_historiales)
+
+
+def test_nivel_fino_guarda_un_valor_por_muestra():
+    h = HistorialMultiResolucion(dt=1.0)
+    for i in range(MUESTRAS_DEFECTO + 10):
+        h.agregar(float(i))
+    fino = h.niveles["muestra"]
+    assert fino.periodo == 1.0 and len(fino.valores) == MUESTRAS_DEFECTO
+    assert sorted(h.niveles) == ["hora", "minuto", "muestra"]
+    t, mn, me, mx = h.serie("muestra")
+    assert t[-1] == h.t_ultimo == MUESTRAS_DEFECTO + 9
+    assert t[0] == 10 and mn == me == mx == [float(i) for i in range(10, MUESTRAS_DEFECTO + 10)]
+    t, mn, _, _ = fino.serie_desde(h.t_ultimo - 4.5)
+    assert t == [h.t_ultimo - k for k in (4, 3, 2, 1, 0)] and mn == t
+
+
+def test_niveles_siguen_el_dt():
+    h = HistorialMultiResolucion(dt=600.0)
+    assert sorted(h.niveles) == ["hora", "muestra"] # El nivel de minutos no agrega nada con dt = 600 s
+    for i in range(12):
+        h.agregar(float(i))
+    assert h.serie("muestra")[0] == [600.0 * i for i in range(12)]
+    t, mn, me, mx = h.serie("hora")
+    assert t == [0.0, 3600.0] and mn == [0.0, 6.0] and me == [2.5, 8.5] and mx == [5.0, 11.0]
+
+
+def test_tiempo_explicito_repite_los_ticks_salteados():
+    h = HistorialMultiResolucion(dt=10.0)
+    h.agregar(1.0, t=1000.0)
+    h.agregar(3.0, t=1030.0)
+    assert h.serie("muestra")[:2] == ([1000.0, 1010.0, 1020.0, 1030.0], [1.0, 1.0, 1.0, 3.0])
+    with pytest.raises(ValueError):
+        h.agregar(4.0, t=1030.0)
+
+
+def test_exportar_e_importar():
+    historiales = [HistorialMultiResolucion(dt=5.0) for _ in range(3)]
+    for j, h in enumerate(historiales):
+        for i in range(50 * (j + 1)):
+            h.agregar(float(i * j))
+    copia = importar_historiales(*exportar_historiales(historiales))
+    for a, b in zip(historiales, copia):
+        assert b.dt == 5.0 and b.t_ultimo == a.t_ultimo and list(b) == list(a)
+        for nivel in a.niveles:
+            assert b.serie(nivel) == a.serie(nivel)
+
+
+def test_historial_parque_nivel_de_muestras():
+    h = HistorialParque(filas=3, capacidad=4, dt=2.0, muestras=6)
+    for k in range(10):
+        h.agregar(np.array([k, 10 * k, 100 * k], dtype=float), 3)
+    t, mn, me, mx = h.fila(1).serie("muestra")
+    assert t == [8.0, 10.0, 12.0, 14.0, 16.0, 18.0]
+    assert mn == me == mx == [40.0, 50.0, 60.0, 70.0, 80.0, 90.0]
+    assert list(h.fila(1)) == [60.0, 70.0, 80.0, 90.0] # La secuencia cruda son las ultimas 'capacidad'
+    assert h.fila(2).serie_para(10) == h.fila(2).serie("muestra")
+    assert h.fila(2).serie_para(60)[0] == [0.0] # Mas de 12 s: el nivel de minutos
+
+    h.escribir_crudo(0, [1.0, 2.0]) # Solo cambia la secuencia cruda
+    assert h.fila(0).serie("muestra")[1] == [4.0, 5.0, 0.0, 0.0, 1.0, 2.0]
@@ -0,0 +1,123 @@
+# test_kpis.py
+"""Los KPI en linea coinciden con recalcularlos a fuerza bruta sobre la corrida registrada."""
+import math
+import numpy as np
+import pytest
+from aerogenerador import AerogeneradorBase
+from controlador import SimuladorController
+from kpis import ESTADOS_DISPONIBLES, VENTANAS, VentanaDeslizante
+
+DT = 45.0 # No divide a las cubetas de 1 minuto: los ticks caen desparejos
+
+
+def _ventana_bruta(eventos, duracion: float, periodo: float):
+    """(sumas, segundos) de la ventana despues de los eventos (t, valores, dt), sin cubetas circulares."""
+    cubetas = max(1, round(duracion / periodo) - 1)
+    numeros = [math.floor((t - dt) / periodo) for t, _, dt in eventos]
+    actual = numeros[-1]
+    dentro = [e for e, numero in zip(eventos, numeros) if numero >= actual - cubetas]
+    filas = max(len(v) for _, v, _ in eventos)
+    sumas = np.zeros(filas)
+    for _, v, dt in dentro:
+        sumas[:len(v)] += v * dt
+    return sumas, sum(dt for _, _, dt in dentro)
+
+
+def test_ventana_con_huecos_mayores_que_la_ventana():
+    rng = np.random.default_rng(3)
+    ventana = VentanaDeslizante(600, 60, 4)
+    eventos, t = [], 0.0
+    for k in range(900):
+        dt = float(rng.choice([1.0, 7.0, 60.0, 150.0]))
+        t += dt + (5000.0 if k % 200 == 199 else 0.0) # Cada tanto, un salto de mas de una ventana
+        valores = rng.uniform(0, 100, 4)
+        ventana.agregar(t, valores, dt)
+        eventos.append((t, valores, dt))
+        sumas, segundos = _ventana_bruta(eventos, 600, 60)
+        np.testing.assert_allclose(ventana.sumas(4), sumas, rtol=1e-9, atol=1e-6)
+        assert ventana.segundos() == pytest.approx(segundos)
+
+
+def _corrida(ticks: int):
+    """Controlador con KPI, con comandos y altas que superan la capacidad inicial, y lo que vio cada tick."""
+    c = SimuladorController("vectorizado", semilla=11, dt=DT)
+    while len(c.ags) < 60:
+        c.agregar_aerogenerador("BAJA" if len(c.ags) % 4 else "ALTA")
+    for ag in c.ags:
+        ag.solicitar_marcha()
+    kpis = c.habilitar_kpis()
+    registro = []
+    for tick in range(ticks):
+        if tick == 100:
+            for _ in range(10):
+                c.agregar_aerogenerador("ALTA")
+                c.ags[-1].solicitar_marcha()
+        elif tick == 300:
+            c.ags[3].forzar_parada_manual()
+            c.ags[61].realizar_mantenimiento()
+        elif tick == 900:
+            c.ags[3].solicitar_marcha()
+        c.avanzar_ciclo_simulacion()
+        _, estados, _, _, potencia = c.arrays_parque()
+        registro.append((estados.copy(), potencia.copy()))
+    assert kpis.capacidad > kpis.CAPACIDAD_INICIAL
+    return c, kpis, registro
+
+
+def test_kpis_contra_fuerza_bruta():
+    c, kpis, registro = _corrida(2100) # Mas de un dia: las tres ventanas ya dieron la vuelta
+    n = len(c.ags)
+    estados = np.full((len(registro), n), -1)
+    potencia = np.zeros((len(registro), n))
+    for k, (e, p) in enumerate(registro):
+        estados[k, :len(e)] = e
+        potencia[k, :len(p)] = p
+    observados = DT * (estados >= 0).sum(axis=0)
+    por_estado = np.stack([DT * (estados == codigo).sum(axis=0) for codigo in range(len(AerogeneradorBase.ESTADOS))])
+    energia = potencia.sum(axis=0) * DT / 3600
+    nominal = c.parque.potencias_nominales()
+    disponibles = [AerogeneradorBase.ESTADOS.index(e) for e in ESTADOS_DISPONIBLES]
+    assert len(set(np.unique(estados[estados >= 0]).tolist())) >= 4 # Hubo tramos de varios estados
+
+    np.testing.assert_allclose(kpis.segundos(), observados)
+    np.testing.assert_allclose(kpis.segundos_por_estado(), por_estado)
+    np.testing.assert_allclose(kpis.energia_kwh[:n], energia)
+    np.testing.assert_allclose(kpis.disponibilidad(), por_estado[disponibles].sum(axis=0) / observados)
+    np.testing.assert_allclose(kpis.factor_capacidad(), energia / (nominal * observados / 3600))
+    eventos = [((k + 1) * DT, p, DT) for k, p in enumerate(potencia)]
+    for nombre, (duracion, periodo) in VENTANAS.items():
+        sumas, segundos = _ventana_bruta(eventos, duracion, periodo)
+        np.testing.assert_allclose(kpis.media(nombre), sumas / np.minimum(segundos, observados), atol=1e-9)
+        assert kpis.turbina(65)[f"media_{nombre}_kw"] == pytest.approx(sumas[65] / min(segundos, observados[65]))
+        # El parque es la suma de las turbinas
+        assert kpis.parque()[f"media_{nombre}_kw"] == pytest.approx(sumas.sum() / segundos)
+
+    parque = kpis.parque()
+    assert parque["energia_kwh"] == pytest.approx(energia.sum())
+    np.testing.assert_allclose(kpis.segundos_estado_parque, por_estado.sum(axis=1))
+    assert parque["disponibilidad"] == pytest.approx(por_estado[disponibles].sum() / observados.sum())
+    assert parque["factor_capacidad"] == pytest.approx(energia.sum() / (nominal * observados).sum() * 3600)
+    resumen = kpis.turbina(3)
+    assert resumen["fraccion_stop"] == pytest.approx(por_estado[AerogeneradorBase.ESTADOS.index("stop"), 3]
+                                                     / observados[3])
+    c.cerrar()
+
+
+def test_los_kpi_vuelven_con_el_checkpoint(tmp_path):
+    c, kpis, _ = _corrida(150)
+    gestor = c.habilitar_checkpoints(str(tmp_path))
+    gestor.guardar()
+    gestor.esperar()
+    c.ags[5].forzar_parada_manual()
+    gestor.guardar() # Incremental: los KPI van completos
+    gestor.esperar()
+    r = SimuladorController.restaurar(str(tmp_path))
+    assert r.kpis is not None and r.kpis.n == kpis.n
+    assert r.kpis.parque() == kpis.parque()
+    for _ in range(200):
+        c.avanzar_ciclo_simulacion()
+        r.avanzar_ciclo_simulacion()
+    assert r.kpis.parque() == pytest.approx(kpis.parque())
+    assert [r.kpis_turbina(ag.id_a) for ag in r.ags] == [pytest.approx(c.kpis_turbina(ag.id_a)) for ag in c.ags]
+    c.cerrar()
+    r.cerrar()
@@ -0,0 +1,169 @@
+# test_paridad_motores.py
+"""Los motores vectorizado y distribuido reproducen exactamente al motor por objetos con las mismas entradas."""
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+from controlador import SimuladorController
+from fallas import FallaElectrica, FallaMecanica
+from historial import MUESTRAS_PARQUE
+from sensores import FuenteSensor
+
+TURBINAS = 60
+TICKS = 400
+# marcha, parada, mantenimiento, falla electrica, falla mecanica, advertencia, nada
+PROBABILIDAD_COMANDO = (0.01, 0.004, 0.02, 0.002, 0.002, 0.004, 0.958)
+
+
+class FuenteSorteada(FuenteSensor):
+    """Viento y temperatura enteros sorteados con una semilla fija (mismo rango que los sensores)."""
+    def __init__(self, semilla: int, n: int):
+        self.rng = np.random.default_rng(semilla)
+        self.n = n
+        self.valores = {}
+
+    def avanzar(self) -> None:
+        self.valores = {"viento": self.rng.integers(0, 36, self.n).astype(float),
+                        "temp": self.rng.integers(40, 96, self.n).astype(float)}
+
+    def leer(self, canal: str, indice: int) -> float:
+        return float(self.valores[canal][indice])
+
+    def leer_lote(self, canal: str, n: int) -> np.ndarray:
+        return self.valores[canal][:n].copy()
+
+
+def _parque(motor: str, procesos: int = None) -> SimuladorController:
+    c = SimuladorController(motor, semilla=3, procesos=procesos)
+    while len(c.ags) < TURBINAS:
+        c.agregar_aerogenerador("BAJA" if len(c.ags) % 3 else "ALTA")
+    c.conectar_fuente(FuenteSorteada(11, TURBINAS))
+    return c
+
+
+def _aplicar(ag, op: int, componente: str) -> None:
+    if op == 0:
+        ag.solicitar_marcha()
+    elif op == 1:
+        ag.forzar_parada_manual()
+    elif op == 2:
+        ag.realizar_mantenimiento()
+    elif op == 3:
+        ag.registrar_falla_externa(FallaElectrica(componente, "Falla del convertidor"), componente)
+    elif op == 4:
+        ag.registrar_falla_externa(FallaMecanica(componente, "Falla de caja multiplicadora"), componente)
+    elif op == 5:
+        ag.registrar_advertencia(FallaElectrica(componente, "Deriva de temperatura"), componente)
+
+
+def _foto(c: SimuladorController):
+    return [(ag.get_estado(), ag.potencia_actual, ag.get_timer_rearme(), ag._bloqueo_manual,
+             ag.es_bloqueo_critico(), ag.contar_fallas(), list(ag.historial_potencia)) for ag in c.ags]
+
+
+def _avanzar_iguales(referencia: SimuladorController, otro: SimuladorController, semilla: int) -> None:
+    """Mismos comandos en los dos parques durante TICKS ticks; compara totales y turbinas en cada tick."""
+    for c in (referencia, otro):
+        for ag in c.ags:
+            ag.solicitar_marcha()
+    rng = np.random.default_rng(semilla)
+    componentes = ("Buje", "Gondola", "Torre")
+    for tick in range(TICKS):
+        # Comandos y fallas poco frecuentes (6: ninguno); el mantenimiento mas seguido que las fallas
+        ops = rng.choice(7, TURBINAS, p=PROBABILIDAD_COMANDO)
+        donde = rng.integers(0, 3, TURBINAS)
+        for c in (referencia, otro):
+            for i in np.flatnonzero(ops < 6).tolist():
+                _aplicar(c.ags[i], int(ops[i]), componentes[donde[i]])
+        total_referencia = referencia.avanzar_ciclo_simulacion()
+        total_otro = otro.avanzar_ciclo_simulacion()
+        assert total_otro == pytest.approx(total_referencia, abs=1e-6), tick
+        assert _foto(otro) == _foto(referencia), tick
+
+
+def test_motores_identicos_en_cada_tick():
+    objetos, vectorizado = _parque("objetos"), _parque("vectorizado")
+    _avanzar_iguales(objetos, vectorizado, 5)
+
+    estados = objetos.contar_estados()
+    assert estados == vectorizado.contar_estados()
+    assert sum(1 for k in estados.values() if k) >= 4 # La secuencia recorrio varios estados
+    for a, b in zip(objetos.ags, vectorizado.ags):
+        assert a.historial_potencia.serie("minuto") == b.historial_potencia.serie("minuto")
+        # El nivel de muestras del parque es mas corto: se compara con la cola del de objetos
+        muestras = b.historial_potencia.serie("muestra")
+        assert len(muestras[0]) == min(TICKS, MUESTRAS_PARQUE)
+        assert tuple(c[-len(muestras[0]):] for c in a.historial_potencia.serie("muestra")) == muestras
+        assert b.historial_potencia.serie_para(60) == muestras
+    assert objetos.registro_fallas.por_nivel == vectorizado.registro_fallas.por_nivel
+    assert objetos.turbinas_con_falla() == vectorizado.turbinas_con_falla()
+
+
+def test_planificacion_por_eventos_con_fuente_externa():
+    """Con lecturas externas, la planificacion por eventos reproduce la evaluacion completa."""
+    completa, eventos = _parque("objetos"), _parque("objetos")
+    eventos.habilitar_planificacion_eventos()
+    _avanzar_iguales(completa, eventos, 8)
+
+
+def test_motor_distribuido_identico_al_vectorizado():
+    """Dos shards (filas pares e impares) con la misma semilla y lecturas externas."""
+    vectorizado, distribuido = _parque("vectorizado"), _parque("distribuido", procesos=2)
+    try:
+        _avanzar_iguales(vectorizado, distribuido, 13)
+        assert distribuido.contar_estados() == vectorizado.contar_estados()
+        assert distribuido.registro_fallas.por_nivel == vectorizado.registro_fallas.por_nivel
+        for a, b in zip(vectorizado.ags, distribuido.ags):
+            assert b.historial_potencia.serie("minuto") == a.historial_potencia.serie("minuto")
+            assert b.historial_potencia.serie("muestra") == a.historial_potencia.serie("muestra")
+    finally:
+        distribuido.cerrar()
+        vectorizado.cerrar()
+
+
+def test_cerrar_distribuido_no_deja_procesos_ni_memoria():
+    c = _parque("distribuido", procesos=2)
+    c.avanzar_ciclo_simulacion()
+    procesos = list(c.parque._trabajadores)
+    nombres = [bloque.name for bloque in c.parque._bloques.values()]
+    assert procesos and all(p.is_alive() for p in procesos)
+    c.cerrar()
+    assert not any(p.is_alive() for p in procesos)
+    assert not [p for p in mp.active_children() if p in procesos]
+    for nombre in nombres:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=nombre)
+    c.cerrar() # Cerrar dos veces no falla
+
+
+def _corrida_distribuida(procesos: int):
+    """Sensores aleatorios del motor y un parque que crece dos veces (se vuelven a repartir los bloques,
+    con filas que cambian de shard y bloques aleatorios partidos entre shards)."""
+    c = SimuladorController("distribuido", semilla=21, procesos=procesos)
+    ticks = []
+    try:
+        for tick in range(60):
+            if tick in (0, 20, 40):
+                inicio = len(c.ags)
+                for _ in range(2200):
+                    c.agregar_aerogenerador("BAJA" if len(c.ags) % 3 else "ALTA")
+                for ag in c.ags[inicio:]:
+                    ag.solicitar_marcha()
+            c.avanzar_ciclo_simulacion()
+            ticks.append(np.stack([np.array(a, dtype=float) for a in c.arrays_parque()] +
+                                  [c.parque.timer_rearme[:c.parque.n].astype(float)]))
+        historiales = [(c.ags[i].historial_potencia.serie("muestra"), c.ags[i].historial_potencia.serie("minuto"))
+                       for i in (0, 1, 2199, 2200, 3299, 3300, 4095, 4096, 4400, 6599)]
+    finally:
+        c.cerrar()
+    return ticks, historiales
+
+
+def test_distribuido_no_depende_de_la_cantidad_de_procesos():
+    ticks, historiales = _corrida_distribuida(1)
+    assert len(np.unique(ticks[-1][2])) > 10 # Viento sorteado, no constante
+    for procesos in (2, 3):
+        otros, otros_historiales = _corrida_distribuida(procesos)
+        for tick, (a, b) in enumerate(zip(ticks, otros)):
+            np.testing.assert_array_equal(a, b, err_msg=f"procesos={procesos}, tick={tick}")
+        assert otros_historiales == historiales
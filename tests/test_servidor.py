@@ -0,0 +1,117 @@
+# test_servidor.py
+"""Suscripciones filtradas por diferencias y tramas mal formadas (cierran solo la conexion que las envio)."""
+import asyncio
+import socket
+import numpy as np
+import pytest
+from controlador import SimuladorController
+from parque_vectorizado import CODIGOS_ESTADO
+from servidor import (COMANDO, PARADA, SUSCRIBIR, ClienteTelemetria, ServidorTelemetria, _CABECERA, _COMANDO,
+                      _SUSCRIBIR, _trama, decodificar_delta)
+
+TRAMAS_INVALIDAS = {
+    "largo_cero": _CABECERA.pack(0, SUSCRIBIR),
+    "largo_excesivo": _CABECERA.pack(ServidorTelemetria.MAX_TRAMA + 1, SUSCRIBIR),
+    "suscribir_corta": _trama(SUSCRIBIR, b"\x0f"),
+    "suscribir_sin_ids": _trama(SUSCRIBIR, _SUSCRIBIR.pack(15, 1000)),
+    "comando_corto": _trama(COMANDO, b"\x01\x00"),
+}
+
+
+class ClienteRegistrado(ClienteTelemetria):
+    """Guarda cada trama DELTA decodificada junto con el espejo previo a aplicarla."""
+    def __init__(self):
+        super().__init__()
+        self.tramas = []
+
+    def _aplicar(self, cuerpo: bytes) -> None:
+        anterior = {id_a: dict(valores) for id_a, valores in self.estado.items()}
+        self.tramas.append((decodificar_delta(bytes(cuerpo)), anterior))
+        super()._aplicar(cuerpo)
+
+
+async def _con_servidor(prueba, turbinas: int = 3):
+    errores = [] # Excepciones que escapan de los manejadores de conexion
+    asyncio.get_running_loop().set_exception_handler(lambda loop, contexto: errores.append(contexto))
+    c = SimuladorController("vectorizado", semilla=1)
+    while len(c.ags) < turbinas:
+        c.ags[c.agregar_aerogenerador("ALTA") - 1].solicitar_marcha()
+    servidor = ServidorTelemetria(c)
+    host, puerto = await servidor.iniciar()
+    try:
+        await prueba(servidor, host, puerto)
+    finally:
+        await servidor.cerrar()
+    assert errores == []
+
+
+def test_suscripcion_filtrada_converge_al_controlador():
+    ids = [2, 5, 7, 11]
+    async def prueba(servidor, host, puerto):
+        c = servidor.controller
+        cliente = ClienteRegistrado()
+        await cliente.conectar(host, puerto)
+        await cliente.suscribir(ids, ("estado", "potencia"))
+        for tick in range(40):
+            if tick == 20:
+                assert await asyncio.wait_for(cliente.comando(PARADA, 5), 2) == (True, "OK")
+            c.avanzar_ciclo_simulacion()
+            servidor.publicar()
+            await asyncio.wait_for(cliente.esperar_version(servidor.instantanea.version), 2)
+
+            for id_a in ids: # El espejo coincide con el controlador despues de cada tick
+                ag = c.buscar(id_a)
+                assert cliente.estado[id_a] == {"estado": CODIGOS_ESTADO[ag.get_estado()],
+                                                "potencia": float(np.float32(ag.potencia_actual))}
+        assert cliente.estado[5]["estado"] == CODIGOS_ESTADO["stop"]
+        assert sorted(cliente.estado) == ids
+
+        primera = True
+        for (_, _, datos), anterior in cliente.tramas:
+            assert set(datos) == {"estado", "potencia"} # Nunca llegan campos no pedidos
+            for campo, (recibidos, valores) in datos.items():
+                assert set(recibidos.tolist()) <= set(ids) # ... ni turbinas no pedidas
+                if primera:
+                    assert sorted(recibidos.tolist()) == ids # La primera trama trae el estado completo
+                else: # Las siguientes, solo los valores que cambiaron
+                    assert all(anterior[i][campo] != v for i, v in zip(recibidos.tolist(), valores.tolist()))
+            primera = False
+        assert len(cliente.tramas) > 1
+        await cliente.cerrar()
+    asyncio.run(_con_servidor(prueba, turbinas=12))
+
+
+@pytest.mark.parametrize("trama", list(TRAMAS_INVALIDAS.values()), ids=list(TRAMAS_INVALIDAS))
+def test_trama_invalida_cierra_la_conexion(trama):
+    async def prueba(servidor, host, puerto):
+        sano = ClienteTelemetria()
+        await sano.conectar(host, puerto)
+        await sano.suscribir()
+        lector, escritor = await asyncio.open_connection(host, puerto)
+        escritor.write(trama)
+        await escritor.drain()
+        assert await asyncio.wait_for(lector.read(), 2) == b"" # El servidor cerro sin responder
+        escritor.close()
+        # Los demas clientes siguen atendidos
+        assert await asyncio.wait_for(sano.comando(PARADA, 1), 2) == (True, "OK")
+        assert servidor.cantidad_clientes() == 1
+        await sano.cerrar()
+    asyncio.run(_con_servidor(prueba))
+
+
+def test_respuestas_con_contrapresion():
+    """Un cliente que envia comandos sin leer las respuestas deja de ser leido: su buffer no crece."""
+    async def prueba(servidor, host, puerto):
+        cliente = socket.socket()
+        cliente.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        cliente.connect((host, puerto))
+        lector, escritor = await asyncio.open_connection(sock=cliente)
+        await asyncio.sleep(0.1)
+        transporte = servidor.suscriptores[0].escritor.transport # Sin buffers del kernel que absorban
+        transporte.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        for _ in range(20000):
+            escritor.write(_trama(COMANDO, _COMANDO.pack(1, 99, 1))) # Comando desconocido
+        await asyncio.sleep(0.5)
+        assert transporte.get_write_buffer_size() <= ServidorTelemetria.LIMITE_BUFFER + 1024
+        escritor.close()
+    asyncio.run(_con_servidor(prueba))
@@ -0,0 +1,34 @@
+# test_simulacion_headless.py
+"""--dt fija el paso de los historiales de todas las turbinas, no solo el del controlador."""
+import pytest
+from simulacion_headless import EjecutorHeadless, crear_controlador, main
+
+DT = 600.0
+TICKS = 30
+
+
+@pytest.mark.parametrize("motor", ["objetos", "vectorizado"])
+def test_historiales_con_dt_del_controlador(motor):
+    c = crear_controlador(6, "ALTA", motor, 1, dt=DT)
+    EjecutorHeadless(c).ejecutar(TICKS)
+    assert c.dt == DT
+    for ag in c.ags:
+        h = ag.historial_potencia
+        assert h.t_ultimo == (TICKS - 1) * DT
+        t, _, _, _ = h.serie("hora")
+        assert t == [i * 3600.0 for i in range(len(t))] and len(t) == (TICKS - 1) * DT // 3600 + 1
+    c.cerrar()
+
+
+def test_dt_invalido():
+    with pytest.raises(ValueError):
+        crear_controlador(3, "ALTA", "objetos", 1, dt=0)
+
+
+def test_restaurar_no_cambia_dt(tmp_path):
+    assert main(["--ticks", "5", "--dt", str(DT), "--sin-salida", "--semilla", "1",
+                 "--checkpoints", str(tmp_path), "--checkpoint-cada", "5"]) == 0
+    c = crear_controlador(3, "ALTA", "objetos", None, restaurar=str(tmp_path))
+    assert c.dt == DT and c.ags[0].historial_potencia.dt == DT
+    with pytest.raises(ValueError):
+        crear_controlador(3, "ALTA", "objetos", None, restaurar=str(tmp_path), dt=1.0)
@@ -0,0 +1,88 @@
+# test_telemetria.py
+"""Consultas por AG con el indice de cada segmento, orden por tiempo y cierre del almacen al cerrar el controlador."""
+import numpy as np
+import pytest
+from controlador import SimuladorController
+from telemetria import AlmacenTelemetria
+
+
+def _lotes(almacen: AlmacenTelemetria, desde: int, hasta: int, ids: np.ndarray) -> None:
+    for tick in range(desde, hasta):
+        n = len(ids)
+        almacen.agregar_lote(float(tick), ids, np.full(n, tick % 6), np.arange(n) + tick * 0.5,
+                             np.full(n, 50.0), np.arange(n) * float(tick))
+
+
+def test_consulta_por_ag_coincide_con_el_filtro(tmp_path):
+    almacen = AlmacenTelemetria(str(tmp_path), registros_por_segmento=1000)
+    ids = np.array([4, 1, 9, 7, 2], dtype=np.uint32)
+    _lotes(almacen, 0, 700, ids) # 3500 registros: 3 segmentos llenos y uno activo
+    assert len(almacen.segmentos) == 4
+    todos = almacen.consultar()
+    for id_a in (1, 9, 3):
+        for t0, t1 in ((float("-inf"), float("inf")), (150.0, 480.5), (690.0, 700.0)):
+            esperado = todos[(todos["id_a"] == id_a) & (todos["t"] >= t0) & (todos["t"] < t1)]
+            assert np.array_equal(almacen.consultar(t0, t1, id_a), esperado)
+
+    # El segmento activo sigue creciendo despues de indexarse: la cola se filtra aparte
+    _lotes(almacen, 700, 760, ids)
+    resultado = almacen.consultar(600.0, id_a=7)
+    assert resultado["t"].tolist() == [float(t) for t in range(600, 760)]
+    assert (resultado["id_a"] == 7).all()
+    almacen.compactar(hasta=500.0)
+    assert np.array_equal(almacen.consultar(id_a=2)["t"], np.arange(760, dtype=float))
+    almacen.cerrar()
+
+
+def test_cerrar_controlador_cierra_la_telemetria(tmp_path):
+    c = SimuladorController("vectorizado", semilla=1)
+    c.habilitar_telemetria(str(tmp_path), registros_por_segmento=100)
+    for _ in range(45):
+        c.avanzar_ciclo_simulacion()
+    c.cerrar()
+    assert c.telemetria is None
+    reabierto = AlmacenTelemetria(str(tmp_path))
+    assert len(reabierto) == 45 * len(c.ags)
+    assert reabierto.consultar(id_a=c.ags[1].id_a)["t"].tolist() == \
+        [c.t_inicio + tick * c.dt for tick in range(1, 46)]
+    reabierto.cerrar()
+
+
+def test_rechaza_registros_anteriores_al_ultimo(tmp_path):
+    almacen = AlmacenTelemetria(str(tmp_path), registros_por_segmento=10)
+    ids = np.array([3, 8], dtype=np.uint32)
+    _lotes(almacen, 0, 10, ids) # 2 segmentos llenos: el activo se abre con el proximo lote
+    _lotes(almacen, 9, 10, ids) # Mismo t que el ultimo: se acepta
+    with pytest.raises(ValueError):
+        _lotes(almacen, 5, 6, ids)
+    lote = almacen.consultar()[:4][::-1] # Desordenado dentro del lote
+    lote["t"] += 100.0
+    with pytest.raises(ValueError):
+        almacen.agregar_registros(lote)
+    assert len(almacen) == 22
+    assert (np.diff(almacen.consultar()["t"]) >= 0).all()
+    almacen.cerrar()
+
+
+def test_restaurado_no_reescribe_la_telemetria_original(tmp_path):
+    c = SimuladorController("vectorizado", semilla=1)
+    c.habilitar_checkpoints(str(tmp_path / "ckp"))
+    c.checkpoints.guardar()
+    c.checkpoints.esperar()
+    c.habilitar_telemetria(str(tmp_path / "tlm"))
+    for _ in range(5):
+        c.avanzar_ciclo_simulacion()
+    c.cerrar()
+    r = SimuladorController.restaurar(str(tmp_path / "ckp"))
+    with pytest.raises(ValueError):
+        r.habilitar_telemetria(str(tmp_path / "tlm"))
+    almacen = AlmacenTelemetria(str(tmp_path / "tlm")) # Aunque se abra el almacen directamente
+    with pytest.raises(ValueError):
+        almacen.agregar_lote(r.tiempo_simulado() + r.dt, *r.arrays_parque())
+    almacen.cerrar()
+    r.habilitar_telemetria(str(tmp_path / "tlm_restaurado"))
+    r.avanzar_ciclo_simulacion()
+    r.cerrar()
+    reabierto = AlmacenTelemetria(str(tmp_path / "tlm"))
+    assert len(reabierto) == 5 * len(c.ags)
+    reabierto.cerrar()
@@ -0,0 +1,98 @@
+# test_topologia.py
+"""Despacho con limites de exportacion: cuotas por alimentador, reparto de cada modo y subtotales."""
+import numpy as np
+import pytest
+from topologia import MODOS, TopologiaParque
+
+
+def _cuotas(disponible_alimentador: np.ndarray, limites: np.ndarray, limite_parque: float) -> np.ndarray:
+    """Cuota de cada alimentador calculada desde cero."""
+    cuota = np.minimum(disponible_alimentador, limites)
+    if cuota.sum() > limite_parque:
+        cuota = cuota * limite_parque / cuota.sum()
+    return cuota
+
+
+def _verificar(t: TopologiaParque, disponible: np.ndarray, entregada: np.ndarray) -> None:
+    n = t.n
+    alimentador_fila = t.alimentador_de[t.string_de[:n]]
+    disponible_alimentador = np.bincount(alimentador_fila, weights=disponible, minlength=t.alimentadores)
+    entregada_alimentador = np.bincount(alimentador_fila, weights=entregada, minlength=t.alimentadores)
+    cuota = _cuotas(disponible_alimentador, t.limite_alimentador, t.limite_parque)
+    assert (entregada >= -1e-9).all() and (entregada <= disponible + 1e-9).all()
+    np.testing.assert_allclose(entregada_alimentador, np.minimum(disponible_alimentador, cuota), rtol=1e-9, atol=1e-6)
+    # Subtotales incrementales contra la suma de las turbinas
+    np.testing.assert_allclose(t.entregada_alimentador, entregada_alimentador, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(t.disponible_alimentador, disponible_alimentador, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(t.entregada_string, np.bincount(t.string_de[:n], weights=entregada,
+                                                                minlength=t.strings), rtol=1e-9, atol=1e-6)
+    assert t.total_entregado == pytest.approx(entregada.sum(), rel=1e-9, abs=1e-6)
+    assert t.total_disponible == pytest.approx(disponible.sum(), rel=1e-9, abs=1e-6)
+
+    for a in np.flatnonzero(cuota < disponible_alimentador * (1 - 1e-9)):
+        filas = np.flatnonzero((alimentador_fila == a) & (disponible > 0))
+        d, e = disponible[filas], entregada[filas]
+        parciales = filas[(e > 1e-9) & (e < d - 1e-9)]
+        if t.modo == "proporcional": # La misma fraccion para todas
+            np.testing.assert_allclose(e / d, cuota[a] / disponible_alimentador[a], rtol=1e-9)
+        elif t.modo == "prioridad": # A lo sumo una a medias; las de mayor prioridad, a pleno
+            assert len(parciales) <= 1
+            for i in filas[e > 1e-9]:
+                mayores = filas[t.prioridad[filas] > t.prioridad[i]]
+                np.testing.assert_allclose(entregada[mayores], disponible[mayores], rtol=1e-9)
+        else: # nominal: las recortadas quedan en lambda * nominal; las que no llegan a lambda, a pleno
+            recortadas = filas[e < disponible[filas] - 1e-9]
+            lam = entregada[recortadas] / t.nominal[recortadas]
+            np.testing.assert_allclose(lam, lam[0], rtol=1e-9)
+            plenas = filas[e >= disponible[filas] - 1e-9]
+            assert (disponible[plenas] / t.nominal[plenas] <= lam[0] * (1 + 1e-9)).all()
+
+
+@pytest.mark.parametrize("modo", MODOS)
+@pytest.mark.parametrize("semilla", range(4))
+def test_despacho_aleatorio(modo, semilla):
+    rng = np.random.default_rng(semilla)
+    t = TopologiaParque(turbinas_por_string=int(rng.integers(2, 6)), strings_por_alimentador=int(rng.integers(1, 4)),
+                        modo=modo)
+    t.agregar_turbinas(rng.choice([750.0, 1500.0, 3000.0], 40))
+    disponible = rng.uniform(0, 1, t.n) * t.nominal
+    for tick in range(300):
+        if tick % 60 == 30: # Altas a mitad de la corrida (strings y alimentadores nuevos)
+            t.agregar_turbinas(rng.choice([750.0, 3000.0], int(rng.integers(1, 12))))
+            disponible = np.r_[disponible, np.zeros(t.n - len(disponible))]
+        if tick % 25 == 0:
+            t.fijar_limite_parque(None if rng.random() < 0.2 else float(rng.uniform(0.2, 1.0) * disponible.sum()))
+            for a in range(t.alimentadores):
+                t.fijar_limite_alimentador(a, None if rng.random() < 0.5 else float(rng.uniform(0, 8000)))
+        if tick % 40 == 10:
+            t.conectar_string(int(rng.integers(t.strings)), int(rng.integers(t.alimentadores + 1)))
+        if tick % 50 == 20 and modo == "prioridad":
+            t.fijar_prioridades(rng.permutation(t.n).astype(float))
+        # Cada tick cambia una parte del parque (el resto reutiliza subtotales y consignas)
+        cambian = rng.random(t.n) < 0.3
+        disponible = np.where(cambian, rng.uniform(0, 1, t.n) * t.nominal, disponible)
+        disponible[rng.random(t.n) < 0.05] = 0.0
+        entregada = t.despachar(disponible.copy())
+        _verificar(t, disponible, entregada)
+
+
+def test_recalculo_periodico_corrige_los_subtotales():
+    rng = np.random.default_rng(9)
+    t = TopologiaParque(turbinas_por_string=4, strings_por_alimentador=2)
+    t.RECALCULO_CADA = 7
+    t.agregar_turbinas(np.full(30, 1500.0))
+    t.fijar_limite_parque(20000.0)
+    for _ in range(3):
+        disponible = rng.uniform(0, 1500, t.n)
+        entregada = t.despachar(disponible)
+    # Redondeo acumulado (simulado): los subtotales se apartan de la suma de las turbinas
+    t.disponible_string += 0.5
+    t.entregada_alimentador -= 0.25
+    t.total_entregado += 1.0
+    t.total_disponible -= 1.0
+    for _ in range(t.RECALCULO_CADA - t._ticks % t.RECALCULO_CADA):
+        disponible = rng.uniform(0, 1500, t.n)
+        entregada = t.despachar(disponible)
+    assert t._ticks % t.RECALCULO_CADA == 0
+    _verificar(t, disponible, entregada)
+    np.testing.assert_allclose(t.disponible_string, np.bincount(t.string_de, weights=disponible), rtol=1e-12)
@@ -0,0 +1,272 @@
+# topologia.py
+"""Topologia electrica del parque y despacho de consignas con limite de exportacion.
+
+Las turbinas se agrupan en strings, los strings en alimentadores y los alimentadores en la subestacion.
+Los subtotales de cada nivel (potencia disponible y entregada) se actualizan con las diferencias de las
+turbinas que cambiaron, sin volver a sumar el parque.
+El despacho reparte un limite del parque y/o de cada alimentador: la subestacion asigna a cada
+alimentador una cuota (proporcional a lo que puede entregar) y dentro de cada alimentador limitado se
+calculan las consignas de las turbinas segun el modo:
+  - "proporcional": todas recortan la misma fraccion de su potencia disponible.
+  - "nominal": reparto por POTENCIA_NOMINAL (llenado: consigna = lambda * nominal, sin pasar lo disponible).
+  - "prioridad": se llena en orden de prioridad (por defecto, las de mayor POTENCIA_NOMINAL primero).
+Las consignas solo se recalculan en los alimentadores cuya potencia disponible o cuota cambio.
+"""
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+MODOS = ("proporcional", "nominal", "prioridad")
+SIN_LIMITE = np.inf
+
+
+def _agrandar(array: np.ndarray, largo: int, relleno=0) -> np.ndarray:
+    nuevo = np.full(largo, relleno, dtype=array.dtype)
+    nuevo[:len(array)] = array
+    return nuevo
+
+
+class TopologiaParque:
+    """Turbinas (fila i = controller.ags[i]) -> strings -> alimentadores -> subestacion.
+    Por defecto las turbinas llenan strings de 'turbinas_por_string' en orden de alta y los strings
+    llenan alimentadores de 'strings_por_alimentador'.
+    """
+    RECALCULO_CADA = 3600 # Ticks entre sumas completas (los subtotales incrementales no acumulan redondeo)
+
+    def __init__(self, turbinas_por_string: int = 10, strings_por_alimentador: int = 6, modo: str = "proporcional"):
+        if turbinas_por_string < 1 or strings_por_alimentador < 1:
+            raise ValueError("Los strings y alimentadores necesitan al menos un elemento.")
+        self.turbinas_por_string = turbinas_por_string
+        self.strings_por_alimentador = strings_por_alimentador
+        self.modo = modo
+        self.n = 0
+        self.nominal = np.zeros(0)
+        self.string_de = np.zeros(0, dtype=np.int64)
+        self.prioridad = np.zeros(0)          # Mayor = se despacha antes (modo "prioridad")
+        self.disponible = np.zeros(0)         # Potencia sin recorte del ultimo tick
+        self.entregada = np.zeros(0)          # Potencia despues del despacho
+        self.consigna = np.zeros(0)           # kW; SIN_LIMITE en los alimentadores sin recorte
+        self.alimentador_de = np.zeros(0, dtype=np.int64) # por string
+        self.limite_alimentador = np.zeros(0)
+        self.limite_parque = SIN_LIMITE
+        # Subtotales por nivel
+        self.disponible_string = np.zeros(0)
+        self.entregada_string = np.zeros(0)
+        self.disponible_alimentador = np.zeros(0)
+        self.entregada_alimentador = np.zeros(0)
+        self.total_disponible = 0.0
+        self.total_entregado = 0.0
+        # Despacho vigente
+        self.cuota = np.zeros(0)              # kW asignados a cada alimentador
+        self.limitado = np.zeros(0, dtype=bool)
+        self._orden_prioridad: Optional[np.ndarray] = None # Filas por (alimentador, prioridad); None = rearmar
+        self._forzar = True                   # Recalcular todo el despacho en el proximo tick
+        self._ticks = 0
+
+    @property
+    def modo(self) -> str:
+        return self._modo
+
+    @modo.setter
+    def modo(self, valor: str) -> None:
+        if valor not in MODOS:
+            raise ValueError(f"Modo de despacho desconocido: {valor}")
+        self._modo = valor
+        self._forzar = True
+
+    # --- Estructura ---
+    def agregar_turbinas(self, nominales_kw: Sequence[float], strings: Optional[Sequence[int]] = None) -> None:
+        """Alta al final; sin 'strings' se completan los strings en orden."""
+        nominales_kw = np.asarray(nominales_kw, dtype=float)
+        inicio, n = self.n, self.n + len(nominales_kw)
+        if strings is None:
+            strings = np.arange(inicio, n) // self.turbinas_por_string
+        strings = np.asarray(strings, dtype=np.int64)
+        for nombre in ("nominal", "string_de", "prioridad", "disponible", "entregada"):
+            setattr(self, nombre, _agrandar(getattr(self, nombre), n))
+        self.consigna = _agrandar(self.consigna, n, SIN_LIMITE)
+        self.nominal[inicio:n] = nominales_kw
+        self.prioridad[inicio:n] = nominales_kw
+        self.string_de[inicio:n] = strings
+        self.n = n
+        if len(strings) and strings.max() >= len(self.alimentador_de):
+            self._agregar_strings(int(strings.max()) + 1)
+        self._orden_prioridad = None
+
+    def _agregar_strings(self, cantidad: int) -> None:
+        viejos = len(self.alimentador_de)
+        self.alimentador_de = _agrandar(self.alimentador_de, cantidad)
+        self.alimentador_de[viejos:] = np.arange(viejos, cantidad) // self.strings_por_alimentador
+        self.disponible_string = _agrandar(self.disponible_string, cantidad)
+        self.entregada_string = _agrandar(self.entregada_string, cantidad)
+        self._agregar_alimentadores(int(self.alimentador_de.max()) + 1)
+
+    def _agregar_alimentadores(self, cantidad: int) -> None:
+        if cantidad <= len(self.limite_alimentador):
+            return
+        self.limite_alimentador = _agrandar(self.limite_alimentador, cantidad, SIN_LIMITE)
+        for nombre in ("disponible_alimentador", "entregada_alimentador", "cuota"):
+            setattr(self, nombre, _agrandar(getattr(self, nombre), cantidad))
+        self.limitado = _agrandar(self.limitado, cantidad, False)
+
+    def conectar_string(self, string: int, alimentador: int) -> None:
+        """Mueve un string (con sus turbinas) a otro alimentador."""
+        if string >= len(self.alimentador_de):
+            self._agregar_strings(string + 1)
+        self._agregar_alimentadores(alimentador + 1)
+        self.alimentador_de[string] = alimentador
+        self._orden_prioridad = None
+        self._recalcular()
+
+    def fijar_prioridades(self, prioridades: Sequence[float]) -> None:
+        """Prioridad de despacho de cada turbina (modo "prioridad"; mayor = primero)."""
+        self.prioridad[:self.n] = prioridades
+        self._orden_prioridad = None
+        self._forzar = True
+
+    @property
+    def strings(self) -> int:
+        return len(self.alimentador_de)
+
+    @property
+    def alimentadores(self) -> int:
+        return len(self.limite_alimentador)
+
+    # --- Limites ---
+    def fijar_limite_parque(self, kw: Optional[float]) -> None:
+        """Limite de exportacion de la subestacion (None: sin limite)."""
+        self.limite_parque = SIN_LIMITE if kw is None else float(kw)
+        self._forzar = True
+
+    def fijar_limite_alimentador(self, alimentador: int, kw: Optional[float]) -> None:
+        self._agregar_alimentadores(alimentador + 1)
+        self.limite_alimentador[alimentador] = SIN_LIMITE if kw is None else float(kw)
+        self._forzar = True
+
+    # --- Despacho ---
+    def despachar(self, disponible: np.ndarray) -> np.ndarray:
+        """Recibe la potencia sin recorte de las n turbinas y devuelve la entregada (min(disponible, consigna))."""
+        n = self.n
+        if len(disponible) != n:
+            raise ValueError(f"Topologia de {n} turbinas y un tick de {len(disponible)}.")
+        self._ticks += 1
+        if self._ticks % self.RECALCULO_CADA == 0:
+            self.disponible[:n] = disponible
+            self._recalcular()
+            cambiados = np.ones(self.alimentadores, dtype=bool)
+        else:
+            filas = np.flatnonzero(disponible != self.disponible[:n])
+            cambiados = np.zeros(self.alimentadores, dtype=bool)
+            if len(filas):
+                delta = disponible[filas] - self.disponible[filas]
+                self.disponible[filas] = disponible[filas]
+                self._sumar(filas, delta, self.disponible_string, self.disponible_alimentador)
+                self.total_disponible += float(delta.sum())
+                cambiados[self.alimentador_de[self.string_de[filas]]] = True
+
+        # Cuotas: cada alimentador hasta su limite; la subestacion reparte el suyo en proporcion
+        cuota = np.minimum(self.disponible_alimentador, self.limite_alimentador)
+        total = float(cuota.sum())
+        if total > self.limite_parque:
+            cuota *= self.limite_parque / total
+        limitado = cuota < self.disponible_alimentador * (1 - 1e-12)
+        if self._forzar: # Todos: un string movido de alimentador trae consignas del anterior
+            recalcular = np.ones(self.alimentadores, dtype=bool)
+            self._forzar = False
+        else:
+            recalcular = (cambiados | (cuota != self.cuota)) & (limitado | self.limitado)
+        self.cuota, self.limitado = cuota, limitado
+
+        if recalcular.any():
+            self._asignar(np.flatnonzero(recalcular))
+        entregada = np.minimum(self.disponible[:n], self.consigna[:n])
+        filas = np.flatnonzero(entregada != self.entregada[:n])
+        if len(filas):
+            delta = entregada[filas] - self.entregada[filas]
+            self.entregada[filas] = entregada[filas]
+            self._sumar(filas, delta, self.entregada_string, self.entregada_alimentador)
+            self.total_entregado += float(delta.sum())
+        return entregada
+
+    def _asignar(self, alimentadores: np.ndarray) -> None:
+        """Consignas de las turbinas de 'alimentadores' (los que no estan limitados quedan sin consigna)."""
+        n = self.n
+        alimentador_fila = self.alimentador_de[self.string_de[:n]]
+        sin_recorte = alimentadores[~self.limitado[alimentadores]]
+        if len(sin_recorte):
+            self.consigna[:n][np.isin(alimentador_fila, sin_recorte)] = SIN_LIMITE
+        limitados = alimentadores[self.limitado[alimentadores]]
+        if not len(limitados):
+            return
+        en_grupo = np.zeros(self.alimentadores, dtype=bool)
+        en_grupo[limitados] = True
+        disponible = self.disponible[:n]
+
+        if self.modo == "proporcional":
+            filas = np.flatnonzero(en_grupo[alimentador_fila])
+            f = alimentador_fila[filas]
+            fraccion = self.cuota[f] / np.maximum(self.disponible_alimentador[f], 1e-12)
+            self.consigna[filas] = disponible[filas] * fraccion
+            return
+
+        if self.modo == "prioridad":
+            if self._orden_prioridad is None:
+                self._orden_prioridad = np.lexsort((-self.prioridad[:n], alimentador_fila))
+            filas = self._orden_prioridad[en_grupo[alimentador_fila[self._orden_prioridad]]]
+        else: # nominal: orden por disponible / nominal, el punto donde cada turbina queda a pleno
+            filas = np.flatnonzero(en_grupo[alimentador_fila])
+            razon = disponible[filas] / np.maximum(self.nominal[filas], 1e-12)
+            filas = filas[np.lexsort((razon, alimentador_fila[filas]))]
+        f = alimentador_fila[filas]
+        inicio = np.flatnonzero(np.r_[True, f[1:] != f[:-1]]) # Comienzo de cada alimentador en 'filas'
+        grupo = np.repeat(np.arange(len(inicio)), np.diff(np.r_[inicio, len(filas)]))
+        cuota = self.cuota[f]
+        acumulado = np.cumsum(disponible[filas])
+        antes = acumulado - disponible[filas]
+        antes -= antes[inicio][grupo] # Disponible de las anteriores del mismo alimentador
+
+        if self.modo == "prioridad":
+            self.consigna[filas] = np.clip(cuota - antes, 0.0, disponible[filas])
+            return
+
+        # Llenado: con lambda en la razon de la fila k, las anteriores estan a pleno (suman 'antes') y
+        # las siguientes entregan lambda * nominal. Se busca la primera fila donde se alcanza la cuota.
+        nominal = self.nominal[filas]
+        nominal_acum = np.cumsum(nominal)
+        nominal_restante = nominal_acum[np.r_[inicio[1:], len(filas)] - 1][grupo] - (nominal_acum - nominal)
+        razon = disponible[filas] / np.maximum(nominal, 1e-12)
+        alcanza = antes + razon * nominal_restante >= cuota
+        # Filas por alimentador que no alcanzan (f es creciente en cada grupo): la siguiente fija lambda
+        primera = inicio + np.bincount(grupo, weights=~alcanza, minlength=len(inicio)).astype(np.int64)
+        primera = np.minimum(primera, np.r_[inicio[1:], len(filas)] - 1)
+        lam = (cuota[primera] - antes[primera]) / np.maximum(nominal_restante[primera], 1e-12)
+        self.consigna[filas] = lam[grupo] * nominal
+
+    def _sumar(self, filas: np.ndarray, delta: np.ndarray, por_string: np.ndarray, por_alimentador: np.ndarray) -> None:
+        """Suma las diferencias de 'filas' a strings y alimentadores."""
+        por_string_delta = np.bincount(self.string_de[filas], weights=delta, minlength=self.strings)
+        por_string += por_string_delta
+        por_alimentador += np.bincount(self.alimentador_de, weights=por_string_delta, minlength=self.alimentadores)
+
+    def _recalcular(self) -> None:
+        """Subtotales desde cero y despacho completo en el proximo tick."""
+        n = self.n
+        for valores, por_string, por_alimentador in (
+                (self.disponible[:n], self.disponible_string, self.disponible_alimentador),
+                (self.entregada[:n], self.entregada_string, self.entregada_alimentador)):
+            por_string[:] = np.bincount(self.string_de[:n], weights=valores, minlength=self.strings)
+            por_alimentador[:] = np.bincount(self.alimentador_de, weights=por_string, minlength=self.alimentadores)
+        self.total_disponible = float(self.disponible_alimentador.sum())
+        self.total_entregado = float(self.entregada_alimentador.sum())
+        self._forzar = True
+
+    # --- Consultas ---
+    def turbina(self, i: int) -> Dict[str, float]:
+        string = int(self.string_de[i])
+        return {"string": string, "alimentador": int(self.alimentador_de[string]),
+                "disponible_kw": float(self.disponible[i]), "consigna_kw": float(self.consigna[i]),
+                "entregada_kw": float(self.entregada[i])}
+
+    def resumen(self) -> Dict[str, float]:
+        return {"disponible_kw": self.total_disponible, "entregada_kw": self.total_entregado,
+                "recorte_kw": self.total_disponible - self.total_entregado,
+                "alimentadores_limitados": int(self.limitado.sum())}
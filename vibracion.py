@@ -0,0 +1,279 @@
+# vibracion.py
+"""Canal de vibracion de alta frecuencia en los rodamientos de buje y gondola.
+
+Cada turbina tiene un acelerometro por componente muestreado a 'frecuencia' Hz (decenas de muestras
+por tick). Las muestras van a buffers circulares preasignados de 'ventana' muestras por canal, comunes a
+todo el parque: como todos los canales se muestrean a la vez, escribir un tick es una sola asignacion
+por tramo. Despues de cada tick se calculan para todo el parque, en operaciones NumPy por lote, el RMS,
+la curtosis y la energia en bandas de frecuencia (FFT de la ventana) de cada canal. Cuando una
+caracteristica cruza su umbral se registra una FallaMecanica en el componente (con histeresis: la
+misma condicion no vuelve a disparar hasta que la caracteristica baje del umbral). Las de nivel
+"Critica" detienen la turbina; las demas quedan como advertencia.
+
+La memoria no crece con el tiempo: 2 canales x ventana muestras float32 por turbina.
+"""
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from fallas import FallaMecanica
+from sensores import SensorVibracion
+
+COMPONENTES = ("Buje", "Gondola")
+# Bandas (Hz) de la energia espectral: desbalance y giro, engranajes, impactos de rodamiento
+BANDAS_HZ: Tuple[Tuple[float, float], ...] = ((0.5, 5.0), (5.0, 12.5), (12.5, 25.0))
+
+
+class Umbral(NamedTuple):
+    """Condicion que genera una falla. 'caracteristica': rms (mm/s), curtosis o banda_<k> ((mm/s)^2)."""
+    caracteristica: str
+    valor: float
+    mensaje: str
+    nivel: str = "Critica"
+    componente: Optional[str] = None # None: buje y gondola
+
+
+UMBRALES_POR_DEFECTO: Tuple[Umbral, ...] = (
+    Umbral("rms", 4.5, "Vibracion excesiva (RMS)"),
+    Umbral("curtosis", 8.0, "Impactos en rodamiento (curtosis)"),
+    Umbral("banda_2", 0.5, "Energia de alta frecuencia en rodamiento", "Advertencia"),
+)
+HISTERESIS = 0.8 # Una condicion se rearma al bajar de HISTERESIS * umbral
+
+
+def _agrandar(array: np.ndarray, filas: int) -> np.ndarray:
+    """Copia de 'array' con 'filas' en el segundo eje (las nuevas en cero)."""
+    nuevo = np.zeros(array.shape[:1] + (filas,) + array.shape[2:], dtype=array.dtype)
+    nuevo[:, :array.shape[1]] = array
+    return nuevo
+
+
+class GeneradorVibracion:
+    """Senal sintetica (mm/s): ruido de banda ancha, tono de giro que crece con el viento y, en los
+    canales degradados, desbalance (tono mas fuerte) e impactos periodicos de rodamiento que excitan una
+    resonancia cerca de Nyquist. Se puede reemplazar por otra fuente con el mismo metodo 'muestras'."""
+    RUIDO = 0.3              # Desvio del ruido de banda ancha
+    TONO_POR_MS = 0.1        # Amplitud del tono de giro por m/s de viento (rotor generando)
+    TONO_DETENIDO = 0.02     # Idem con el rotor en rueda libre
+    GIRO_POR_MS = 0.25       # Hz del tono por m/s de viento (hasta GIRO_MAXIMO)
+    GIRO_MAXIMO = 4.0
+    INERCIA = 30.0           # Constante de tiempo (s) con la que el rotor sigue al viento
+    FACTOR_COMPONENTE = np.array([1.0, 0.6], dtype=np.float32)[:, None, None] # Buje, gondola
+    FREC_IMPACTOS = 1.3      # Hz de los impactos de una pista danada (rodamiento principal, giro lento)
+    RESONANCIA = np.array([1.0, -0.8, 0.55, -0.3, 0.1], dtype=np.float32) # Respuesta a un impacto
+
+    def __init__(self, semilla: Optional[int] = None):
+        self.rng = np.random.default_rng(semilla)
+        self.capacidad = 0
+        self.fase = np.zeros(0)                       # Fase del tono de giro por turbina
+        self.giro = np.zeros(0)                       # Viento que "ve" el rotor (filtrado por la inercia)
+        self.amplitud = np.zeros(0)                   # Amplitud del tono al final del bloque anterior
+        self.desbalance = np.zeros((2, 0), dtype=np.float32)
+        self.rodamiento = np.zeros((2, 0), dtype=np.float32) # Amplitud de los impactos (0: sano)
+
+    def redimensionar(self, filas: int) -> None:
+        for nombre in ("fase", "giro", "amplitud"):
+            nuevo = np.zeros(filas)
+            anterior = getattr(self, nombre)
+            nuevo[:len(anterior)] = anterior
+            setattr(self, nombre, nuevo)
+        self.desbalance = _agrandar(self.desbalance, filas)
+        self.rodamiento = _agrandar(self.rodamiento, filas)
+        self.capacidad = filas
+
+    def degradar(self, fila: int, componente: str, rodamiento: float = 0.0, desbalance: float = 0.0) -> None:
+        """Fija el dano de un canal: amplitud de los impactos (mm/s) y aumento relativo del tono."""
+        c = COMPONENTES.index(componente)
+        self.rodamiento[c, fila] = rodamiento
+        self.desbalance[c, fila] = desbalance
+
+    def reparar(self, fila: int) -> None:
+        self.rodamiento[:, fila] = 0.0
+        self.desbalance[:, fila] = 0.0
+
+    def muestras(self, inicio: int, m: int, fs: float, viento: np.ndarray, potencia: np.ndarray,
+                 dt: float) -> np.ndarray:
+        """(2, n, m) ultimas muestras de un tick de 'dt' segundos de las n turbinas; 'inicio' es el
+        numero global de la primera muestra."""
+        n = len(viento)
+        bloque = self.rng.standard_normal((2, n, m), dtype=np.float32)
+        bloque *= self.RUIDO
+
+        # El rotor no sigue los saltos del viento: giro y amplitud cambian sin escalones dentro del bloque
+        alfa = 1 - np.exp(-dt / self.INERCIA)
+        giro = self.giro[:n]
+        giro += alfa * (viento - giro)
+        frec = np.minimum(self.GIRO_POR_MS * giro, self.GIRO_MAXIMO)
+        objetivo = np.where(potencia > 0, self.TONO_POR_MS, self.TONO_DETENIDO) * giro
+        rampa = np.arange(1, m + 1) / m
+        cambio = alfa * (objetivo - self.amplitud[:n])
+        amplitud = self.amplitud[:n, None] + cambio[:, None] * rampa
+        self.amplitud[:n] += cambio
+        fases = self.fase[:n, None] + (2 * np.pi / fs) * frec[:, None] * np.arange(m)
+        tono = (amplitud * np.sin(fases)).astype(np.float32)
+        self.fase[:n] = (fases[:, -1] + 2 * np.pi * frec / fs) % (2 * np.pi)
+        bloque += self.FACTOR_COMPONENTE * (1 + self.desbalance[:, :n, None]) * tono
+
+        comp, filas = np.nonzero(self.rodamiento[:, :n]) # Pocos canales degradados: solo esos
+        if len(filas):
+            largo = len(self.RESONANCIA)
+            s = inicio - largo + 1 + np.arange(m + largo - 1) # Incluye la cola de impactos del bloque previo
+            golpes = np.diff(np.floor(np.concatenate([s[:1] - 1, s]) * (self.FREC_IMPACTOS / fs))) > 0
+            respuesta = np.convolve(golpes.astype(np.float32), self.RESONANCIA, mode="valid")
+            bloque[comp, filas] += self.rodamiento[comp, filas, None] * respuesta
+        return bloque
+
+
+class MonitorVibracion:
+    """Buffers circulares y caracteristicas por ventana de todo el parque (fila i = controller.ags[i]).
+    Lo alimenta el controlador despues de cada tick. No se guarda en los checkpoints."""
+    def __init__(self, controller, frecuencia: float = 50.0, ventana: int = 256,
+                 umbrales: Sequence[Umbral] = UMBRALES_POR_DEFECTO,
+                 generador: Optional[GeneradorVibracion] = None, semilla: Optional[int] = None):
+        if frecuencia <= 0 or ventana < 8:
+            raise ValueError("Frecuencia positiva y ventana de al menos 8 muestras.")
+        self.controller = controller
+        self.frecuencia = frecuencia
+        self.ventana = ventana
+        self.muestras_por_tick = max(1, round(frecuencia * controller.dt))
+        self.generador = generador if generador is not None else GeneradorVibracion(semilla)
+        self.umbrales = list(umbrales)
+        self.bandas = list(BANDAS_HZ)
+        for u in self.umbrales:
+            self._columna(u.caracteristica)
+            if u.componente is not None and u.componente not in COMPONENTES:
+                raise ValueError(f"Componente desconocido: {u.componente}")
+
+        # Hann girada a la posicion del buffer: el modulo de la FFT no cambia con la rotacion circular
+        self._hann = np.hanning(ventana).astype(np.float32)
+        frecuencias = np.fft.rfftfreq(ventana, 1 / frecuencia)
+        # Espectro -> potencia media por banda (Parseval, una cara, corregido por la ventana)
+        escala = 2.0 / (ventana * float(np.sum(self._hann.astype(float) ** 2)))
+        nyquist = frecuencia / 2
+        self._bandas = np.stack([((frecuencias >= lo) & ((frecuencias < hi) | (hi >= nyquist))
+                                  & (frecuencias <= hi)) * escala
+                                 for lo, hi in self.bandas], axis=1).astype(np.float32)
+
+        self.n = 0
+        self.capacidad = 0
+        self.pos = 0             # Proxima columna a escribir (comun a todos los canales)
+        self.total_muestras = 0  # Muestras escritas por canal desde que se habilito
+        self.buffer = np.zeros((2, 0, ventana), dtype=np.float32)
+        self.alta = np.zeros(0, dtype=np.int64) # total_muestras al dar de alta cada fila
+        self.rms = np.zeros((2, 0), dtype=np.float32)
+        self.curtosis = np.zeros((2, 0), dtype=np.float32)
+        self.energia_bandas = np.zeros((2, 0, len(self.bandas)), dtype=np.float32)
+        self._encima = np.zeros((len(self.umbrales), 2, 0), dtype=bool)
+        self.fallas_por_umbral = [0] * len(self.umbrales)
+        self.agregar_turbinas(len(controller.ags))
+
+    def _columna(self, caracteristica: str) -> Tuple[str, Optional[int]]:
+        if caracteristica in ("rms", "curtosis"):
+            return caracteristica, None
+        if caracteristica.startswith("banda_") and caracteristica[6:].isdigit() and int(caracteristica[6:]) < len(BANDAS_HZ):
+            return "energia_bandas", int(caracteristica[6:])
+        raise ValueError(f"Caracteristica desconocida: {caracteristica}")
+
+    def agregar_turbinas(self, cantidad: int) -> None:
+        """Alta de filas al final; se evaluan recien cuando llenan su primera ventana."""
+        n = self.n + cantidad
+        if n > self.capacidad:
+            capacidad = max(n, 2 * self.capacidad, 64)
+            for nombre in ("buffer", "rms", "curtosis", "energia_bandas"):
+                setattr(self, nombre, _agrandar(getattr(self, nombre), capacidad))
+            encima = np.zeros((len(self.umbrales), 2, capacidad), dtype=bool)
+            encima[..., :self.n] = self._encima[..., :self.n]
+            self._encima = encima
+            alta = np.zeros(capacidad, dtype=np.int64)
+            alta[:self.n] = self.alta[:self.n]
+            self.alta = alta
+            self.generador.redimensionar(capacidad)
+            self.capacidad = capacidad
+        self.alta[self.n:n] = self.total_muestras
+        self.n = n
+
+    def instalar(self, ag, i: int) -> None:
+        """Agrega los sensores de vibracion a buje y gondola del AG de la fila i."""
+        for parte in (ag.buje, ag.gondola):
+            sensor = SensorVibracion(parte.nombre)
+            sensor.conectar(self, i)
+            parte.agregar_sensor(sensor.canal, sensor)
+
+    # --- Ciclo ---
+    def al_avanzar(self, viento: np.ndarray, potencia: np.ndarray) -> None:
+        """Adquiere las muestras del tick, actualiza las caracteristicas y revisa los umbrales."""
+        n = len(viento)
+        if n != self.n:
+            raise ValueError(f"Vibracion de {self.n} turbinas y un tick de {n}.")
+        m = self.muestras_por_tick
+        util = min(m, self.ventana) # Con ticks largos solo importan las ultimas 'ventana' muestras
+        inicio = self.total_muestras + m - util
+        self.pos = (self.pos + m - util) % self.ventana
+        bloque = self.generador.muestras(inicio, util, self.frecuencia, viento, potencia, self.controller.dt)
+        primero = min(util, self.ventana - self.pos)
+        self.buffer[:, :n, self.pos:self.pos + primero] = bloque[..., :primero]
+        self.buffer[:, :n, :util - primero] = bloque[..., primero:]
+        self.pos = (self.pos + util) % self.ventana
+        self.total_muestras += m
+        self._calcular(n)
+        self._revisar_umbrales(n)
+
+    def _calcular(self, n: int) -> None:
+        x = self.buffer[:, :n]
+        centrada = x - x.mean(axis=-1, keepdims=True)
+        cuadrados = centrada * centrada
+        m2 = cuadrados.mean(axis=-1)
+        m4 = (cuadrados * cuadrados).mean(axis=-1)
+        self.rms[:, :n] = np.sqrt(m2)
+        self.curtosis[:, :n] = m4 / np.maximum(m2 * m2, 1e-12)
+        # La muestra mas vieja esta en self.pos: se gira la ventana de Hann para que la acompane
+        espectro = np.fft.rfft(centrada * np.roll(self._hann, self.pos), axis=-1)
+        potencia = espectro.real ** 2 + espectro.imag ** 2
+        self.energia_bandas[:, :n] = potencia @ self._bandas
+
+    def _revisar_umbrales(self, n: int) -> None:
+        completas = self.total_muestras - self.alta[:n] >= self.ventana
+        if not completas.any():
+            return
+        for k, u in enumerate(self.umbrales):
+            nombre, banda = self._columna(u.caracteristica)
+            valores = getattr(self, nombre)[:, :n] if banda is None else self.energia_bandas[:, :n, banda]
+            encima = self._encima[k, :, :n]
+            nuevas = (valores > u.valor) & ~encima & completas
+            if u.componente is not None:
+                nuevas[1 - COMPONENTES.index(u.componente)] = False
+            encima |= nuevas
+            encima &= valores >= HISTERESIS * u.valor
+            for c, fila in zip(*np.nonzero(nuevas)):
+                self._fallar(k, COMPONENTES[c], int(fila), float(valores[c, fila]))
+
+    def _fallar(self, k: int, componente: str, fila: int, valor: float) -> None:
+        u = self.umbrales[k]
+        falla = FallaMecanica(componente, f"{u.mensaje}: {u.caracteristica} = {valor:.2f}", u.nivel)
+        falla.timestamp = self.controller.tiempo_simulado()
+        ag = self.controller.ags[fila]
+        if u.nivel == "Critica":
+            ag.registrar_falla_externa(falla, componente)
+        else: # Aviso: la turbina sigue en marcha
+            ag.registrar_advertencia(falla, componente)
+        self.fallas_por_umbral[k] += 1
+
+    # --- Consultas ---
+    def leer(self, canal: str, indice: int) -> float:
+        """RMS de la ultima ventana del canal ("vibracion_buje" / "vibracion_gondola")."""
+        return float(self.rms[COMPONENTES.index(canal.split("_", 1)[1].capitalize()), indice])
+
+    def caracteristicas(self, i: int) -> Dict[str, Dict[str, float]]:
+        """Caracteristicas de la fila i por componente."""
+        resumen = {}
+        for c, componente in enumerate(COMPONENTES):
+            datos = {"rms": float(self.rms[c, i]), "curtosis": float(self.curtosis[c, i])}
+            for b, energia in enumerate(self.energia_bandas[c, i].tolist()):
+                datos[f"banda_{b}"] = energia
+            resumen[componente] = datos
+        return resumen
+
+    def resumen(self) -> Dict[str, int]:
+        """Fallas disparadas por condicion."""
+        conteo: Dict[str, int] = {}
+        for u, cantidad in zip(self.umbrales, self.fallas_por_umbral):
+            conteo[u.caracteristica] = conteo.get(u.caracteristica, 0) + cantidad
+        return conteo